@@ -0,0 +1,371 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.SensorData import SensorData
+
+class ActuationRule():
+	"""
+	Base class for a single compiled actuation rule. Each rule keeps its own
+	activation state, and only reports a command when that state changes.
+
+	Sub-classes implement _isActive(), and can check self.isActive so that rules
+	with memory (e.g. hysteresis) can hold their current state.
+
+	"""
+
+	__slots__ = ('name', 'sensorTypeID', 'actuatorTypeID', 'actuatorName', 'targetValue', 'isActive')
+
+	def __init__(self, name: str, sensorTypeID: int, actuatorTypeID: int, actuatorName: str = ConfigConst.NOT_SET, targetValue: float = None):
+		self.name           = name
+		self.sensorTypeID   = sensorTypeID
+		self.actuatorTypeID = actuatorTypeID
+		self.actuatorName   = actuatorName
+		self.targetValue    = targetValue
+		self.isActive       = False
+
+	def evaluate(self, val: float, now: float) -> ActuatorData:
+		"""
+		Evaluates the rule against the given reading.
+
+		@param val The sensor reading.
+		@param now The monotonic time of the reading, in seconds.
+		@return ActuatorData The command to issue if the rule changed state; None otherwise.
+		"""
+		isActive = self._isActive(val, now)
+
+		if isActive == self.isActive:
+			return None
+
+		self.isActive = isActive
+
+		return self._createCommand(val)
+
+	def reset(self):
+		"""
+		Clears the activation state so the rule will behave as if it had never been evaluated.
+
+		"""
+		self.isActive = False
+
+	def _createCommand(self, val: float) -> ActuatorData:
+		data = ActuatorData(typeID = self.actuatorTypeID, name = self.actuatorName)
+		data.setCommand(ConfigConst.COMMAND_ON if self.isActive else ConfigConst.COMMAND_OFF)
+		data.setValue(val if self.targetValue is None else self.targetValue)
+		data.setStateData(self.name)
+
+		return data
+
+	def _isActive(self, val: float, now: float) -> bool:
+		return False
+
+class ThresholdRule(ActuationRule):
+	"""
+	Active whenever the reading is below 'floor' or above 'ceiling'.
+	Either bound may be None, in which case it's ignored.
+
+	"""
+
+	__slots__ = ('floor', 'ceiling')
+
+	def __init__(self, name: str, sensorTypeID: int, actuatorTypeID: int, floor: float = None, ceiling: float = None, **kwargs):
+		super(ThresholdRule, self).__init__(name, sensorTypeID, actuatorTypeID, **kwargs)
+
+		self.floor   = floor
+		self.ceiling = ceiling
+
+	def _isActive(self, val: float, now: float) -> bool:
+		return (self.floor is not None and val < self.floor) or (self.ceiling is not None and val > self.ceiling)
+
+class HysteresisRule(ThresholdRule):
+	"""
+	Activates like ThresholdRule, but once active, only releases when the reading
+	has moved back inside the bounds by at least 'deadband'. This keeps an actuator
+	from toggling on every reading while the value hovers around a bound.
+
+	"""
+
+	__slots__ = ('deadband',)
+
+	def __init__(self, name: str, sensorTypeID: int, actuatorTypeID: int, floor: float = None, ceiling: float = None, deadband: float = 0.0, **kwargs):
+		super(HysteresisRule, self).__init__(name, sensorTypeID, actuatorTypeID, floor = floor, ceiling = ceiling, **kwargs)
+
+		self.deadband = abs(deadband)
+
+	def _isActive(self, val: float, now: float) -> bool:
+		if not self.isActive:
+			return super(HysteresisRule, self)._isActive(val, now)
+
+		if self.floor is not None and val < self.floor + self.deadband:
+			return True
+
+		if self.ceiling is not None and val > self.ceiling - self.deadband:
+			return True
+
+		return False
+
+class RateOfChangeRule(ActuationRule):
+	"""
+	Active whenever the absolute rate of change between two consecutive
+	readings exceeds 'maxRate' (units per second).
+
+	"""
+
+	__slots__ = ('maxRate', 'lastVal', 'lastTime')
+
+	def __init__(self, name: str, sensorTypeID: int, actuatorTypeID: int, maxRate: float = 0.0, **kwargs):
+		super(RateOfChangeRule, self).__init__(name, sensorTypeID, actuatorTypeID, **kwargs)
+
+		self.maxRate  = abs(maxRate)
+		self.lastVal  = None
+		self.lastTime = None
+
+	def reset(self):
+		super(RateOfChangeRule, self).reset()
+
+		self.lastVal  = None
+		self.lastTime = None
+
+	def _isActive(self, val: float, now: float) -> bool:
+		lastVal  = self.lastVal
+		lastTime = self.lastTime
+
+		self.lastVal  = val
+		self.lastTime = now
+
+		if lastTime is None or now <= lastTime:
+			return self.isActive
+
+		return abs(val - lastVal) / (now - lastTime) > self.maxRate
+
+class ActuationRuleEngine():
+	"""
+	Compiles threshold, hysteresis and rate-of-change rules from the configuration
+	into a dispatch table keyed by sensor type ID. Each SensorData reading is
+	checked only against the rules registered for its type ID, and config is
+	never re-read after the rules are compiled.
+
+	Rules are declared in their own 'Rule.<ruleName>' section, e.g.
+
+	[Rule.HvacTemp]
+	ruleType       = hysteresis
+	sensorTypeID   = 1013
+	actuatorTypeID = 1001
+	actuatorName   = HvacActuator
+	floor          = 18.0
+	ceiling        = 20.0
+	deadband       = 0.5
+
+	The legacy 'handleTempChangeOnDevice' / 'triggerHvacTempFloor' / 'triggerHvacTempCeiling'
+	settings in the ConstrainedDevice section are compiled into an equivalent
+	HVAC threshold rule.
+
+	"""
+
+	# the ConstrainedDevice settings compiled into the legacy HVAC rule (as stored by the config parser)
+	LEGACY_RULE_KEYS = frozenset(key.lower() for key in ( \
+		ConfigConst.HANDLE_TEMP_CHANGE_ON_DEVICE_KEY, ConfigConst.TRIGGER_HVAC_TEMP_FLOOR_KEY, ConfigConst.TRIGGER_HVAC_TEMP_CEILING_KEY))
+
+	RULE_TYPES = {
+		ConfigConst.RULE_TYPE_THRESHOLD:  ThresholdRule,
+		ConfigConst.RULE_TYPE_HYSTERESIS: HysteresisRule,
+		ConfigConst.RULE_TYPE_RATE:       RateOfChangeRule
+	}
+
+	def __init__(self, loadFromConfig: bool = True):
+		"""
+		Constructor.
+
+		@param loadFromConfig If True (the default), compile all rules found in the config.
+		"""
+		self.dispatchTable = {}
+		self.ruleCount = 0
+
+		if loadFromConfig:
+			self.compileRules(self._loadRuleDefinitionsFromConfig())
+
+	def compileRules(self, ruleDefs: list):
+		"""
+		Compiles the given rule definitions and replaces the current dispatch table.
+		Each definition is a dict using the same keys as the 'Rule.<ruleName>' config
+		sections, plus ConfigConst.NAME_PROP for the rule name. Invalid definitions
+		are logged and skipped.
+
+		@param ruleDefs The list of rule definitions to compile.
+		"""
+		table = {}
+		count = 0
+
+		for ruleDef in ruleDefs or []:
+			rule = self._compileRule(ruleDef)
+
+			if rule:
+				table.setdefault(rule.sensorTypeID, []).append(rule)
+				count += 1
+
+		# tuples are cheaper to iterate and can't be mutated after compile
+		self.dispatchTable = {typeID: tuple(rules) for typeID, rules in table.items()}
+		self.ruleCount = count
+
+		logging.info("Compiled %d actuation rules for %d sensor types.", count, len(self.dispatchTable))
+
+	def evaluate(self, data: SensorData, now: float = None) -> list:
+		"""
+		Evaluates the rules registered for the reading's type ID.
+
+		@param data The SensorData reading to evaluate.
+		@param now Optional monotonic time of the reading, in seconds. Defaults to time.monotonic().
+		@return list The ActuatorData commands for any rule that changed state (may be empty).
+		"""
+		rules = self.dispatchTable.get(data.getTypeID()) if data else None
+
+		if not rules:
+			return []
+
+		if now is None:
+			now = time.monotonic()
+
+		val = data.getValue()
+		commands = []
+
+		for rule in rules:
+			cmd = rule.evaluate(val, now)
+
+			if cmd:
+				commands.append(cmd)
+
+		return commands
+
+	def handleConfigChange(self, section: str, changedKeys: set, snapshot = None) -> bool:
+		"""
+		Config listener (see ConfigUtil.addConfigListener()). Recompiles the
+		rules if a 'Rule.<ruleName>' section or one of the legacy HVAC trigger
+		settings changed. Recompiled rules start with no activation state.
+
+		@param section The changed section.
+		@param changedKeys The changed keys in that section.
+		@param snapshot The new ConfigSnapshot (unused - rules are reloaded from ConfigUtil).
+		@return bool True if the rules were recompiled; False otherwise.
+		"""
+		if section.startswith(ConfigConst.RULE_SECTION_PREFIX) or \
+			(section == ConfigConst.CONSTRAINED_DEVICE and not self.LEGACY_RULE_KEYS.isdisjoint(changedKeys)):
+			logging.info("Actuation rule config changed in section %s. Recompiling rules.", section)
+
+			self.compileRules(self._loadRuleDefinitionsFromConfig())
+
+			return True
+
+		return False
+
+	def getRuleCount(self) -> int:
+		"""
+		Returns the number of compiled rules.
+
+		@return int
+		"""
+		return self.ruleCount
+
+	def getRules(self, typeID: int) -> tuple:
+		"""
+		Returns the compiled rules for the given sensor type ID.
+
+		@param typeID The sensor type ID.
+		@return tuple The rules (may be empty).
+		"""
+		return self.dispatchTable.get(typeID, ())
+
+	def resetRuleState(self):
+		"""
+		Clears the activation state of all compiled rules.
+
+		"""
+		for rules in self.dispatchTable.values():
+			for rule in rules:
+				rule.reset()
+
+	def _compileRule(self, ruleDef: dict) -> ActuationRule:
+		name = ruleDef.get(ConfigConst.NAME_PROP, ConfigConst.NOT_SET)
+		ruleType = str(ruleDef.get(ConfigConst.RULE_TYPE_KEY, ConfigConst.RULE_TYPE_THRESHOLD)).strip().lower()
+
+		if ruleType not in self.RULE_TYPES:
+			logging.warning("Unknown actuation rule type '%s' for rule %s. Ignoring.", ruleType, name)
+			return None
+
+		try:
+			kwargs = {
+				'actuatorName': ruleDef.get(ConfigConst.ACTUATOR_NAME_KEY, ConfigConst.NOT_SET),
+				'targetValue':  self._toFloat(ruleDef.get(ConfigConst.TARGET_VALUE_KEY))
+			}
+
+			sensorTypeID   = int(ruleDef[ConfigConst.SENSOR_TYPE_ID_KEY])
+			actuatorTypeID = int(ruleDef[ConfigConst.ACTUATOR_TYPE_ID_KEY])
+
+			if ruleType == ConfigConst.RULE_TYPE_RATE:
+				kwargs['maxRate'] = float(ruleDef[ConfigConst.MAX_RATE_KEY])
+			else:
+				kwargs['floor']   = self._toFloat(ruleDef.get(ConfigConst.FLOOR_KEY))
+				kwargs['ceiling'] = self._toFloat(ruleDef.get(ConfigConst.CEILING_KEY))
+
+				if kwargs['floor'] is None and kwargs['ceiling'] is None:
+					raise ValueError("At least one of floor or ceiling is required.")
+
+				if ruleType == ConfigConst.RULE_TYPE_HYSTERESIS:
+					kwargs['deadband'] = self._toFloat(ruleDef.get(ConfigConst.DEADBAND_KEY)) or 0.0
+
+			return self.RULE_TYPES[ruleType](name, sensorTypeID, actuatorTypeID, **kwargs)
+		except (KeyError, TypeError, ValueError) as e:
+			logging.warning("Invalid actuation rule %s: %s. Ignoring.", name, e)
+
+		return None
+
+	def _loadRuleDefinitionsFromConfig(self) -> list:
+		configUtil = ConfigUtil()
+		ruleDefs = []
+
+		if configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.HANDLE_TEMP_CHANGE_ON_DEVICE_KEY):
+			ruleDefs.append({
+				ConfigConst.NAME_PROP:            ConfigConst.HVAC_TEMP_RULE_NAME,
+				ConfigConst.RULE_TYPE_KEY:        ConfigConst.RULE_TYPE_THRESHOLD,
+				# the type ID the temperature sensor tasks actually emit
+				ConfigConst.SENSOR_TYPE_ID_KEY:   SensorData.TEMPERATURE_SENSOR_TYPE,
+				ConfigConst.ACTUATOR_TYPE_ID_KEY: ConfigConst.HVAC_ACTUATOR_TYPE,
+				ConfigConst.ACTUATOR_NAME_KEY:    ConfigConst.HVAC_ACTUATOR_NAME,
+				ConfigConst.FLOOR_KEY:   configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TRIGGER_HVAC_TEMP_FLOOR_KEY),
+				ConfigConst.CEILING_KEY: configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TRIGGER_HVAC_TEMP_CEILING_KEY)
+			})
+
+		for section in configUtil.getSectionNames(prefix = ConfigConst.RULE_SECTION_PREFIX):
+			ruleDef = {}
+
+			for key in (ConfigConst.RULE_TYPE_KEY, ConfigConst.SENSOR_TYPE_ID_KEY, ConfigConst.ACTUATOR_TYPE_ID_KEY, \
+				ConfigConst.ACTUATOR_NAME_KEY, ConfigConst.FLOOR_KEY, ConfigConst.CEILING_KEY, \
+				ConfigConst.DEADBAND_KEY, ConfigConst.MAX_RATE_KEY, ConfigConst.TARGET_VALUE_KEY):
+				if configUtil.hasProperty(section, key):
+					ruleDef[key] = configUtil.getProperty(section, key)
+
+			ruleDef[ConfigConst.NAME_PROP] = section[len(ConfigConst.RULE_SECTION_PREFIX):]
+			ruleDefs.append(ruleDef)
+
+		return ruleDefs
+
+	def _toFloat(self, val) -> float:
+		if val is None or val == '':
+			return None
+
+		return float(val)
@@ -0,0 +1,311 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class AsyncDeviceRuntime():
+	"""
+	Optional asyncio runtime for the CDA. A single event loop (on one thread)
+	replaces the per-manager scheduler threads and the ingest worker threads:
+	 - polling tasks run on the loop at a fixed rate, instead of on APScheduler
+	 - data callbacks submitted from any thread are run on the loop, in order
+	 - blocking work (device I/O, network sends) is offloaded to a small,
+	   bounded executor so it never stalls the loop
+
+	Handlers may be plain functions or coroutine functions; the latter are
+	scheduled as tasks on the loop.
+
+	Connectors with their own event loop (the CoAP client and server, and
+	the MQTT client's network I/O) can run on this one instead - see
+	getLoop(). They must then be stopped before the runtime.
+
+	The runtime is only used if runtimeMode is set to 'asyncio' in the
+	ConstrainedDevice section. Thread mode remains the default.
+
+	"""
+
+	def __init__(self, executorWorkers: int = None):
+		"""
+		Constructor.
+
+		@param executorWorkers The max number of threads used for blocking work.
+		If None, it's read from the ConstrainedDevice section of the config.
+		"""
+		if executorWorkers is None:
+			executorWorkers = ConfigUtil().getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ASYNC_EXECUTOR_WORKERS_KEY, ConfigConst.DEFAULT_ASYNC_EXECUTOR_WORKERS)
+
+		self.executorWorkers = max(1, executorWorkers)
+
+		self.loop = None
+		self.loopThread = None
+		self.executor = None
+
+		self.pollTasks = []
+		self.pollFutures = []
+
+		# tasks created for coroutine handlers (only touched on the loop thread)
+		self.handlerTasks = set()
+
+		self.lock = threading.Lock()
+		self.isRunning = False
+
+	def getLoop(self) -> asyncio.AbstractEventLoop:
+		"""
+		Returns the event loop the runtime runs on, creating it if the runtime
+		isn't started yet, so connectors can share it rather than running their
+		own. It's closed by stopRuntime().
+
+		@return AbstractEventLoop
+		"""
+		with self.lock:
+			if not self.loop or self.loop.is_closed():
+				self.loop = asyncio.new_event_loop()
+
+			return self.loop
+
+	def isRuntimeThread(self) -> bool:
+		"""
+		Checks if the caller is running on the event loop thread.
+
+		@return bool
+		"""
+		return self.loopThread is not None and threading.current_thread() is self.loopThread
+
+	def submit(self, handler, data) -> bool:
+		"""
+		Schedules handler(data) to run on the event loop. Safe to call from any
+		thread. This matches DataIngestQueue.submit(), so either can sit behind
+		DeviceDataManager.
+
+		@param handler The function (or coroutine function) to call with the data.
+		@param data The data to process.
+		@return bool True if the call was scheduled; False if the runtime isn't running.
+		"""
+		# still accepted while stopping, so results of in-flight blocking work aren't lost
+		if not self.loopThread:
+			return False
+
+		try:
+			self.loop.call_soon_threadsafe(self._runHandler, handler, data)
+
+			return True
+		except RuntimeError:
+			# loop closed underneath us during shutdown
+			return False
+
+	def runBlocking(self, func, *args):
+		"""
+		Runs func(*args) on the executor, so blocking I/O doesn't stall the loop.
+		Exceptions are logged, not raised.
+
+		@param func The blocking function to call.
+		@param args The arguments to pass to func.
+		@return Future The concurrent.futures.Future for the call, or None if not running.
+		"""
+		if not self.isRunning:
+			return None
+
+		try:
+			future = self.executor.submit(func, *args)
+			future.add_done_callback(self._logFailure)
+
+			return future
+		except RuntimeError:
+			# executor shut down underneath us during shutdown
+			return None
+
+	def schedulePolling(self, pollFunc, intervalSecs: float, isBlocking: bool = True):
+		"""
+		Calls pollFunc() every intervalSecs, at a fixed rate, for as long as the
+		runtime is running. Ticks missed because a poll overran are skipped rather
+		than run back to back.
+
+		@param pollFunc The function to call.
+		@param intervalSecs The poll interval.
+		@param isBlocking If True (the default), pollFunc is run on the executor.
+		"""
+		intervalSecs = max(0.001, intervalSecs)
+
+		with self.lock:
+			self.pollTasks.append((pollFunc, intervalSecs, isBlocking))
+
+			if self.isRunning:
+				self.pollFutures.append(self._startPolling(pollFunc, intervalSecs, isBlocking))
+
+	def setPollInterval(self, pollFunc, intervalSecs: float) -> bool:
+		"""
+		Changes the interval of a polling task scheduled with schedulePolling().
+		If the runtime is running, the task is restarted with the new interval
+		(so it polls once straight away).
+
+		@param pollFunc The function passed to schedulePolling().
+		@param intervalSecs The new poll interval.
+		@return bool True if the task was found; False otherwise.
+		"""
+		intervalSecs = max(0.001, intervalSecs)
+
+		with self.lock:
+			for index, (func, oldIntervalSecs, isBlocking) in enumerate(self.pollTasks):
+				if func == pollFunc:
+					self.pollTasks[index] = (func, intervalSecs, isBlocking)
+
+					# futures are kept in the same order as the tasks
+					if self.isRunning:
+						self.pollFutures[index].cancel()
+						self.pollFutures[index] = self._startPolling(func, intervalSecs, isBlocking)
+
+					logging.info("Poll interval changed from %s to %s seconds.", str(oldIntervalSecs), str(intervalSecs))
+
+					return True
+
+		return False
+
+	def startRuntime(self):
+		"""
+		Starts the event loop on its own thread, along with any polling tasks
+		already scheduled.
+
+		"""
+		loop = self.getLoop()
+
+		with self.lock:
+			if self.isRunning:
+				return
+
+			self.loop = loop
+			self.executor = ThreadPoolExecutor(max_workers = self.executorWorkers, thread_name_prefix = 'AsyncDeviceRuntimeIO')
+
+			started = threading.Event()
+
+			self.loopThread = threading.Thread(target = self._runLoop, args = (started,), name = 'AsyncDeviceRuntime', daemon = True)
+			self.loopThread.start()
+
+			started.wait()
+
+			self.isRunning = True
+
+			for pollFunc, intervalSecs, isBlocking in self.pollTasks:
+				self.pollFutures.append(self._startPolling(pollFunc, intervalSecs, isBlocking))
+
+		logging.info("AsyncDeviceRuntime started: pollTasks=%d, executorWorkers=%d", len(self.pollTasks), self.executorWorkers)
+
+	def drainRuntime(self):
+		"""
+		Cancels polling, runs any callbacks already submitted (including async
+		handlers) and waits for pending blocking work, but leaves the event loop
+		running, so connectors sharing it can still shut down. Callbacks are
+		still accepted until stopRuntime() is called.
+
+		"""
+		with self.lock:
+			if not self.isRunning:
+				return
+
+			self.isRunning = False
+
+		for future in self.pollFutures:
+			future.cancel()
+
+		self.pollFutures = []
+
+		self.executor.shutdown(wait = True)
+
+		# blocking work may have submitted callbacks as it finished
+		asyncio.run_coroutine_threadsafe(self._awaitPendingTasks(), self.loop).result()
+
+		logging.info("AsyncDeviceRuntime drained.")
+
+	def stopRuntime(self):
+		"""
+		Drains the runtime (see drainRuntime()) and then stops and closes the
+		event loop.
+
+		"""
+		self.drainRuntime()
+
+		with self.lock:
+			if not self.loopThread:
+				return
+
+			self.loop.call_soon_threadsafe(self.loop.stop)
+			self.loopThread.join()
+			self.loop.close()
+
+			self.loopThread = None
+
+		logging.info("AsyncDeviceRuntime stopped.")
+
+	def _runLoop(self, started: threading.Event):
+		asyncio.set_event_loop(self.loop)
+		self.loop.call_soon(started.set)
+		self.loop.run_forever()
+
+	def _runHandler(self, handler, data):
+		try:
+			if asyncio.iscoroutinefunction(handler):
+				task = self.loop.create_task(handler(data))
+				task.add_done_callback(self._logFailure)
+
+				self.handlerTasks.add(task)
+				task.add_done_callback(self.handlerTasks.discard)
+			else:
+				handler(data)
+		except Exception as e:
+			logging.warning("Failed to process data on event loop: %s", e)
+
+	async def _runPolling(self, pollFunc, intervalSecs: float, isBlocking: bool):
+		nextTime = self.loop.time()
+
+		while True:
+			try:
+				if isBlocking:
+					await self.loop.run_in_executor(self.executor, pollFunc)
+				else:
+					result = pollFunc()
+
+					if asyncio.iscoroutine(result):
+						await result
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				logging.warning("Polling task failed: %s", e)
+
+			nextTime += intervalSecs
+			now = self.loop.time()
+
+			if nextTime < now:
+				# overran - skip the missed ticks
+				nextTime += ((now - nextTime) // intervalSecs + 1) * intervalSecs
+
+			await asyncio.sleep(nextTime - now)
+
+	def _startPolling(self, pollFunc, intervalSecs: float, isBlocking: bool):
+		# must be called with self.lock held
+		return asyncio.run_coroutine_threadsafe(self._runPolling(pollFunc, intervalSecs, isBlocking), self.loop)
+
+	async def _awaitPendingTasks(self):
+		# only the runtime's own tasks - connectors sharing the loop have long-running ones
+		while self.handlerTasks:
+			await asyncio.gather(*list(self.handlerTasks), return_exceptions = True)
+
+	def _logFailure(self, future):
+		if not future.cancelled() and future.exception():
+			logging.warning("Async runtime task failed: %s", future.exception())
@@ -18,9 +18,10 @@ from time import sleep
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
-from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.cda.app.DeviceDataManager import DeviceDataManager
 
-logging.basicConfig(format = '%(asctime)s:%(name)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 
 class ConstrainedDeviceApp():
 	"""
@@ -36,7 +37,8 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("Initializing CDA...")
 		
-		# TODO: implementation here
+		# DeviceDataManager only imports the subsystems enabled in the config
+		self.dataMgr = DeviceDataManager()
 		
 		self.isStarted = False
 
@@ -52,7 +54,8 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("Starting CDA...")
 		
-		# TODO: implementation here
+		self.dataMgr.startManager()
+		self.isStarted = True
 		
 		logging.info("CDA started.")
 
@@ -63,7 +66,8 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("CDA stopping...")
 		
-		# TODO: implementation here
+		self.dataMgr.stopManager()
+		self.isStarted = False
 		
 		logging.info("CDA stopped with exit code %s.", str(code))
 		
@@ -79,17 +83,25 @@ def main():
 	argParser.add_argument('-c', '--configFile', help = 'Optional custom configuration file for the CDA.')
 
 	configFile = None
+	hasArgs = False
 
 	try:
 		args = argParser.parse_args()
 		configFile = args.configFile
-
-		logging.info('Parsed configuration file arg: %s', configFile)
+		hasArgs = True
 	except:
-		logging.info('No arguments to parse.')
+		pass
 
 	# init ConfigUtil
 	configUtil = ConfigUtil(configFile)
+
+	# init logging (level, per-module levels and async handler are all config-driven)
+	LoggingUtil().configureLogging()
+
+	if hasArgs:
+		logging.info('Parsed configuration file arg: %s', configFile)
+	else:
+		logging.info('No arguments to parse.')
 	cda = None
 
 	try:
@@ -0,0 +1,256 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+
+from collections import deque
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class DataIngestQueue():
+	"""
+	Bounded multi-producer queue, with its own pool of worker threads, that
+	decouples the threads producing data (sensor and system performance
+	schedulers, actuator and connection callbacks) from the processing done by
+	DeviceDataManager. Producers only pay the cost of an enqueue, so a slow
+	upstream publish no longer stalls sensing.
+
+	When the queue is full, the drop policy decides what happens:
+	 - dropOldest: the oldest queued item is discarded to make room
+	 - dropNewest: the new item is discarded
+	 - block: the producer waits up to the block timeout for room, and the new
+	   item is discarded if there still isn't any. A worker submitting to the
+	   full queue (e.g. the response to an actuator command fired by a rule
+	   it's running) could be waiting on itself, so it processes the item
+	   right away instead
+
+	NOTE: With more than one worker, items may be processed out of order.
+	Keep the default of one worker if ordering per resource matters (e.g. for
+	rate-of-change rules).
+
+	"""
+
+	DROP_OLDEST = 'dropOldest'
+	DROP_NEWEST = 'dropNewest'
+	BLOCK       = 'block'
+
+	def __init__(self, maxSize: int = None, workerCount: int = None, dropPolicy: str = None, blockTimeoutMillis: int = None):
+		"""
+		Constructor. Any setting not passed in is read from the ConstrainedDevice
+		section of the config.
+
+		@param maxSize The max number of queued items.
+		@param workerCount The number of worker threads.
+		@param dropPolicy One of 'dropOldest', 'dropNewest' or 'block'.
+		@param blockTimeoutMillis The max time a producer waits for room with the 'block' policy.
+		"""
+		configUtil = ConfigUtil()
+		section = ConfigConst.CONSTRAINED_DEVICE
+
+		if maxSize is None:
+			maxSize = configUtil.getInteger(section, ConfigConst.INGEST_QUEUE_MAX_SIZE_KEY, ConfigConst.DEFAULT_INGEST_QUEUE_MAX_SIZE)
+
+		if workerCount is None:
+			workerCount = configUtil.getInteger(section, ConfigConst.INGEST_WORKER_COUNT_KEY, ConfigConst.DEFAULT_INGEST_WORKER_COUNT)
+
+		if dropPolicy is None:
+			dropPolicy = configUtil.getProperty(section, ConfigConst.INGEST_DROP_POLICY_KEY, self.DROP_OLDEST)
+
+		if blockTimeoutMillis is None:
+			blockTimeoutMillis = configUtil.getInteger(section, ConfigConst.INGEST_BLOCK_TIMEOUT_MILLIS_KEY, ConfigConst.DEFAULT_INGEST_BLOCK_TIMEOUT_MILLIS)
+
+		if dropPolicy not in (self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK):
+			logging.warning("Unknown ingest queue drop policy '%s'. Using '%s'.", dropPolicy, self.DROP_OLDEST)
+			dropPolicy = self.DROP_OLDEST
+
+		self.maxSize = max(1, maxSize)
+		self.workerCount = max(1, workerCount)
+		self.dropPolicy = dropPolicy
+		self.blockTimeoutSecs = max(0, blockTimeoutMillis) / 1000.0
+
+		# each item is (handler, data, enqueueTime)
+		self.items = deque()
+
+		self.lock = threading.Lock()
+		self.notEmpty = threading.Condition(self.lock)
+		self.notFull = threading.Condition(self.lock)
+
+		self.workers = []
+		self.isRunning = False
+
+		self.enqueuedCount = 0
+		self.processedCount = 0
+		self.droppedOldestCount = 0
+		self.droppedNewestCount = 0
+		self.maxDepth = 0
+		self.totalWaitSecs = 0.0
+		self.maxWaitSecs = 0.0
+
+	def submit(self, handler, data) -> bool:
+		"""
+		Queues handler(data) to be called on one of the worker threads.
+
+		@param handler The function to call with the data.
+		@param data The data to process.
+		@return bool True if the item was queued (or processed); False if it was dropped.
+		"""
+		isInline = False
+
+		with self.lock:
+			if len(self.items) >= self.maxSize:
+				if self.dropPolicy == self.DROP_OLDEST:
+					self.items.popleft()
+					self.droppedOldestCount += 1
+				elif self.dropPolicy == self.BLOCK and threading.current_thread() in self.workers:
+					# a worker would be waiting on itself - it may be the one to make room
+					self.enqueuedCount += 1
+					isInline = True
+				elif self.dropPolicy == self.BLOCK:
+					deadline = time.monotonic() + self.blockTimeoutSecs
+
+					while len(self.items) >= self.maxSize and self.isRunning:
+						remainingSecs = deadline - time.monotonic()
+
+						if remainingSecs <= 0:
+							break
+
+						self.notFull.wait(remainingSecs)
+
+				if len(self.items) >= self.maxSize and not isInline:
+					self.droppedNewestCount += 1
+
+					return False
+
+			if not isInline:
+				self.items.append((handler, data, time.monotonic()))
+				self.enqueuedCount += 1
+
+				if len(self.items) > self.maxDepth:
+					self.maxDepth = len(self.items)
+
+				self.notEmpty.notify()
+
+		if isInline:
+			self._processItem(handler, data, time.monotonic())
+
+		return True
+
+	def getDepth(self) -> int:
+		"""
+		Returns the number of items currently queued.
+
+		@return int
+		"""
+		with self.lock:
+			return len(self.items)
+
+	def getStats(self) -> dict:
+		"""
+		Returns the queue depth, wait time and drop counters. Wait time is the time
+		an item spent queued before a worker picked it up.
+
+		@return dict
+		"""
+		with self.lock:
+			return {
+				ConfigConst.QUEUE_DEPTH_PROP:          len(self.items),
+				ConfigConst.MAX_QUEUE_DEPTH_PROP:      self.maxDepth,
+				ConfigConst.ENQUEUED_COUNT_PROP:       self.enqueuedCount,
+				ConfigConst.PROCESSED_COUNT_PROP:      self.processedCount,
+				ConfigConst.DROPPED_OLDEST_COUNT_PROP: self.droppedOldestCount,
+				ConfigConst.DROPPED_NEWEST_COUNT_PROP: self.droppedNewestCount,
+				ConfigConst.AVG_WAIT_MILLIS_PROP:      (1000.0 * self.totalWaitSecs / self.processedCount) if self.processedCount else 0.0,
+				ConfigConst.MAX_WAIT_MILLIS_PROP:      1000.0 * self.maxWaitSecs
+			}
+
+	def startQueue(self):
+		"""
+		Starts the worker threads.
+
+		"""
+		with self.lock:
+			if self.isRunning:
+				return
+
+			self.isRunning = True
+
+		for i in range(0, self.workerCount):
+			worker = threading.Thread(target = self._runWorkerLoop, name = 'DataIngestWorker-' + str(i), daemon = True)
+			worker.start()
+
+			self.workers.append(worker)
+
+		logging.info("DataIngestQueue started: maxSize=%d, workers=%d, dropPolicy=%s", self.maxSize, self.workerCount, self.dropPolicy)
+
+	def stopQueue(self, drain: bool = True):
+		"""
+		Stops the worker threads.
+
+		@param drain If True (the default), process the remaining items before stopping.
+		"""
+		with self.lock:
+			self.isRunning = False
+			self.notEmpty.notify_all()
+			self.notFull.notify_all()
+
+		for worker in self.workers:
+			worker.join()
+
+		self.workers = []
+
+		if drain:
+			while self._processNextItem(block = False):
+				pass
+
+		logging.info("DataIngestQueue stopped: %s", str(self.getStats()))
+
+	def _processNextItem(self, block: bool = True) -> bool:
+		with self.lock:
+			while not self.items:
+				if not block or not self.isRunning:
+					return False
+
+				self.notEmpty.wait()
+
+			if block and not self.isRunning:
+				# stopping - anything left is drained (or not) by stopQueue()
+				return False
+
+			handler, data, enqueueTime = self.items.popleft()
+			self.notFull.notify()
+
+		self._processItem(handler, data, enqueueTime)
+
+		return True
+
+	def _processItem(self, handler, data, enqueueTime: float):
+		waitSecs = time.monotonic() - enqueueTime
+
+		try:
+			handler(data)
+		except Exception as e:
+			logging.warning("Failed to process queued data: %s", e)
+
+		with self.lock:
+			self.processedCount += 1
+			self.totalWaitSecs += waitSecs
+
+			if waitSecs > self.maxWaitSecs:
+				self.maxWaitSecs = waitSecs
+
+	def _runWorkerLoop(self):
+		while self._processNextItem():
+			pass
@@ -10,21 +10,34 @@
 # Programming the Internet of Things project.
 # 
 
+import functools
 import logging
 
-from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
-from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from importlib import import_module
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.ActuationRuleEngine import ActuationRuleEngine
+from programmingtheiot.cda.app.DataIngestQueue import DataIngestQueue
+from programmingtheiot.cda.app.ReportByExceptionFilter import ReportByExceptionFilter
+
+from programmingtheiot.cda.connection.MessageBatcher import MessageBatcher
+from programmingtheiot.cda.connection.MessageOutbox import MessageOutbox
+from programmingtheiot.cda.connection.UpstreamTransportRouter import UpstreamTransportRouter
 
 from programmingtheiot.cda.system.ActuatorAdapterManager import ActuatorAdapterManager
-from programmingtheiot.cda.system.SensorAdapterManager import SensorAdapterManager
-from programmingtheiot.cda.system.SystemPerformanceManager import SystemPerformanceManager
 
+from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 from programmingtheiot.common.ISystemPerformanceDataListener import ISystemPerformanceDataListener
 from programmingtheiot.common.ITelemetryDataListener import ITelemetryDataListener
+from programmingtheiot.common.LatencyTracer import LatencyTracer, TraceContext
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 
 from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 
@@ -34,8 +47,105 @@ class DeviceDataManager(IDataMessageListener):
 	
 	"""
 	
+	# telemetry resources that may be batched for upstream transmission
+	BATCHED_RESOURCES = frozenset([ \
+		ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, \
+		ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE])
+	
+	# how long outbox replay waits for a message to be delivered before retrying it later
+	REPLAY_SEND_TIMEOUT_SECS = 30.0
+	
 	def __init__(self):
-		pass
+		self.configUtil = ConfigUtil()
+		
+		self.actuatorAdapterMgr = ActuatorAdapterManager()
+		self.actuatorAdapterMgr.setDataMessageListener(self)
+		
+		# rules are compiled once here - config is not re-read per reading
+		self.actuationRuleEngine = ActuationRuleEngine()
+		
+		self.dataUtil = DataUtil()
+		self.reportByExceptionFilter = ReportByExceptionFilter()
+		
+		self.mqttClient = None
+		self.coapClient = None
+		self.coapServer = None
+		
+		# CoAP resource handlers, updated with the latest data
+		self.sysPerfDataListener = None
+		self.telemetryDataListeners = {}
+		
+		# when enabled, callbacks from the managers and connections only enqueue the data,
+		# and all processing (analysis, filtering, upstream publish) runs on the queue's workers
+		self.ingestQueue = None
+		self.asyncRuntime = None
+		
+		# in asyncio mode, the connectors run on the runtime's event loop (instead of
+		# their own loop threads, and paho's network thread)
+		eventLoop = None
+		
+		runtimeMode = self.configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.RUNTIME_MODE_KEY, ConfigConst.RUNTIME_MODE_THREAD)
+		
+		if runtimeMode == ConfigConst.RUNTIME_MODE_ASYNCIO:
+			# the event loop takes the place of the ingest queue's workers
+			self.asyncRuntime = self._loadClass('programmingtheiot.cda.app.AsyncDeviceRuntime')()
+			eventLoop = self.asyncRuntime.getLoop()
+		elif self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_INGEST_QUEUE_KEY):
+			self.ingestQueue = DataIngestQueue()
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_MQTT_CLIENT_KEY):
+			self.mqttClient = self._loadClass('programmingtheiot.cda.connection.MqttClientConnector')(eventLoop = eventLoop)
+			self.mqttClient.setDataMessageListener(self)
+			
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_COAP_CLIENT_KEY):
+			self.coapClient = self._loadClass('programmingtheiot.cda.connection.CoapClientConnector')(eventLoop = eventLoop)
+			self.coapClient.setDataMessageListener(self)
+			
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_COAP_SERVER_KEY):
+			# registers its telemetry and system performance handlers as listeners
+			self.coapServer = self._loadClass('programmingtheiot.cda.connection.CoapServerAdapter')(dataMsgListener = self, eventLoop = eventLoop)
+		
+		# with both clients enabled, the router picks one of them per message (instead of sending over both)
+		self.upstreamRouter = None
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_UPSTREAM_ROUTER_KEY):
+			self.upstreamRouter = UpstreamTransportRouter()
+			
+			if self.mqttClient:
+				self.upstreamRouter.addTransport(ConfigConst.MQTT_TRANSPORT_NAME, self.mqttClient.publishMessageAsync, self.mqttClient.isConnected)
+			
+			if self.coapClient:
+				self.upstreamRouter.addTransport(ConfigConst.COAP_TRANSPORT_NAME, self._postUpstreamAsync)
+		
+		self.upstreamBatcher = None
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_UPSTREAM_BATCHING_KEY):
+			self.upstreamBatcher = MessageBatcher(flushCallback = self._handleUpstreamBatch)
+		
+		self.upstreamOutbox = None
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_OUTBOX_KEY):
+			self.upstreamOutbox = MessageOutbox()
+			
+			# replay straight away once the uplink is back, not after the retry interval
+			if self.mqttClient:
+				self.mqttClient.setConnectListener(self.upstreamOutbox.notifyConnected)
+				
+			if self.upstreamRouter:
+				self.upstreamRouter.setHealthyListener(self.upstreamOutbox.notifyConnected)
+		
+		self.sysPerfMgr = None
+		self.sensorAdapterMgr = None
+		
+		# polling tasks run on the asyncio runtime (if enabled)
+		self.pollFuncs = []
+		
+		self._initManagers()
+		
+		if self.asyncRuntime:
+			self._initAsyncPolling()
+		
+		self._initMetrics()
 		
 	def getLatestActuatorDataResponseFromCache(self, name: str = None) -> ActuatorData:
 		"""
@@ -72,7 +182,20 @@ class DeviceDataManager(IDataMessageListener):
 		@param data The incoming ActuatorData command message.
 		@return boolean
 		"""
-		pass
+		if data:
+			logging.info("Processing actuator command message: %s", str(data))
+			
+			self.actuatorCmdMsgCounter.inc()
+			
+			if self.asyncRuntime and self.asyncRuntime.isRuntimeThread():
+				# actuation is device I/O - keep it off the event loop
+				self.asyncRuntime.runBlocking(self.actuatorAdapterMgr.sendActuatorCommand, data)
+			else:
+				self.actuatorAdapterMgr.sendActuatorCommand(data)
+			
+			return True
+		
+		return False
 	
 	def handleActuatorCommandResponse(self, data: ActuatorData) -> bool:
 		"""
@@ -83,7 +206,12 @@ class DeviceDataManager(IDataMessageListener):
 		@param data The incoming ActuatorData response message.
 		@return boolean
 		"""
-		pass
+		if data:
+			self.actuatorResponseMsgCounter.inc()
+			
+			return self._dispatchData(self._processActuatorCommandResponse, data)
+		
+		return False
 	
 	def handleIncomingMessage(self, resourceEnum: ResourceNameEnum, msg: str) -> bool:
 		"""
@@ -94,7 +222,12 @@ class DeviceDataManager(IDataMessageListener):
 		@param data The incoming JSON message.
 		@return boolean
 		"""
-		pass
+		if not msg:
+			return False
+		
+		self.incomingMsgCounter.inc()
+		
+		return self._dispatchData(functools.partial(self._processIncomingMessage, resourceEnum), msg)
 	
 	def handleSensorMessage(self, data: SensorData) -> bool:
 		"""
@@ -105,7 +238,12 @@ class DeviceDataManager(IDataMessageListener):
 		@param data The incoming SensorData message.
 		@return boolean
 		"""
-		pass
+		if data:
+			self.sensorMsgCounter.inc()
+			
+			return self._dispatchData(self._processSensorMessage, data)
+		
+		return False
 	
 	def handleSystemPerformanceMessage(self, data: SystemPerformanceData) -> bool:
 		"""
@@ -116,20 +254,287 @@ class DeviceDataManager(IDataMessageListener):
 		@param data The incoming SystemPerformanceData message.
 		@return boolean
 		"""
-		pass
+		if data:
+			self.sysPerfMsgCounter.inc()
+			
+			return self._dispatchData(self._processSystemPerformanceMessage, data)
+		
+		return False
 	
 	def setSystemPerformanceDataListener(self, listener: ISystemPerformanceDataListener = None):
-		pass
+		if listener:
+			self.sysPerfDataListener = listener
 			
 	def setTelemetryDataListener(self, name: str = None, listener: ITelemetryDataListener = None):
-		pass
+		if listener:
+			self.telemetryDataListeners[name] = listener
 			
 	def startManager(self):
-		pass
+		self._startMetricsExport()
+		self._startConfigWatcher()
+		
+		if self.asyncRuntime:
+			self.asyncRuntime.startRuntime()
+		
+		if self.ingestQueue:
+			self.ingestQueue.startQueue()
+		
+		if not self.asyncRuntime:
+			# otherwise they're polled on the event loop
+			if self.sysPerfMgr:
+				self.sysPerfMgr.startManager()
+			
+			if self.sensorAdapterMgr:
+				self.sensorAdapterMgr.startManager(self.handleSensorMessage)
+		
+		if self.upstreamOutbox:
+			# anything stored before a restart is replayed once the uplink is available
+			self.upstreamOutbox.startReplay(self._replayUpstream)
+		
+		if self.upstreamBatcher:
+			self.upstreamBatcher.startBatcher()
+		
+		if self.mqttClient:
+			# actuator commands are subscribed by the connector itself (on connect)
+			self.mqttClient.connectClient()
+		
+		if self.coapServer:
+			self.coapServer.startServer()
 		
 	def stopManager(self):
-		pass
+		if self.sysPerfMgr:
+			self.sysPerfMgr.stopManager()
+		
+		if self.sensorAdapterMgr:
+			self.sensorAdapterMgr.stopManager()
+		
+		if self.asyncRuntime:
+			# the loop keeps running until the connectors sharing it are stopped
+			self.asyncRuntime.drainRuntime()
+		
+		if self.ingestQueue:
+			self.ingestQueue.stopQueue()
+		
+		if self.upstreamBatcher:
+			self.upstreamBatcher.stopBatcher()
+		
+		if self.upstreamRouter:
+			logging.info("Upstream router stats: %s", str(self.upstreamRouter.getStats()))
+		
+		if self.mqttClient:
+			self.mqttClient.disconnectClient()
+		
+		if self.coapClient:
+			self.coapClient.disconnectClient()
+		
+		if self.coapServer:
+			self.coapServer.stopServer()
+		
+		if self.asyncRuntime:
+			self.asyncRuntime.stopRuntime()
 		
+		# last, so the messages failed by the disconnects above are kept
+		if self.upstreamOutbox:
+			logging.info("Upstream outbox stats: %s", str(self.upstreamOutbox.getStats()))
+			
+			self.upstreamOutbox.close()
+		
+		logging.info("Upstream report-by-exception stats: %s", str(self.reportByExceptionFilter.getStats()))
+		
+		if LatencyTracer().isEnabled():
+			logging.info("Latency tracing stats: %s", str(LatencyTracer().getStageStats()))
+		
+		self._stopMetricsExport()
+		self._stopConfigWatcher()
+		
+	def _loadClass(self, moduleName: str):
+		"""
+		Imports the named module and returns the class of the same name.
+		Subsystems (and their third-party dependencies - paho, aiocoap,
+		psutil, apscheduler, asyncio) are only imported when the config
+		enables them, which keeps CDA startup cheap.
+		
+		@param moduleName The fully qualified module name.
+		@return The class defined in the module.
+		"""
+		return getattr(import_module(moduleName), moduleName.rsplit('.', 1)[1])
+	
+	def _initMetrics(self):
+		metricsRegistry = MetricsRegistry()
+		msgHelp = 'Messages handled by the device data manager, by type'
+		
+		self.sensorMsgCounter = metricsRegistry.counter(ConfigConst.DEVICE_MESSAGES_METRIC, msgHelp, {'type': 'sensor'})
+		self.sysPerfMsgCounter = metricsRegistry.counter(ConfigConst.DEVICE_MESSAGES_METRIC, msgHelp, {'type': 'systemPerformance'})
+		self.actuatorCmdMsgCounter = metricsRegistry.counter(ConfigConst.DEVICE_MESSAGES_METRIC, msgHelp, {'type': 'actuatorCommand'})
+		self.actuatorResponseMsgCounter = metricsRegistry.counter(ConfigConst.DEVICE_MESSAGES_METRIC, msgHelp, {'type': 'actuatorResponse'})
+		self.incomingMsgCounter = metricsRegistry.counter(ConfigConst.DEVICE_MESSAGES_METRIC, msgHelp, {'type': 'incoming'})
+		
+		self.upstreamSentCounter = metricsRegistry.counter(ConfigConst.UPSTREAM_SENT_METRIC, 'Messages (or batches) sent upstream')
+		self.upstreamFailedCounter = metricsRegistry.counter(ConfigConst.UPSTREAM_FAILED_METRIC, 'Messages (or batches) that could not be sent upstream')
+		self.upstreamStoredCounter = metricsRegistry.counter(ConfigConst.UPSTREAM_STORED_METRIC, 'Messages (or batches) stored in the outbox')
+		
+		if self.ingestQueue:
+			metricsRegistry.gauge(ConfigConst.INGEST_QUEUE_DEPTH_METRIC, 'Ingest queue depth').setFunction(self.ingestQueue.getDepth)
+		
+		if self.upstreamOutbox:
+			metricsRegistry.gauge(ConfigConst.OUTBOX_PENDING_METRIC, 'Messages waiting in the outbox').setFunction(self.upstreamOutbox.getPendingCount)
+	
+	def _startMetricsExport(self):
+		metricsRegistry = MetricsRegistry()
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_METRICS_ENDPOINT_KEY):
+			host = self.configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.METRICS_HOST_KEY, ConfigConst.DEFAULT_METRICS_HOST)
+			port = self.configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.METRICS_PORT_KEY, ConfigConst.DEFAULT_METRICS_PORT)
+			
+			try:
+				metricsRegistry.startHttpEndpoint(host, port)
+			except OSError as e:
+				logging.warning("Failed to start metrics endpoint on %s:%d: %s", host, port, e)
+		
+		exportFile = self.configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.METRICS_EXPORT_FILE_KEY)
+		
+		if exportFile:
+			metricsRegistry.startFileExport( \
+				exportFile, \
+				self.configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.METRICS_EXPORT_INTERVAL_KEY, ConfigConst.DEFAULT_METRICS_EXPORT_INTERVAL), \
+				self.configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.METRICS_EXPORT_FORMAT_KEY, ConfigConst.METRICS_FORMAT_JSON))
+	
+	def _stopMetricsExport(self):
+		metricsRegistry = MetricsRegistry()
+		metricsRegistry.stopHttpEndpoint()
+		metricsRegistry.stopFileExport()
+	
+	def _startConfigWatcher(self):
+		"""
+		If enabled, watches the config file and applies changes to the actuation
+		rules (and, in asyncio mode, the poll cycle) without a restart.
+		
+		"""
+		if not self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_CONFIG_WATCHER_KEY):
+			return
+		
+		self.configUtil.addConfigListener(self.actuationRuleEngine.handleConfigChange)
+		
+		if self.asyncRuntime:
+			self.configUtil.addConfigListener(self._handlePollCycleChange, ConfigConst.CONSTRAINED_DEVICE, [ConfigConst.POLL_CYCLES_KEY])
+		
+		self.configUtil.startConfigWatcher( \
+			self.configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.CONFIG_WATCH_INTERVAL_KEY, ConfigConst.DEFAULT_CONFIG_WATCH_INTERVAL))
+	
+	def _stopConfigWatcher(self):
+		self.configUtil.stopConfigWatcher()
+		self.configUtil.removeConfigListener(self.actuationRuleEngine.handleConfigChange)
+		self.configUtil.removeConfigListener(self._handlePollCycleChange)
+	
+	def _handlePollCycleChange(self, section: str, changedKeys: set, snapshot):
+		pollSecs = snapshot.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, ConfigConst.DEFAULT_POLL_CYCLES)
+		
+		for pollFunc in self.pollFuncs:
+			self.asyncRuntime.setPollInterval(pollFunc, pollSecs)
+	
+	def _initManagers(self):
+		"""
+		Creates the system performance and sensor adapter managers, if enabled.
+		In thread mode, each polls on its own scheduler once started.
+		
+		"""
+		pollSecs = self.configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, ConfigConst.DEFAULT_POLL_CYCLES)
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_SYSTEM_PERF_KEY):
+			self.sysPerfMgr = self._loadClass('programmingtheiot.cda.system.SystemPerformanceManager')(pollRate = pollSecs)
+			self.sysPerfMgr.setDataMessageListener(self)
+		
+		if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_SENSING_KEY):
+			# the manager defaults to emulators, so the config is always passed on
+			useEmulator = self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_EMULATOR_KEY)
+			
+			self.sensorAdapterMgr = self._loadClass('programmingtheiot.cda.system.SensorAdapterManager')(useEmulator = useEmulator, pollRate = pollSecs)
+	
+	def _initAsyncPolling(self):
+		"""
+		In asyncio mode, sensor and system performance polling run on the event
+		loop (with the reads themselves on its executor) rather than on the
+		managers' own scheduler threads.
+		
+		"""
+		pollSecs = self.configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, ConfigConst.DEFAULT_POLL_CYCLES)
+		
+		if self.sysPerfMgr:
+			self.pollFuncs.append(self.sysPerfMgr.handleTelemetry)
+		
+		if self.sensorAdapterMgr:
+			self.pollFuncs.append(self._pollSensors)
+		
+		for pollFunc in self.pollFuncs:
+			self.asyncRuntime.schedulePolling(pollFunc, pollSecs)
+	
+	def _pollSensors(self):
+		for data in self.sensorAdapterMgr.generateAllTelemetry().values():
+			if data:
+				self.handleSensorMessage(data)
+	
+	def _dispatchData(self, handler, data) -> bool:
+		"""
+		Hands the data to the asyncio runtime or the ingest queue if either is
+		enabled, so the calling (producer) thread returns immediately; otherwise
+		processes it on the calling thread.
+		
+		"""
+		if self.asyncRuntime:
+			return self.asyncRuntime.submit(handler, data)
+		
+		if self.ingestQueue:
+			return self.ingestQueue.submit(handler, data)
+		
+		handler(data)
+		
+		return True
+	
+	def _processActuatorCommandResponse(self, data: ActuatorData):
+		# actuator responses are never filtered - they're sent upstream as-is
+		jsonData = self.dataUtil.actuatorDataToJson(data)
+		self._handleUpstreamTransmission(ResourceNameEnum.CDA_ACTUATOR_RESPONSE_RESOURCE, jsonData)
+	
+	def _processIncomingMessage(self, resourceEnum: ResourceNameEnum, msg: str):
+		# inbound payloads may be batches - each message is handled separately
+		for jsonData in MessageBatcher.unbatchPayload(msg):
+			if resourceEnum == ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE:
+				self.handleActuatorCommandMessage(self.dataUtil.jsonToActuatorData(jsonData))
+			else:
+				self._handleIncomingDataAnalysis(jsonData)
+	
+	def _processSensorMessage(self, data: SensorData):
+		telemetryDataListener = self.telemetryDataListeners.get(data.getName())
+		
+		if telemetryDataListener:
+			telemetryDataListener.onSensorDataUpdate(data)
+		
+		self._handleSensorDataAnalysis(data)
+		
+		isReportable = self.reportByExceptionFilter.isReportable(data.getName(), (data.getValue(),))
+		data.markTraceStage(ConfigConst.TRACE_STAGE_ANALYZE)
+		
+		if isReportable:
+			jsonData = self.dataUtil.sensorDataToJson(data)
+			data.markTraceStage(ConfigConst.TRACE_STAGE_ENCODE)
+			
+			self._handleUpstreamTransmission(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, jsonData, data.getTraceContext())
+	
+	def _processSystemPerformanceMessage(self, data: SystemPerformanceData):
+		if self.sysPerfDataListener:
+			self.sysPerfDataListener.onSystemPerformanceDataUpdate(data)
+		
+		values = (data.getCpuUtilization(), data.getDiskUtilization(), data.getMemoryUtilization())
+		
+		isReportable = self.reportByExceptionFilter.isReportable(data.getName(), values)
+		data.markTraceStage(ConfigConst.TRACE_STAGE_ANALYZE)
+		
+		if isReportable:
+			jsonData = self.dataUtil.systemPerformanceDataToJson(data)
+			data.markTraceStage(ConfigConst.TRACE_STAGE_ENCODE)
+			
+			self._handleUpstreamTransmission(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, jsonData, data.getTraceContext())
+	
 	def _handleIncomingDataAnalysis(self, msg: str):
 		"""
 		Call this from handleIncomeMessage() to determine if there's
@@ -146,14 +551,155 @@ class DeviceDataManager(IDataMessageListener):
 		any action to take on the message. Steps to take:
 		1) Check config: Is there a rule or flag that requires immediate processing of data?
 		2) Act on data: If # 1 is true, determine what - if any - action is required, and execute.
+		
+		Rules are evaluated by the ActuationRuleEngine, which only returns a command
+		when a rule changes state, so actuators aren't sent a command for every reading.
 		"""
-		pass
+		for actuatorData in self.actuationRuleEngine.evaluate(data):
+			self.handleActuatorCommandMessage(actuatorData)
 		
-	def _handleUpstreamTransmission(self, resourceName: ResourceNameEnum, msg: str):
+	def _handleUpstreamTransmission(self, resourceName: ResourceNameEnum, msg: str, traceContext: TraceContext = None):
 		"""
 		Call this from handleActuatorCommandResponse(), handlesensorMessage(), and handleSystemPerformanceMessage()
 		to determine if the message should be sent upstream. Steps to take:
 		1) Check connection: Is there a client connection configured (and valid) to a remote MQTT or CoAP server?
 		2) Act on msg: If # 1 is true, send message upstream using one (or both) client connections.
+		
+		NOTE: Sensor and system performance messages have already passed through the
+		report-by-exception filter by the time they get here. If upstream batching is
+		enabled, they're batched; actuator responses are always sent immediately.
+		
+		If the message is traced, batching ends its trace at the 'enqueue' stage,
+		since the publish ack covers the whole batch.
 		"""
-		pass
+		if self.upstreamBatcher and resourceName in self.BATCHED_RESOURCES:
+			self.upstreamBatcher.addMessage(resourceName, msg)
+			
+			if traceContext:
+				traceContext.markStage(ConfigConst.TRACE_STAGE_ENQUEUE, isFinal = True)
+		else:
+			self._sendUpstream(resourceName, msg, traceContext)
+	
+	def _handleUpstreamBatch(self, resourceName: ResourceNameEnum, payload: str, count: int):
+		"""
+		Flush callback for the upstream MessageBatcher.
+		
+		"""
+		logging.debug("Sending upstream batch of %d messages to %s", count, resourceName.value)
+		
+		self._sendUpstream(resourceName, payload)
+	
+	def _sendUpstream(self, resourceName: ResourceNameEnum, msg: str, traceContext: TraceContext = None):
+		"""
+		Sends the message upstream. If it can't be sent and the outbox is enabled,
+		it's stored so it can be replayed once the uplink is available again.
+		
+		NOTE: This is fire-and-forget - on the asyncio runtime's loop, the send is
+		handed to its executor, so the outcome isn't known when this returns. It's
+		only reflected in the upstream sent / failed / stored counters.
+		
+		"""
+		if self.asyncRuntime and self.asyncRuntime.isRuntimeThread():
+			# network I/O - keep it off the event loop
+			if not self.asyncRuntime.runBlocking(self._sendUpstream, resourceName, msg, traceContext):
+				logging.warning("Async runtime not running. Dropping upstream message to %s.", resourceName.name)
+			
+			return
+		
+		if self._transmitUpstream(resourceName, msg, traceContext):
+			self.upstreamSentCounter.inc()
+			return
+		
+		self.upstreamFailedCounter.inc()
+		
+		if self.upstreamOutbox and self.upstreamOutbox.storeMessage(resourceName, msg):
+			self.upstreamStoredCounter.inc()
+		else:
+			logging.warning("Failed to send message upstream to %s. Dropping it.", resourceName.name)
+	
+	def _transmitUpstream(self, resourceName: ResourceNameEnum, msg: str, traceContext: TraceContext = None) -> bool:
+		"""
+		Sends the message upstream. Returns True if it was sent, or is still in
+		flight (e.g. queued in the MQTT publish pipeline); if it fails only after
+		this returns (e.g. when a disconnect fails the MQTT messages in flight),
+		it's counted as failed and stored in the outbox then.
+		
+		"""
+		future = self._transmitUpstreamAsync(resourceName, msg, traceContext)
+		
+		if future.done():
+			return bool(future.result())
+		
+		future.add_done_callback(functools.partial(self._handleAsyncSendResult, resourceName, msg))
+		
+		return True
+	
+	def _replayUpstream(self, resourceName: ResourceNameEnum, msg: str) -> bool:
+		"""
+		Outbox replay callback. Unlike _transmitUpstream(), only returns True once
+		the message was actually delivered, so the outbox never moves past a
+		message that was merely queued.
+		
+		"""
+		try:
+			return bool(self._transmitUpstreamAsync(resourceName, msg).result(timeout = self.REPLAY_SEND_TIMEOUT_SECS))
+		except FutureTimeoutError:
+			logging.warning("Timed out replaying message upstream to %s. Retrying later.", resourceName.name)
+		
+		return False
+	
+	def _transmitUpstreamAsync(self, resourceName: ResourceNameEnum, msg: str, traceContext: TraceContext = None) -> Future:
+		"""
+		Sends the message over the best healthy transport (see UpstreamTransportRouter)
+		if the router is enabled; otherwise over every enabled client. The returned
+		Future resolves with True once any of them delivered the message.
+		
+		"""
+		if traceContext:
+			traceContext.markStage(ConfigConst.TRACE_STAGE_ENQUEUE)
+		
+		if self.upstreamRouter:
+			future = self.upstreamRouter.routeMessage(resourceName, msg)
+			
+			if traceContext:
+				future.add_done_callback(functools.partial(self._handleTracedPublishResult, traceContext))
+			
+			return future
+		
+		future = None
+		isSent = False
+		
+		if self.mqttClient:
+			# with the publish pipeline, the future resolves on the broker's ack
+			future = self.mqttClient.publishMessageAsync(resource = resourceName, msg = msg)
+			
+			if traceContext:
+				future.add_done_callback(functools.partial(self._handleTracedPublishResult, traceContext))
+		
+		if self.coapClient:
+			isSent = bool(self.coapClient.sendPostRequest(resource = resourceName, payload = msg))
+		
+		if isSent or not future:
+			# already delivered over CoAP (or there's no MQTT client) - no need to wait for MQTT
+			future = Future()
+			future.set_result(isSent)
+		
+		return future
+	
+	def _handleAsyncSendResult(self, resourceName: ResourceNameEnum, msg: str, future):
+		if future.result():
+			return
+		
+		self.upstreamFailedCounter.inc()
+		
+		if self.upstreamOutbox and self.upstreamOutbox.storeMessage(resourceName, msg):
+			self.upstreamStoredCounter.inc()
+		else:
+			logging.warning("Failed to send message upstream to %s. Dropping it.", resourceName.name)
+	
+	def _postUpstreamAsync(self, resourceName: ResourceNameEnum, msg: str):
+		return self.coapClient.sendPostRequestAsync(resource = resourceName, payload = msg)
+	
+	def _handleTracedPublishResult(self, traceContext: TraceContext, future):
+		if future.result():
+			traceContext.markStage(ConfigConst.TRACE_STAGE_PUBLISH_ACK, isFinal = True)
@@ -0,0 +1,193 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class DeadbandSettings():
+	"""
+	Deadband settings for a single named resource. A value of None (or 0)
+	disables that particular check.
+
+	"""
+
+	__slots__ = ('absDeadband', 'pctDeadband', 'maxSilenceSecs')
+
+	def __init__(self, absDeadband: float = None, pctDeadband: float = None, maxSilenceSecs: float = None):
+		self.absDeadband    = absDeadband or None
+		self.pctDeadband    = (pctDeadband / 100.0) if pctDeadband else None
+		self.maxSilenceSecs = maxSilenceSecs or None
+
+	def isFilterEnabled(self) -> bool:
+		return self.absDeadband is not None or self.pctDeadband is not None
+
+class ReportByExceptionFilter():
+	"""
+	Report-by-exception stage for upstream transmission. A reading is only
+	reported if one of its values differs from the last reported value by more
+	than the configured absolute or percent deadband, or if the max silence
+	(heartbeat) interval has expired since the last report.
+
+	Default settings are read from the ConstrainedDevice section, and can be
+	overridden per resource name in a 'Deadband.<name>' section, e.g.
+
+	[Deadband.PressureSensor]
+	deadbandAbs    = 0.5
+	maxSilenceSecs = 300
+
+	If no deadband is configured for a name, every reading is reported.
+
+	"""
+
+	def __init__(self, loadFromConfig: bool = True):
+		"""
+		Constructor.
+
+		@param loadFromConfig If True (the default), load the deadband settings from the config.
+		"""
+		self.defaultSettings = DeadbandSettings()
+		self.settings = {}
+
+		# name -> (lastValues, lastSentTime)
+		self.lastReported = {}
+
+		self.sentCounts = {}
+		self.suppressedCounts = {}
+
+		self.lock = threading.Lock()
+
+		if loadFromConfig:
+			self._loadSettingsFromConfig()
+
+	def setDeadband(self, name: str = None, absDeadband: float = None, pctDeadband: float = None, maxSilenceSecs: float = None):
+		"""
+		Sets the deadband for the named resource. If name is None, sets the default
+		deadband used for all resources without their own settings.
+
+		@param name The resource name (e.g. the SensorData name).
+		@param absDeadband The absolute deadband, in the units of the reading.
+		@param pctDeadband The percent deadband, relative to the last reported value (e.g. 5.0 for 5%).
+		@param maxSilenceSecs The max number of seconds between reports, regardless of deadband.
+		"""
+		settings = DeadbandSettings(absDeadband, pctDeadband, maxSilenceSecs)
+
+		if name:
+			self.settings[name] = settings
+		else:
+			self.defaultSettings = settings
+
+	def isReportable(self, name: str, values: tuple, now: float = None) -> bool:
+		"""
+		Checks if the reading should be reported. If so, it's recorded as the
+		last reported reading for 'name'; otherwise it's counted as suppressed.
+
+		@param name The resource name.
+		@param values The tuple of numeric values to compare against the last reported values.
+		@param now Optional monotonic time of the reading, in seconds. Defaults to time.monotonic().
+		@return bool True if the reading should be sent upstream; False otherwise.
+		"""
+		settings = self.settings.get(name, self.defaultSettings)
+
+		if now is None:
+			now = time.monotonic()
+
+		with self.lock:
+			last = self.lastReported.get(name)
+
+			if not last or not settings.isFilterEnabled() or self._isOutsideDeadband(settings, last[0], values) or \
+				(settings.maxSilenceSecs and now - last[1] >= settings.maxSilenceSecs):
+				self.lastReported[name] = (values, now)
+				self.sentCounts[name] = self.sentCounts.get(name, 0) + 1
+
+				return True
+
+			self.suppressedCounts[name] = self.suppressedCounts.get(name, 0) + 1
+
+			return False
+
+	def getStats(self, name: str = None) -> dict:
+		"""
+		Returns the sent and suppressed counts, either for the given name or
+		totalled across all names.
+
+		@param name The optional resource name.
+		@return dict With ConfigConst.SENT_COUNT_PROP, ConfigConst.SUPPRESSED_COUNT_PROP
+		and ConfigConst.SUPPRESSED_PCT_PROP entries.
+		"""
+		with self.lock:
+			if name:
+				sent = self.sentCounts.get(name, 0)
+				suppressed = self.suppressedCounts.get(name, 0)
+			else:
+				sent = sum(self.sentCounts.values())
+				suppressed = sum(self.suppressedCounts.values())
+
+		total = sent + suppressed
+
+		return {
+			ConfigConst.SENT_COUNT_PROP: sent,
+			ConfigConst.SUPPRESSED_COUNT_PROP: suppressed,
+			ConfigConst.SUPPRESSED_PCT_PROP: (100.0 * suppressed / total) if total else 0.0
+		}
+
+	def reset(self, name: str = None):
+		"""
+		Clears the last reported reading (and counts) for the given name, or for
+		all names if None. The next reading will always be reported.
+
+		@param name The optional resource name.
+		"""
+		with self.lock:
+			if name:
+				self.lastReported.pop(name, None)
+				self.sentCounts.pop(name, None)
+				self.suppressedCounts.pop(name, None)
+			else:
+				self.lastReported.clear()
+				self.sentCounts.clear()
+				self.suppressedCounts.clear()
+
+	def _isOutsideDeadband(self, settings: DeadbandSettings, lastValues: tuple, values: tuple) -> bool:
+		if len(values) != len(lastValues):
+			return True
+
+		for lastVal, val in zip(lastValues, values):
+			delta = abs(val - lastVal)
+
+			if settings.absDeadband is not None and delta > settings.absDeadband:
+				return True
+
+			if settings.pctDeadband is not None and delta > settings.pctDeadband * abs(lastVal):
+				return True
+
+		return False
+
+	def _loadSettingsFromConfig(self):
+		configUtil = ConfigUtil()
+
+		self.defaultSettings = self._loadSettings(configUtil, ConfigConst.CONSTRAINED_DEVICE)
+
+		for section in configUtil.getSectionNames(prefix = ConfigConst.DEADBAND_SECTION_PREFIX):
+			self.settings[section[len(ConfigConst.DEADBAND_SECTION_PREFIX):]] = self._loadSettings(configUtil, section)
+
+		logging.info("Loaded report-by-exception settings for %d resources.", len(self.settings))
+
+	def _loadSettings(self, configUtil: ConfigUtil, section: str) -> DeadbandSettings:
+		return DeadbandSettings( \
+			absDeadband = configUtil.getFloat(section, ConfigConst.DEADBAND_ABS_KEY), \
+			pctDeadband = configUtil.getFloat(section, ConfigConst.DEADBAND_PCT_KEY), \
+			maxSilenceSecs = configUtil.getFloat(section, ConfigConst.MAX_SILENCE_SECS_KEY))
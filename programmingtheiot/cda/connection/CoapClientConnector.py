@@ -10,50 +10,741 @@
 # Programming the Internet of Things project.
 # 
 
+import asyncio
 import logging
-import socket
+import threading
+
+from concurrent.futures import Future
+
+from aiocoap import Context, Message, Reliable, Unreliable
+from aiocoap.numbers.codes import Code
+from aiocoap.optiontypes import BlockOption
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.common.ConfigUtil import ConfigUtil
-
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 from programmingtheiot.cda.connection.IRequestResponseClient import IRequestResponseClient
+from programmingtheiot.cda.connection.ResourceDirectory import ResourceDirectory
+from programmingtheiot.cda.connection.handlers.BlockwiseResource import blockSizeToBytes, getBlockSizeExp
 
 class CoapClientConnector(IRequestResponseClient):
 	"""
-	Shell representation of class for student implementation.
-	
+	CoAP client connector for the CDA, built on aiocoap.
+
+	A single aiocoap client context (and so a single UDP socket) is created
+	on first use and kept for the connector's lifetime. It runs on its own
+	event loop thread, or on the event loop passed in (the AsyncDeviceRuntime's,
+	in asyncio mode), and aiocoap owns the message ID, token and
+	retransmission handling. Any number of requests may be submitted from
+	any thread; at most maxConcurrentRequests are outstanding at once, the
+	rest wait their turn.
+
+	NOTE: aiocoap follows RFC 7252's NSTART = 1, so only one CON request
+	per server is unacknowledged at a time (the others are queued by
+	aiocoap). Pipelining mostly pays off for NON requests.
+
+	The send*Request() methods wait for the response (as the interface
+	expects). Their send*RequestAsync() counterparts return a Future right
+	away, so requests can be pipelined. Either way, successful response
+	payloads are passed to the data message listener's
+	handleIncomingMessage().
+
+	GET responses with an ETag are remembered per URI, and the next GET
+	for that URI sends the ETag; if the server answers 2.03 Valid, the
+	remembered payload is passed to the listener instead.
+
+	Payloads too large for a single datagram can be sent and fetched with
+	the send*RequestBlockwise() methods (RFC 7959 Block1 / Block2). Blocks
+	are read from (and written to) the caller's buffer or file one at a
+	time, in the configured blockSize or the smaller size the server asks
+	for, rather than aiocoap concatenating the whole payload block by block.
+
+	Discovery responses ('.well-known/core') are parsed into a
+	ResourceDirectory, which answers later discovery requests and resource
+	lookups (see lookupResource()) locally for discoveryCacheTtlSecs. The
+	directory is refreshed in the background before it expires, and
+	concurrent discovery requests share a single round trip.
+
+	Each observed resource has a single observe relation, however often
+	startObserver() is called for it, and the latest notification payload
+	is cached (see getLatestObservedData()) until the observer is stopped.
+
 	"""
-	
-	def __init__(self):
-		pass
-	
+
+	def __init__(self, dataMsgListener: IDataMessageListener = None, host: str = None, port: int = None, eventLoop: asyncio.AbstractEventLoop = None):
+		"""
+		Constructor. The server's host and port default to those in the
+		Coap.GatewayService section of the config.
+
+		@param dataMsgListener The optional data message listener for responses.
+		@param host The optional CoAP server host.
+		@param port The optional CoAP server port.
+		@param eventLoop The optional event loop to run on, which must be running
+		(on another thread) when the client is used. If None, the client starts
+		and stops its own event loop thread.
+		"""
+		self.config = ConfigUtil()
+		self.dataMsgListener = dataMsgListener
+
+		if not host:
+			host = self.config.getProperty(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.HOST_KEY, ConfigConst.DEFAULT_HOST)
+
+		if not port:
+			port = self.config.getInteger(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_COAP_PORT)
+
+		self.host = host
+		self.port = port
+		self.uriPrefix = 'coap://' + (('[' + host + ']') if ':' in host else host) + ':' + str(port) + '/'
+
+		self.maxConcurrentRequests = max(1, self.config.getInteger( \
+			ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.MAX_CONCURRENT_REQUESTS_KEY, ConfigConst.DEFAULT_MAX_CONCURRENT_REQUESTS))
+
+		self.blockSizeExp = getBlockSizeExp(self.config.getInteger( \
+			ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.BLOCK_SIZE_KEY, ConfigConst.DEFAULT_BLOCK_SIZE))
+
+		self.resourceDirectory = ResourceDirectory(self.config.getFloat( \
+			ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.DISCOVERY_TTL_KEY, ConfigConst.DEFAULT_DISCOVERY_TTL))
+
+		# the in-flight discovery request, and the timer for the next refresh (only touched on the loop thread)
+		self.discoveryTask = None
+		self.discoveryRefreshHandle = None
+
+		# (resource, name) -> request URI
+		self.uriCache = {}
+
+		# request URI -> observer task (only touched on the loop thread)
+		self.observerTasks = {}
+
+		# request URI -> latest notification payload
+		self.observeCache = {}
+
+		# request URI -> (ETag, payload) of the last GET response that had an ETag
+		self.etagCache = {}
+
+		# the shared event loop, if any (self.loop is only set while the client is ready)
+		self.eventLoop = eventLoop
+
+		self.loop = None
+		self.loopThread = None
+		self.coapContext = None
+		self.requestSemaphore = None
+		self.inflightCount = 0
+
+		self.lock = threading.Lock()
+
+		metricsRegistry = MetricsRegistry()
+		self.requestCounter = metricsRegistry.counter(ConfigConst.COAP_REQUESTS_METRIC, 'CoAP requests sent')
+		self.requestFailedCounter = metricsRegistry.counter(ConfigConst.COAP_REQUEST_FAILED_METRIC, 'CoAP requests that failed or timed out')
+		metricsRegistry.gauge(ConfigConst.COAP_INFLIGHT_METRIC, 'CoAP requests awaiting a response').setFunction(lambda: self.inflightCount)
+
+		logging.info("CoAP server: %s (max concurrent requests: %d)", self.uriPrefix, self.maxConcurrentRequests)
+
+	def connectClient(self) -> bool:
+		"""
+		Creates the client context, if not already created. Optional, as
+		the first request does this anyway.
+
+		@return bool True if the client is ready; False otherwise.
+		"""
+		return self._initClient()
+
+	def disconnectClient(self) -> bool:
+		"""
+		Stops any observers, shuts down the client context and stops the
+		event loop thread (unless the loop is shared). A later request
+		creates a new context.
+
+		@return bool True if the client was running; False otherwise.
+		"""
+		with self.lock:
+			if not self.loop:
+				logging.warning("CoAP client already disconnected. Ignoring disconnect request.")
+				return False
+
+			try:
+				asyncio.run_coroutine_threadsafe(self._shutdownContext(), self.loop).result(IRequestResponseClient.DEFAULT_TIMEOUT)
+			except Exception as e:
+				logging.warning("Failed to shut down CoAP client context: %s", e)
+
+			if self.loopThread:
+				self.loop.call_soon_threadsafe(self.loop.stop)
+				self.loopThread.join()
+				self.loop.close()
+
+			self.loop = None
+			self.loopThread = None
+
+			logging.info("CoAP client disconnected.")
+
+			return True
+
 	def sendDiscoveryRequest(self, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
+		"""
+		Discovers the server's resources, unless they were discovered within
+		the last discoveryCacheTtlSecs (see getResourceDirectory()).
+
+		@param timeout The number of seconds to wait for the response.
+		@return bool True if the server's resources are known; False otherwise.
+		"""
+		if self.resourceDirectory.isValid():
+			return True
+
+		if not self._initClient():
+			return False
+
+		future = asyncio.run_coroutine_threadsafe(self._joinDiscovery(timeout), self.loop)
+
+		return self._waitForResult(future)
 
 	def sendDeleteRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
+		return self._waitForResult(self.sendDeleteRequestAsync(resource, name, enableCON, timeout))
 
 	def sendGetRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
+		return self._waitForResult(self.sendGetRequestAsync(resource, name, enableCON, timeout))
 
 	def sendPostRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
+		return self._waitForResult(self.sendPostRequestAsync(resource, name, enableCON, payload, timeout))
 
 	def sendPutRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
+		return self._waitForResult(self.sendPutRequestAsync(resource, name, enableCON, payload, timeout))
+
+	def sendDeleteRequestAsync(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> Future:
+		return self._sendRequestAsync(Code.DELETE, resource, name, enableCON, None, timeout)
+
+	def sendGetRequestAsync(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> Future:
+		"""
+		Sends a GET request without waiting for the response. The other
+		send*RequestAsync() methods work the same way.
+
+		@param resource The resource enum containing the resource path string.
+		@param name The optional name appended to the resource path.
+		@param enableCON If true, CON (confirmed) messaging will be used; otherwise use NON (non-confirmed).
+		@param timeout The number of seconds to wait for the response once the request is sent.
+		@return Future Resolves with True on a successful (2.xx) response; False otherwise.
+		"""
+		return self._sendRequestAsync(Code.GET, resource, name, enableCON, None, timeout)
+
+	def sendPostRequestAsync(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> Future:
+		return self._sendRequestAsync(Code.POST, resource, name, enableCON, payload, timeout)
+
+	def sendPutRequestAsync(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> Future:
+		return self._sendRequestAsync(Code.PUT, resource, name, enableCON, payload, timeout)
+
+	def sendGetRequestBlockwise(self, resource: ResourceNameEnum = None, name: str = None, sink = None, enableCON: bool = True, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		"""
+		Fetches a (large) payload block by block, using Block2.
+
+		@param resource The resource enum containing the resource path string.
+		@param name The optional name appended to the resource path.
+		@param sink The optional writable (binary) file object each block is written
+		to. If None, the payload is collected and passed to the data message listener.
+		@param enableCON If true, CON (confirmed) messaging will be used; otherwise use NON (non-confirmed).
+		@param timeout The number of seconds to wait for each block's response.
+		@return bool True if the whole payload was received; False otherwise.
+		"""
+		return self._sendBlockwise(Code.GET, resource, name, enableCON, sink, timeout)
+
+	def sendPostRequestBlockwise(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = True, payload = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		"""
+		Sends a (large) payload block by block, using Block1. sendPutRequestBlockwise()
+		works the same way.
+
+		@param resource The resource enum containing the resource path string.
+		@param name The optional name appended to the resource path.
+		@param enableCON If true, CON (confirmed) messaging will be used; otherwise use NON (non-confirmed).
+		@param payload The bytes-like payload, or a readable (binary) file object.
+		@param timeout The number of seconds to wait for each block's response.
+		@return bool True if the whole payload was accepted; False otherwise.
+		"""
+		return self._sendBlockwise(Code.POST, resource, name, enableCON, payload, timeout)
+
+	def sendPutRequestBlockwise(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = True, payload = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		return self._sendBlockwise(Code.PUT, resource, name, enableCON, payload, timeout)
+
+	def getResourceDirectory(self) -> ResourceDirectory:
+		"""
+		Returns the directory of the server's resources, as of the latest
+		discovery request.
+
+		@return ResourceDirectory
+		"""
+		return self.resourceDirectory
+
+	def lookupResource(self, resource: ResourceNameEnum = None, name: str = None) -> dict:
+		"""
+		Returns the link attributes (e.g. 'rt', 'obs') the server listed for
+		a resource, without sending a request. Discover the server's resources
+		first (see sendDiscoveryRequest()).
+
+		@param resource The resource enum containing the resource path string.
+		@param name The optional name appended to the resource path.
+		@return dict The attributes, or None if the server didn't list the resource.
+		"""
+		return self.resourceDirectory.lookupResource(resource, name)
+
+	def getLatestObservedData(self, resource: ResourceNameEnum = None, name: str = None) -> str:
+		"""
+		Returns the payload of the latest notification for an observed resource,
+		without sending a request.
+
+		@param resource The observed resource.
+		@param name The optional name appended to the resource path.
+		@return str The payload, or None if the resource isn't being observed
+		or hasn't sent anything yet.
+		"""
+		if not resource:
+			return None
+
+		return self.observeCache.get(self._getUri(resource, name))
 
 	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
-		pass
+		if listener:
+			self.dataMsgListener = listener
+			return True
+
+		return False
 
 	def startObserver(self, resource: ResourceNameEnum = None, name: str = None, ttl: int = IRequestResponseClient.DEFAULT_TTL) -> bool:
-		pass
+		if not resource or not self._initClient():
+			return False
+
+		uri = self._getUri(resource, name)
+
+		self.loop.call_soon_threadsafe(self._startObserverTask, resource, uri, ttl)
+
+		return True
 
 	def stopObserver(self, resource: ResourceNameEnum = None, name: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
-		pass
-	
-	def _initClient(self):
-		pass
+		if not resource or not self.loop:
+			return False
+
+		uri = self._getUri(resource, name)
+
+		self.loop.call_soon_threadsafe(self._stopObserverTask, uri)
+
+		return True
+
+	def _initClient(self) -> bool:
+		if self.loop:
+			return True
+
+		with self.lock:
+			if self.loop:
+				return True
+
+			loop = self.eventLoop
+			loopThread = None
+
+			if not loop:
+				loop = asyncio.new_event_loop()
+				loopThread = threading.Thread(target = loop.run_forever, name = 'CoapClientConnector', daemon = True)
+				loopThread.start()
+			elif not loop.is_running():
+				logging.error("Shared event loop not running. Can't create CoAP client context.")
+
+				return False
+
+			try:
+				asyncio.run_coroutine_threadsafe(self._createContext(), loop).result(IRequestResponseClient.DEFAULT_TIMEOUT)
+			except Exception as e:
+				logging.error("Failed to create CoAP client context: %s", e)
+
+				if loopThread:
+					loop.call_soon_threadsafe(loop.stop)
+					loopThread.join()
+					loop.close()
+
+				return False
+
+			self.loop = loop
+			self.loopThread = loopThread
+
+			logging.info("CoAP client context created.")
+
+			return True
+
+	async def _createContext(self):
+		self.coapContext = await Context.create_client_context()
+		self.requestSemaphore = asyncio.Semaphore(self.maxConcurrentRequests)
+
+	async def _shutdownContext(self):
+		if self.discoveryRefreshHandle:
+			self.discoveryRefreshHandle.cancel()
+			self.discoveryRefreshHandle = None
+
+		if self.discoveryTask:
+			self.discoveryTask.cancel()
+			self.discoveryTask = None
+
+		# no longer refreshed - the next discovery request goes to the server
+		self.resourceDirectory.clear()
+
+		for task in list(self.observerTasks.values()):
+			task.cancel()
+
+		self.observerTasks.clear()
+		self.observeCache.clear()
+		self.etagCache.clear()
+
+		if self.coapContext:
+			await self.coapContext.shutdown()
+			self.coapContext = None
+
+	def _sendRequestAsync(self, code: Code, resource: ResourceNameEnum, name: str, enableCON: bool, payload: str, timeout: int) -> Future:
+		if not resource or not self._initClient():
+			if not resource:
+				logging.warning("No resource. Ignoring CoAP %s request.", str(code))
+
+			self.requestFailedCounter.inc()
+
+			future = Future()
+			future.set_result(False)
+
+			return future
+
+		uri = self._getUri(resource, name)
+		payload = payload.encode('utf-8') if payload else b''
+
+		return asyncio.run_coroutine_threadsafe( \
+			self._request(code, resource, uri, Reliable if enableCON else Unreliable, payload, timeout), self.loop)
+
+	async def _request(self, code: Code, resource: ResourceNameEnum, uri: str, transportTuning, payload: bytes, timeout: int) -> bool:
+		async with self.requestSemaphore:
+			cachedResponse = self.etagCache.get(uri) if code == Code.GET else None
+
+			request = Message(code = code, transport_tuning = transportTuning, uri = uri, payload = payload)
+
+			if cachedResponse:
+				request.opt.etags = (cachedResponse[0],)
+
+			response = await self._sendMessage(request, uri, timeout)
+
+		if not response:
+			return False
+
+		if code == Code.GET:
+			if response.code == Code.VALID and cachedResponse:
+				# unchanged since the last GET
+				return self._handleResponse(resource, uri, response, cachedResponse[1])
+
+			if response.code.is_successful() and response.opt.etag:
+				self.etagCache[uri] = (response.opt.etag, response.payload)
+
+		return self._handleResponse(resource, uri, response)
+
+	def _sendBlockwise(self, code: Code, resource: ResourceNameEnum, name: str, enableCON: bool, data, timeout: int) -> bool:
+		if not resource or not self._initClient():
+			if not resource:
+				logging.warning("No resource. Ignoring CoAP %s request.", str(code))
+
+			self.requestFailedCounter.inc()
+
+			return False
+
+		uri = self._getUri(resource, name)
+		transportTuning = Reliable if enableCON else Unreliable
+
+		if code == Code.GET:
+			transfer = self._receiveBlocks(resource, uri, transportTuning, data, timeout)
+		else:
+			transfer = self._sendBlocks(code, resource, uri, transportTuning, data, timeout)
+
+		return self._waitForResult(asyncio.run_coroutine_threadsafe(transfer, self.loop))
+
+	async def _sendBlocks(self, code: Code, resource: ResourceNameEnum, uri: str, transportTuning, payload, timeout: int) -> bool:
+		# the transfer holds one request slot throughout - its blocks are sent one at a time
+		async with self.requestSemaphore:
+			blockReader = BlockReader(payload)
+			blockSizeExp = self.blockSizeExp
+
+			while True:
+				blockSize = blockSizeToBytes(blockSizeExp)
+				blockNum = blockReader.offset // blockSize
+				block, more = blockReader.read(blockSize)
+
+				request = Message(code = code, transport_tuning = transportTuning, uri = uri, payload = block, \
+					block1 = BlockOption.BlockwiseTuple(blockNum, more, blockSizeExp))
+
+				# lets the server turn down an upload that's too large right away
+				if blockNum == 0 and blockReader.size is not None:
+					request.opt.size1 = blockReader.size
+
+				response = await self._sendMessage(request, uri, timeout, handleBlockwise = False)
+
+				if not response or not more or not response.code.is_successful():
+					break
+
+				block1 = response.opt.block1
+
+				if response.code != Code.CONTINUE or block1 is None or block1.block_number != blockNum:
+					logging.warning("Unexpected response to CoAP block %d sent to %s: %s", blockNum, uri, str(response.code))
+					self.requestFailedCounter.inc()
+
+					return False
+
+				# the server may ask for smaller blocks (but never larger ones)
+				blockSizeExp = min(blockSizeExp, block1.size_exponent)
+
+		if not response:
+			return False
+
+		return self._handleResponse(resource, uri, response)
+
+	async def _receiveBlocks(self, resource: ResourceNameEnum, uri: str, transportTuning, sink, timeout: int) -> bool:
+		buffer = bytearray() if sink is None else None
+		offset = 0
+
+		async with self.requestSemaphore:
+			blockSizeExp = self.blockSizeExp
+			etag = None
+
+			while True:
+				blockSize = blockSizeToBytes(blockSizeExp)
+				request = Message(code = Code.GET, transport_tuning = transportTuning, uri = uri, \
+					block2 = BlockOption.BlockwiseTuple(offset // blockSize, False, blockSizeExp))
+
+				response = await self._sendMessage(request, uri, timeout, handleBlockwise = False)
+
+				if not response or not response.code.is_successful():
+					break
+
+				block2 = response.opt.block2
+
+				if offset == 0:
+					etag = response.opt.etag
+				elif block2 is None or block2.start != offset or response.opt.etag != etag:
+					# the payload was replaced (or the server lost track) mid-transfer
+					logging.warning("CoAP resource %s changed during block-wise transfer.", uri)
+					self.requestFailedCounter.inc()
+
+					return False
+
+				if sink is None:
+					buffer += response.payload
+				else:
+					sink.write(response.payload)
+
+				offset += len(response.payload)
+
+				if block2 is None or not block2.more:
+					break
+
+				# the server may answer with smaller blocks (but never larger ones)
+				blockSizeExp = min(blockSizeExp, block2.size_exponent)
+
+		if not response:
+			return False
+
+		logging.debug("Received %d bytes from %s.", offset, uri)
+
+		return self._handleResponse(resource, uri, response, b'' if sink else bytes(buffer))
+
+	async def _sendMessage(self, request: Message, uri: str, timeout: int, handleBlockwise: bool = True) -> Message:
+		self.requestCounter.inc()
+		self.inflightCount += 1
+
+		try:
+			return await asyncio.wait_for(self.coapContext.request(request, handle_blockwise = handleBlockwise).response, timeout)
+		except Exception as e:
+			self.requestFailedCounter.inc()
+			logging.warning("CoAP %s request to %s failed: %s", str(request.code), uri, repr(e))
+
+			return None
+		finally:
+			self.inflightCount -= 1
+
+	async def _joinDiscovery(self, timeout: int) -> bool:
+		# callers arriving while a discovery request is in flight wait for its response
+		if not self.discoveryTask or self.discoveryTask.done():
+			self.discoveryTask = self.loop.create_task(self._discover(timeout))
+
+		# shielded, so a caller giving up doesn't cancel the request for the others
+		return await asyncio.shield(self.discoveryTask)
+
+	async def _discover(self, timeout: int) -> bool:
+		uri = self.uriPrefix + ConfigConst.WELL_KNOWN_CORE_PATH
+		request = Message(code = Code.GET, transport_tuning = Reliable, uri = uri)
+
+		response = await self._sendMessage(request, uri, timeout)
+
+		if response and response.code.is_successful():
+			linkFormat = response.payload.decode('utf-8', errors = 'replace')
+			count = self.resourceDirectory.update(linkFormat)
+
+			logging.info("CoAP discovery response (%s): %d resources.", str(response.code), count)
+			logging.debug("CoAP discovery response payload: %s", linkFormat)
+
+			self._scheduleDiscoveryRefresh(self.resourceDirectory.ttlSecs * ConfigConst.DISCOVERY_REFRESH_RATIO)
+
+			return True
+
+		if response:
+			self.requestFailedCounter.inc()
+			logging.warning("CoAP discovery request to %s returned %s", uri, str(response.code))
+
+		# while the directory is still valid, try again halfway to its expiry
+		self._scheduleDiscoveryRefresh(self.resourceDirectory.getTimeToExpiry() / 2)
+
+		return False
+
+	def _scheduleDiscoveryRefresh(self, delay: float):
+		if self.discoveryRefreshHandle:
+			self.discoveryRefreshHandle.cancel()
+			self.discoveryRefreshHandle = None
+
+		if delay > 0:
+			self.discoveryRefreshHandle = self.loop.call_later(delay, self._refreshDiscovery)
+
+	def _refreshDiscovery(self):
+		self.discoveryRefreshHandle = None
+
+		if not self.discoveryTask or self.discoveryTask.done():
+			logging.debug("Refreshing discovered CoAP resources.")
+
+			self.discoveryTask = self.loop.create_task(self._discover(IRequestResponseClient.DEFAULT_TIMEOUT))
+
+	def _startObserverTask(self, resource: ResourceNameEnum, uri: str, ttl: int):
+		if uri in self.observerTasks:
+			logging.debug("Already observing %s. Reusing the observe relation.", uri)
+			return
+
+		self.observerTasks[uri] = self.loop.create_task(self._observe(resource, uri, ttl))
+
+	def _stopObserverTask(self, uri: str):
+		task = self.observerTasks.pop(uri, None)
+		self.observeCache.pop(uri, None)
+
+		if task:
+			task.cancel()
+
+	async def _observe(self, resource: ResourceNameEnum, uri: str, ttl: int):
+		request = Message(code = Code.GET, transport_tuning = Reliable, uri = uri, observe = 0)
+		pendingRequest = self.coapContext.request(request)
+
+		try:
+			async with asyncio.timeout(ttl if ttl > 0 else None):
+				self._handleNotification(resource, uri, await pendingRequest.response)
+
+				async for notification in pendingRequest.observation:
+					self._handleNotification(resource, uri, notification)
+		except TimeoutError:
+			logging.info("Observation of %s reached its TTL.", uri)
+		except asyncio.CancelledError:
+			logging.info("Observation of %s stopped.", uri)
+		except Exception as e:
+			logging.warning("Observation of %s failed: %s", uri, repr(e))
+		finally:
+			# the server is told on its next notification
+			if not pendingRequest.observation.cancelled:
+				pendingRequest.observation.cancel()
+
+			if self.observerTasks.get(uri) is asyncio.current_task():
+				del self.observerTasks[uri]
+				self.observeCache.pop(uri, None)
+
+	def _handleNotification(self, resource: ResourceNameEnum, uri: str, response: Message):
+		if response.code.is_successful() and response.payload:
+			self.observeCache[uri] = response.payload.decode('utf-8')
+
+		self._handleResponse(resource, uri, response)
+
+	def _handleResponse(self, resource: ResourceNameEnum, uri: str, response: Message, payload: bytes = None) -> bool:
+		if not response.code.is_successful():
+			self.requestFailedCounter.inc()
+			logging.warning("CoAP request to %s returned %s", uri, str(response.code))
+
+			return False
+
+		if payload is None:
+			payload = response.payload
+
+		if self.dataMsgListener and payload:
+			try:
+				self.dataMsgListener.handleIncomingMessage(resource, payload.decode('utf-8'))
+			except Exception as e:
+				logging.warning("Failed to handle CoAP response from %s: %s", uri, e)
+
+		return True
+
+	def _getUri(self, resource: ResourceNameEnum, name: str) -> str:
+		uri = self.uriCache.get((resource, name))
+
+		if not uri:
+			uri = self.uriPrefix + resource.value + ('/' + name if name else '')
+			self.uriCache[(resource, name)] = uri
+
+		return uri
+
+	def _isLoopThread(self) -> bool:
+		# works for a shared loop too, whose thread isn't known here
+		try:
+			return self.loop is not None and asyncio.get_running_loop() is self.loop
+		except RuntimeError:
+			return False
+
+	def _waitForResult(self, future: Future) -> bool:
+		# a listener calling back in on the loop thread mustn't wait on itself
+		if self._isLoopThread():
+			return True
+
+		try:
+			return future.result()
+		except Exception as e:
+			logging.warning("CoAP request failed: %s", e)
+
+			return False
+
+class BlockReader():
+	"""
+	Reads the blocks of a block-wise upload from a bytes-like payload (sliced
+	through a memoryview, so nothing but the block is copied) or from a
+	readable file object (read just ahead of the block, to know if it's the
+	last one).
+
+	"""
+
+	def __init__(self, payload = None):
+		self.offset = 0
+		self.size = None
+		self.file = None
+		self.view = None
+
+		if hasattr(payload, 'read'):
+			self.file = payload
+			self.pending = bytearray()
+			self.isEof = False
+		else:
+			self.view = memoryview(payload if payload is not None else b'').cast('B')
+			self.size = len(self.view)
+
+	def read(self, blockSize: int) -> tuple:
+		"""
+		Returns the next block, and whether there's more after it.
+
+		@param blockSize The block size, in bytes.
+		@return tuple (bytes, bool)
+		"""
+		if self.view is not None:
+			block = bytes(self.view[self.offset:self.offset + blockSize])
+			more = self.offset + len(block) < self.size
+		else:
+			# one byte past the block tells whether it's the last one
+			while len(self.pending) <= blockSize and not self.isEof:
+				data = self.file.read(blockSize + 1 - len(self.pending))
+
+				if data:
+					self.pending += data
+				else:
+					self.isEof = True
+
+			block = bytes(self.pending[:blockSize])
+			del self.pending[:blockSize]
+			more = len(self.pending) > 0
+
+		self.offset += len(block)
+
+		return (block, more)
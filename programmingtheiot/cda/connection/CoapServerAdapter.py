@@ -10,13 +10,14 @@
 # Programming the Internet of Things project.
 # 
 
+import asyncio
 import logging
+import threading
 
-from threading import Thread
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
 
-from coapthon.server.coap import CoAP
-from coapthon.resources.resource import Resource
+import aiocoap
+import aiocoap.resource as resource
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
@@ -24,27 +25,248 @@ from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+from programmingtheiot.cda.connection.handlers.BlockwiseResource import BlockwiseResource
+from programmingtheiot.cda.connection.handlers.GetSystemPerformanceResourceHandler import GetSystemPerformanceResourceHandler
 from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
 from programmingtheiot.cda.connection.handlers.UpdateActuatorResourceHandler import UpdateActuatorResourceHandler
-from programmingtheiot.cda.connection.handlers.GetSystemPerformanceResourceHandler import GetSystemPerformanceResourceHandler
+from programmingtheiot.cda.connection.handlers.WorkerPoolResource import WorkerPoolResource
 
 class CoapServerAdapter():
 	"""
-	Definition for a CoAP communications server, with embedded test functions.
-	
+	Definition for a CoAP communications server, built on aiocoap.
+
+	The server runs on its own event loop thread, or on the event loop
+	passed in (the AsyncDeviceRuntime's, in asyncio mode). Resources (aiocoap
+	resources, such as the handlers in programmingtheiot.cda.connection.handlers)
+	are added with addResource(), before or after the server is started;
+	'.well-known/core' lists them for discovery.
+
+	The CDA's own resources are always added: telemetry (per sensor name)
+	and system performance, whose handlers are set as the data message
+	listener's telemetry / system performance listeners, the actuator
+	command resource, and the media resource. Media payloads are usually
+	too large for a single datagram, so it's a BlockwiseResource (see there
+	for the Block1 / Block2 handling).
+
+	Concurrency: the event loop decodes every request, and resources that
+	never block - the telemetry and system performance GETs, which are
+	served from their cached representation, and observe notifications -
+	are handled right there. Resources that may block (WorkerPoolResource
+	sub-classes, such as the actuator command handler) hand their requests
+	to a pool of serverWorkerCount threads, each with its own limit on
+	concurrent and queued requests. So a slow actuator command never holds
+	up a telemetry read. With serverWorkerCount = 0, everything is handled
+	on the event loop, one request at a time.
+
 	"""
-	
-	def __init__(self, dataMsgListener = None):
-		pass
-		
+
+	def __init__(self, dataMsgListener: IDataMessageListener = None, host: str = None, port: int = None, workerCount: int = None, \
+		eventLoop: asyncio.AbstractEventLoop = None):
+		"""
+		Constructor. The host and port default to those in the
+		Coap.GatewayService section of the config, and the worker count
+		to serverWorkerCount in the ConstrainedDevice section.
+
+		@param dataMsgListener The optional data message listener.
+		@param host The optional host (address) to bind to.
+		@param port The optional port to bind to. Zero lets the OS pick one (see getPort()).
+		@param workerCount The optional number of worker threads (0 for none).
+		@param eventLoop The optional event loop to run on, which must be running
+		(on another thread) while the server is started and stopped. If None, the
+		server starts and stops its own event loop thread.
+		"""
+		configUtil = ConfigUtil()
+
+		if not host:
+			host = configUtil.getProperty(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.HOST_KEY, ConfigConst.DEFAULT_HOST)
+
+		if port is None:
+			port = configUtil.getInteger(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_COAP_PORT)
+
+		self.host = host
+		self.port = port
+		self.dataMsgListener = dataMsgListener
+
+		self.site = resource.Site()
+		self.site.add_resource(ConfigConst.WELL_KNOWN_CORE_PATH.split('/'), resource.WKCResource(self.site.get_resources_as_linkheader))
+
+		if workerCount is None:
+			workerCount = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.SERVER_WORKER_COUNT_KEY, ConfigConst.DEFAULT_SERVER_WORKER_COUNT)
+
+		self.workerCount = max(0, workerCount)
+
+		# resources whose requests are handled on the worker pool
+		self.workerPoolResources = []
+
+		# the shared event loop, if any (self.loop is only set while the server runs)
+		self.eventLoop = eventLoop
+
+		self.loop = None
+		self.loopThread = None
+		self.serverContext = None
+		self.executor = None
+
+		self._initResources()
+
+		self.lock = threading.Lock()
+
 	def addResource(self, resourcePath: ResourceNameEnum = None, endName: str = None, resource = None):
-		pass
-				
-	def startServer(self):
-		pass
-	
-	def stopServer(self):
-		pass
-	
+		"""
+		Adds a resource at the resource path (plus the optional end name).
+
+		@param resourcePath The resource enum containing the resource path string.
+		@param endName The optional name appended to the resource path.
+		@param resource The aiocoap resource.
+		@return bool True if the resource was added; False otherwise.
+		"""
+		if not resourcePath or not resource:
+			logging.warning("No resource path or resource. Ignoring CoAP resource.")
+
+			return False
+
+		path = resourcePath.value.split('/') + ([endName] if endName else [])
+
+		self.site.add_resource(path, resource)
+
+		if isinstance(resource, WorkerPoolResource):
+			self.workerPoolResources.append(resource)
+			resource.setExecutor(self.executor)
+
+		logging.info("Added CoAP resource: %s", '/'.join(path))
+
+		return True
+
+	def startServer(self) -> bool:
+		with self.lock:
+			if self.loop:
+				logging.warning("CoAP server already started. Ignoring start request.")
+
+				return False
+
+			loop = self.eventLoop
+			loopThread = None
+
+			if not loop:
+				loop = asyncio.new_event_loop()
+				loopThread = threading.Thread(target = loop.run_forever, name = 'CoapServerAdapter', daemon = True)
+				loopThread.start()
+			elif not loop.is_running():
+				logging.error("Shared event loop not running. Can't start CoAP server.")
+
+				return False
+
+			if self.workerCount > 0:
+				self._setExecutor(ThreadPoolExecutor(max_workers = self.workerCount, thread_name_prefix = 'CoapServerWorker'))
+
+			try:
+				self.serverContext = asyncio.run_coroutine_threadsafe( \
+					aiocoap.Context.create_server_context(self.site, bind = (self.host, self.port)), loop).result()
+			except Exception as e:
+				logging.error("Failed to start CoAP server on %s:%s: %s", self.host, self.port, e)
+
+				if loopThread:
+					loop.call_soon_threadsafe(loop.stop)
+					loopThread.join()
+					loop.close()
+
+				self._setExecutor(None)
+
+				return False
+
+			self.loop = loop
+			self.loopThread = loopThread
+
+			logging.info("CoAP server started on %s:%d (worker threads: %d).", self.host, self.getPort(), self.workerCount)
+
+			return True
+
+	def stopServer(self) -> bool:
+		with self.lock:
+			if not self.loop:
+				logging.warning("CoAP server not started. Ignoring stop request.")
+
+				return False
+
+			try:
+				asyncio.run_coroutine_threadsafe(self.serverContext.shutdown(), self.loop).result()
+			except Exception as e:
+				logging.warning("Failed to shut down CoAP server context: %s", e)
+
+			# before the loop stops - finished requests hand their responses back to it
+			self._setExecutor(None)
+
+			if self.loopThread:
+				self.loop.call_soon_threadsafe(self.loop.stop)
+				self.loopThread.join()
+				self.loop.close()
+
+			self.loop = None
+			self.loopThread = None
+			self.serverContext = None
+
+			logging.info("CoAP server stopped.")
+
+			return True
+
+	def getPort(self) -> int:
+		"""
+		Returns the port the server is bound to, which is only known once it's
+		started if it was created with port 0.
+
+		@return int
+		"""
+		if self.serverContext:
+			# aiocoap doesn't expose the bound address, so find it on the transport's socket
+			for transport in self.serverContext.request_interfaces:
+				endpoint = getattr(getattr(transport, 'token_interface', None), 'message_interface', None)
+				endpoint = getattr(endpoint, 'message_interface', endpoint)
+				sock = getattr(getattr(endpoint, 'transport', None), 'get_extra_info', lambda key: None)('socket')
+
+				if sock:
+					return sock.getsockname()[1]
+
+		return self.port
+
 	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
-		pass
+		if listener:
+			self.dataMsgListener = listener
+			self.actuatorHandler.setDataMessageListener(listener)
+
+			# the handlers are updated with the latest data by the listener
+			for name, handler in self.telemetryHandlers.items():
+				listener.setTelemetryDataListener(name, handler)
+
+			listener.setSystemPerformanceDataListener(self.sysPerfHandler)
+
+			return True
+
+		return False
+
+	def _initResources(self):
+		self.telemetryHandlers = {}
+
+		for name in [ConfigConst.TEMP_SENSOR_NAME, ConfigConst.HUMIDITY_SENSOR_NAME, ConfigConst.PRESSURE_SENSOR_NAME]:
+			self.telemetryHandlers[name] = GetTelemetryResourceHandler()
+			self.addResource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name, self.telemetryHandlers[name])
+
+		self.sysPerfHandler = GetSystemPerformanceResourceHandler()
+		self.addResource(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, ConfigConst.SYSTEM_PERF_NAME, self.sysPerfHandler)
+
+		self.actuatorHandler = UpdateActuatorResourceHandler()
+		self.addResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, resource = self.actuatorHandler)
+
+		self.mediaResource = BlockwiseResource(name = ConfigConst.MEDIA_MSG)
+		self.addResource(ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, resource = self.mediaResource)
+
+		self.setDataMessageListener(self.dataMsgListener)
+
+	def _setExecutor(self, executor: ThreadPoolExecutor = None):
+		if self.executor:
+			# requests still being handled finish first
+			self.executor.shutdown(wait = True)
+
+		self.executor = executor
+
+		for resource in self.workerPoolResources:
+			resource.setExecutor(executor)
@@ -0,0 +1,288 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import json
+import logging
+import threading
+import time
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MessageBatcher():
+	"""
+	Accumulates outgoing JSON messages per ResourceNameEnum and ships them as a
+	single batch payload (a JSON array of the individual messages) when any of
+	the following limits is reached:
+	 - max count: the number of messages in the batch
+	 - max bytes: the size of the batch payload (message lengths plus separators)
+	 - max linger: the time since the first message was added to the batch
+
+	The flush callback is invoked as flushCallback(resource, payload, count), on
+	the caller's thread for count and size limits, or on the batcher's own
+	thread for the linger limit.
+
+	Inbound batches can be split back into individual JSON messages with
+	unbatchPayload().
+
+	"""
+
+	BATCH_START = '['
+	BATCH_END   = ']'
+	BATCH_SEP   = ','
+
+	def __init__(self, flushCallback = None, maxCount: int = None, maxBytes: int = None, maxLingerMillis: int = None):
+		"""
+		Constructor. Any limit not passed in is read from the ConstrainedDevice
+		section of the config.
+
+		@param flushCallback The function to call with each batch payload.
+		@param maxCount The max number of messages per batch.
+		@param maxBytes The max size of a batch payload.
+		@param maxLingerMillis The max time a message can wait in a batch, in milliseconds.
+		"""
+		configUtil = ConfigUtil()
+
+		if maxCount is None:
+			maxCount = configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.BATCH_MAX_COUNT_KEY, ConfigConst.DEFAULT_BATCH_MAX_COUNT)
+
+		if maxBytes is None:
+			maxBytes = configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.BATCH_MAX_BYTES_KEY, ConfigConst.DEFAULT_BATCH_MAX_BYTES)
+
+		if maxLingerMillis is None:
+			maxLingerMillis = configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.BATCH_MAX_LINGER_MILLIS_KEY, ConfigConst.DEFAULT_BATCH_MAX_LINGER_MILLIS)
+
+		self.flushCallback = flushCallback
+		self.maxCount = max(1, maxCount)
+		self.maxBytes = max(1, maxBytes)
+		self.maxLingerSecs = max(0, maxLingerMillis) / 1000.0
+
+		# resource -> [messages, payloadSize, firstAddTime]
+		self.batches = {}
+
+		self.batchCount = 0
+		self.msgCount = 0
+
+		self.cond = threading.Condition()
+		self.lingerThread = None
+		self.isRunning = False
+
+	def addMessage(self, resource: ResourceNameEnum, msg: str) -> bool:
+		"""
+		Adds the message to the batch for 'resource', flushing the batch first if
+		adding the message would exceed max bytes, and after if it reaches max count.
+
+		@param resource The resource the message is destined for.
+		@param msg The JSON message.
+		@return bool True if the message was added; False otherwise.
+		"""
+		if not resource or not msg:
+			return False
+
+		if isinstance(msg, bytes):
+			msg = msg.decode('utf-8')
+
+		msgSize = len(msg)
+		flushed = []
+
+		with self.cond:
+			batch = self.batches.get(resource)
+
+			if batch and batch[1] + len(self.BATCH_SEP) + msgSize > self.maxBytes:
+				flushed.append(self._removeBatch(resource))
+				batch = None
+
+			if not batch:
+				batch = [[], len(self.BATCH_START) + len(self.BATCH_END), time.monotonic()]
+				self.batches[resource] = batch
+
+				# wake the linger thread so it can track the new deadline
+				self.cond.notify()
+			else:
+				batch[1] += len(self.BATCH_SEP)
+
+			batch[0].append(msg)
+			batch[1] += msgSize
+
+			if len(batch[0]) >= self.maxCount or batch[1] >= self.maxBytes:
+				flushed.append(self._removeBatch(resource))
+
+		for msgs in flushed:
+			self._flush(resource, msgs)
+
+		return True
+
+	def flushAll(self):
+		"""
+		Flushes every pending batch, regardless of limits.
+
+		"""
+		with self.cond:
+			pending = [(resource, self._removeBatch(resource)) for resource in list(self.batches.keys())]
+
+		for resource, msgs in pending:
+			self._flush(resource, msgs)
+
+	def getPendingCount(self, resource: ResourceNameEnum = None) -> int:
+		"""
+		Returns the number of messages waiting to be flushed.
+
+		@param resource The optional resource. If None, the total across all resources is returned.
+		@return int
+		"""
+		with self.cond:
+			if resource:
+				batch = self.batches.get(resource)
+				return len(batch[0]) if batch else 0
+
+			return sum(len(batch[0]) for batch in self.batches.values())
+
+	def getStats(self) -> dict:
+		"""
+		Returns the number of batches flushed, and the number of messages they contained.
+
+		@return dict
+		"""
+		return {ConfigConst.BATCH_COUNT_PROP: self.batchCount, ConfigConst.MESSAGE_COUNT_PROP: self.msgCount}
+
+	def setFlushCallback(self, flushCallback = None):
+		self.flushCallback = flushCallback
+
+	def startBatcher(self):
+		"""
+		Starts the thread that flushes batches once they've reached max linger time.
+
+		"""
+		with self.cond:
+			if self.isRunning:
+				return
+
+			self.isRunning = True
+
+		self.lingerThread = threading.Thread(target = self._runLingerLoop, name = 'MessageBatcher', daemon = True)
+		self.lingerThread.start()
+
+		logging.info("MessageBatcher started: maxCount=%d, maxBytes=%d, maxLingerSecs=%.3f", self.maxCount, self.maxBytes, self.maxLingerSecs)
+
+	def stopBatcher(self):
+		"""
+		Stops the linger thread and flushes every pending batch.
+
+		"""
+		with self.cond:
+			self.isRunning = False
+			self.cond.notify()
+
+		if self.lingerThread:
+			self.lingerThread.join()
+			self.lingerThread = None
+
+		self.flushAll()
+
+		logging.info("MessageBatcher stopped: %s", str(self.getStats()))
+
+	@staticmethod
+	def createBatchPayload(msgs: list) -> str:
+		"""
+		Joins the JSON messages into a single batch payload.
+
+		@param msgs The list of JSON messages.
+		@return str The batch payload.
+		"""
+		return MessageBatcher.BATCH_START + MessageBatcher.BATCH_SEP.join(msgs) + MessageBatcher.BATCH_END
+
+	@staticmethod
+	def isBatchPayload(payload) -> bool:
+		"""
+		Checks if the payload is a batch (JSON array) rather than a single JSON message.
+
+		@param payload The payload as a str or bytes.
+		@return bool
+		"""
+		if isinstance(payload, bytes):
+			payload = payload.decode('utf-8')
+
+		return bool(payload) and payload.lstrip().startswith(MessageBatcher.BATCH_START)
+
+	@staticmethod
+	def unbatchPayload(payload) -> list:
+		"""
+		Splits an inbound payload into its individual JSON messages. If the payload
+		isn't a batch, it's returned as the only element of the list.
+
+		@param payload The payload as a str or bytes.
+		@return list The list of JSON messages (as str).
+		"""
+		if not payload:
+			return []
+
+		if isinstance(payload, bytes):
+			payload = payload.decode('utf-8')
+
+		if not MessageBatcher.isBatchPayload(payload):
+			return [payload]
+
+		try:
+			return [json.dumps(item) for item in json.loads(payload)]
+		except ValueError as e:
+			logging.warning("Failed to unbatch payload: %s", e)
+
+		return []
+
+	def _flush(self, resource: ResourceNameEnum, msgs: list):
+		if not msgs:
+			return
+
+		if self.flushCallback:
+			try:
+				self.flushCallback(resource, self.createBatchPayload(msgs), len(msgs))
+			except Exception as e:
+				logging.warning("Batch flush failed for resource %s: %s", resource.name, e)
+
+	def _removeBatch(self, resource: ResourceNameEnum) -> list:
+		# must be called with self.cond held
+		batch = self.batches.pop(resource, None)
+
+		if not batch:
+			return None
+
+		self.batchCount += 1
+		self.msgCount += len(batch[0])
+
+		return batch[0]
+
+	def _runLingerLoop(self):
+		while True:
+			expired = []
+
+			with self.cond:
+				if not self.isRunning:
+					return
+
+				now = time.monotonic()
+				waitSecs = None
+
+				for resource, batch in list(self.batches.items()):
+					remainingSecs = batch[2] + self.maxLingerSecs - now
+
+					if remainingSecs <= 0:
+						expired.append((resource, self._removeBatch(resource)))
+					elif waitSecs is None or remainingSecs < waitSecs:
+						waitSecs = remainingSecs
+
+				if not expired:
+					self.cond.wait(waitSecs)
+
+			for resource, msgs in expired:
+				self._flush(resource, msgs)
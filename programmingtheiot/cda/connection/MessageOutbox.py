@@ -0,0 +1,606 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MessageOutbox():
+	"""
+	Disk-backed store-and-forward outbox for upstream messages that couldn't be
+	sent while the uplink was down.
+
+	Messages are appended to a log of fixed-size segment files. Each record is
+	a header (body length and CRC32) followed by the body, which is the
+	ResourceNameEnum name and the message separated by a newline. On open, the
+	newest segment is scanned and any partially written record at its tail
+	(e.g. from a crash mid-write) is truncated.
+
+	Replay reads from a persisted cursor (segment number and offset), which is
+	atomically replaced after each replayed batch. Delivery is at-least-once: a
+	crash between sending and saving the cursor can replay a few messages again.
+	Fully replayed segments are deleted. If the outbox exceeds its max size, the
+	oldest segments are evicted, whether they were replayed or not.
+
+	The replay thread is rate limited so a large backlog drains without
+	starving live traffic, and backs off while the uplink is still down.
+
+	"""
+
+	SEGMENT_PREFIX = 'outbox-'
+	SEGMENT_SUFFIX = '.seg'
+	CURSOR_FILE    = 'outbox.cursor'
+
+	RECORD_HEADER  = struct.Struct('>II')
+	RECORD_SEP     = b'\n'
+
+	FSYNC_ALWAYS   = 'always'
+	FSYNC_INTERVAL = 'interval'
+	FSYNC_NEVER    = 'never'
+
+	REPLAY_TICK_SECS  = 0.1
+	REPLAY_BATCH_SIZE = 32
+
+	def __init__(self, outboxPath: str = None, maxBytes: int = None, segmentMaxBytes: int = None, \
+		fsyncPolicy: str = None, fsyncIntervalMillis: int = None, replayRatePerSec: float = None, retryIntervalSecs: float = None):
+		"""
+		Constructor. Any setting not passed in is read from the ConstrainedDevice
+		section of the config. The outbox path defaults to an 'outbox' directory
+		under testCdaDataPath.
+
+		@param outboxPath The directory to store the segment files in.
+		@param maxBytes The max total size of all segment files.
+		@param segmentMaxBytes The size at which a new segment file is started.
+		@param fsyncPolicy One of 'always', 'interval' or 'never'.
+		@param fsyncIntervalMillis The min time between fsync calls for the 'interval' policy.
+		@param replayRatePerSec The max number of messages replayed per second.
+		@param retryIntervalSecs The time to wait before retrying replay after a failed send.
+		"""
+		configUtil = ConfigUtil()
+		section = ConfigConst.CONSTRAINED_DEVICE
+
+		if not outboxPath:
+			cdaDataPath = configUtil.getProperty(section, ConfigConst.TEST_CDA_DATA_PATH_KEY, ConfigConst.DEFAULT_CDA_DATA_PATH)
+			outboxPath = os.path.join(cdaDataPath, ConfigConst.OUTBOX_DIR_NAME)
+
+		if maxBytes is None:
+			maxBytes = configUtil.getInteger(section, ConfigConst.OUTBOX_MAX_BYTES_KEY, ConfigConst.DEFAULT_OUTBOX_MAX_BYTES)
+
+		if segmentMaxBytes is None:
+			segmentMaxBytes = configUtil.getInteger(section, ConfigConst.OUTBOX_SEGMENT_MAX_BYTES_KEY, ConfigConst.DEFAULT_OUTBOX_SEGMENT_MAX_BYTES)
+
+		if fsyncPolicy is None:
+			fsyncPolicy = configUtil.getProperty(section, ConfigConst.OUTBOX_FSYNC_POLICY_KEY, self.FSYNC_INTERVAL)
+
+		if fsyncIntervalMillis is None:
+			fsyncIntervalMillis = configUtil.getInteger(section, ConfigConst.OUTBOX_FSYNC_INTERVAL_MILLIS_KEY, ConfigConst.DEFAULT_OUTBOX_FSYNC_INTERVAL_MILLIS)
+
+		if replayRatePerSec is None:
+			replayRatePerSec = configUtil.getFloat(section, ConfigConst.OUTBOX_REPLAY_RATE_KEY, ConfigConst.DEFAULT_OUTBOX_REPLAY_RATE)
+
+		if retryIntervalSecs is None:
+			retryIntervalSecs = configUtil.getFloat(section, ConfigConst.OUTBOX_RETRY_INTERVAL_SECS_KEY, ConfigConst.DEFAULT_OUTBOX_RETRY_INTERVAL_SECS)
+
+		fsyncPolicy = str(fsyncPolicy).strip().lower()
+
+		if fsyncPolicy not in (self.FSYNC_ALWAYS, self.FSYNC_INTERVAL, self.FSYNC_NEVER):
+			logging.warning("Unknown outbox fsync policy '%s'. Using '%s'.", fsyncPolicy, self.FSYNC_INTERVAL)
+			fsyncPolicy = self.FSYNC_INTERVAL
+
+		self.outboxPath = outboxPath
+		self.maxBytes = max(1, maxBytes)
+
+		# keep at least two segments within max bytes, so eviction never has to drop the active one
+		self.segmentMaxBytes = max(1, min(segmentMaxBytes, self.maxBytes // 2))
+
+		self.fsyncPolicy = fsyncPolicy
+		self.fsyncIntervalSecs = max(0, fsyncIntervalMillis) / 1000.0
+		self.replayRatePerSec = max(0.0, replayRatePerSec)
+		self.retryIntervalSecs = max(self.REPLAY_TICK_SECS, retryIntervalSecs)
+
+		self.lock = threading.RLock()
+
+		# held for a whole replay, so no two replays send the same messages
+		self.replayLock = threading.Lock()
+
+		# segNo -> [fileSize, unreplayedRecordCount]
+		self.segments = {}
+
+		self.activeSegNo = 0
+		self.activeFile = None
+		self.lastFsyncTime = 0.0
+
+		self.cursorSegNo = 0
+		self.cursorOffset = 0
+
+		self.storedCount = 0
+		self.replayedCount = 0
+		self.evictedCount = 0
+
+		self.replayThread = None
+		self.replayEvent = threading.Event()
+		self.isReplayRunning = False
+
+		self._openOutbox()
+
+	def storeMessage(self, resource: ResourceNameEnum, msg: str) -> bool:
+		"""
+		Appends the message to the outbox, evicting the oldest segments if needed.
+
+		@param resource The resource the message is destined for.
+		@param msg The message (str or bytes).
+		@return bool True if the message was stored; False otherwise.
+		"""
+		if not resource or not msg:
+			return False
+
+		if isinstance(msg, str):
+			msg = msg.encode('utf-8')
+
+		body = resource.name.encode('utf-8') + self.RECORD_SEP + msg
+		record = self.RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+		with self.lock:
+			if not self.activeFile:
+				return False
+
+			try:
+				segment = self.segments[self.activeSegNo]
+
+				if segment[0] > 0 and segment[0] + len(record) > self.segmentMaxBytes:
+					self._rollSegment()
+					segment = self.segments[self.activeSegNo]
+
+				self.activeFile.write(record)
+				self.activeFile.flush()
+
+				segment[0] += len(record)
+				segment[1] += 1
+
+				self.storedCount += 1
+
+				self._syncIfNeeded()
+				self._evictIfNeeded()
+
+				return True
+			except OSError as e:
+				logging.warning("Failed to store message in outbox: %s", e)
+
+		return False
+
+	def replayMessages(self, sendFunc, maxCount: int = None) -> int:
+		"""
+		Replays stored messages, oldest first, by calling sendFunc(resource, msg)
+		for each. Replay stops at the first send that returns False, and that
+		message will be retried on the next call.
+
+		Messages are read in batches, and the outbox lock isn't held while they're
+		sent, so storing new messages isn't blocked by a slow uplink.
+
+		@param sendFunc The function to call for each message. Must return True on success.
+		@param maxCount The optional max number of messages to replay.
+		@return int The number of messages successfully replayed.
+		"""
+		replayed = 0
+
+		with self.replayLock:
+			while maxCount is None or replayed < maxCount:
+				limit = self.REPLAY_BATCH_SIZE if maxCount is None else min(self.REPLAY_BATCH_SIZE, maxCount - replayed)
+				segNo, records = self._readBatch(limit)
+
+				if not records:
+					break
+
+				processedCount, sentCount = self._sendBatch(sendFunc, records)
+				replayed += sentCount
+
+				if processedCount:
+					with self.lock:
+						self.replayedCount += sentCount
+						self._advanceCursor(segNo, records[processedCount - 1][2], processedCount)
+						self._saveCursor()
+
+				if processedCount < len(records):
+					break
+
+		return replayed
+
+	def startReplay(self, sendFunc):
+		"""
+		Starts the rate limited background replay thread.
+
+		@param sendFunc The function to call for each message. Must return True on success.
+		"""
+		with self.lock:
+			if self.isReplayRunning:
+				return
+
+			self.isReplayRunning = True
+
+		self.replayEvent.clear()
+		self.replayThread = threading.Thread(target = self._runReplayLoop, args = (sendFunc,), name = 'MessageOutboxReplay', daemon = True)
+		self.replayThread.start()
+
+		logging.info("MessageOutbox replay started: %s", str(self.getStats()))
+
+	def stopReplay(self):
+		"""
+		Stops the background replay thread.
+
+		"""
+		with self.lock:
+			self.isReplayRunning = False
+
+		self.replayEvent.set()
+
+		if self.replayThread:
+			self.replayThread.join()
+			self.replayThread = None
+
+	def notifyConnected(self):
+		"""
+		Wakes the replay thread so it can retry immediately, rather than waiting
+		out its retry interval. Call this when the uplink (re)connects.
+
+		"""
+		self.replayEvent.set()
+
+	def getPendingCount(self) -> int:
+		"""
+		Returns the number of messages waiting to be replayed.
+
+		@return int
+		"""
+		with self.lock:
+			return sum(segment[1] for segment in self.segments.values())
+
+	def getStats(self) -> dict:
+		"""
+		Returns the outbox counters and current size.
+
+		@return dict
+		"""
+		with self.lock:
+			return {
+				ConfigConst.STORED_COUNT_PROP:   self.storedCount,
+				ConfigConst.REPLAYED_COUNT_PROP: self.replayedCount,
+				ConfigConst.EVICTED_COUNT_PROP:  self.evictedCount,
+				ConfigConst.PENDING_COUNT_PROP:  self.getPendingCount(),
+				ConfigConst.PENDING_BYTES_PROP:  sum(segment[0] for segment in self.segments.values())
+			}
+
+	def close(self):
+		"""
+		Stops replay, syncs and closes the active segment file.
+
+		"""
+		self.stopReplay()
+
+		with self.lock:
+			if self.activeFile:
+				try:
+					if self.fsyncPolicy != self.FSYNC_NEVER:
+						os.fsync(self.activeFile.fileno())
+
+					self.activeFile.close()
+				except OSError as e:
+					logging.warning("Failed to close outbox segment: %s", e)
+
+				self.activeFile = None
+
+	#
+	# private methods
+	#
+
+	def _openOutbox(self):
+		try:
+			os.makedirs(self.outboxPath, exist_ok = True)
+
+			segNos = sorted(self._listSegmentNumbers())
+
+			self._loadCursor()
+
+			for segNo in segNos:
+				if segNo < self.cursorSegNo:
+					# already replayed - the delete was interrupted
+					os.remove(self._getSegmentFileName(segNo))
+					continue
+
+				startOffset = self.cursorOffset if segNo == self.cursorSegNo else 0
+				validSize, count = self._scanSegment(segNo, startOffset)
+				self.segments[segNo] = [validSize, count]
+
+			if self.segments:
+				self.activeSegNo = max(self.segments.keys())
+
+				# drop any partial record left at the tail by a crash
+				fileName = self._getSegmentFileName(self.activeSegNo)
+
+				if os.path.getsize(fileName) > self.segments[self.activeSegNo][0]:
+					logging.warning("Truncating partial record at tail of outbox segment: %s", fileName)
+					os.truncate(fileName, self.segments[self.activeSegNo][0])
+			else:
+				self.activeSegNo = max(self.cursorSegNo, 1)
+				self.segments[self.activeSegNo] = [0, 0]
+
+			self._advanceCursorToOldestSegment()
+
+			self.activeFile = open(self._getSegmentFileName(self.activeSegNo), 'ab')
+
+			logging.info("Opened outbox at %s: %s", self.outboxPath, str(self.getStats()))
+		except OSError as e:
+			logging.error("Failed to open outbox at %s: %s", self.outboxPath, e)
+
+	def _scanSegment(self, segNo: int, startOffset: int = 0) -> tuple:
+		"""
+		Returns the offset just past the last valid record, and the number of
+		valid records after startOffset.
+
+		"""
+		offset = 0
+		count = 0
+
+		with open(self._getSegmentFileName(segNo), 'rb') as segFile:
+			while True:
+				record = self._readRecord(segFile)
+
+				if not record:
+					break
+
+				offset = segFile.tell()
+
+				if offset > startOffset:
+					count += 1
+
+		return (offset, count)
+
+	def _readRecord(self, segFile) -> bytes:
+		header = segFile.read(self.RECORD_HEADER.size)
+
+		if len(header) < self.RECORD_HEADER.size:
+			return None
+
+		length, crc = self.RECORD_HEADER.unpack(header)
+		body = segFile.read(length)
+
+		if len(body) < length or zlib.crc32(body) != crc:
+			return None
+
+		return body
+
+	def _readBatch(self, limit: int) -> tuple:
+		"""
+		Returns the cursor's segment number and up to limit records from the
+		cursor on, as (resourceName, msg, endOffset) tuples. Fully replayed
+		segments are deleted on the way.
+
+		"""
+		with self.lock:
+			while self.cursorSegNo in self.segments:
+				segment = self.segments[self.cursorSegNo]
+
+				if self.cursorOffset >= segment[0]:
+					# nothing left in this segment - move on unless it's the active one
+					if self.cursorSegNo == self.activeSegNo:
+						break
+
+					self._deleteSegment(self.cursorSegNo)
+					self._advanceCursorToOldestSegment()
+					continue
+
+				records = self._readSegment(segment, limit)
+
+				if records:
+					return (self.cursorSegNo, records)
+
+			return (self.cursorSegNo, [])
+
+	def _readSegment(self, segment: list, limit: int) -> list:
+		records = []
+
+		with open(self._getSegmentFileName(self.cursorSegNo), 'rb') as segFile:
+			segFile.seek(self.cursorOffset)
+
+			while len(records) < limit and segFile.tell() < segment[0]:
+				body = self._readRecord(segFile)
+
+				if not body:
+					if not records:
+						# can only happen if the file was modified underneath us - skip the rest
+						logging.warning("Corrupt record in outbox segment %d at offset %d. Skipping.", self.cursorSegNo, segFile.tell())
+						segment[1] = 0
+						self.cursorOffset = segment[0]
+
+					break
+
+				resourceName, _, msg = body.partition(self.RECORD_SEP)
+				records.append((resourceName.decode('utf-8'), msg.decode('utf-8'), segFile.tell()))
+
+		return records
+
+	def _sendBatch(self, sendFunc, records: list) -> tuple:
+		"""
+		Sends the records in order, stopping at the first failed send. Returns the
+		number of records done with (sent, or dropped), and the number sent.
+
+		"""
+		sentCount = 0
+
+		for processedCount, (resourceName, msg, _) in enumerate(records):
+			resource = ResourceNameEnum.__members__.get(resourceName)
+
+			if not resource:
+				logging.warning("Unknown resource in outbox record: %s. Dropping.", resourceName)
+				continue
+
+			try:
+				isSent = sendFunc(resource, msg)
+			except Exception as e:
+				logging.warning("Outbox replay send failed: %s", e)
+				isSent = False
+
+			if not isSent:
+				return (processedCount, sentCount)
+
+			sentCount += 1
+
+		return (len(records), sentCount)
+
+	def _advanceCursor(self, segNo: int, offset: int, count: int):
+		# the segment may have been evicted (and the cursor moved on) while sending
+		segment = self.segments.get(segNo)
+
+		if segment and segNo == self.cursorSegNo and offset > self.cursorOffset:
+			segment[1] = max(0, segment[1] - count)
+			self.cursorOffset = offset
+
+	def _runReplayLoop(self, sendFunc):
+		tokens = 0.0
+		lastTime = time.monotonic()
+		waitSecs = self.REPLAY_TICK_SECS
+
+		while self.isReplayRunning:
+			self.replayEvent.wait(waitSecs)
+			self.replayEvent.clear()
+
+			if not self.isReplayRunning:
+				break
+
+			now = time.monotonic()
+
+			if self.replayRatePerSec > 0:
+				# token bucket, with at most one second worth of burst - but room for
+				# at least one message, or rates below one per second never replay
+				tokens = min(max(1.0, self.replayRatePerSec), tokens + (now - lastTime) * self.replayRatePerSec)
+				maxCount = int(tokens)
+			else:
+				maxCount = None
+
+			lastTime = now
+			waitSecs = self.REPLAY_TICK_SECS
+
+			if maxCount == 0 or self.getPendingCount() == 0:
+				continue
+
+			replayed = self.replayMessages(sendFunc, maxCount = maxCount)
+			tokens -= replayed
+
+			if self.getPendingCount() > 0 and (maxCount is None or replayed < maxCount):
+				# a send failed - the uplink is probably still down
+				waitSecs = self.retryIntervalSecs
+
+	def _rollSegment(self):
+		self._syncActiveFile()
+		self.activeFile.close()
+
+		self.activeSegNo += 1
+		self.segments[self.activeSegNo] = [0, 0]
+		self.activeFile = open(self._getSegmentFileName(self.activeSegNo), 'ab')
+
+	def _evictIfNeeded(self):
+		totalBytes = sum(segment[0] for segment in self.segments.values())
+
+		while totalBytes > self.maxBytes and len(self.segments) > 1:
+			oldestSegNo = min(self.segments.keys())
+			segment = self.segments[oldestSegNo]
+
+			totalBytes -= segment[0]
+			self.evictedCount += segment[1]
+
+			logging.warning("Outbox full. Evicting %d messages from segment %d.", segment[1], oldestSegNo)
+
+			self._deleteSegment(oldestSegNo)
+
+			if oldestSegNo == self.cursorSegNo:
+				self._advanceCursorToOldestSegment()
+				self._saveCursor()
+
+	def _deleteSegment(self, segNo: int):
+		self.segments.pop(segNo, None)
+
+		try:
+			os.remove(self._getSegmentFileName(segNo))
+		except OSError as e:
+			logging.warning("Failed to delete outbox segment %d: %s", segNo, e)
+
+	def _advanceCursorToOldestSegment(self):
+		oldestSegNo = min(self.segments.keys())
+
+		if oldestSegNo != self.cursorSegNo:
+			self.cursorSegNo = oldestSegNo
+			self.cursorOffset = 0
+
+	def _loadCursor(self):
+		try:
+			with open(os.path.join(self.outboxPath, self.CURSOR_FILE), 'r') as cursorFile:
+				segNo, offset = cursorFile.read().split()
+
+				self.cursorSegNo = int(segNo)
+				self.cursorOffset = int(offset)
+		except FileNotFoundError:
+			pass
+		except (OSError, ValueError) as e:
+			logging.warning("Invalid outbox cursor. Replaying from the oldest segment: %s", e)
+
+			self.cursorSegNo = 0
+			self.cursorOffset = 0
+
+	def _saveCursor(self):
+		cursorFileName = os.path.join(self.outboxPath, self.CURSOR_FILE)
+		tmpFileName = cursorFileName + '.tmp'
+
+		try:
+			with open(tmpFileName, 'w') as cursorFile:
+				cursorFile.write(str(self.cursorSegNo) + ' ' + str(self.cursorOffset))
+				cursorFile.flush()
+
+				if self.fsyncPolicy != self.FSYNC_NEVER:
+					os.fsync(cursorFile.fileno())
+
+			# atomic on POSIX - a crash leaves either the old or the new cursor
+			os.replace(tmpFileName, cursorFileName)
+		except OSError as e:
+			logging.warning("Failed to save outbox cursor: %s", e)
+
+	def _syncIfNeeded(self):
+		if self.fsyncPolicy == self.FSYNC_ALWAYS:
+			self._syncActiveFile()
+		elif self.fsyncPolicy == self.FSYNC_INTERVAL and time.monotonic() - self.lastFsyncTime >= self.fsyncIntervalSecs:
+			self._syncActiveFile()
+
+	def _syncActiveFile(self):
+		if self.fsyncPolicy != self.FSYNC_NEVER:
+			os.fsync(self.activeFile.fileno())
+			self.lastFsyncTime = time.monotonic()
+
+	def _listSegmentNumbers(self) -> list:
+		segNos = []
+
+		for fileName in os.listdir(self.outboxPath):
+			if fileName.startswith(self.SEGMENT_PREFIX) and fileName.endswith(self.SEGMENT_SUFFIX):
+				try:
+					segNos.append(int(fileName[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+				except ValueError:
+					pass
+
+		return segNos
+
+	def _getSegmentFileName(self, segNo: int) -> str:
+		return os.path.join(self.outboxPath, self.SEGMENT_PREFIX + str(segNo).zfill(10) + self.SEGMENT_SUFFIX)
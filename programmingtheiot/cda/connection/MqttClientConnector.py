@@ -10,24 +10,48 @@
 # Programming the Internet of Things project.
 # 
 
+import asyncio
 import logging
+import socket
 import paho.mqtt.client as mqttClient
 
+from concurrent.futures import Future
+
 import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 
 from programmingtheiot.cda.connection.IPubSubClient import IPubSubClient
+from programmingtheiot.cda.connection.MqttLoopDriver import MqttLoopDriver
+from programmingtheiot.cda.connection.MqttPublishPipeline import MqttPublishPipeline
+from programmingtheiot.cda.connection.TopicTrie import TopicTrie
+
+from programmingtheiot.data.DataUtil import DataUtil
 
 class MqttClientConnector(IPubSubClient):
 	"""
-	Shell representation of class for student implementation.
+	MQTT client connector for the CDA.
+	
+	All inbound messages are routed through a TopicTrie, which maps topic
+	filters (including '+' and '#' wildcards) to a ResourceNameEnum and an
+	optional callback. Messages without a callback are passed to the data
+	message listener's handleIncomingMessage().
+	
+	If enablePublishPipeline is set, publishMessage() only queues the message
+	and returns; an MqttPublishPipeline keeps up to maxInflightMessages
+	unacknowledged at once. Use publishMessageAsync() to get a Future for
+	each message's completion.
+	
+	If an event loop is passed in (the AsyncDeviceRuntime's, in asyncio mode),
+	the client's network I/O runs on it, through an MqttLoopDriver, instead
+	of on paho's own network thread.
 	
 	"""
 
-	def __init__(self, clientID: str = None):
+	def __init__(self, clientID: str = None, eventLoop: asyncio.AbstractEventLoop = None):
 		"""
 		Default constructor. This will set remote broker information and client connection
 		information based on the default configuration file contents.
@@ -38,29 +62,173 @@ class MqttClientConnector(IPubSubClient):
 		auto-reconnect enabled, this can cause a race condition where each client with
 		the same clientID continuously attempts to re-connect, causing the broker to
 		disconnect the previous instance.
+		@param eventLoop The optional asyncio event loop to run the network I/O on,
+		which must be running (on another thread) while the client is connected.
 		"""
-		pass
+		self.config = ConfigUtil()
+		self.dataMsgListener = None
+		self.connectListener = None
+		self.dataUtil = DataUtil()
+		
+		self.host = self.config.getProperty(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.HOST_KEY, ConfigConst.DEFAULT_HOST)
+		self.port = self.config.getInteger(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_MQTT_PORT)
+		self.keepAlive = self.config.getInteger(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.KEEP_ALIVE_KEY, ConfigConst.DEFAULT_KEEP_ALIVE)
+		self.defaultQos = self.config.getInteger(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.DEFAULT_QOS_KEY, ConfigConst.DEFAULT_QOS)
+		
+		if not clientID:
+			clientID = self.config.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY, ConfigConst.CONSTRAINED_DEVICE)
+		
+		self.clientID = clientID
+		self.mqttClient = None
+		
+		self.eventLoop = eventLoop
+		self.loopDriver = None
+		
+		self.enablePublishPipeline = self.config.getBoolean(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.ENABLE_PUBLISH_PIPELINE_KEY)
+		self.maxInflight = self.config.getInteger(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.MAX_INFLIGHT_MESSAGES_KEY, ConfigConst.DEFAULT_MAX_INFLIGHT_MESSAGES)
+		self.publishQueueSize = self.config.getInteger(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.PUBLISH_QUEUE_SIZE_KEY, ConfigConst.DEFAULT_PUBLISH_QUEUE_SIZE)
+		self.publishPipeline = None
+		
+		# topic filter -> qos, for re-subscribing after a reconnect
+		self.subscriptionQos = {}
+		self.topicTrie = TopicTrie()
+		
+		# actuator commands are always routed to the listener as ActuatorData
+		self.topicTrie.subscribe(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, self.onActuatorCommandMessage)
+		self.subscriptionQos[ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value] = self.defaultQos
+		
+		metricsRegistry = MetricsRegistry()
+		self.publishedCounter = metricsRegistry.counter(ConfigConst.MQTT_PUBLISHED_METRIC, 'MQTT messages published (or queued, with the publish pipeline)')
+		self.publishFailedCounter = metricsRegistry.counter(ConfigConst.MQTT_PUBLISH_FAILED_METRIC, 'MQTT messages that could not be published')
+		self.receivedCounter = metricsRegistry.counter(ConfigConst.MQTT_RECEIVED_METRIC, 'MQTT messages received')
+		self.connectedGauge = metricsRegistry.gauge(ConfigConst.MQTT_CONNECTED_METRIC, '1 if connected to the MQTT broker; 0 otherwise')
+		
+		logging.info("MQTT client ID: %s, broker: %s:%d", self.clientID, self.host, self.port)
 
 	def connectClient(self) -> bool:
-		pass
+		if not self.mqttClient:
+			self.mqttClient = mqttClient.Client(client_id = self.clientID, clean_session = True)
+			
+			self.mqttClient.on_connect = self.onConnect
+			self.mqttClient.on_disconnect = self.onDisconnect
+			self.mqttClient.on_message = self.onMessage
+			self.mqttClient.on_publish = self.onPublish
+			self.mqttClient.on_subscribe = self.onSubscribe
+			
+			if self.enablePublishPipeline:
+				# paho's own window must not be the bottleneck
+				self.mqttClient.max_inflight_messages_set(self.maxInflight)
+				self.publishPipeline = MqttPublishPipeline(self.mqttClient, self.maxInflight, self.publishQueueSize)
+			
+			if self.eventLoop:
+				self.loopDriver = MqttLoopDriver(self.mqttClient, self.eventLoop)
+		
+		if self.publishPipeline:
+			self.publishPipeline.startPipeline()
+		
+		if not self.mqttClient.is_connected():
+			logging.info("MQTT client connecting to broker at host: %s", self.host)
+			
+			# the network loop connects (and reconnects) in the background, so an
+			# unreachable broker doesn't block or raise here
+			self.mqttClient.connect_async(self.host, self.port, self.keepAlive)
+			self._startNetworkLoop()
+			
+			return True
+		
+		logging.warning("MQTT client is already connected. Ignoring connect request.")
+		
+		return False
 		
 	def disconnectClient(self) -> bool:
-		pass
+		if self.publishPipeline:
+			if self.mqttClient.is_connected():
+				# give queued messages a chance to go out first
+				self.publishPipeline.flush(timeout = self.keepAlive)
+			
+			self.publishPipeline.stopPipeline()
+		
+		if self.mqttClient and self.mqttClient.is_connected():
+			self.mqttClient.disconnect()
+			self._stopNetworkLoop()
+			
+			return True
+		
+		if self.mqttClient:
+			# may still be trying to connect in the background
+			self._stopNetworkLoop()
+		
+		logging.warning("MQTT client already disconnected. Ignoring disconnect request.")
+		
+		return False
 		
 	def onConnect(self, client, userdata, flags, rc):
-		pass
+		logging.info("MQTT client connected to broker: %s (rc = %s)", self.host, str(rc))
+		
+		# paho leaves Nagle's algorithm on, which holds small packets (e.g. a
+		# publish right after an ack) for up to a delayed-ack timeout
+		sock = client.socket()
+		
+		if sock:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		
+		self.connectedGauge.set(1 if rc == 0 else 0)
+		
+		if self.publishPipeline:
+			self.publishPipeline.setConnected(rc == 0)
+		
+		# (re)subscribe to everything in the trie - with clean sessions, the broker forgets on disconnect
+		for topicFilter, qos in list(self.subscriptionQos.items()):
+			client.subscribe(topicFilter, qos)
+		
+		if rc == 0 and self.connectListener:
+			try:
+				self.connectListener()
+			except Exception as e:
+				logging.warning("MQTT connect listener failed: %s", e)
 		
 	def onDisconnect(self, client, userdata, rc):
-		pass
+		logging.info("MQTT client disconnected from broker: %s (rc = %s)", self.host, str(rc))
+		
+		self.connectedGauge.set(0)
+		
+		if self.publishPipeline:
+			self.publishPipeline.setConnected(False)
 		
 	def onMessage(self, client, userdata, msg):
-		pass
+		"""
+		Routes the message to every subscription whose topic filter matches its topic.
+		
+		"""
+		self.receivedCounter.inc()
+		
+		matches = self.topicTrie.match(msg.topic)
+		
+		if not matches:
+			logging.debug("No subscription matches MQTT topic: %s", msg.topic)
+			return
+		
+		for topicFilter, resource, callback in matches:
+			try:
+				if callback:
+					callback(client, userdata, msg)
+				elif self.dataMsgListener:
+					if not resource:
+						resource = ResourceNameEnum.parseResourcePath(msg.topic)[0]
+					
+					if resource:
+						self.dataMsgListener.handleIncomingMessage(resource, msg.payload.decode('utf-8'))
+					else:
+						logging.debug("No resource for MQTT topic %s (filter %s). Ignoring.", msg.topic, topicFilter)
+			except Exception as e:
+				logging.warning("Failed to handle MQTT message on topic %s (filter %s): %s", msg.topic, topicFilter, e)
 			
 	def onPublish(self, client, userdata, mid):
-		pass
+		if self.publishPipeline:
+			self.publishPipeline.onPublish(mid)
 	
 	def onSubscribe(self, client, userdata, mid, granted_qos):
-		pass
+		logging.debug("MQTT subscription acknowledged: mid = %s, qos = %s", str(mid), str(granted_qos))
 	
 	def onActuatorCommandMessage(self, client, userdata, msg):
 		"""
@@ -75,16 +243,163 @@ class MqttClientConnector(IPubSubClient):
 		@param userdata The user reference context.
 		@param msg The message context, including the embedded payload.
 		"""
-		pass
+		if self.dataMsgListener and msg.payload:
+			actuatorData = self.dataUtil.jsonToActuatorData(msg.payload.decode('utf-8'))
+			
+			self.dataMsgListener.handleActuatorCommandMessage(actuatorData)
 	
 	def publishMessage(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = ConfigConst.DEFAULT_QOS):
-		pass
+		if not resource or not msg:
+			logging.warning("No resource or message. Ignoring publish request.")
+			return False
+		
+		if not self.mqttClient or not self.mqttClient.is_connected():
+			logging.warning("MQTT client not connected. Ignoring publish request.")
+			self.publishFailedCounter.inc()
+			return False
+		
+		if qos < 0 or qos > 2:
+			qos = ConfigConst.DEFAULT_QOS
+		
+		if self.publishPipeline:
+			future = self.publishPipeline.publish(resource.value, msg, qos)
+			
+			# True if queued (or already sent); False only if dropped
+			isPublished = not future.done() or future.result()
+		else:
+			msgInfo = self.mqttClient.publish(topic = resource.value, payload = msg, qos = qos)
+			isPublished = msgInfo.rc == mqttClient.MQTT_ERR_SUCCESS
+		
+		if isPublished:
+			self.publishedCounter.inc()
+		else:
+			self.publishFailedCounter.inc()
+		
+		return isPublished
+	
+	def publishMessageAsync(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = ConfigConst.DEFAULT_QOS) -> Future:
+		"""
+		Publishes the message and returns a Future for its completion. With the
+		publish pipeline enabled, the Future resolves with True once the message
+		is sent (QoS 0) or acked by the broker (QoS 1 and 2). Without it, the
+		message is handed to paho immediately and the Future is already resolved.
+		
+		@param resource The topic Enum containing the topic value to publish the message to.
+		@param msg The message to publish.
+		@param qos The QoS level.
+		@return Future Resolves with True on success; False otherwise.
+		"""
+		if self.publishPipeline and resource and msg and self.mqttClient.is_connected():
+			if qos < 0 or qos > 2:
+				qos = ConfigConst.DEFAULT_QOS
+			
+			future = self.publishPipeline.publish(resource.value, msg, qos)
+			
+			if future.done() and not future.result():
+				self.publishFailedCounter.inc()
+			else:
+				self.publishedCounter.inc()
+			
+			return future
+		
+		future = Future()
+		future.set_result(self.publishMessage(resource = resource, msg = msg, qos = qos))
+		
+		return future
+	
+	def isConnected(self) -> bool:
+		"""
+		Returns True if the client is connected to the broker.
+		
+		@return bool
+		"""
+		return bool(self.mqttClient and self.mqttClient.is_connected())
+	
+	def getPublishStats(self) -> dict:
+		"""
+		Returns the publish pipeline stats, or None if the pipeline isn't enabled.
+		
+		@return dict
+		"""
+		return self.publishPipeline.getStats() if self.publishPipeline else None
 	
-	def subscribeToTopic(self, resource: ResourceNameEnum = None, callback = None, qos: int = ConfigConst.DEFAULT_QOS):
-		pass
+	def subscribeToTopic(self, resource: ResourceNameEnum = None, callback = None, qos: int = ConfigConst.DEFAULT_QOS, topicFilter: str = None):
+		"""
+		Subscribes to the resource's topic, or to 'topicFilter' if given (e.g. a
+		per-device or wildcard filter such as 'PIOT/ConstrainedDevice/+/SensorMsg').
+		Matching messages are mapped to 'resource'. If no resource is given, each
+		message is mapped to the resource its topic starts with (e.g. for a
+		'PIOT/ConstrainedDevice/#' filter).
+		
+		@param resource The resource to map matching messages to.
+		@param callback The optional callback (client, userdata, msg) for matching messages.
+		@param qos The QoS level.
+		@param topicFilter The optional topic filter. Defaults to the resource's topic.
+		@return bool True if the subscription was added; False otherwise.
+		"""
+		if not topicFilter:
+			if not resource:
+				logging.warning("No resource or topic filter. Ignoring subscribe request.")
+				return False
+			
+			topicFilter = resource.value
+		
+		if qos < 0 or qos > 2:
+			qos = ConfigConst.DEFAULT_QOS
+		
+		if not self.topicTrie.subscribe(topicFilter, resource, callback):
+			return False
+		
+		self.subscriptionQos[topicFilter] = qos
+		
+		# if not connected, onConnect() subscribes later
+		if self.mqttClient and self.mqttClient.is_connected():
+			self.mqttClient.subscribe(topicFilter, qos)
+		
+		return True
 	
-	def unsubscribeFromTopic(self, resource: ResourceNameEnum = None):
-		pass
+	def unsubscribeFromTopic(self, resource: ResourceNameEnum = None, topicFilter: str = None):
+		if not topicFilter:
+			if not resource:
+				return False
+			
+			topicFilter = resource.value
+		
+		if not self.topicTrie.unsubscribe(topicFilter):
+			return False
+		
+		self.subscriptionQos.pop(topicFilter, None)
+		
+		if self.mqttClient and self.mqttClient.is_connected():
+			self.mqttClient.unsubscribe(topicFilter)
+		
+		return True
 
 	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
-		pass
+		if listener:
+			self.dataMsgListener = listener
+			return True
+		
+		return False
+	
+	def setConnectListener(self, listener = None):
+		"""
+		Sets the function to call (with no arguments) each time the client
+		connects - or reconnects - to the broker, e.g. MessageOutbox.notifyConnected().
+		It's called on the client's network thread (or event loop).
+		
+		@param listener The listener, or None to remove it.
+		"""
+		self.connectListener = listener
+	
+	def _startNetworkLoop(self):
+		if self.loopDriver:
+			self.loopDriver.startDriver()
+		else:
+			self.mqttClient.loop_start()
+		
+	def _stopNetworkLoop(self):
+		if self.loopDriver:
+			self.loopDriver.stopDriver()
+		else:
+			self.mqttClient.loop_stop()
@@ -0,0 +1,192 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+
+import paho.mqtt.client as mqttClient
+
+class MqttLoopDriver():
+	"""
+	Drives a paho MQTT client's network I/O from an asyncio event loop (such
+	as the AsyncDeviceRuntime's), instead of paho's own network thread
+	(loop_start()).
+
+	paho tells the driver when its socket opens and closes, and when it has
+	data to write; the driver registers the socket with the event loop, which
+	calls loop_read() / loop_write() when it's ready. A task on the loop calls
+	loop_misc() once a second (for keep-alive pings), and connects - and
+	reconnects, backing off up to RECONNECT_MAX_DELAY_SECS - whenever the
+	client has no socket. The blocking connect itself runs on the loop's
+	default executor.
+
+	NOTE: paho's socket callbacks are made on whichever thread is calling
+	into the client (e.g. the publish pipeline's sender), so registrations
+	from other threads are handed to the loop with call_soon_threadsafe().
+	Those calls may run after the socket was closed or replaced, so each
+	checks it's still the client's socket; and the writer unregisters
+	itself once paho has nothing left to write, so it can't spin on a
+	stale registration.
+
+	"""
+
+	MISC_INTERVAL_SECS = 1.0
+
+	RECONNECT_MIN_DELAY_SECS = 1.0
+	RECONNECT_MAX_DELAY_SECS = 120.0
+
+	def __init__(self, client: mqttClient.Client, loop: asyncio.AbstractEventLoop):
+		"""
+		Constructor. Takes over the client's socket callbacks.
+
+		@param client The paho client, which must not use loop_start().
+		@param loop The event loop to run the client's network I/O on.
+		"""
+		self.client = client
+		self.loop = loop
+
+		self.miscFuture = None
+		self.isRunning = False
+
+		client.on_socket_open = self._onSocketOpen
+		client.on_socket_close = self._onSocketClose
+		client.on_socket_register_write = self._onSocketRegisterWrite
+		client.on_socket_unregister_write = self._onSocketUnregisterWrite
+
+	def startDriver(self) -> bool:
+		"""
+		Starts connecting (after connect_async()) and servicing the client on
+		the event loop, which must be running.
+
+		@return bool True if started; False if already running, or the loop isn't.
+		"""
+		if self.isRunning:
+			return False
+
+		if not self.loop.is_running():
+			logging.error("Event loop not running. Can't drive MQTT client.")
+
+			return False
+
+		self.isRunning = True
+		self.miscFuture = asyncio.run_coroutine_threadsafe(self._runMisc(), self.loop)
+
+		return True
+
+	def stopDriver(self, timeout: float = 1.0):
+		"""
+		Stops connecting and servicing the client. Called after disconnect(),
+		this waits (up to timeout) for the DISCONNECT to go out and the socket
+		to close.
+
+		@param timeout The max number of seconds to wait for the socket to close.
+		"""
+		if not self.isRunning:
+			return
+
+		self.isRunning = False
+
+		if self.miscFuture:
+			self.miscFuture.cancel()
+			self.miscFuture = None
+
+		try:
+			asyncio.run_coroutine_threadsafe(self._awaitSocketClosed(timeout), self.loop).result(timeout + 1.0)
+		except Exception as e:
+			logging.warning("Failed to wait for MQTT socket to close: %s", e)
+
+	async def _runMisc(self):
+		reconnectDelaySecs = self.RECONNECT_MIN_DELAY_SECS
+
+		while self.isRunning:
+			if self.client.socket() is None:
+				try:
+					await self.loop.run_in_executor(None, self.client.reconnect)
+
+					reconnectDelaySecs = self.RECONNECT_MIN_DELAY_SECS
+				except Exception as e:
+					logging.debug("MQTT connect failed (retrying in %.0f secs): %s", reconnectDelaySecs, e)
+
+					await asyncio.sleep(reconnectDelaySecs)
+
+					reconnectDelaySecs = min(reconnectDelaySecs * 2, self.RECONNECT_MAX_DELAY_SECS)
+
+				continue
+
+			self.client.loop_misc()
+
+			await asyncio.sleep(self.MISC_INTERVAL_SECS)
+
+	async def _awaitSocketClosed(self, timeout: float):
+		endTime = self.loop.time() + timeout
+
+		while self.client.socket() is not None and self.loop.time() < endTime:
+			await asyncio.sleep(0.01)
+
+	def _onSocketOpen(self, client, userdata, sock):
+		self._callOnLoop(self._addReader, sock)
+
+	def _onSocketClose(self, client, userdata, sock):
+		# paho closes the socket straight after, so its fd is read now
+		self._callOnLoop(self._removeSocket, sock.fileno())
+
+	def _onSocketRegisterWrite(self, client, userdata, sock):
+		self._callOnLoop(self._addWriter, sock)
+
+	def _onSocketUnregisterWrite(self, client, userdata, sock):
+		self._callOnLoop(self._removeWriter, sock.fileno())
+
+	def _callOnLoop(self, func, *args):
+		try:
+			isLoopThread = asyncio.get_running_loop() is self.loop
+		except RuntimeError:
+			isLoopThread = False
+
+		if isLoopThread:
+			func(*args)
+		else:
+			self.loop.call_soon_threadsafe(func, *args)
+
+	def _addReader(self, sock):
+		# may have been closed (or replaced) since
+		if self.client.socket() is sock:
+			self.loop.add_reader(sock, self.client.loop_read)
+
+	def _addWriter(self, sock):
+		if self.client.socket() is sock and self.client.want_write():
+			self.loop.add_writer(sock, self._handleWritable, sock)
+
+	def _handleWritable(self, sock):
+		self.client.loop_write()
+
+		if self.client.socket() is sock and not self.client.want_write():
+			self.loop.remove_writer(sock)
+
+	def _removeWriter(self, fd: int):
+		sock = self.client.socket()
+
+		# something may have been queued since paho asked for this
+		if sock and sock.fileno() == fd and self.client.want_write():
+			return
+
+		self._removeFd(self.loop.remove_writer, fd)
+
+	def _removeSocket(self, fd: int):
+		self._removeFd(self.loop.remove_reader, fd)
+		self._removeFd(self.loop.remove_writer, fd)
+
+	def _removeFd(self, removeFunc, fd: int):
+		try:
+			removeFunc(fd)
+		except OSError:
+			# already closed - the selector has dropped it
+			pass
@@ -0,0 +1,277 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future
+
+import paho.mqtt.client as mqttClient
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+class MqttPublishPipeline():
+	"""
+	Pipelined publishing for a paho MQTT client. Callers enqueue messages and
+	get a Future back immediately; a single sender thread feeds the queue to
+	paho while keeping at most 'maxInflight' messages unacknowledged.
+
+	Completion is tracked by message ID: paho's on_publish callback (forwarded
+	to onPublish()) resolves the matching Future with True. For QoS 0, that's
+	when the message is written to the socket; for QoS 1 and 2, it's when the
+	broker acknowledges it. Futures for messages that couldn't be sent, or
+	were still queued when the pipeline stopped, resolve with False.
+
+	NOTE: onPublish() can be called by paho's network thread before publish()
+	has returned the message ID to the sender thread, so acks that arrive
+	while a publish() call is in progress are remembered until the sender
+	records the ID. Acks for any other unknown ID (e.g. paho resending a
+	message after a reconnect) are ignored, so a stale one can't complete a
+	later message that reuses the ID. The sender never holds the
+	pipeline's lock while calling into paho, since paho holds its own locks
+	while calling on_publish.
+
+	"""
+
+	def __init__(self, client: mqttClient.Client, maxInflight: int = ConfigConst.DEFAULT_MAX_INFLIGHT_MESSAGES, \
+		maxQueueSize: int = ConfigConst.DEFAULT_PUBLISH_QUEUE_SIZE):
+		"""
+		Constructor.
+
+		@param client The paho client to publish with.
+		@param maxInflight The max number of unacknowledged messages.
+		@param maxQueueSize The max number of messages waiting to be handed to paho.
+		"""
+		self.client = client
+		self.maxInflight = max(1, maxInflight)
+		self.maxQueueSize = max(1, maxQueueSize)
+
+		# each item is (topic, payload, qos, future)
+		self.sendQueue = deque()
+
+		# mid -> (future, publishTime)
+		self.pending = {}
+		self.earlyAcks = set()
+		self.inflightCount = 0
+
+		# True while the sender is in client.publish(), before it knows the mid
+		self.isPublishing = False
+
+		# incremented on each disconnect, which fails everything in flight
+		self.disconnectCount = 0
+
+		self.cond = threading.Condition()
+		self.senderThread = None
+		self.isRunning = False
+		self.isConnected = False
+
+		self.queuedCount = 0
+		self.ackedCount = 0
+		self.failedCount = 0
+		self.totalAckSecs = 0.0
+
+	def publish(self, topic: str, payload, qos: int = ConfigConst.DEFAULT_QOS) -> Future:
+		"""
+		Queues the message for publishing.
+
+		@param topic The topic to publish to.
+		@param payload The message payload.
+		@param qos The QoS level.
+		@return Future Resolves with True once the message is published (and acked
+		for QoS 1 and 2), or False if it was dropped or couldn't be sent.
+		"""
+		future = Future()
+
+		with self.cond:
+			if not self.isRunning or len(self.sendQueue) >= self.maxQueueSize:
+				self.failedCount += 1
+				future.set_result(False)
+
+				return future
+
+			self.sendQueue.append((topic, payload, qos, future))
+			self.queuedCount += 1
+			self.cond.notify_all()
+
+		return future
+
+	def onPublish(self, mid: int):
+		"""
+		Call from the paho on_publish callback.
+
+		@param mid The message ID paho assigned to the publish.
+		"""
+		with self.cond:
+			entry = self.pending.pop(mid, None)
+
+			if not entry:
+				if self.isPublishing:
+					self.earlyAcks.add(mid)
+
+				return
+
+			self._completeInflight(entry[1])
+			self.cond.notify_all()
+
+		entry[0].set_result(True)
+
+	def setConnected(self, isConnected: bool):
+		"""
+		Call from the paho on_connect and on_disconnect callbacks. The sender
+		only hands messages to paho while connected.
+
+		@param isConnected True if connected; False otherwise.
+		"""
+		failed = []
+
+		with self.cond:
+			self.isConnected = isConnected
+
+			if not isConnected:
+				# clean session - the broker won't ack anything from the old session
+				failed = [entry[0] for entry in self.pending.values()]
+
+				self.failedCount += len(failed)
+				self.inflightCount -= len(failed)
+				self.pending.clear()
+				self.earlyAcks.clear()
+				self.disconnectCount += 1
+
+			self.cond.notify_all()
+
+		for future in failed:
+			future.set_result(False)
+
+	def getInflightCount(self) -> int:
+		with self.cond:
+			return self.inflightCount
+
+	def getStats(self) -> dict:
+		"""
+		Returns the queued, acked and failed counts, the current queue depth and
+		in-flight count, and the average time from publish to ack.
+
+		@return dict
+		"""
+		with self.cond:
+			return {
+				ConfigConst.ENQUEUED_COUNT_PROP:  self.queuedCount,
+				ConfigConst.ACKED_COUNT_PROP:     self.ackedCount,
+				ConfigConst.FAILED_COUNT_PROP:    self.failedCount,
+				ConfigConst.QUEUE_DEPTH_PROP:     len(self.sendQueue),
+				ConfigConst.INFLIGHT_COUNT_PROP:  self.inflightCount,
+				ConfigConst.AVG_ACK_MILLIS_PROP:  (1000.0 * self.totalAckSecs / self.ackedCount) if self.ackedCount else 0.0
+			}
+
+	def flush(self, timeout: float = None) -> bool:
+		"""
+		Waits until every queued message has been acked (or has failed), or
+		the connection is lost (queued messages can't drain until it's back).
+
+		@param timeout The max number of seconds to wait. None waits forever.
+		@return bool True if the pipeline drained in time; False otherwise.
+		"""
+		with self.cond:
+			self.cond.wait_for(lambda: not self.isConnected or (not self.sendQueue and self.inflightCount == 0), timeout)
+
+			return not self.sendQueue and self.inflightCount == 0
+
+	def startPipeline(self):
+		with self.cond:
+			if self.isRunning:
+				return
+
+			self.isRunning = True
+
+		self.senderThread = threading.Thread(target = self._runSenderLoop, name = 'MqttPublishPipeline', daemon = True)
+		self.senderThread.start()
+
+		logging.info("MQTT publish pipeline started: maxInflight=%d, maxQueueSize=%d", self.maxInflight, self.maxQueueSize)
+
+	def stopPipeline(self):
+		"""
+		Stops the sender thread. Messages still queued fail; messages already
+		in flight are left for paho to complete.
+
+		"""
+		with self.cond:
+			self.isRunning = False
+
+			failed = [item[3] for item in self.sendQueue]
+
+			self.failedCount += len(failed)
+			self.sendQueue.clear()
+			self.cond.notify_all()
+
+		if self.senderThread:
+			self.senderThread.join()
+			self.senderThread = None
+
+		for future in failed:
+			future.set_result(False)
+
+		logging.info("MQTT publish pipeline stopped: %s", str(self.getStats()))
+
+	def _completeInflight(self, publishTime: float):
+		# must be called with self.cond held
+		self.inflightCount -= 1
+		self.ackedCount += 1
+		self.totalAckSecs += time.monotonic() - publishTime
+
+	def _runSenderLoop(self):
+		while True:
+			with self.cond:
+				self.cond.wait_for(lambda: not self.isRunning or \
+					(self.isConnected and self.sendQueue and self.inflightCount < self.maxInflight))
+
+				if not self.isRunning:
+					return
+
+				topic, payload, qos, future = self.sendQueue.popleft()
+				self.inflightCount += 1
+				self.isPublishing = True
+
+				disconnectCount = self.disconnectCount
+
+			publishTime = time.monotonic()
+
+			try:
+				msgInfo = self.client.publish(topic = topic, payload = payload, qos = qos)
+				rc = msgInfo.rc
+			except Exception as e:
+				logging.warning("Failed to publish to %s: %s", topic, e)
+				rc = mqttClient.MQTT_ERR_UNKNOWN
+
+			isAcked = False
+
+			with self.cond:
+				if rc != mqttClient.MQTT_ERR_SUCCESS or disconnectCount != self.disconnectCount:
+					# if disconnected meanwhile, it missed being failed with the rest in flight
+					self.inflightCount -= 1
+					self.failedCount += 1
+				elif msgInfo.mid in self.earlyAcks:
+					self._completeInflight(publishTime)
+					isAcked = True
+				else:
+					self.pending[msgInfo.mid] = (future, publishTime)
+					future = None
+
+				# anything else acked meanwhile wasn't ours
+				self.isPublishing = False
+				self.earlyAcks.clear()
+
+				self.cond.notify_all()
+
+			if future:
+				future.set_result(isAcked)
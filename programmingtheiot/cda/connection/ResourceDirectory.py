@@ -0,0 +1,156 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import re
+import time
+
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+# one link: '<target>' followed by its ';' separated parameters (quoted values may contain ',' or ';')
+_LINK_PATTERN = re.compile(r'<([^>]*)>((?:\s*;\s*[^;,="\s]+(?:\s*=\s*(?:"[^"]*"|[^;,]*))?)*)')
+
+_PARAM_PATTERN = re.compile(r';\s*([^;,="\s]+)(?:\s*=\s*("[^"]*"|[^;,]*))?')
+
+class ResourceDirectory():
+	"""
+	In-memory directory of a CoAP server's resources, built from its
+	'/.well-known/core' (RFC 6690 link-format) response and valid for
+	ttlSecs after each update.
+
+	Each resource path maps to its link attributes (e.g. 'rt', 'ct',
+	'obs'); flag attributes without a value map to True. Paths under a
+	known ResourceNameEnum are also indexed by enum and name, so resource
+	lookups never need a round trip to the server.
+
+	The directory's contents are replaced as a whole on update, so
+	readers (on any thread) never see a partial update.
+
+	"""
+
+	def __init__(self, ttlSecs: float = ConfigConst.DEFAULT_DISCOVERY_TTL):
+		"""
+		Constructor.
+
+		@param ttlSecs How long the directory is valid after an update.
+		"""
+		self.ttlSecs = ttlSecs
+
+		# (path -> attributes, (ResourceNameEnum, name) -> attributes, expiry time)
+		self.entries = (MappingProxyType({}), {}, 0.0)
+
+	def clear(self):
+		self.entries = (MappingProxyType({}), {}, 0.0)
+
+	def getResources(self) -> MappingProxyType:
+		"""
+		Returns the (read-only) path to attributes mapping, even if expired.
+
+		@return MappingProxyType
+		"""
+		return self.entries[0]
+
+	def getResourceNames(self, resource: ResourceNameEnum = None) -> list:
+		"""
+		Returns the names of the discovered resources under 'resource' (None
+		for the resource path itself, if that was discovered).
+
+		@param resource The resource enum.
+		@return list
+		"""
+		return [name for resourceEnum, name in self.entries[1] if resourceEnum == resource]
+
+	def getTimeToExpiry(self) -> float:
+		"""
+		Returns the number of seconds until the directory expires (zero or
+		less if it has).
+
+		@return float
+		"""
+		return self.entries[2] - time.monotonic()
+
+	def isValid(self) -> bool:
+		"""
+		Returns True if the directory was updated within the last ttlSecs.
+
+		@return bool
+		"""
+		return self.getTimeToExpiry() > 0
+
+	def lookupResource(self, resource: ResourceNameEnum = None, name: str = None) -> dict:
+		"""
+		Returns the attributes of the discovered resource, even if expired.
+
+		@param resource The resource enum.
+		@param name The optional name appended to the resource path.
+		@return dict The attributes, or None if the resource wasn't discovered.
+		"""
+		return self.entries[1].get((resource, name if name else None))
+
+	def update(self, linkFormat: str = None) -> int:
+		"""
+		Replaces the directory's contents with the resources listed in the
+		link-format payload, valid for another ttlSecs.
+
+		@param linkFormat The link-format payload.
+		@return int The number of resources.
+		"""
+		resources = ResourceDirectory.parseLinkFormat(linkFormat)
+		resourcesByName = {}
+
+		for path, attributes in resources.items():
+			resource, name = ResourceNameEnum.parseResourcePath(path)
+
+			if resource:
+				resourcesByName[(resource, name)] = attributes
+
+		self.entries = (MappingProxyType(resources), resourcesByName, time.monotonic() + self.ttlSecs)
+
+		logging.debug("Resource directory updated: %d resources (%d known).", len(resources), len(resourcesByName))
+
+		return len(resources)
+
+	@staticmethod
+	def parseLinkFormat(linkFormat: str = None) -> dict:
+		"""
+		Parses a link-format payload into a path to attributes mapping. Link
+		targets may be relative paths or absolute URIs; either way, only the
+		path (without leading '/') is kept.
+
+		@param linkFormat The link-format payload.
+		@return dict
+		"""
+		resources = {}
+
+		if not linkFormat:
+			return resources
+
+		for link in _LINK_PATTERN.finditer(linkFormat):
+			path = urlsplit(link.group(1).strip()).path.strip('/')
+			attributes = {}
+
+			for key, value in _PARAM_PATTERN.findall(link.group(2)):
+				if not value:
+					attributes[key] = True
+				elif value.startswith('"') and value.endswith('"'):
+					attributes[key] = value[1:-1]
+				else:
+					attributes[key] = value.strip()
+
+			resources[path] = attributes
+
+		return resources
@@ -0,0 +1,268 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class TopicTrieNode():
+	"""
+	A single topic level in the TopicTrie.
+
+	"""
+
+	__slots__ = ('children', 'subscription')
+
+	def __init__(self):
+		self.children = {}
+
+		# (topicFilter, resource, callback), or None if no filter ends here
+		self.subscription = None
+
+class TopicTrie():
+	"""
+	Maps MQTT topic filters (including the '+' single level and '#' multi level
+	wildcards) to a ResourceNameEnum and an optional callback, and finds every
+	subscription matching a concrete topic.
+
+	Matching walks one trie level per topic level, so its cost depends on the
+	topic depth rather than the number of subscriptions. Results for concrete
+	topics are cached until the subscriptions change. The cache is bounded; when
+	full, the oldest entry is dropped.
+
+	Per the MQTT spec, topics starting with '$' (e.g. '$SYS/...') are not
+	matched by filters starting with a wildcard.
+
+	"""
+
+	LEVEL_SEP        = '/'
+	SINGLE_LEVEL     = '+'
+	MULTI_LEVEL      = '#'
+	SYS_TOPIC_PREFIX = '$'
+
+	DEFAULT_MAX_CACHE_SIZE = 1024
+
+	def __init__(self, maxCacheSize: int = DEFAULT_MAX_CACHE_SIZE):
+		"""
+		Constructor.
+
+		@param maxCacheSize The max number of resolved topics to cache. 0 disables the cache.
+		"""
+		self.root = TopicTrieNode()
+		self.maxCacheSize = max(0, maxCacheSize)
+
+		self.subscriptionCount = 0
+		self.cache = {}
+
+		self.lock = threading.Lock()
+
+	def subscribe(self, topicFilter: str, resource: ResourceNameEnum = None, callback = None) -> bool:
+		"""
+		Adds (or replaces) the subscription for the topic filter.
+
+		@param topicFilter The topic filter, which may contain '+' and '#' wildcards.
+		@param resource The resource to map matching topics to.
+		@param callback The optional callback for matching messages.
+		@return bool True if the filter is valid and was added; False otherwise.
+		"""
+		if not self.isValidTopicFilter(topicFilter):
+			logging.warning("Invalid MQTT topic filter: %s", topicFilter)
+			return False
+
+		with self.lock:
+			node = self.root
+
+			for level in topicFilter.split(self.LEVEL_SEP):
+				child = node.children.get(level)
+
+				if not child:
+					child = TopicTrieNode()
+					node.children[level] = child
+
+				node = child
+
+			if not node.subscription:
+				self.subscriptionCount += 1
+
+			node.subscription = (topicFilter, resource, callback)
+			self.cache.clear()
+
+		return True
+
+	def unsubscribe(self, topicFilter: str) -> bool:
+		"""
+		Removes the subscription for the topic filter, pruning any trie levels
+		that are no longer needed.
+
+		@param topicFilter The topic filter used to subscribe.
+		@return bool True if the subscription existed and was removed; False otherwise.
+		"""
+		if not topicFilter:
+			return False
+
+		with self.lock:
+			path = []
+			node = self.root
+
+			for level in topicFilter.split(self.LEVEL_SEP):
+				child = node.children.get(level)
+
+				if not child:
+					return False
+
+				path.append((node, level))
+				node = child
+
+			if not node.subscription:
+				return False
+
+			node.subscription = None
+			self.subscriptionCount -= 1
+
+			for parent, level in reversed(path):
+				child = parent.children[level]
+
+				if child.subscription or child.children:
+					break
+
+				del parent.children[level]
+
+			self.cache.clear()
+
+		return True
+
+	def match(self, topic: str) -> tuple:
+		"""
+		Finds every subscription whose filter matches the concrete topic.
+
+		@param topic The topic of the received message.
+		@return tuple A tuple of (topicFilter, resource, callback) tuples. Empty if nothing matches.
+		"""
+		matches = self.cache.get(topic)
+
+		if matches is not None:
+			return matches
+
+		with self.lock:
+			matches = self._match(topic)
+
+			if self.maxCacheSize:
+				if len(self.cache) >= self.maxCacheSize:
+					# dicts keep insertion order, so this drops the oldest entry
+					del self.cache[next(iter(self.cache))]
+
+				self.cache[topic] = matches
+
+		return matches
+
+	def getSubscriptionCount(self) -> int:
+		return self.subscriptionCount
+
+	def getTopicFilters(self) -> list:
+		"""
+		Returns every subscribed topic filter, e.g. to re-subscribe after a reconnect.
+
+		@return list
+		"""
+		topicFilters = []
+
+		with self.lock:
+			nodes = [self.root]
+
+			while nodes:
+				node = nodes.pop()
+
+				if node.subscription:
+					topicFilters.append(node.subscription[0])
+
+				nodes.extend(node.children.values())
+
+		return topicFilters
+
+	def clear(self):
+		with self.lock:
+			self.root = TopicTrieNode()
+			self.subscriptionCount = 0
+			self.cache.clear()
+
+	@staticmethod
+	def isValidTopicFilter(topicFilter: str) -> bool:
+		"""
+		Checks the topic filter against the MQTT 3.1.1 rules: wildcards must
+		occupy a whole level, and '#' may only be the last level.
+
+		@param topicFilter The topic filter.
+		@return bool
+		"""
+		if not topicFilter:
+			return False
+
+		levels = topicFilter.split(TopicTrie.LEVEL_SEP)
+
+		for i, level in enumerate(levels):
+			if level == TopicTrie.MULTI_LEVEL:
+				if i != len(levels) - 1:
+					return False
+			elif level != TopicTrie.SINGLE_LEVEL and (TopicTrie.SINGLE_LEVEL in level or TopicTrie.MULTI_LEVEL in level):
+				return False
+
+		return True
+
+	def _match(self, topic: str) -> tuple:
+		# must be called with self.lock held
+		if not topic:
+			return ()
+
+		levels = topic.split(self.LEVEL_SEP)
+		isSysTopic = topic.startswith(self.SYS_TOPIC_PREFIX)
+
+		matches = []
+		nodes = [self.root]
+
+		for i, level in enumerate(levels):
+			allowWildcard = i > 0 or not isSysTopic
+			nextNodes = []
+
+			for node in nodes:
+				if allowWildcard:
+					multiLevel = node.children.get(self.MULTI_LEVEL)
+
+					if multiLevel and multiLevel.subscription:
+						matches.append(multiLevel.subscription)
+
+					singleLevel = node.children.get(self.SINGLE_LEVEL)
+
+					if singleLevel:
+						nextNodes.append(singleLevel)
+
+				child = node.children.get(level)
+
+				if child:
+					nextNodes.append(child)
+
+			nodes = nextNodes
+
+			if not nodes:
+				break
+
+		for node in nodes:
+			if node.subscription:
+				matches.append(node.subscription)
+
+			# 'a/b/#' also matches 'a/b'
+			multiLevel = node.children.get(self.MULTI_LEVEL)
+
+			if multiLevel and multiLevel.subscription:
+				matches.append(multiLevel.subscription)
+
+		return tuple(matches)
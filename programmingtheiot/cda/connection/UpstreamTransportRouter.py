@@ -0,0 +1,361 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import functools
+import logging
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class UpstreamTransportRouter():
+	"""
+	Routes each upstream message over one of several transports (e.g. the
+	MQTT and CoAP client connectors), picking the best healthy one per
+	resource, and fails over to the next one if a send fails.
+
+	A transport is added with a send function, which takes the resource
+	and message and returns a Future that resolves with True once the
+	message is delivered (e.g. MqttClientConnector.publishMessageAsync()),
+	and an optional function returning its connection state.
+
+	Each transport's health is tracked from its sends: a smoothed RTT (the
+	time until its Future resolves), and the error rate over its last
+	windowSize results. A transport is unhealthy while disconnected, or
+	for retryIntervalSecs once its error rate exceeds maxErrorRate; after
+	that, the next message probes it again.
+
+	Each resource sticks to its current transport while that's healthy,
+	unless another healthy one is ROUTER_SWITCH_RATIO times faster (in
+	RTT, allowing for its error rate), so resources don't flap between
+	transports of similar speed.
+
+	A message whose send fails - right away, or later, e.g. when a
+	disconnect fails the messages an MQTT publish pipeline has in flight -
+	is sent again over the next healthy transport. The Future returned by
+	routeMessage() only resolves with False once every healthy transport
+	has failed, so the caller can keep the message (e.g. in the outbox)
+	rather than it being dropped.
+
+	A listener set with setHealthyListener() is called when a transport
+	that was unhealthy is found healthy again (it reconnected, or its retry
+	interval is over), so messages kept elsewhere can be sent again right
+	away. Health is checked as messages are routed.
+
+	"""
+
+	def __init__(self, windowSize: int = None, maxErrorRate: float = None, retryIntervalSecs: float = None):
+		"""
+		Constructor. Any setting that's None is read from the
+		ConstrainedDevice section of the config.
+
+		@param windowSize The number of recent results a transport's error rate is based on.
+		@param maxErrorRate The error rate (0 - 1) above which a transport is skipped.
+		@param retryIntervalSecs How long an unhealthy transport is skipped before it's tried again.
+		"""
+		configUtil = ConfigUtil()
+		section = ConfigConst.CONSTRAINED_DEVICE
+
+		if windowSize is None:
+			windowSize = configUtil.getInteger(section, ConfigConst.ROUTER_WINDOW_SIZE_KEY, ConfigConst.DEFAULT_ROUTER_WINDOW_SIZE)
+
+		if maxErrorRate is None:
+			maxErrorRate = configUtil.getFloat(section, ConfigConst.ROUTER_MAX_ERROR_RATE_KEY, ConfigConst.DEFAULT_ROUTER_MAX_ERROR_RATE)
+
+		if retryIntervalSecs is None:
+			retryIntervalSecs = configUtil.getFloat(section, ConfigConst.ROUTER_RETRY_INTERVAL_SECS_KEY, ConfigConst.DEFAULT_ROUTER_RETRY_INTERVAL_SECS)
+
+		self.windowSize = max(1, windowSize)
+		self.maxErrorRate = min(max(0.0, maxErrorRate), 1.0)
+		self.retryIntervalSecs = max(0.0, retryIntervalSecs)
+
+		self.lock = threading.Lock()
+
+		# in the order added, which breaks ties between transports
+		self.transports = []
+
+		# resource -> the transport it was last routed over
+		self.routes = {}
+
+		self.failoverCount = 0
+		self.healthyListener = None
+
+		self.metricsRegistry = MetricsRegistry()
+		self.failoverCounter = self.metricsRegistry.counter(ConfigConst.UPSTREAM_FAILOVER_METRIC, 'Upstream messages sent again over another transport')
+
+	def addTransport(self, name: str = None, sendFunc = None, isConnectedFunc = None) -> bool:
+		"""
+		Adds a transport. Transports added first are preferred while there's
+		nothing to tell them apart.
+
+		@param name The transport name (e.g. 'mqtt'), used for logging and stats.
+		@param sendFunc The function to call as sendFunc(resource, msg). Must return a Future.
+		@param isConnectedFunc The optional function returning the transport's connection
+		state. If None, the transport is always considered connected.
+		@return bool True if the transport was added; False otherwise.
+		"""
+		if not name or not sendFunc:
+			logging.warning("No transport name or send function. Ignoring upstream transport.")
+
+			return False
+
+		transport = _Transport(name, sendFunc, isConnectedFunc, self.windowSize)
+
+		with self.lock:
+			self.transports.append(transport)
+
+		self.metricsRegistry.gauge(ConfigConst.UPSTREAM_HEALTHY_METRIC, '1 if the upstream transport is healthy; 0 otherwise', \
+			labels = {'transport': name}).setFunction(lambda: 1 if self._isHealthy(transport, time.monotonic()) else 0)
+
+		logging.info("Added upstream transport: %s", name)
+
+		return True
+
+	def setHealthyListener(self, listener = None):
+		"""
+		Sets the function to call (with no arguments) when an unhealthy
+		transport is healthy again, e.g. MessageOutbox.notifyConnected().
+
+		@param listener The listener, or None to remove it.
+		"""
+		self.healthyListener = listener
+
+	def routeMessage(self, resource: ResourceNameEnum = None, msg: str = None) -> Future:
+		"""
+		Sends the message over the best healthy transport for the resource,
+		failing over to the others as needed.
+
+		@param resource The resource the message is destined for.
+		@param msg The message.
+		@return Future Resolves with True once a transport delivered the message,
+		or False if every healthy transport failed (or there was none).
+		"""
+		future = Future()
+
+		if not resource or not msg:
+			logging.warning("No resource or message. Ignoring upstream message.")
+			future.set_result(False)
+
+			return future
+
+		self._sendMessage(resource, msg, future, set())
+
+		return future
+
+	def getStats(self) -> dict:
+		"""
+		Returns each transport's health and counters, the transport each
+		resource is currently routed over, and the number of failovers.
+
+		@return dict
+		"""
+		now = time.monotonic()
+
+		with self.lock:
+			return { \
+				ConfigConst.TRANSPORTS_PROP: {transport.name: self._getTransportStats(transport, now) for transport in self.transports}, \
+				ConfigConst.ROUTES_PROP: {resource.name: name for resource, name in self.routes.items()}, \
+				ConfigConst.FAILOVER_COUNT_PROP: self.failoverCount}
+
+	def _sendMessage(self, resource: ResourceNameEnum, msg: str, future: Future, triedNames: set):
+		# at most once per transport, so the recursion through _handleSendResult() is bounded
+		while True:
+			transport = self._selectTransport(resource, triedNames)
+
+			if not transport:
+				logging.warning("No healthy upstream transport left for %s.", resource.name)
+				future.set_result(False)
+
+				return
+
+			if triedNames:
+				self._countFailover(transport, resource)
+
+			triedNames.add(transport.name)
+			sendTime = time.monotonic()
+
+			try:
+				sendFuture = transport.sendFunc(resource, msg)
+			except Exception as e:
+				logging.warning("Upstream transport %s failed to send to %s: %s", transport.name, resource.name, e)
+				sendFuture = None
+
+			if sendFuture:
+				sendFuture.add_done_callback(functools.partial(self._handleSendResult, transport, resource, msg, future, triedNames, sendTime))
+
+				return
+
+			self._recordResult(transport, False, sendTime)
+
+	def _handleSendResult(self, transport, resource: ResourceNameEnum, msg: str, future: Future, triedNames: set, sendTime: float, sendFuture: Future):
+		try:
+			isSent = bool(sendFuture.result())
+		except Exception as e:
+			logging.warning("Upstream transport %s failed to send to %s: %s", transport.name, resource.name, e)
+			isSent = False
+
+		self._recordResult(transport, isSent, sendTime)
+
+		if isSent:
+			future.set_result(True)
+		else:
+			self._sendMessage(resource, msg, future, triedNames)
+
+	def _selectTransport(self, resource: ResourceNameEnum, triedNames: set):
+		now = time.monotonic()
+		recoveredNames = []
+
+		with self.lock:
+			for transport in self.transports:
+				if self._updateHealth(transport, self._isHealthy(transport, now)):
+					recoveredNames.append(transport.name)
+
+			candidates = [transport for transport in self.transports \
+				if transport.name not in triedNames and transport.isHealthy]
+
+		self._notifyRecovered(recoveredNames)
+
+		if not candidates:
+			return None
+
+		with self.lock:
+			# transports without an RTT yet only win if none has one
+			best = min(candidates, key = lambda transport: (transport.rttMillis is None, self._getCost(transport)))
+			routedName = self.routes.get(resource)
+
+			for transport in candidates:
+				if transport.name == routedName:
+					if transport is best or self._getCost(transport) <= self._getCost(best) * ConfigConst.ROUTER_SWITCH_RATIO:
+						return transport
+
+					break
+
+			self.routes[resource] = best.name
+
+		if routedName:
+			logging.info("Routing %s over upstream transport %s (was %s).", resource.name, best.name, routedName)
+
+		return best
+
+	def _recordResult(self, transport, isSent: bool, sendTime: float):
+		now = time.monotonic()
+
+		with self.lock:
+			transport.results.append(isSent)
+
+			if isSent:
+				transport.sentCount += 1
+				transport.retryTime = 0.0
+
+				rttMillis = (now - sendTime) * 1000.0
+
+				if transport.rttMillis is None:
+					transport.rttMillis = rttMillis
+				else:
+					transport.rttMillis += ConfigConst.ROUTER_RTT_SMOOTHING * (rttMillis - transport.rttMillis)
+
+				return
+
+			transport.failedCount += 1
+
+			if len(transport.results) >= min(ConfigConst.ROUTER_MIN_SAMPLES, self.windowSize) and \
+				self._getErrorRate(transport) > self.maxErrorRate:
+				if transport.retryTime <= now:
+					logging.warning("Upstream transport %s is unhealthy. Retrying in %.1f seconds.", transport.name, self.retryIntervalSecs)
+
+				transport.retryTime = now + self.retryIntervalSecs
+
+	def _countFailover(self, transport, resource: ResourceNameEnum):
+		with self.lock:
+			self.failoverCount += 1
+
+		self.failoverCounter.inc()
+
+		logging.debug("Failing over to upstream transport %s for %s.", transport.name, resource.name)
+
+	def _isConnected(self, transport) -> bool:
+		try:
+			return not transport.isConnectedFunc or bool(transport.isConnectedFunc())
+		except Exception:
+			return False
+
+	def _isHealthy(self, transport, now: float) -> bool:
+		return transport.retryTime <= now and self._isConnected(transport)
+
+	def _updateHealth(self, transport, isHealthy: bool) -> bool:
+		# must be called with self.lock held - returns True if the transport just recovered
+		isRecovered = isHealthy and not transport.isHealthy
+		transport.isHealthy = isHealthy
+
+		return isRecovered
+
+	def _notifyRecovered(self, names: list):
+		for name in names:
+			logging.info("Upstream transport %s is healthy again.", name)
+
+		if names and self.healthyListener:
+			try:
+				self.healthyListener()
+			except Exception as e:
+				logging.warning("Upstream transport healthy listener failed: %s", e)
+
+	def _getCost(self, transport) -> float:
+		# the expected time to deliver a message, if failed sends were retried
+		return (transport.rttMillis or 0.0) / max(0.01, 1.0 - self._getErrorRate(transport))
+
+	def _getErrorRate(self, transport) -> float:
+		if not transport.results:
+			return 0.0
+
+		return transport.results.count(False) / len(transport.results)
+
+	def _getTransportStats(self, transport, now: float) -> dict:
+		return { \
+			ConfigConst.IS_CONNECTED_PROP: self._isConnected(transport), \
+			ConfigConst.IS_HEALTHY_PROP: self._isHealthy(transport, now), \
+			ConfigConst.RTT_MILLIS_PROP: round(transport.rttMillis, 3) if transport.rttMillis is not None else None, \
+			ConfigConst.ERROR_RATE_PROP: round(self._getErrorRate(transport), 3), \
+			ConfigConst.SENT_COUNT_PROP: transport.sentCount, \
+			ConfigConst.FAILED_COUNT_PROP: transport.failedCount}
+
+class _Transport():
+	"""
+	A transport's send and connection state functions, and its health.
+
+	"""
+
+	def __init__(self, name: str, sendFunc, isConnectedFunc, windowSize: int):
+		self.name = name
+		self.sendFunc = sendFunc
+		self.isConnectedFunc = isConnectedFunc
+
+		# True / False for each of the last windowSize sends
+		self.results = deque(maxlen = windowSize)
+
+		# smoothed, None until the first successful send
+		self.rttMillis = None
+
+		# skipped until then, once unhealthy
+		self.retryTime = 0.0
+
+		# as of the last check, to tell when it recovers
+		self.isHealthy = True
+
+		self.sentCount = 0
+		self.failedCount = 0
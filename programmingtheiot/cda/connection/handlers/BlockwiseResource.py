@@ -0,0 +1,261 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import hashlib
+import logging
+import time
+
+from aiocoap import Message
+from aiocoap.numbers.codes import Code
+from aiocoap.optiontypes import BlockOption
+from aiocoap.resource import Resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class BlockwiseResource(Resource):
+	"""
+	Resource for payloads that don't fit in a single CoAP datagram (e.g.
+	media or batched telemetry), with its own RFC 7959 block-wise handling.
+	aiocoap's built-in handling reassembles an upload by concatenating
+	bytes objects, copying everything received so far for every block.
+
+	Uploads (PUT or POST with Block1) are appended to one buffer per
+	transfer, which is then passed to onPayloadReceived(). Downloads (GET
+	with Block2) are sliced straight from the stored payload through a
+	memoryview, so only the block being sent is ever copied.
+
+	The block size is negotiated: each block is the smaller of the size
+	the client asked for and the configured blockSize, and a client
+	sending larger Block1 blocks is told to switch to the smaller size.
+
+	Responses to GET carry an ETag (a hash of the payload), so a client
+	can tell if the payload was replaced during a transfer. Incomplete
+	uploads are dropped after blockwiseTimeoutSecs, and uploads larger
+	than maxBlockwisePayloadBytes are rejected with 4.13.
+
+	"""
+
+	ETAG_LENGTH = 8
+
+	def __init__(self, name: str = None, blockSize: int = None, maxPayloadBytes: int = None, timeoutSecs: float = None):
+		"""
+		Constructor. Any setting that's None is read from the
+		ConstrainedDevice section of the config.
+
+		@param name The resource name, used for logging.
+		@param blockSize The largest block size (16 - 1024 bytes) to use.
+		@param maxPayloadBytes The largest upload accepted.
+		@param timeoutSecs How long an incomplete upload is kept.
+		"""
+		super().__init__()
+
+		configUtil = ConfigUtil()
+
+		if blockSize is None:
+			blockSize = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.BLOCK_SIZE_KEY, ConfigConst.DEFAULT_BLOCK_SIZE)
+
+		if maxPayloadBytes is None:
+			maxPayloadBytes = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.MAX_BLOCKWISE_BYTES_KEY, ConfigConst.DEFAULT_MAX_BLOCKWISE_BYTES)
+
+		if timeoutSecs is None:
+			timeoutSecs = configUtil.getFloat( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.BLOCKWISE_TIMEOUT_KEY, ConfigConst.DEFAULT_BLOCKWISE_TIMEOUT)
+
+		self.name = name
+		self.blockSizeExp = getBlockSizeExp(blockSize)
+		self.maxPayloadBytes = maxPayloadBytes
+		self.timeoutSecs = timeoutSecs
+
+		# (payload, ETag) - replaced as a whole, so a GET never mixes two payloads
+		self.representation = (None, None)
+
+		# transfer key -> [buffer, expiry time] (only touched on the server's loop)
+		self.uploads = {}
+
+	def getPayload(self):
+		"""
+		Returns the latest payload, either uploaded or set via setPayload().
+
+		@return bytes-like The payload, or None if there isn't one yet.
+		"""
+		return self.representation[0]
+
+	def setPayload(self, payload) -> bool:
+		"""
+		Sets the payload served to GET requests. It's served as is (not
+		copied), so it mustn't be modified afterwards.
+
+		@param payload The bytes-like payload.
+		@return bool True if the payload was set; False otherwise.
+		"""
+		if payload is None:
+			return False
+
+		self.representation = (payload, hashlib.blake2b(payload, digest_size = self.ETAG_LENGTH).digest())
+
+		return True
+
+	def onPayloadReceived(self, payload: bytearray) -> bool:
+		"""
+		Called on the server's event loop once an upload is complete.
+		Sub-classes override this; by default, the payload is served to
+		later GET requests.
+
+		@param payload The complete payload.
+		@return bool True if the payload was accepted; False otherwise.
+		"""
+		return self.setPayload(payload)
+
+	async def needs_blockwise_assembly(self, request):
+		# handled here - see _receiveBlock() and _createBlockResponse()
+		return False
+
+	async def render_get(self, request):
+		payload, etag = self.representation
+
+		if payload is None:
+			return Message(code = Code.NOT_FOUND)
+
+		return self._createBlockResponse(request, memoryview(payload), etag)
+
+	async def render_post(self, request):
+		return self._receiveBlock(request)
+
+	async def render_put(self, request):
+		return self._receiveBlock(request)
+
+	def _createBlockResponse(self, request, payload: memoryview, etag: bytes) -> Message:
+		block2 = request.opt.block2
+		blockSizeExp = min(self.blockSizeExp, request.remote.maximum_block_size_exp)
+
+		if block2 is None:
+			# small enough to send as is
+			if len(payload) <= blockSizeToBytes(blockSizeExp):
+				return Message(payload = bytes(payload), etag = etag)
+
+			block2 = BlockOption.BlockwiseTuple(0, False, blockSizeExp)
+
+		# a client asking for larger blocks than ours gets smaller ones, from the same offset
+		blockSizeExp = min(blockSizeExp, block2.size_exponent)
+		blockSize = blockSizeToBytes(blockSizeExp)
+		offset = block2.start
+
+		if offset > 0 and offset >= len(payload):
+			return Message(code = Code.BAD_OPTION)
+
+		more = offset + blockSize < len(payload)
+		response = Message( \
+			payload = bytes(payload[offset:offset + blockSize]), etag = etag, \
+			block2 = BlockOption.BlockwiseTuple(offset // blockSize, more, blockSizeExp))
+
+		if offset == 0:
+			response.opt.size2 = len(payload)
+
+		return response
+
+	def _receiveBlock(self, request) -> Message:
+		block1 = request.opt.block1
+
+		if block1 is None:
+			if len(request.payload) > self.maxPayloadBytes:
+				return Message(code = Code.REQUEST_ENTITY_TOO_LARGE, size1 = self.maxPayloadBytes)
+
+			return self._completeUpload(bytearray(request.payload), None)
+
+		if not block1.is_valid_for_payload_size(len(request.payload)):
+			return Message(code = Code.BAD_REQUEST)
+
+		transferKey = (request.remote.blockwise_key, request.code)
+		now = time.monotonic()
+
+		if block1.block_number == 0:
+			self._removeExpiredUploads(now)
+
+			if request.opt.size1 is not None and request.opt.size1 > self.maxPayloadBytes:
+				return Message(code = Code.REQUEST_ENTITY_TOO_LARGE, size1 = self.maxPayloadBytes)
+
+			# a new transfer silently replaces an incomplete one from the same client
+			upload = self.uploads[transferKey] = [bytearray(), 0.0]
+		else:
+			upload = self.uploads.get(transferKey)
+
+			# blocks must arrive in order - a gap (or a dropped transfer) can't be completed
+			if not upload or block1.start != len(upload[0]):
+				self.uploads.pop(transferKey, None)
+
+				return Message(code = Code.REQUEST_ENTITY_INCOMPLETE)
+
+		buffer = upload[0]
+
+		if len(buffer) + len(request.payload) > self.maxPayloadBytes:
+			del self.uploads[transferKey]
+
+			return Message(code = Code.REQUEST_ENTITY_TOO_LARGE, size1 = self.maxPayloadBytes)
+
+		# bytearray appends are amortized - the blocks received so far aren't copied again
+		buffer += request.payload
+		upload[1] = now + self.timeoutSecs
+
+		# the acknowledged block number, with our preferred size for the next blocks
+		ackBlock1 = BlockOption.BlockwiseTuple( \
+			block1.block_number, block1.more, min(block1.size_exponent, self.blockSizeExp))
+
+		if block1.more:
+			return Message(code = Code.CONTINUE, block1 = ackBlock1)
+
+		del self.uploads[transferKey]
+
+		return self._completeUpload(buffer, ackBlock1)
+
+	def _completeUpload(self, payload: bytearray, block1) -> Message:
+		logging.debug("CoAP resource %s received %d bytes.", self.name, len(payload))
+
+		try:
+			if not self.onPayloadReceived(payload):
+				return Message(code = Code.BAD_REQUEST, block1 = block1)
+		except Exception as e:
+			logging.warning("Failed to handle payload for CoAP resource %s: %s", self.name, e)
+
+			return Message(code = Code.INTERNAL_SERVER_ERROR, block1 = block1)
+
+		return Message(code = Code.CHANGED, block1 = block1)
+
+	def _removeExpiredUploads(self, now: float):
+		for transferKey in [key for key, upload in self.uploads.items() if upload[1] < now]:
+			logging.debug("Dropping incomplete upload to CoAP resource %s.", self.name)
+
+			del self.uploads[transferKey]
+
+def getBlockSizeExp(blockSize: int) -> int:
+	"""
+	Returns the block size exponent (SZX) for the largest valid block size
+	that's no larger than 'blockSize' (clamped to 16 - 1024 bytes).
+
+	@param blockSize The block size, in bytes.
+	@return int The SZX (0 - 6).
+	"""
+	blockSize = min(max(blockSize, ConfigConst.MIN_BLOCK_SIZE), ConfigConst.MAX_BLOCK_SIZE)
+
+	return blockSize.bit_length() - 5
+
+def blockSizeToBytes(blockSizeExp: int) -> int:
+	"""
+	Returns the block size, in bytes, for the given SZX.
+
+	@param blockSizeExp The block size exponent (0 - 6).
+	@return int The block size.
+	"""
+	return 1 << (blockSizeExp + 4)
@@ -0,0 +1,214 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import hashlib
+import logging
+
+from aiocoap import Message, ContentFormat
+from aiocoap.numbers.codes import Code
+from aiocoap.resource import ObservableResource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
+
+class CoalescingObservableResource(ObservableResource):
+	"""
+	Observable (aiocoap) resource whose notifications are rate limited:
+	observers are notified at most once every minIntervalSecs, no matter how
+	often the representation is updated. Updates in between are coalesced -
+	only the latest one is sent (latest value wins), once the interval is up.
+
+	All of a resource's observe relations are notified together, so each
+	relation sees at most one notification per interval. A GET (including
+	the one that registers an observer) always returns the latest value.
+
+	The latest data is only encoded when it's first requested, and the
+	encoded payload is cached per content format until the next update, so
+	repeated GETs (and the notifications to every observer) share a single
+	encode. Responses carry an ETag (a hash of the payload) and Max-Age; a
+	GET with a matching ETag gets a 2.03 Valid without a payload.
+
+	updateRepresentation() may be called from any thread; notifications are
+	always sent on the CoAP server's event loop, which is picked up when the
+	first observer registers. Until then, updates are simply stored.
+
+	"""
+
+	# the first is the default, for requests without an Accept option
+	CONTENT_FORMATS = (ContentFormat.JSON, ContentFormat.TEXT)
+
+	ETAG_LENGTH = 8
+
+	def __init__(self, name: str = None, minIntervalSecs: float = None, maxAgeSecs: int = None, enableCache: bool = True):
+		"""
+		Constructor.
+
+		@param name The resource name, used for logging.
+		@param minIntervalSecs The min time between notifications. If None,
+		it's read from the ConstrainedDevice section of the config.
+		@param maxAgeSecs The Max-Age of GET responses. If None, it's read from
+		the ConstrainedDevice section of the config.
+		@param enableCache If False, the data is encoded for every GET (only
+		useful for comparison).
+		"""
+		super().__init__()
+
+		configUtil = ConfigUtil()
+
+		if minIntervalSecs is None:
+			minIntervalSecs = configUtil.getFloat( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.OBSERVE_MIN_INTERVAL_KEY, ConfigConst.DEFAULT_OBSERVE_MIN_INTERVAL)
+
+		if maxAgeSecs is None:
+			maxAgeSecs = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.RESOURCE_MAX_AGE_KEY, ConfigConst.DEFAULT_RESOURCE_MAX_AGE)
+
+		self.name = name
+		self.minIntervalSecs = max(0.0, minIntervalSecs)
+		self.maxAgeSecs = max(0, maxAgeSecs)
+		self.enableCache = enableCache
+
+		# (latest data, content format -> (payload, etag)) - replaced as a whole on
+		# update, so a GET racing an update can't cache an old payload for new data
+		self.representation = (None, {})
+
+		self.loop = None
+		self.observerCount = 0
+		self.lastNotifyTime = None
+		self.isNotifyPending = False
+
+		self.updateCount = 0
+		self.notificationCount = 0
+		self.encodeCount = 0
+
+		metricsRegistry = MetricsRegistry()
+		self.notificationCounter = metricsRegistry.counter(ConfigConst.COAP_NOTIFICATIONS_METRIC, 'CoAP observe notifications sent')
+		self.coalescedCounter = metricsRegistry.counter(ConfigConst.COAP_COALESCED_METRIC, 'Updates superseded before a CoAP observe notification was sent')
+
+	def updateRepresentation(self, data) -> bool:
+		"""
+		Stores the new data, dropping any cached payloads, and if there are
+		observers, schedules a notification (unless one is already pending,
+		which will then carry this data instead).
+
+		@param data The data to represent (e.g. a SensorData instance).
+		@return bool True if the data was stored; False otherwise.
+		"""
+		if data is None:
+			return False
+
+		self.representation = (data, {})
+		self.updateCount += 1
+
+		if self.isNotifyPending:
+			self.coalescedCounter.inc()
+		elif self.loop and self.observerCount > 0:
+			self.isNotifyPending = True
+
+			try:
+				self.loop.call_soon_threadsafe(self._scheduleNotification)
+			except RuntimeError:
+				# server loop closed
+				self.isNotifyPending = False
+
+		return True
+
+	def encodeRepresentation(self, data) -> str:
+		"""
+		Encodes the data for a response. Sub-classes override this; both content
+		formats use the same (JSON) text.
+
+		@param data The data passed to updateRepresentation().
+		@return str
+		"""
+		return str(data)
+
+	def getStats(self) -> dict:
+		"""
+		Returns the number of updates, encodes, notifications sent and current observers.
+
+		@return dict
+		"""
+		return { \
+			ConfigConst.UPDATE_COUNT_PROP: self.updateCount, \
+			ConfigConst.ENCODE_COUNT_PROP: self.encodeCount, \
+			ConfigConst.NOTIFICATION_COUNT_PROP: self.notificationCount, \
+			ConfigConst.OBSERVER_COUNT_PROP: self.observerCount}
+
+	async def add_observation(self, request, serverobservation):
+		self.loop = asyncio.get_running_loop()
+
+		await super().add_observation(request, serverobservation)
+
+	def update_observation_count(self, newcount):
+		self.observerCount = newcount
+
+		logging.debug("CoAP resource %s has %d observer(s).", self.name, newcount)
+
+	async def render_get(self, request):
+		data, payloadCache = self.representation
+
+		if data is None:
+			return Message(code = Code.NOT_FOUND)
+
+		contentFormat = request.opt.accept
+
+		if contentFormat is None:
+			contentFormat = self.CONTENT_FORMATS[0]
+		elif contentFormat not in self.CONTENT_FORMATS:
+			return Message(code = Code.NOT_ACCEPTABLE)
+
+		cachedPayload = payloadCache.get(contentFormat)
+
+		if cachedPayload is None:
+			payload = self.encodeRepresentation(data).encode('utf-8')
+			cachedPayload = (payload, hashlib.blake2b(payload, digest_size = self.ETAG_LENGTH).digest())
+
+			self.encodeCount += 1
+
+			if self.enableCache:
+				payloadCache[contentFormat] = cachedPayload
+
+		payload, etag = cachedPayload
+
+		# the client already has this representation
+		if etag in request.opt.etags:
+			return Message(code = Code.VALID, etag = etag, max_age = self.maxAgeSecs)
+
+		return Message(payload = payload, content_format = contentFormat, etag = etag, max_age = self.maxAgeSecs)
+
+	def _scheduleNotification(self):
+		# runs on the loop - the notification timing is only ever touched there
+		delaySecs = 0.0
+
+		if self.lastNotifyTime is not None:
+			delaySecs = self.lastNotifyTime + self.minIntervalSecs - self.loop.time()
+
+		if delaySecs > 0:
+			self.loop.call_later(delaySecs, self._notify)
+		else:
+			self._notify()
+
+	def _notify(self):
+		# cleared first - an update arriving while observers are notified schedules the next one
+		self.isNotifyPending = False
+		self.lastNotifyTime = self.loop.time()
+
+		if self.observerCount > 0:
+			self.notificationCount += 1
+			self.notificationCounter.inc()
+
+			# each observer's notification is rendered from the latest payload
+			self.updated_state()
@@ -14,25 +14,35 @@ import logging
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
-from programmingtheiot.common.ConfigUtil import ConfigUtil
-from programmingtheiot.common.ITelemetryDataListener import ITelemetryDataListener
+from programmingtheiot.common.ISystemPerformanceDataListener import ISystemPerformanceDataListener
+
+from programmingtheiot.cda.connection.handlers.CoalescingObservableResource import CoalescingObservableResource
 
 from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 
-class GetSystemPerformanceResourceHandler(ITelemetryDataListener):
+class GetSystemPerformanceResourceHandler(CoalescingObservableResource, ISystemPerformanceDataListener):
 	"""
 	Observable resource that will collect system performance data based on the
 	given name from the data message listener implementation.
 	
-	NOTE: Your implementation will likely need to extend from the selected
-	CoAP library's observable resource base class.
+	Notifications are coalesced (see CoalescingObservableResource): at most
+	one per observeMinIntervalSecs, carrying the latest SystemPerformanceData.
 	
 	"""
 
-	def __init__(self):
-		pass
+	def __init__(self, minIntervalSecs: float = None, maxAgeSecs: int = None, enableCache: bool = True):
+		super().__init__(name = ConfigConst.SYSTEM_PERF_MSG, minIntervalSecs = minIntervalSecs, maxAgeSecs = maxAgeSecs, enableCache = enableCache)
+		
+		self.dataUtil = DataUtil()
+		
+	def onSystemPerformanceDataUpdate(self, data: SystemPerformanceData = None) -> bool:
+		if not data:
+			return False
 		
-	def onSystemPerformanceDataUpdate(self, data: SystemPerformanceData) -> bool:
-		pass
-	
\ No newline at end of file
+		# only encoded when first requested (see encodeRepresentation())
+		return self.updateRepresentation(data)
+	
+	def encodeRepresentation(self, data) -> str:
+		return self.dataUtil.systemPerformanceDataToJson(data)
+	
@@ -14,25 +14,36 @@ import logging
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
-from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.ITelemetryDataListener import ITelemetryDataListener
 
+from programmingtheiot.cda.connection.handlers.CoalescingObservableResource import CoalescingObservableResource
+
 from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.SensorData import SensorData
 
-class GetTelemetryResourceHandler(ITelemetryDataListener):
+class GetTelemetryResourceHandler(CoalescingObservableResource, ITelemetryDataListener):
 	"""
 	Observable resource that will collect telemetry based on the given
 	name from the data message listener implementation.
 	
-	NOTE: Your implementation will likely need to extend from the selected
-	CoAP library's observable resource base class.
+	Sensor updates may arrive far more often than observers need them, so
+	notifications are coalesced (see CoalescingObservableResource): at most
+	one per observeMinIntervalSecs, carrying the latest SensorData.
 	
 	"""
 
-	def __init__(self):
-		pass
+	def __init__(self, minIntervalSecs: float = None, maxAgeSecs: int = None, enableCache: bool = True):
+		super().__init__(name = ConfigConst.SENSOR_MSG, minIntervalSecs = minIntervalSecs, maxAgeSecs = maxAgeSecs, enableCache = enableCache)
+		
+		self.dataUtil = DataUtil()
 		
 	def onSensorDataUpdate(self, data: SensorData = None) -> bool:
-		pass
-	
\ No newline at end of file
+		if not data:
+			return False
+		
+		# only encoded when first requested (see encodeRepresentation())
+		return self.updateRepresentation(data)
+	
+	def encodeRepresentation(self, data) -> str:
+		return self.dataUtil.sensorDataToJson(data)
+	
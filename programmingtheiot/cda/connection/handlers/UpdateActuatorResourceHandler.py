@@ -12,21 +12,69 @@
 
 import logging
 
+from aiocoap import Message, ContentFormat
+from aiocoap.numbers.codes import Code
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 
+from programmingtheiot.cda.connection.handlers.WorkerPoolResource import WorkerPoolResource
+
 from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.ActuatorData import ActuatorData
 
-class UpdateActuatorResourceHandler():
+class UpdateActuatorResourceHandler(WorkerPoolResource):
 	"""
 	Standard resource that will handle an incoming actuation command,
 	and return the command response.
 	
-	NOTE: Your implementation will likely need to extend from the selected
-	CoAP library's resource base class.
+	Actuation is device I/O and may take a while (e.g. scrolling text on
+	the SenseHAT), so commands are decoded and handled on the CoAP server's
+	worker pool (see WorkerPoolResource) - by default one at a time, with
+	a few more queued - and never hold up telemetry GETs or notifications.
 	
 	"""
 
-	def __init__(self, dataMsgListener: IDataMessageListener = None):
-		pass
-		
\ No newline at end of file
+	def __init__(self, dataMsgListener: IDataMessageListener = None, maxConcurrency: int = None, maxQueuedRequests: int = None):
+		super().__init__(name = ConfigConst.ACTUATOR_CMD, maxConcurrency = maxConcurrency, maxQueuedRequests = maxQueuedRequests)
+		
+		self.dataMsgListener = dataMsgListener
+		self.dataUtil = DataUtil()
+		
+	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
+		if listener:
+			self.dataMsgListener = listener
+			return True
+		
+		return False
+	
+	def handlePost(self, request: Message) -> Message:
+		return self.handlePut(request)
+	
+	def handlePut(self, request: Message) -> Message:
+		if not self.dataMsgListener:
+			logging.warning("No data message listener. Ignoring actuator command.")
+			
+			return Message(code = Code.SERVICE_UNAVAILABLE)
+		
+		try:
+			data = self.dataUtil.jsonToActuatorData(request.payload.decode('utf-8'))
+		except Exception as e:
+			logging.warning("Failed to decode actuator command: %s", e)
+			
+			data = None
+		
+		if not data:
+			return Message(code = Code.BAD_REQUEST)
+		
+		if not self.dataMsgListener.handleActuatorCommandMessage(data):
+			return Message(code = Code.BAD_REQUEST)
+		
+		response = ActuatorData(typeID = data.getTypeID(), name = data.getName())
+		response.updateData(data)
+		response.setAsResponse()
+		
+		return Message( \
+			code = Code.CHANGED, content_format = ContentFormat.JSON, \
+			payload = self.dataUtil.actuatorDataToJson(response).encode('utf-8'))
@@ -0,0 +1,171 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+
+from concurrent.futures import Executor
+
+from aiocoap import Message
+from aiocoap.numbers.codes import Code
+from aiocoap.resource import Resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
+
+class WorkerPoolResource(Resource):
+	"""
+	Resource whose request handling may block (e.g. an actuator command
+	that scrolls text on the SenseHAT). Requests are decoded and handled
+	on the CoAP server's worker pool (see CoapServerAdapter), so the
+	server's event loop - and with it every cached GET and observe
+	notification - never waits for them.
+
+	At most maxConcurrency requests to the resource are handled at once,
+	and at most maxQueuedRequests more wait for their turn. Any others
+	are answered with 5.03 Service Unavailable right away, so a burst of
+	slow requests can't tie up the whole pool or queue without bound.
+
+	Sub-classes implement handleGet(), handlePut(), handlePost() and / or
+	handleDelete(), which take the request and return the response, and
+	are called on a worker thread. Without a worker pool (executor), they
+	are called on the event loop, as for any other resource.
+
+	"""
+
+	def __init__(self, name: str = None, maxConcurrency: int = None, maxQueuedRequests: int = None):
+		"""
+		Constructor. Any setting that's None is read from the
+		ConstrainedDevice section of the config.
+
+		@param name The resource name, used for logging.
+		@param maxConcurrency The max number of requests handled at once.
+		@param maxQueuedRequests The max number of requests waiting to be handled.
+		"""
+		super().__init__()
+
+		configUtil = ConfigUtil()
+
+		if maxConcurrency is None:
+			maxConcurrency = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.RESOURCE_CONCURRENCY_KEY, ConfigConst.DEFAULT_RESOURCE_CONCURRENCY)
+
+		if maxQueuedRequests is None:
+			maxQueuedRequests = configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.RESOURCE_QUEUE_SIZE_KEY, ConfigConst.DEFAULT_RESOURCE_QUEUE_SIZE)
+
+		self.name = name
+		self.maxConcurrency = max(1, maxConcurrency)
+		self.maxQueuedRequests = max(0, maxQueuedRequests)
+
+		self.executor = None
+
+		# created on the server's loop (on first use)
+		self.semaphore = None
+
+		# the counts are only updated on the server's loop
+		self.pendingCount = 0
+		self.handledCount = 0
+		self.failedCount = 0
+		self.rejectedCount = 0
+
+		self.rejectedCounter = MetricsRegistry().counter(ConfigConst.COAP_REJECTED_METRIC, 'CoAP requests turned down because the resource was busy')
+
+	def setExecutor(self, executor: Executor = None):
+		"""
+		Sets the worker pool requests are handled on. If None, they are
+		handled on the server's event loop.
+
+		@param executor The worker pool.
+		"""
+		self.executor = executor
+
+	def getStats(self) -> dict:
+		"""
+		Returns the number of requests handled, failed (with a 5.xx), turned
+		down (as the resource was busy) and currently pending (handled or waiting).
+
+		@return dict
+		"""
+		return { \
+			ConfigConst.HANDLED_COUNT_PROP: self.handledCount, \
+			ConfigConst.FAILED_COUNT_PROP: self.failedCount, \
+			ConfigConst.REJECTED_COUNT_PROP: self.rejectedCount, \
+			ConfigConst.INFLIGHT_COUNT_PROP: self.pendingCount}
+
+	def handleGet(self, request: Message) -> Message:
+		return None
+
+	def handleDelete(self, request: Message) -> Message:
+		return None
+
+	def handlePost(self, request: Message) -> Message:
+		return None
+
+	def handlePut(self, request: Message) -> Message:
+		return None
+
+	async def render_get(self, request):
+		return await self._dispatch(self.handleGet, request)
+
+	async def render_delete(self, request):
+		return await self._dispatch(self.handleDelete, request)
+
+	async def render_post(self, request):
+		return await self._dispatch(self.handlePost, request)
+
+	async def render_put(self, request):
+		return await self._dispatch(self.handlePut, request)
+
+	async def _dispatch(self, handler, request) -> Message:
+		if not self.executor:
+			response = self._handleRequest(handler, request)
+		elif self.pendingCount >= self.maxConcurrency + self.maxQueuedRequests:
+			self.rejectedCount += 1
+			self.rejectedCounter.inc()
+
+			logging.debug("CoAP resource %s is busy. Turning down %s request.", self.name, str(request.code))
+
+			return Message(code = Code.SERVICE_UNAVAILABLE, max_age = ConfigConst.SERVICE_UNAVAILABLE_MAX_AGE)
+		else:
+			if not self.semaphore:
+				self.semaphore = asyncio.Semaphore(self.maxConcurrency)
+
+			self.pendingCount += 1
+
+			try:
+				async with self.semaphore:
+					response = await asyncio.get_running_loop().run_in_executor(self.executor, self._handleRequest, handler, request)
+			finally:
+				self.pendingCount -= 1
+
+		if response.code is not None and response.code >= Code.INTERNAL_SERVER_ERROR:
+			self.failedCount += 1
+		else:
+			self.handledCount += 1
+
+		return response
+
+	def _handleRequest(self, handler, request) -> Message:
+		try:
+			response = handler(request)
+		except Exception as e:
+			logging.warning("Failed to handle %s request for CoAP resource %s: %s", str(request.code), self.name, e)
+
+			return Message(code = Code.INTERNAL_SERVER_ERROR)
+
+		if response is None:
+			return Message(code = Code.METHOD_NOT_ALLOWED)
+
+		return response
@@ -11,6 +11,7 @@ import random
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
 from programmingtheiot.cda.sim.SimulatedSensorData import SensorDataGenerator
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 
 class HumidityI2cSensorAdapterTask(BaseSensorSimTask):
     """
@@ -28,6 +29,7 @@ class HumidityI2cSensorAdapterTask(BaseSensorSimTask):
         self.sensorType = SensorData.HUMIDITY_SENSOR_TYPE
         self.humidAddr = 0x5F  # HTS221 sensor address
         self.dataMsgListener = None
+        self.readingLogger = LoggingUtil().getRateLimitedLogger(__name__)
 
         if HAS_SMBUS:
             try:
@@ -61,7 +63,7 @@ class HumidityI2cSensorAdapterTask(BaseSensorSimTask):
         sensorData = SensorData(typeID=self.sensorType)
         sensorData.setValue(humidVal)
 
-        logging.info(
+        self.readingLogger.info(
             "SensorData: name=%s, typeID=%s, value=%.2f%%",
             sensorData.getName(),
             sensorData.getSensorType(),
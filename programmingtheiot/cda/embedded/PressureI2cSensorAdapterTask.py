@@ -11,6 +11,7 @@ import random
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
 from programmingtheiot.cda.sim.SimulatedSensorData import SensorDataGenerator
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 
 class PressureI2cSensorAdapterTask(BaseSensorSimTask):
     """
@@ -28,6 +29,7 @@ class PressureI2cSensorAdapterTask(BaseSensorSimTask):
         self.sensorType = SensorData.PRESSURE_SENSOR_TYPE
         self.pressAddr = 0x5C  # LPS25H sensor address
         self.dataMsgListener = None
+        self.readingLogger = LoggingUtil().getRateLimitedLogger(__name__)
 
         if HAS_SMBUS:
             try:
@@ -61,7 +63,7 @@ class PressureI2cSensorAdapterTask(BaseSensorSimTask):
         sensorData = SensorData(typeID=self.sensorType)
         sensorData.setValue(pressVal)
 
-        logging.info(
+        self.readingLogger.info(
             "SensorData: name=%s, typeID=%s, value=%.2f hPa",
             sensorData.getName(),
             sensorData.getSensorType(),
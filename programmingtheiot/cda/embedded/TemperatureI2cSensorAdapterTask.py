@@ -11,6 +11,7 @@ except ImportError:
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
 from programmingtheiot.cda.sim.SimulatedSensorData import SensorDataGenerator
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 
 class TemperatureI2cSensorAdapterTask(BaseSensorSimTask):
     """
@@ -28,6 +29,7 @@ class TemperatureI2cSensorAdapterTask(BaseSensorSimTask):
         self.sensorType = SensorData.TEMPERATURE_SENSOR_TYPE
         self.tempAddr = 0x5F  # Shared with HTS221
         self.dataMsgListener = None
+        self.readingLogger = LoggingUtil().getRateLimitedLogger(__name__)
 
         if HAS_SMBUS:
             try:
@@ -61,7 +63,7 @@ class TemperatureI2cSensorAdapterTask(BaseSensorSimTask):
         sensorData = SensorData(typeID=self.sensorType)
         sensorData.setValue(tempVal)
 
-        logging.info(
+        self.readingLogger.info(
             "SensorData: name=%s, typeID=%s, value=%.2f °C",
             sensorData.getName(),
             sensorData.getSensorType(),
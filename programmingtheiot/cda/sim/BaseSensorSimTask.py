@@ -19,7 +19,9 @@ from programmingtheiot.data.SensorData import SensorData
 
 class BaseSensorSimTask():
 	"""
-	Shell representation of class for student implementation.
+	Base class for simulated sensor tasks. If a data set is provided, each call
+	to generateTelemetry() returns its next entry (wrapping around at the end);
+	otherwise, a random value between minVal and maxVal is returned.
 	
 	"""
 
@@ -27,7 +29,15 @@ class BaseSensorSimTask():
 	DEFAULT_MAX_VAL = 1000.0
 	
 	def __init__(self, name = ConfigConst.NOT_SET, typeID: int = ConfigConst.DEFAULT_SENSOR_TYPE, dataSet = None, minVal: float = DEFAULT_MIN_VAL, maxVal: float = DEFAULT_MAX_VAL):
-		pass
+		self.name = name
+		self.typeID = typeID
+		self.dataSet = dataSet
+		self.dataSetIndex = 0
+		self.useRandomizer = not dataSet
+		self.minVal = minVal
+		self.maxVal = maxVal
+		
+		self.latestSensorData = None
 	
 	def generateTelemetry(self) -> SensorData:
 		"""
@@ -36,7 +46,23 @@ class BaseSensorSimTask():
 		
 		A local reference to SensorData can be contained in this base class.
 		"""
-		pass
+		sensorData = SensorData(typeID = self.getTypeID(), name = self.getName())
+		
+		if self.useRandomizer:
+			sensorVal = random.uniform(self.minVal, self.maxVal)
+		else:
+			sensorVal = self.dataSet.getDataEntry(index = self.dataSetIndex)
+			self.dataSetIndex += 1
+			
+			if self.dataSetIndex >= self.dataSet.getDataEntryCount():
+				self.dataSetIndex = 0
+		
+		sensorData.setValue(sensorVal)
+		sensorData.markTraceStage(ConfigConst.TRACE_STAGE_GENERATE)
+		
+		self.latestSensorData = sensorData
+		
+		return self.latestSensorData
 	
 	def getTelemetryValue(self) -> float:
 		"""
@@ -44,17 +70,19 @@ class BaseSensorSimTask():
 		If SensorData hasn't yet been created, call self.generateTelemetry(), then return
 		its current value.
 		"""
-		pass
+		if not self.latestSensorData:
+			self.generateTelemetry()
+		
+		return self.latestSensorData.getValue()
 	
 	def getLatestTelemetry(self) -> SensorData:
 		"""
 		This can return the current SensorData instance or a copy.
 		"""
-		pass
+		return self.latestSensorData
 	
 	def getName(self) -> str:
-		pass
+		return self.name
 	
 	def getTypeID(self) -> int:
-		pass
-	
\ No newline at end of file
+		return self.typeID
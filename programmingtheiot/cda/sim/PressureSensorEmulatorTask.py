@@ -1,4 +1,5 @@
 import logging
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
 from programmingtheiot.cda.sim.SimulatedSensorData import SensorDataGenerator
@@ -15,6 +16,7 @@ class PressureSensorEmulatorTask(BaseSensorSimTask):
             maxVal=SensorDataGenerator.HI_NORMAL_ENV_PRESSURE
         )
         self.dataMsgListener = None
+        self.readingLogger = LoggingUtil().getRateLimitedLogger(__name__)
         logging.info("PressureSensorEmulatorTask initialized.")
 
     def setDataMessageListener(self, listener):
@@ -27,7 +29,7 @@ class PressureSensorEmulatorTask(BaseSensorSimTask):
     def generateTelemetry(self) -> SensorData:
         sensorData = super().generateTelemetry()
         if sensorData:
-            logging.info("Pressure Sensor Reading: %.2f hPa", sensorData.getValue())
+            self.readingLogger.info("Pressure Sensor Reading: %.2f hPa", sensorData.getValue())
             if self.dataMsgListener:
                 try:
                     self.dataMsgListener.handleSensorData(sensorData)
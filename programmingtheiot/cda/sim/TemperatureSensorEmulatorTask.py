@@ -1,4 +1,5 @@
 import logging
+from programmingtheiot.common.LoggingUtil import LoggingUtil
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
 from programmingtheiot.cda.sim.SimulatedSensorData import SensorDataGenerator
@@ -15,6 +16,7 @@ class TemperatureSensorEmulatorTask(BaseSensorSimTask):
             maxVal=SensorDataGenerator.HI_NORMAL_INDOOR_TEMP
         )
         self.dataMsgListener = None
+        self.readingLogger = LoggingUtil().getRateLimitedLogger(__name__)
         logging.info("TemperatureSensorEmulatorTask initialized.")
 
     def setDataMessageListener(self, listener):
@@ -27,7 +29,7 @@ class TemperatureSensorEmulatorTask(BaseSensorSimTask):
     def generateTelemetry(self) -> SensorData:
         sensorData = super().generateTelemetry()
         if sensorData:
-            logging.info("Temperature Sensor Reading: %.2f °C", sensorData.getValue())
+            self.readingLogger.info("Temperature Sensor Reading: %.2f °C", sensorData.getValue())
             if self.dataMsgListener:
                 try:
                     self.dataMsgListener.handleSensorData(sensorData)
@@ -3,10 +3,7 @@ from importlib import import_module
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 from programmingtheiot.common.ConfigUtil import ConfigUtil
-
-# Simulated actuator tasks
-from programmingtheiot.cda.sim.HumidifierActuatorSimTask import HumidifierActuatorSimTask
-from programmingtheiot.cda.sim.HvacActuatorSimTask import HvacActuatorSimTask
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 
 class ActuatorAdapterManager:
     def __init__(self):
@@ -19,6 +16,10 @@ class ActuatorAdapterManager:
 
         self.dataMsgListener = None
 
+        metricsRegistry = MetricsRegistry()
+        self.commandCounter = metricsRegistry.counter(ConfigConst.ACTUATOR_COMMANDS_METRIC, 'Actuator commands executed')
+        self.commandErrorCounter = metricsRegistry.counter(ConfigConst.ACTUATOR_ERRORS_METRIC, 'Actuator commands with no matching actuator')
+
         # Initialize actuator adapters
         self._initEnvironmentalActuationTasks()
 
@@ -45,6 +46,10 @@ class ActuatorAdapterManager:
 
         else:
             logging.warning(f"No actuator available for typeID: {typeID}")
+            self.commandErrorCounter.inc()
+            return
+
+        self.commandCounter.inc()
 
     def _executeActuatorCommand(self, actuator, actuatorData):
         """Call the correct method for either emulator or simulator."""
@@ -58,9 +63,15 @@ class ActuatorAdapterManager:
     def _initEnvironmentalActuationTasks(self):
         """Initialize all actuator tasks (simulated or emulated)."""
         if not self.useEmulator:
-            # Simulated actuators
-            self.humidifierActuator = HumidifierActuatorSimTask()
-            self.hvacActuator = HvacActuatorSimTask()
+            # Simulated actuators (imported here, like the emulators below, so
+            # only the configured kind is ever loaded)
+            hueModule = import_module('programmingtheiot.cda.sim.HumidifierActuatorSimTask')
+            hueClazz = getattr(hueModule, 'HumidifierActuatorSimTask')
+            self.humidifierActuator = hueClazz()
+
+            hvacModule = import_module('programmingtheiot.cda.sim.HvacActuatorSimTask')
+            hvacClazz = getattr(hvacModule, 'HvacActuatorSimTask')
+            self.hvacActuator = hvacClazz()
         else:
             # Emulated actuators via SenseHAT
             hueModule = import_module('programmingtheiot.cda.emulated.HumidifierEmulatorTask')
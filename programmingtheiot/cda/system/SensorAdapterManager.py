@@ -1,21 +1,14 @@
 import logging
+from importlib import import_module
+
 from programmingtheiot.common import ConfigConst
 from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 
-# I2C sensor imports (if available)
-try:
-    from programmingtheiot.cda.embedded.HumidityI2cSensorAdapterTask import HumidityI2cSensorAdapterTask
-    from programmingtheiot.cda.embedded.PressureI2cSensorAdapterTask import PressureI2cSensorAdapterTask
-    from programmingtheiot.cda.embedded.TemperatureI2cSensorAdapterTask import TemperatureI2cSensorAdapterTask
-    I2C_AVAILABLE = True
-except ImportError:
-    I2C_AVAILABLE = False
-    logging.warning("I2C sensor modules not available; will use emulators.")
-
-# Emulator imports
-from programmingtheiot.cda.sim.HumiditySensorEmulatorTask import HumiditySensorEmulatorTask
-from programmingtheiot.cda.sim.PressureSensorEmulatorTask import PressureSensorEmulatorTask
-from programmingtheiot.cda.sim.TemperatureSensorEmulatorTask import TemperatureSensorEmulatorTask
+# sensor task modules are imported on demand, so a CDA that only uses one
+# kind of adapter (or has sensing disabled) never loads the others
+I2C_TASK_MODULE = 'programmingtheiot.cda.embedded.{}I2cSensorAdapterTask'
+EMULATOR_TASK_MODULE = 'programmingtheiot.cda.sim.{}SensorEmulatorTask'
 
 class SensorAdapterManager:
     """
@@ -24,35 +17,51 @@ class SensorAdapterManager:
     Provides test-compatible adapter attributes.
     """
 
-    def __init__(self, useEmulator=True, useI2C=True):
+    def __init__(self, useEmulator=True, useI2C=True, pollRate: int = 5):
         self.config = ConfigUtil()
         self.useEmulator = useEmulator
-        self.useI2C = useI2C and I2C_AVAILABLE
+        self.useI2C = useI2C
+
+        # Scheduler for periodic telemetry generation, created by startManager()
+        self.scheduler = None
+        self.pollRate = pollRate  # seconds
+        self.telemetryHandler = None
 
         # Adapter attributes expected by tests
         self.humidityAdapter = None
         self.pressureAdapter = None
         self.tempAdapter = None
 
+        self.readingsCounter = MetricsRegistry().counter(ConfigConst.SENSOR_READINGS_METRIC, 'Sensor readings generated')
+
         self._initSensors()
 
     def _initSensors(self):
         if self.useI2C:
             try:
-                self.humidityAdapter = HumidityI2cSensorAdapterTask()
-                self.pressureAdapter = PressureI2cSensorAdapterTask()
-                self.tempAdapter = TemperatureI2cSensorAdapterTask()
+                self.humidityAdapter = self._createTask(I2C_TASK_MODULE, 'Humidity')
+                self.pressureAdapter = self._createTask(I2C_TASK_MODULE, 'Pressure')
+                self.tempAdapter = self._createTask(I2C_TASK_MODULE, 'Temperature')
                 logging.info("Loaded I2C sensor adapters.")
                 return
+            except ImportError as e:
+                self.useI2C = False
+                logging.warning("I2C sensor modules not available; will use emulators: %s", e)
             except Exception as e:
                 logging.warning("I2C sensors unavailable, falling back to emulator: %s", e)
 
         if self.useEmulator:
-            self.humidityAdapter = HumiditySensorEmulatorTask()
-            self.pressureAdapter = PressureSensorEmulatorTask()
-            self.tempAdapter = TemperatureSensorEmulatorTask()
+            self.humidityAdapter = self._createTask(EMULATOR_TASK_MODULE, 'Humidity')
+            self.pressureAdapter = self._createTask(EMULATOR_TASK_MODULE, 'Pressure')
+            self.tempAdapter = self._createTask(EMULATOR_TASK_MODULE, 'Temperature')
             logging.info("Loaded simulator/emulator sensor adapters.")
 
+    def _createTask(self, moduleTemplate, sensorName):
+        moduleName = moduleTemplate.format(sensorName)
+        module = import_module(moduleName)
+
+        return getattr(module, moduleName.rsplit('.', 1)[1])()
+
     def generateAllTelemetry(self):
         """
         Generates telemetry data for all available sensors.
@@ -65,8 +74,39 @@ class SensorAdapterManager:
             data['pressure'] = self.pressureAdapter.generateTelemetry()
         if self.tempAdapter:
             data['temperature'] = self.tempAdapter.generateTelemetry()
+
+        self.readingsCounter.inc(len(data))
+
         return data
 
+    def startManager(self, telemetryHandler=None):
+        """
+        Start periodic telemetry generation, passing each SensorData to
+        telemetryHandler (e.g. IDataMessageListener.handleSensorMessage) if set.
+        """
+        # only needed when the manager polls on its own (not on an event loop)
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        self.telemetryHandler = telemetryHandler
+        self.scheduler = BackgroundScheduler()
+        self.scheduler.add_job(self.handleTelemetry, 'interval', seconds=self.pollRate)
+        self.scheduler.start()
+        logging.info("SensorAdapterManager started with poll rate %s seconds.", self.pollRate)
+
+    def stopManager(self):
+        """Stop periodic telemetry generation."""
+        if self.scheduler and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+            logging.info("SensorAdapterManager stopped.")
+
+        self.scheduler = None
+
+    def handleTelemetry(self):
+        """Generate telemetry for all sensors and pass each reading to the handler."""
+        for sensorData in self.generateAllTelemetry().values():
+            if sensorData and self.telemetryHandler:
+                self.telemetryHandler(sensorData)
+
     def setDataMessageListener(self, listener):
         """
         Set a listener object that implements handleSensorData(sensorData)
@@ -4,6 +4,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import programmingtheiot.common.ConfigConst as ConfigConst
 from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 
 from programmingtheiot.cda.system.SystemCpuUtilTask import SystemCpuUtilTask
 from programmingtheiot.cda.system.SystemMemUtilTask import SystemMemUtilTask
@@ -32,6 +33,11 @@ class SystemPerformanceManager:
         # Listener for callbacks
         self.dataMsgListener: IDataMessageListener | None = None
         
+        metricsRegistry = MetricsRegistry()
+        self.pollCounter = metricsRegistry.counter(ConfigConst.SYSTEM_PERF_POLLS_METRIC, 'System performance polls')
+        self.cpuUtilGauge = metricsRegistry.gauge(ConfigConst.CPU_UTIL_METRIC, 'Latest CPU utilization (percent)')
+        self.memUtilGauge = metricsRegistry.gauge(ConfigConst.MEM_UTIL_METRIC, 'Latest memory utilization (percent)')
+        
         # Scheduler for periodic telemetry collection
         self.scheduler = BackgroundScheduler()
         self.pollRate = pollRate  # seconds
@@ -41,6 +47,10 @@ class SystemPerformanceManager:
         self.cpuUtilPct = self.cpuUtilTask.getTelemetryValue()
         self.memUtilPct = self.memUtilTask.getTelemetryValue()
         
+        self.pollCounter.inc()
+        self.cpuUtilGauge.set(self.cpuUtilPct)
+        self.memUtilGauge.set(self.memUtilPct)
+        
         logging.debug(
             "CPU utilization: %s%%, Memory utilization: %s%%",
             self.cpuUtilPct, self.memUtilPct
@@ -51,6 +61,7 @@ class SystemPerformanceManager:
         sysPerfData.setLocationID(self.locationID)
         sysPerfData.setCpuUtilization(self.cpuUtilPct)
         sysPerfData.setMemoryUtilization(self.memUtilPct)
+        sysPerfData.markTraceStage(ConfigConst.TRACE_STAGE_GENERATE)
         
         # Notify listener
         if self.dataMsgListener:
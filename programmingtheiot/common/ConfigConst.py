@@ -275,6 +275,345 @@ HANDLE_TEMP_CHANGE_ON_DEVICE_KEY = 'handleTempChangeOnDevice'
 TRIGGER_HVAC_TEMP_FLOOR_KEY   = 'triggerHvacTempFloor'
 TRIGGER_HVAC_TEMP_CEILING_KEY = 'triggerHvacTempCeiling'
 
+#####
+# Actuation rule sections, keys and types
+#
+# Each rule is declared in its own section named 'Rule.<ruleName>'
+# e.g., [Rule.HvacTemp]
+#
+
+RULE                = 'Rule'
+RULE_SECTION_PREFIX = RULE + '.'
+
+RULE_TYPE_KEY        = 'ruleType'
+SENSOR_TYPE_ID_KEY   = 'sensorTypeID'
+ACTUATOR_TYPE_ID_KEY = 'actuatorTypeID'
+ACTUATOR_NAME_KEY    = 'actuatorName'
+FLOOR_KEY            = 'floor'
+CEILING_KEY          = 'ceiling'
+DEADBAND_KEY         = 'deadband'
+MAX_RATE_KEY         = 'maxRatePerSec'
+TARGET_VALUE_KEY     = 'targetValue'
+
+RULE_TYPE_THRESHOLD  = 'threshold'
+RULE_TYPE_HYSTERESIS = 'hysteresis'
+RULE_TYPE_RATE       = 'rate'
+
+HVAC_TEMP_RULE_NAME  = 'HvacTempRule'
+
+#####
+# Upstream report-by-exception (deadband) keys
+#
+# Defaults are set in the ConstrainedDevice section, and can be
+# overridden per resource name in a 'Deadband.<name>' section
+# e.g., [Deadband.PressureSensor]
+#
+
+DEADBAND                = 'Deadband'
+DEADBAND_SECTION_PREFIX = DEADBAND + '.'
+
+DEADBAND_ABS_KEY     = 'deadbandAbs'
+DEADBAND_PCT_KEY     = 'deadbandPct'
+MAX_SILENCE_SECS_KEY = 'maxSilenceSecs'
+
+#####
+# Upstream batching keys and defaults
+#
+
+ENABLE_UPSTREAM_BATCHING_KEY = 'enableUpstreamBatching'
+BATCH_MAX_COUNT_KEY          = 'batchMaxCount'
+BATCH_MAX_BYTES_KEY          = 'batchMaxBytes'
+BATCH_MAX_LINGER_MILLIS_KEY  = 'batchMaxLingerMillis'
+
+DEFAULT_BATCH_MAX_COUNT         = 50
+DEFAULT_BATCH_MAX_BYTES         = 16384
+DEFAULT_BATCH_MAX_LINGER_MILLIS = 1000
+
+BATCH_COUNT_PROP   = 'batchCount'
+MESSAGE_COUNT_PROP = 'msgCount'
+
+SENT_COUNT_PROP       = 'sentCount'
+SUPPRESSED_COUNT_PROP = 'suppressedCount'
+SUPPRESSED_PCT_PROP   = 'suppressedPct'
+
+#####
+# Store-and-forward outbox keys and defaults
+#
+
+DEFAULT_CDA_DATA_PATH = '/tmp/cda-data'
+OUTBOX_DIR_NAME       = 'outbox'
+
+ENABLE_OUTBOX_KEY                = 'enableOutbox'
+OUTBOX_MAX_BYTES_KEY             = 'outboxMaxBytes'
+OUTBOX_SEGMENT_MAX_BYTES_KEY     = 'outboxSegmentMaxBytes'
+OUTBOX_FSYNC_POLICY_KEY          = 'outboxFsyncPolicy'
+OUTBOX_FSYNC_INTERVAL_MILLIS_KEY = 'outboxFsyncIntervalMillis'
+OUTBOX_REPLAY_RATE_KEY           = 'outboxReplayRatePerSec'
+OUTBOX_RETRY_INTERVAL_SECS_KEY   = 'outboxRetryIntervalSecs'
+
+DEFAULT_OUTBOX_MAX_BYTES             = 10485760
+DEFAULT_OUTBOX_SEGMENT_MAX_BYTES     = 1048576
+DEFAULT_OUTBOX_FSYNC_INTERVAL_MILLIS = 1000
+DEFAULT_OUTBOX_REPLAY_RATE           = 20.0
+DEFAULT_OUTBOX_RETRY_INTERVAL_SECS   = 5.0
+
+STORED_COUNT_PROP   = 'storedCount'
+REPLAYED_COUNT_PROP = 'replayedCount'
+EVICTED_COUNT_PROP  = 'evictedCount'
+PENDING_COUNT_PROP  = 'pendingCount'
+PENDING_BYTES_PROP  = 'pendingBytes'
+
+#####
+# Upstream transport router keys and defaults
+#
+
+ENABLE_UPSTREAM_ROUTER_KEY     = 'enableUpstreamRouter'
+ROUTER_WINDOW_SIZE_KEY         = 'routerWindowSize'
+ROUTER_MAX_ERROR_RATE_KEY      = 'routerMaxErrorRate'
+ROUTER_RETRY_INTERVAL_SECS_KEY = 'routerRetryIntervalSecs'
+
+DEFAULT_ROUTER_WINDOW_SIZE         = 20
+DEFAULT_ROUTER_MAX_ERROR_RATE      = 0.5
+DEFAULT_ROUTER_RETRY_INTERVAL_SECS = 5.0
+
+# a transport's error rate is only judged once its window holds this many results
+ROUTER_MIN_SAMPLES = 5
+
+# weight of the latest RTT in a transport's smoothed RTT
+ROUTER_RTT_SMOOTHING = 0.2
+
+# a resource only moves to a faster healthy transport if its current one is this many times slower
+ROUTER_SWITCH_RATIO = 2.0
+
+MQTT_TRANSPORT_NAME = 'mqtt'
+COAP_TRANSPORT_NAME = 'coap'
+
+RTT_MILLIS_PROP     = 'rttMillis'
+ERROR_RATE_PROP     = 'errorRate'
+IS_CONNECTED_PROP   = 'isConnected'
+IS_HEALTHY_PROP     = 'isHealthy'
+FAILOVER_COUNT_PROP = 'failoverCount'
+ROUTES_PROP         = 'routes'
+TRANSPORTS_PROP     = 'transports'
+
+#####
+# Ingest queue keys and defaults
+#
+
+ENABLE_INGEST_QUEUE_KEY         = 'enableIngestQueue'
+INGEST_QUEUE_MAX_SIZE_KEY       = 'ingestQueueMaxSize'
+INGEST_WORKER_COUNT_KEY         = 'ingestWorkerCount'
+INGEST_DROP_POLICY_KEY          = 'ingestDropPolicy'
+INGEST_BLOCK_TIMEOUT_MILLIS_KEY = 'ingestBlockTimeoutMillis'
+
+DEFAULT_INGEST_QUEUE_MAX_SIZE       = 1000
+DEFAULT_INGEST_WORKER_COUNT         = 1
+DEFAULT_INGEST_BLOCK_TIMEOUT_MILLIS = 1000
+
+QUEUE_DEPTH_PROP          = 'queueDepth'
+MAX_QUEUE_DEPTH_PROP      = 'maxQueueDepth'
+ENQUEUED_COUNT_PROP       = 'enqueuedCount'
+PROCESSED_COUNT_PROP      = 'processedCount'
+DROPPED_OLDEST_COUNT_PROP = 'droppedOldestCount'
+DROPPED_NEWEST_COUNT_PROP = 'droppedNewestCount'
+AVG_WAIT_MILLIS_PROP      = 'avgWaitMillis'
+MAX_WAIT_MILLIS_PROP      = 'maxWaitMillis'
+
+#####
+# Runtime mode keys and defaults
+#
+
+RUNTIME_MODE_KEY           = 'runtimeMode'
+RUNTIME_MODE_THREAD        = 'thread'
+RUNTIME_MODE_ASYNCIO       = 'asyncio'
+ASYNC_EXECUTOR_WORKERS_KEY = 'asyncExecutorWorkers'
+
+DEFAULT_ASYNC_EXECUTOR_WORKERS = 2
+
+#####
+# MQTT publish pipeline keys and defaults
+#
+
+ENABLE_PUBLISH_PIPELINE_KEY = 'enablePublishPipeline'
+MAX_INFLIGHT_MESSAGES_KEY   = 'maxInflightMessages'
+PUBLISH_QUEUE_SIZE_KEY      = 'publishQueueSize'
+
+DEFAULT_MAX_INFLIGHT_MESSAGES = 20
+DEFAULT_PUBLISH_QUEUE_SIZE    = 10000
+
+ACKED_COUNT_PROP    = 'ackedCount'
+FAILED_COUNT_PROP   = 'failedCount'
+INFLIGHT_COUNT_PROP = 'inflightCount'
+AVG_ACK_MILLIS_PROP = 'avgAckMillis'
+
+#####
+# CoAP client keys and defaults
+#
+
+MAX_CONCURRENT_REQUESTS_KEY = 'maxConcurrentRequests'
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 32
+
+WELL_KNOWN_CORE_PATH = '.well-known/core'
+
+DISCOVERY_TTL_KEY = 'discoveryCacheTtlSecs'
+
+DEFAULT_DISCOVERY_TTL = 300.0
+
+# the discovered resources are refreshed once this much of their TTL has passed
+DISCOVERY_REFRESH_RATIO = 0.8
+
+#####
+# Latency tracing keys, stage names and stats
+#
+
+ENABLE_LATENCY_TRACING_KEY = 'enableLatencyTracing'
+
+TRACE_STAGE_GENERATE    = 'generate'
+TRACE_STAGE_ANALYZE     = 'analyze'
+TRACE_STAGE_ENCODE      = 'encode'
+TRACE_STAGE_ENQUEUE     = 'enqueue'
+TRACE_STAGE_PUBLISH_ACK = 'publishAck'
+TRACE_STAGE_TOTAL       = 'total'
+
+COUNT_PROP       = 'count'
+MIN_MILLIS_PROP  = 'minMillis'
+MAX_MILLIS_PROP  = 'maxMillis'
+MEAN_MILLIS_PROP = 'meanMillis'
+P50_MILLIS_PROP  = 'p50Millis'
+P90_MILLIS_PROP  = 'p90Millis'
+P99_MILLIS_PROP  = 'p99Millis'
+
+#####
+# Metrics keys, defaults, names and snapshot props
+#
+
+ENABLE_METRICS_ENDPOINT_KEY   = 'enableMetricsEndpoint'
+METRICS_HOST_KEY              = 'metricsHost'
+METRICS_PORT_KEY              = 'metricsPort'
+METRICS_EXPORT_FILE_KEY       = 'metricsExportFile'
+METRICS_EXPORT_INTERVAL_KEY   = 'metricsExportIntervalSecs'
+METRICS_EXPORT_FORMAT_KEY     = 'metricsExportFormat'
+
+METRICS_FORMAT_JSON       = 'json'
+METRICS_FORMAT_PROMETHEUS = 'prometheus'
+
+DEFAULT_METRICS_HOST            = '127.0.0.1'
+DEFAULT_METRICS_PORT            = 9108
+DEFAULT_METRICS_EXPORT_INTERVAL = 60
+
+METRIC_TYPE_COUNTER   = 'counter'
+METRIC_TYPE_GAUGE     = 'gauge'
+METRIC_TYPE_HISTOGRAM = 'histogram'
+
+DATA_ENCODED_METRIC          = 'piot_data_encoded_total'
+DATA_DECODED_METRIC          = 'piot_data_decoded_total'
+DATA_ENCODE_MICROS_METRIC    = 'piot_data_encode_micros'
+DATA_DECODE_MICROS_METRIC    = 'piot_data_decode_micros'
+MQTT_PUBLISHED_METRIC        = 'piot_mqtt_messages_published_total'
+MQTT_PUBLISH_FAILED_METRIC   = 'piot_mqtt_publish_failures_total'
+MQTT_RECEIVED_METRIC         = 'piot_mqtt_messages_received_total'
+MQTT_CONNECTED_METRIC        = 'piot_mqtt_connected'
+COAP_REQUESTS_METRIC         = 'piot_coap_requests_total'
+COAP_REQUEST_FAILED_METRIC   = 'piot_coap_request_failures_total'
+COAP_INFLIGHT_METRIC         = 'piot_coap_requests_inflight'
+COAP_NOTIFICATIONS_METRIC    = 'piot_coap_notifications_total'
+COAP_COALESCED_METRIC        = 'piot_coap_coalesced_updates_total'
+COAP_REJECTED_METRIC         = 'piot_coap_requests_rejected_total'
+SENSOR_READINGS_METRIC       = 'piot_sensor_readings_total'
+SYSTEM_PERF_POLLS_METRIC     = 'piot_system_perf_polls_total'
+CPU_UTIL_METRIC              = 'piot_cpu_utilization_pct'
+MEM_UTIL_METRIC              = 'piot_memory_utilization_pct'
+ACTUATOR_COMMANDS_METRIC     = 'piot_actuator_commands_total'
+ACTUATOR_ERRORS_METRIC       = 'piot_actuator_command_errors_total'
+DEVICE_MESSAGES_METRIC       = 'piot_device_messages_total'
+UPSTREAM_SENT_METRIC         = 'piot_upstream_messages_sent_total'
+UPSTREAM_FAILED_METRIC       = 'piot_upstream_send_failures_total'
+UPSTREAM_STORED_METRIC       = 'piot_upstream_messages_stored_total'
+UPSTREAM_FAILOVER_METRIC     = 'piot_upstream_failovers_total'
+UPSTREAM_HEALTHY_METRIC      = 'piot_upstream_transport_healthy'
+INGEST_QUEUE_DEPTH_METRIC    = 'piot_ingest_queue_depth'
+OUTBOX_PENDING_METRIC        = 'piot_outbox_pending_messages'
+TRACE_STAGE_LATENCY_METRIC   = 'piot_trace_stage_latency_micros'
+
+METRIC_TYPE_PROP    = 'type'
+METRIC_HELP_PROP    = 'help'
+METRIC_SAMPLES_PROP = 'samples'
+METRIC_LABELS_PROP  = 'labels'
+
+SUM_PROP  = 'sum'
+MIN_PROP  = 'min'
+MAX_PROP  = 'max'
+MEAN_PROP = 'mean'
+P50_PROP  = 'p50'
+P90_PROP  = 'p90'
+P99_PROP  = 'p99'
+
+#####
+# Config watcher keys and defaults
+#
+
+ENABLE_CONFIG_WATCHER_KEY = 'enableConfigWatcher'
+CONFIG_WATCH_INTERVAL_KEY = 'configWatchIntervalSecs'
+
+DEFAULT_CONFIG_WATCH_INTERVAL = 5.0
+
+#####
+# CoAP server keys and defaults
+#
+
+OBSERVE_MIN_INTERVAL_KEY = 'observeMinIntervalSecs'
+RESOURCE_MAX_AGE_KEY     = 'resourceMaxAgeSecs'
+SERVER_WORKER_COUNT_KEY  = 'serverWorkerCount'
+RESOURCE_CONCURRENCY_KEY = 'resourceMaxConcurrency'
+RESOURCE_QUEUE_SIZE_KEY  = 'resourceMaxQueuedRequests'
+
+DEFAULT_OBSERVE_MIN_INTERVAL = 1.0
+DEFAULT_RESOURCE_MAX_AGE     = 5
+DEFAULT_SERVER_WORKER_COUNT  = 4
+DEFAULT_RESOURCE_CONCURRENCY = 1
+DEFAULT_RESOURCE_QUEUE_SIZE  = 8
+
+# Max-Age of a 5.03 response - when a client may retry
+SERVICE_UNAVAILABLE_MAX_AGE  = 1
+
+UPDATE_COUNT_PROP       = 'updateCount'
+NOTIFICATION_COUNT_PROP = 'notificationCount'
+OBSERVER_COUNT_PROP     = 'observerCount'
+ENCODE_COUNT_PROP       = 'encodeCount'
+HANDLED_COUNT_PROP      = 'handledCount'
+REJECTED_COUNT_PROP     = 'rejectedCount'
+
+#####
+# CoAP block-wise transfer (RFC 7959) keys and defaults
+#
+
+BLOCK_SIZE_KEY           = 'blockSize'
+MAX_BLOCKWISE_BYTES_KEY  = 'maxBlockwisePayloadBytes'
+BLOCKWISE_TIMEOUT_KEY    = 'blockwiseTimeoutSecs'
+
+# block sizes are powers of two, from 16 (SZX 0) to 1024 (SZX 6) bytes
+MIN_BLOCK_SIZE           = 16
+MAX_BLOCK_SIZE           = 1024
+
+DEFAULT_BLOCK_SIZE          = 1024
+DEFAULT_MAX_BLOCKWISE_BYTES = 4194304
+DEFAULT_BLOCKWISE_TIMEOUT   = 60.0
+
+#####
+# Logging keys and defaults
+#
+
+LOG_LEVEL_KEY            = 'logLevel'
+MODULE_LOG_LEVELS_KEY    = 'moduleLogLevels'
+LOG_FORMAT_KEY           = 'logFormat'
+ENABLE_ASYNC_LOGGING_KEY = 'enableAsyncLogging'
+LOG_RATE_LIMIT_SECS_KEY  = 'logRateLimitSecs'
+
+DEFAULT_LOG_LEVEL           = 'INFO'
+DEFAULT_LOG_FORMAT          = '%(asctime)s:%(name)s:%(levelname)s:%(message)s'
+DEFAULT_LOG_RATE_LIMIT_SECS = 10.0
+
 RUN_FOREVER_KEY    = 'runForever'
 TEST_EMPTY_APP_KEY = 'testEmptyApp'
 
@@ -8,16 +8,113 @@
 # 
 
 import configparser
+import hashlib
 import logging
 import os
+import threading
 import traceback
 
 from pathlib import Path
+from types import MappingProxyType
 
 from programmingtheiot.common.Singleton import Singleton
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
+class ConfigSnapshot():
+	"""
+	An immutable view of one load of the config. Every value is parsed once,
+	when the snapshot is built, into string, boolean, integer and float
+	tables keyed by (section, key), so a lookup is a single dict access.
+	
+	Values that can't be parsed as a given type are simply absent from that
+	type's table, so the lookup returns the caller's default.
+	
+	"""
+	
+	__slots__ = ('sectionNames', 'properties', 'booleans', 'integers', 'floats', 'optionxform')
+	
+	def __init__(self, configParser: configparser.ConfigParser = None):
+		properties = {}
+		booleans = {}
+		integers = {}
+		floats = {}
+		
+		sectionNames = configParser.sections() if configParser else []
+		
+		for section in sectionNames:
+			try:
+				items = configParser.items(section)
+			except configparser.InterpolationError as e:
+				logging.warning("Invalid interpolation in config section %s. Using raw values: %s", section, e)
+				
+				items = configParser.items(section, raw = True)
+			
+			for key, val in items:
+				propKey = (section, key)
+				properties[propKey] = val
+				
+				boolVal = configparser.ConfigParser.BOOLEAN_STATES.get(val.lower())
+				
+				if boolVal is not None:
+					booleans[propKey] = boolVal
+				
+				try:
+					integers[propKey] = int(val)
+				except ValueError:
+					pass
+				
+				try:
+					floats[propKey] = float(val)
+				except ValueError:
+					pass
+		
+		self.sectionNames = tuple(sectionNames)
+		self.properties = MappingProxyType(properties)
+		self.booleans = MappingProxyType(booleans)
+		self.integers = MappingProxyType(integers)
+		self.floats = MappingProxyType(floats)
+		
+		# keys are stored as the parser stores them (lower case by default)
+		self.optionxform = configParser.optionxform if configParser else str.lower
+	
+	def getProperty(self, section: str, key: str, defaultVal: str = None) -> str:
+		return self.properties.get((section, self.optionxform(key)), defaultVal)
+	
+	def getBoolean(self, section: str, key: str, defaultVal: bool = False) -> bool:
+		return self.booleans.get((section, self.optionxform(key)), defaultVal)
+	
+	def getInteger(self, section: str, key: str, defaultVal: int = 0) -> int:
+		return self.integers.get((section, self.optionxform(key)), defaultVal)
+	
+	def getFloat(self, section: str, key: str, defaultVal: float = 0.0) -> float:
+		return self.floats.get((section, self.optionxform(key)), defaultVal)
+	
+	def getSectionNames(self) -> tuple:
+		return self.sectionNames
+	
+	def hasProperty(self, section: str, key: str) -> bool:
+		return (section, self.optionxform(key)) in self.properties
+	
+	def hasSection(self, section: str) -> bool:
+		return section in self.sectionNames
+	
+	def getChangedKeys(self, previous) -> dict:
+		"""
+		Compares this snapshot with 'previous' and returns the keys that were
+		added, removed or whose value changed.
+		
+		@param previous The older ConfigSnapshot.
+		@return dict Section name -> set of changed keys (as stored, i.e. lower case).
+		"""
+		changedKeys = {}
+		
+		for propKey in self.properties.keys() | previous.properties.keys():
+			if self.properties.get(propKey) != previous.properties.get(propKey):
+				changedKeys.setdefault(propKey[0], set()).add(propKey[1])
+		
+		return changedKeys
+
 class ConfigUtil(metaclass = Singleton):
 	"""
 	A simple utility wrapper around the built-in Python
@@ -25,10 +122,23 @@ class ConfigUtil(metaclass = Singleton):
 	
 	Implemented as a Singleton using the Singleton metaclass.
 	
+	Each (re)load parses the file into a fresh ConfigParser and builds a new
+	ConfigSnapshot from it; the snapshot reference is then swapped in one
+	assignment, so readers on other threads always see either the old or
+	the new config, never a partially loaded one.
+	
+	The optional config watcher polls the config file, and any credential
+	files loaded through getCredentials(), for changes (mtime and size). A
+	changed config file is reloaded, and listeners are only told about the
+	sections and keys whose values actually changed.
+	
+	Parsed credentials are cached per file, keyed by the file's path and
+	(mtime, size), so repeated getCredentials() calls (e.g. on every
+	reconnect) cost a stat() instead of a read and parse.
+	
 	"""
 
 	configFile   = ConfigConst.DEFAULT_CONFIG_FILE_NAME
-	configParser = configparser.ConfigParser()
 	isLoaded	 = False
 	
 	def __init__(self, configFile: str = None):
@@ -39,7 +149,27 @@ class ConfigUtil(metaclass = Singleton):
 		"""
 		if (configFile is not None):
 			self.configFile = configFile
-			
+		
+		self.configParser = configparser.ConfigParser()
+		self.snapshot = ConfigSnapshot()
+		self.loadLock = threading.Lock()
+		
+		# (mtime, size) of the loaded config file
+		self.configFileStat = None
+		
+		# credential file name -> (sections, content digest, (mtime, size))
+		self.credFiles = {}
+		
+		# credential file name -> ((mtime, size), credential dict)
+		self.credCache = {}
+		
+		# (listener, section, normalized key -> key) tuples - replaced, never mutated
+		self.configListeners = ()
+		self.listenerLock = threading.Lock()
+		
+		self.watcherThread = None
+		self.watcherStopEvent = threading.Event()
+		
 		self._loadConfig()
 		logging.info("Created instance of ConfigUtil: " + str(self))
 	
@@ -64,8 +194,9 @@ class ConfigUtil(metaclass = Singleton):
 		If the credential file key has an entry (e.g. the file where the
 		credentials are stored in key = value form), the file will be
 		loaded if possible, and a dict object will be returned
-		to the caller. No caching of the data is made, except within the
-		returned dict object.
+		to the caller. The parsed data is cached until the file's mtime or
+		size changes, invalidateCredentials() is called, or the config is
+		reloaded; each call returns its own copy.
 		
 		NOTE: The key case IS preserved.
 		
@@ -76,12 +207,21 @@ class ConfigUtil(metaclass = Singleton):
 			credFileName = self.getProperty(section, ConfigConst.CRED_FILE_KEY);
 			
 			try:
-				if os.path.exists(credFileName) and os.path.isfile(credFileName):
+				fileStat = self._getFileStat(credFileName) if credFileName else None
+				cachedCreds = self.credCache.get(credFileName)
+				
+				if fileStat and cachedCreds and cachedCreds[0] == fileStat:
+					return dict(cachedCreds[1])
+				
+				if fileStat and os.path.isfile(credFileName):
 					logging.info("Loading credentials from section " + section + " and file " + credFileName)
 					
 					# read cred data and dump it into a custom section for parsing
 					fileRef  = Path(credFileName)
-					credData = "[" + ConfigConst.CRED_SECTION + "]\n" + fileRef.read_text()
+					fileData = fileRef.read_text()
+					credData = "[" + ConfigConst.CRED_SECTION + "]\n" + fileData
+					
+					self._trackCredentialFile(credFileName, section, fileData, fileStat)
 					
 					# create unique ConfigParser that preserves key case
 					credParser = configparser.ConfigParser()
@@ -92,7 +232,9 @@ class ConfigUtil(metaclass = Singleton):
 					credParser.read_string(credData)
 					credProps = dict(credParser.items(ConfigConst.CRED_SECTION))
 					
-					return credProps
+					self.credCache[credFileName] = (fileStat, credProps)
+					
+					return dict(credProps)
 				else:
 					logging.warn("Credential file doesn't exist: " + credFileName)
 			except Exception as e:
@@ -101,6 +243,19 @@ class ConfigUtil(metaclass = Singleton):
 		
 		return None
 	
+	def invalidateCredentials(self, section: str = None):
+		"""
+		Drops cached credentials, so the next getCredentials() call re-reads
+		the credential file.
+		
+		@param section If set, only the credential file used by this section
+		is dropped; otherwise all cached credentials are.
+		"""
+		if section:
+			self.credCache.pop(self.getProperty(section, ConfigConst.CRED_FILE_KEY), None)
+		else:
+			self.credCache = {}
+	
 	def getProperty(self, section: str, key: str, defaultVal: str = None, forceReload: bool = False):
 		"""
 		Attempts to retrieve the value of 'key' from the config.
@@ -110,7 +265,7 @@ class ConfigUtil(metaclass = Singleton):
 		@param forceReload Defaults to false; if true will reload the config.
 		@return The property associated with 'key' in 'section'.
 		"""
-		return self._getConfig(forceReload).get(section, key, fallback = defaultVal)
+		return self._getSnapshot(forceReload).getProperty(section, key, defaultVal)
 	
 	def getBoolean(self, section: str, key: str, forceReload: bool = False):
 		"""
@@ -122,7 +277,7 @@ class ConfigUtil(metaclass = Singleton):
 		@param forceReload Defaults to false; if true will reload the config.
 		@return The boolean associated with 'key' in 'section', or false.
 		"""
-		return self._getConfig(forceReload).getboolean(section, key, fallback = False)
+		return self._getSnapshot(forceReload).getBoolean(section, key)
 		
 	def getInteger(self, section: str, key: str, defaultVal: int = 0, forceReload: bool = False):
 		"""
@@ -134,7 +289,7 @@ class ConfigUtil(metaclass = Singleton):
 		@param forceReload Defaults to false; if true will reload the config.
 		@return The property associated with 'key' in 'section'.
 		"""
-		return self._getConfig(forceReload).getint(section, key, fallback = defaultVal)
+		return self._getSnapshot(forceReload).getInteger(section, key, defaultVal)
 	
 	def getFloat(self, section: str, key: str, defaultVal: float = 0.0, forceReload: bool = False):
 		"""
@@ -146,7 +301,22 @@ class ConfigUtil(metaclass = Singleton):
 		@param forceReload Defaults to false; if true will reload the config.
 		@return The property associated with 'key' in 'section'.
 		"""
-		return self._getConfig(forceReload).getfloat(section, key, fallback = defaultVal)
+		return self._getSnapshot(forceReload).getFloat(section, key, defaultVal)
+	
+	def getSectionNames(self, prefix: str = None) -> list:
+		"""
+		Returns the names of all sections in the loaded config, optionally
+		filtered to those starting with 'prefix'.
+		
+		@param prefix The optional section name prefix to match.
+		@return list The list of matching section names (may be empty).
+		"""
+		sections = list(self.snapshot.getSectionNames())
+		
+		if prefix:
+			return [section for section in sections if section.startswith(prefix)]
+		
+		return sections
 	
 	def hasProperty(self, section: str, key: str) -> bool:
 		"""
@@ -156,7 +326,7 @@ class ConfigUtil(metaclass = Singleton):
 		@param key The name of the key to lookup in 'section'.
 		@return True if 'key' is found in 'section'; False otherwise.
 		"""
-		return self._getConfig().has_option(section, key)
+		return self.snapshot.hasProperty(section, key)
 		
 	def hasSection(self, section: str) -> bool:
 		"""
@@ -165,8 +335,127 @@ class ConfigUtil(metaclass = Singleton):
 		@param section The name of the section to search.
 		@return True if 'section' exists and has parameters; false otherwise.
 		"""
-		return self._getConfig().has_section(section)
+		return self.snapshot.hasSection(section)
+		
+	def addConfigListener(self, listener, section: str = None, keys: list = None):
+		"""
+		Registers 'listener' to be told about config changes. It's called as
+		listener(section, changedKeys, snapshot) - once per changed section -
+		with the set of keys that were added, removed or changed, and the new
+		ConfigSnapshot. A changed credential file is reported as a change to
+		the 'credFile' key of each section that loaded it.
+		
+		Listeners are called on the thread that (re)loaded the config, which
+		is usually the config watcher's thread.
+		
+		@param listener The callable to notify.
+		@param section If set, only changes to this section are reported.
+		@param keys If set, only changes to these keys are reported, and
+		changedKeys uses the same spelling as given here.
+		"""
+		keyMap = None
+		
+		if keys:
+			keyMap = {self.snapshot.optionxform(key): key for key in keys}
+		
+		with self.listenerLock:
+			self.configListeners = self.configListeners + ((listener, section, keyMap),)
+	
+	def removeConfigListener(self, listener):
+		with self.listenerLock:
+			self.configListeners = tuple(entry for entry in self.configListeners if entry[0] != listener)
+	
+	def reloadConfig(self) -> bool:
+		"""
+		Reloads the config file and notifies listeners of any changes. If the
+		file can't be loaded, the current config is kept.
+		
+		@return bool True if the config was reloaded; False otherwise.
+		"""
+		previous = self.snapshot
+		
+		if not self._loadConfig():
+			return False
+		
+		# a section may now point at a different credential file
+		self.invalidateCredentials()
+		
+		changedKeys = self.snapshot.getChangedKeys(previous)
+		
+		if changedKeys:
+			logging.info("Config reloaded. Changed: %s", str({section: sorted(keys) for section, keys in changedKeys.items()}))
+			
+			self._notifyListeners(changedKeys)
+		
+		return True
+	
+	def checkForChanges(self) -> bool:
+		"""
+		Checks the config file and any loaded credential files once, reloading
+		and notifying listeners if something changed. Called periodically by
+		the config watcher.
+		
+		@return bool True if a change was detected; False otherwise.
+		"""
+		isChanged = False
+		configFileStat = self._getFileStat(self.configFile)
 		
+		# a missing (e.g. mid-replace) file is ignored - the current config is kept
+		if configFileStat and configFileStat != self.configFileStat:
+			isChanged = self.reloadConfig()
+		
+		for credFileName, (sections, digest, fileStat) in list(self.credFiles.items()):
+			credFileStat = self._getFileStat(credFileName)
+			
+			if credFileStat and credFileStat != fileStat:
+				newDigest = self._getFileDigest(credFileName)
+				self.credFiles[credFileName] = (sections, newDigest, credFileStat)
+				
+				if newDigest != digest:
+					logging.info("Credential file changed: %s", credFileName)
+					
+					isChanged = True
+					credFileKey = self.snapshot.optionxform(ConfigConst.CRED_FILE_KEY)
+					
+					self._notifyListeners({section: {credFileKey} for section in sections})
+		
+		return isChanged
+	
+	def startConfigWatcher(self, intervalSecs: float = ConfigConst.DEFAULT_CONFIG_WATCH_INTERVAL) -> bool:
+		"""
+		Starts polling the config and credential files for changes.
+		
+		@param intervalSecs The poll interval.
+		@return bool True if the watcher was started; False if it's already running.
+		"""
+		if self.watcherThread:
+			return False
+		
+		self.watcherStopEvent.clear()
+		
+		self.watcherThread = threading.Thread( \
+			target = self._runWatcher, args = (max(0.1, intervalSecs),), name = 'ConfigWatcher', daemon = True)
+		self.watcherThread.start()
+		
+		logging.info("Watching config file %s for changes every %s seconds.", self.configFile, str(intervalSecs))
+		
+		return True
+	
+	def stopConfigWatcher(self):
+		if self.watcherThread:
+			self.watcherStopEvent.set()
+			self.watcherThread.join()
+			self.watcherThread = None
+	
+	def getConfigSnapshot(self) -> ConfigSnapshot:
+		"""
+		Returns the current config snapshot. Use this to read several related
+		values that must come from the same load of the config.
+		
+		@return ConfigSnapshot
+		"""
+		return self.snapshot
+	
 	def isConfigDataLoaded(self) -> bool:
 		"""
 		Simple boolean check if the config data is loaded or not.
@@ -188,56 +477,134 @@ class ConfigUtil(metaclass = Singleton):
 		 
 		"""
 
-		# attempt to load user specific config file
-		if (self.configFile != ConfigConst.DEFAULT_CONFIG_FILE_NAME):
-			logging.info("Loading user config: %s", self.configFile)
-
-			self._doLoadConfig(configFilePath = self.configFile)
-
-		# attempt to load default config file
-		if not self.isLoaded:
-			logging.info("Loading default config: %s", self.configFile)
+		with self.loadLock:
+			configParser = configparser.ConfigParser()
+			isLoaded = False
 			
-			self._doLoadConfig(configFilePath = self.configFile)
-		
-		# attempt to load config file from relative parent path
-		if not self.isLoaded:
-			self.configFile = ConfigConst.PARENT_PATH + self.configFile
-
-			logging.info("Moving up one directory and loading config: %s", self.configFile)
+			# attempt to load user specific (or previously resolved) config file
+			if (self.configFile != ConfigConst.DEFAULT_CONFIG_FILE_NAME):
+				logging.info("Loading user config: %s", self.configFile)
+				
+				isLoaded = self._doLoadConfig(configParser, configFilePath = self.configFile)
 			
-			self._doLoadConfig(configFilePath = self.configFile)
-
-		if not self.isLoaded:
-			logging.warning("No config file loaded. System running without proper configuration.")
-		else:
-			logging.debug("Config: %s", str(self.configParser.sections()))
+			# attempt to load default config file
+			if not isLoaded:
+				logging.info("Loading default config: %s", ConfigConst.DEFAULT_CONFIG_FILE_NAME)
+				
+				isLoaded = self._doLoadConfig(configParser, configFilePath = ConfigConst.DEFAULT_CONFIG_FILE_NAME)
+				
+				if isLoaded:
+					self.configFile = ConfigConst.DEFAULT_CONFIG_FILE_NAME
+			
+			# attempt to load config file from relative parent path
+			if not isLoaded:
+				parentConfigFile = ConfigConst.PARENT_PATH + ConfigConst.DEFAULT_CONFIG_FILE_NAME
+				
+				logging.info("Moving up one directory and loading config: %s", parentConfigFile)
+				
+				isLoaded = self._doLoadConfig(configParser, configFilePath = parentConfigFile)
+				
+				if isLoaded:
+					self.configFile = parentConfigFile
+			
+			if isLoaded:
+				# swap in the new config in one step - lookups on other threads use
+				# either the old snapshot or the new one
+				self.configParser = configParser
+				self.snapshot = ConfigSnapshot(configParser)
+				self.isLoaded = True
+				
+				logging.debug("Config: %s", str(self.snapshot.getSectionNames()))
+			elif self.isLoaded:
+				logging.warning("Config reload failed. Keeping previously loaded configuration.")
+			else:
+				logging.warning("No config file loaded. System running without proper configuration.")
+			
+			return isLoaded
 
-	def _doLoadConfig(self, configFilePath: str = None):
+	def _doLoadConfig(self, configParser: configparser.ConfigParser, configFilePath: str = None) -> bool:
 		"""
-		Check if path exists - if so, load the config file.
+		Check if path exists - if so, load the config file into 'configParser'.
 
 		"""
 		if (os.path.exists(configFilePath)):
 			logging.info("Path found. Attempting config file load: %s", configFilePath)
 
-			self.configParser.read(configFilePath)
-			self.isLoaded = True
-
-			logging.info("Config file successfully loaded from path: %s", configFilePath)
+			try:
+				# stat before reading, so a change made while reading is picked up next time
+				fileStat = self._getFileStat(configFilePath)
+				
+				if configParser.read(configFilePath):
+					logging.info("Config file successfully loaded from path: %s", configFilePath)
+					
+					self.configFileStat = fileStat
+					
+					return True
+			except configparser.Error as e:
+				logging.warning("Failed to parse config file %s: %s", configFilePath, e)
 		else:
 			logging.warning("Path not found. Failed to load config file: %s", configFilePath)
+		
+		return False
 
-	def _getConfig(self, forceReload: bool = False) -> configparser:
+	def _getSnapshot(self, forceReload: bool = False) -> ConfigSnapshot:
 		"""
-		Returns the entire configuration object. If the config file hasn't
-		yet been loaded, it will be loaded.
+		Returns the current config snapshot. The config file is only
+		re-read if 'forceReload' is set.
 		
 		@param forceReload Defaults to false; if true, will reload the config.
-		@return The entire configuration file.
+		@return ConfigSnapshot The snapshot of the loaded config.
 		"""
-		if (self.isLoaded == False or forceReload):
-			self._loadConfig()
+		# a missing config file was already reported by the constructor - don't
+		# retry (and log the failure again) on every lookup
+		if forceReload:
+			self.reloadConfig()
+		
+		return self.snapshot
+	
+	def _getFileDigest(self, fileName: str) -> str:
+		try:
+			return hashlib.sha256(Path(fileName).read_text().encode('utf-8')).hexdigest()
+		except OSError:
+			return None
+	
+	def _getFileStat(self, fileName: str) -> tuple:
+		try:
+			fileStat = os.stat(fileName)
+			
+			return (fileStat.st_mtime_ns, fileStat.st_size)
+		except OSError:
+			return None
+	
+	def _notifyListeners(self, changedKeysBySection: dict):
+		snapshot = self.snapshot
+		
+		for listener, section, keyMap in self.configListeners:
+			for changedSection, changedKeys in changedKeysBySection.items():
+				if section and section != changedSection:
+					continue
+				
+				if keyMap:
+					changedKeys = {keyMap[key] for key in changedKeys if key in keyMap}
+					
+					if not changedKeys:
+						continue
+				
+				try:
+					listener(changedSection, set(changedKeys), snapshot)
+				except Exception as e:
+					logging.warning("Config listener failed to handle change to section %s: %s", changedSection, e)
+	
+	def _runWatcher(self, intervalSecs: float):
+		while not self.watcherStopEvent.wait(intervalSecs):
+			try:
+				self.checkForChanges()
+			except Exception as e:
+				logging.warning("Failed to check config files for changes: %s", e)
+	
+	def _trackCredentialFile(self, credFileName: str, section: str, fileData: str, fileStat: tuple):
+		# only a digest is kept - never the credentials themselves
+		sections = self.credFiles.get(credFileName, (frozenset(),))[0] | {section}
+		digest = hashlib.sha256(fileData.encode('utf-8')).hexdigest()
 		
-		return self.configParser
-	
\ No newline at end of file
+		self.credFiles[credFileName] = (sections, digest, fileStat)
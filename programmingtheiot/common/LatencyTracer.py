@@ -0,0 +1,160 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
+from programmingtheiot.common.Singleton import Singleton
+
+NANOS_IN_MICRO = 1000
+NANOS_IN_MILLI = 1000000
+
+class TraceContext():
+	"""
+	Per-message trace context. It holds the monotonic creation time and the
+	time each stage was reached. Each stage's latency (the time since the
+	previous stage, or since creation for the first one) is reported to the
+	LatencyTracer as soon as the stage is marked.
+
+	"""
+
+	__slots__ = ('tracer', 'createTime', 'lastTime', 'stageTimes')
+
+	def __init__(self, tracer):
+		self.tracer = tracer
+		self.createTime = time.monotonic_ns()
+		self.lastTime = self.createTime
+
+		# stage -> monotonic time (ns)
+		self.stageTimes = {}
+
+	def markStage(self, stage: str, isFinal: bool = False):
+		"""
+		Marks the stage as reached now.
+
+		@param stage The stage name (e.g. ConfigConst.TRACE_STAGE_ENCODE).
+		@param isFinal If True, the time since creation is also recorded as
+		ConfigConst.TRACE_STAGE_TOTAL.
+		"""
+		now = time.monotonic_ns()
+
+		self.stageTimes[stage] = now
+		self.tracer.recordStage(stage, now - self.lastTime)
+		self.lastTime = now
+
+		if isFinal:
+			self.tracer.recordStage(ConfigConst.TRACE_STAGE_TOTAL, now - self.createTime)
+
+	def getCreateTime(self) -> int:
+		return self.createTime
+
+	def getStageOffsetsMillis(self) -> dict:
+		"""
+		Returns the time each stage was reached, in milliseconds since creation.
+
+		@return dict
+		"""
+		return {stage: (stageTime - self.createTime) / NANOS_IN_MILLI for stage, stageTime in self.stageTimes.items()}
+
+class LatencyTracer(metaclass = Singleton):
+	"""
+	Collects per-stage latency histograms for telemetry as it moves from
+	generation through analysis, encoding and enqueueing to the publish ack.
+	The histograms live in the MetricsRegistry (in microseconds, labeled by
+	stage), so they're exported along with every other metric.
+
+	Tracing is off unless 'enableLatencyTracing' is set in the
+	ConstrainedDevice section (or setEnabled() is called). When it's off,
+	createTraceContext() returns None and data containers carry no trace
+	context, so the only cost is that check.
+
+	"""
+
+	def __init__(self):
+		self.enabled = ConfigUtil().getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_LATENCY_TRACING_KEY)
+
+		# stage -> Histogram
+		self.histograms = {}
+		self.lock = threading.Lock()
+
+		if self.enabled:
+			logging.info("Latency tracing is enabled.")
+
+	def isEnabled(self) -> bool:
+		return self.enabled
+
+	def setEnabled(self, enabled: bool):
+		"""
+		Enables or disables tracing for data created from now on. Data that
+		already has a trace context keeps it.
+
+		@param enabled True to enable tracing; False to disable it.
+		"""
+		self.enabled = enabled
+
+	def createTraceContext(self) -> TraceContext:
+		"""
+		Returns a new trace context, or None if tracing is disabled.
+
+		@return TraceContext
+		"""
+		return TraceContext(self) if self.enabled else None
+
+	def recordStage(self, stage: str, nanos: int):
+		histogram = self.histograms.get(stage)
+
+		if not histogram:
+			with self.lock:
+				histogram = self.histograms.get(stage)
+
+				if not histogram:
+					histogram = self.histograms[stage] = MetricsRegistry().histogram( \
+						ConfigConst.TRACE_STAGE_LATENCY_METRIC, 'Per-stage telemetry latency', {'stage': stage})
+
+		histogram.record(nanos // NANOS_IN_MICRO)
+
+	def getStageStats(self) -> dict:
+		"""
+		Returns the latency stats for each stage recorded so far.
+
+		@return dict Stage name -> count, min, max, mean and p50 / p90 / p99 (in milliseconds).
+		"""
+		with self.lock:
+			histograms = list(self.histograms.items())
+
+		stageStats = {}
+
+		for stage, histogram in histograms:
+			stats = histogram.getStats(scale = NANOS_IN_MICRO / NANOS_IN_MILLI)
+
+			if stats[ConfigConst.COUNT_PROP]:
+				stageStats[stage] = {
+					ConfigConst.COUNT_PROP:       stats[ConfigConst.COUNT_PROP],
+					ConfigConst.MIN_MILLIS_PROP:  stats[ConfigConst.MIN_PROP],
+					ConfigConst.MAX_MILLIS_PROP:  stats[ConfigConst.MAX_PROP],
+					ConfigConst.MEAN_MILLIS_PROP: stats[ConfigConst.MEAN_PROP],
+					ConfigConst.P50_MILLIS_PROP:  stats[ConfigConst.P50_PROP],
+					ConfigConst.P90_MILLIS_PROP:  stats[ConfigConst.P90_PROP],
+					ConfigConst.P99_MILLIS_PROP:  stats[ConfigConst.P99_PROP]
+				}
+
+		return stageStats
+
+	def resetStats(self):
+		with self.lock:
+			for histogram in self.histograms.values():
+				histogram.reset()
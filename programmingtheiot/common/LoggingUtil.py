@@ -0,0 +1,253 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from logging.handlers import QueueHandler, QueueListener
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.Singleton import Singleton
+
+class RateLimitedLogger():
+	"""
+	Wraps a named logger for messages that would otherwise be emitted on
+	every sensor reading. At most one message is emitted per interval; the
+	rest are counted, and the count is appended to the next message that
+	does get through.
+
+	The level check comes first, so a disabled message costs a single
+	isEnabledFor() call and its arguments are never formatted. The interval
+	bookkeeping is deliberately lock-free - under contention a message may
+	occasionally slip through early or be miscounted, which is harmless.
+
+	"""
+
+	def __init__(self, name: str = None, intervalSecs: float = ConfigConst.DEFAULT_LOG_RATE_LIMIT_SECS):
+		"""
+		Constructor for RateLimitedLogger.
+
+		@param name The logger name (typically the module's __name__).
+		@param intervalSecs The minimum time between emitted messages. Zero
+		(or less) disables the rate limit.
+		"""
+		self.logger = logging.getLogger(name)
+		self.intervalSecs = intervalSecs
+		self.nextLogTime = 0.0
+		self.suppressedCount = 0
+
+	def debug(self, msg: str, *args):
+		self._log(logging.DEBUG, msg, args)
+
+	def info(self, msg: str, *args):
+		self._log(logging.INFO, msg, args)
+
+	def warning(self, msg: str, *args):
+		self._log(logging.WARNING, msg, args)
+
+	def log(self, level: int, msg: str, *args):
+		"""
+		Emits the message if 'level' is enabled and the interval has elapsed
+		since the last emitted message; otherwise counts it as suppressed.
+
+		@param level The logging level (e.g. logging.INFO).
+		@param msg The message format string.
+		@param args The message arguments.
+		"""
+		self._log(level, msg, args)
+
+	def getSuppressedCount(self) -> int:
+		"""
+		Returns the number of messages suppressed since the last emitted one.
+
+		@return int
+		"""
+		return self.suppressedCount
+
+	def setInterval(self, intervalSecs: float):
+		self.intervalSecs = intervalSecs
+
+	def _log(self, level: int, msg: str, args: tuple):
+		if not self.logger.isEnabledFor(level):
+			return
+
+		if self.intervalSecs > 0:
+			now = time.monotonic()
+
+			if now < self.nextLogTime:
+				self.suppressedCount += 1
+				return
+
+			self.nextLogTime = now + self.intervalSecs
+
+		suppressedCount = self.suppressedCount
+
+		# stacklevel 3 attributes the record to the caller, not this class
+		if suppressedCount:
+			self.suppressedCount = 0
+			self.logger.log(level, msg + ' (%d similar messages suppressed)', *args, suppressedCount, stacklevel = 3)
+		else:
+			self.logger.log(level, msg, *args, stacklevel = 3)
+
+class LoggingUtil(metaclass = Singleton):
+	"""
+	Configures logging for the CDA from the ConstrainedDevice section of
+	the config: the root level ('logLevel'), per-logger overrides
+	('moduleLogLevels', as comma-separated 'name = LEVEL' pairs) and the
+	format ('logFormat').
+
+	If 'enableAsyncLogging' is set, the root logger only gets a QueueHandler
+	and a QueueListener thread does the formatting and stream I/O, so a slow
+	console or log file never stalls the sensor or messaging threads.
+
+	Also hands out the per-module RateLimitedLogger instances, using
+	'logRateLimitSecs' as their interval.
+
+	"""
+
+	def __init__(self):
+		self.rateLimitSecs = \
+			ConfigUtil().getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.LOG_RATE_LIMIT_SECS_KEY, ConfigConst.DEFAULT_LOG_RATE_LIMIT_SECS)
+
+		# logger name -> RateLimitedLogger
+		self.rateLimitedLoggers = {}
+
+		self.handler = None
+		self.queueListener = None
+		self.isExitHookRegistered = False
+		self.lock = threading.Lock()
+
+	def configureLogging(self, stream = None, enableAsync: bool = None) -> bool:
+		"""
+		Installs the configured handler on the root logger and sets the root
+		and per-module levels. Safe to call more than once; the handler (and
+		listener thread) from a previous call are replaced.
+
+		@param stream The stream to log to. Defaults to sys.stderr.
+		@param enableAsync If set, overrides 'enableAsyncLogging'.
+		@return bool True if async (queued) logging is enabled; False otherwise.
+		"""
+		configUtil = ConfigUtil()
+
+		logLevel = \
+			self._getLevel(configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.LOG_LEVEL_KEY, ConfigConst.DEFAULT_LOG_LEVEL), logging.INFO)
+		logFormat = \
+			configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.LOG_FORMAT_KEY, ConfigConst.DEFAULT_LOG_FORMAT)
+		moduleLogLevels = \
+			configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.MODULE_LOG_LEVELS_KEY, '')
+
+		if enableAsync is None:
+			enableAsync = configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_ASYNC_LOGGING_KEY)
+
+		streamHandler = logging.StreamHandler(stream)
+		streamHandler.setFormatter(logging.Formatter(logFormat if logFormat else ConfigConst.DEFAULT_LOG_FORMAT))
+
+		rootLogger = logging.getLogger()
+
+		with self.lock:
+			self._removeHandler(rootLogger)
+
+			if enableAsync:
+				logQueue = queue.SimpleQueue()
+
+				self.queueListener = QueueListener(logQueue, streamHandler, respect_handler_level = True)
+				self.queueListener.start()
+				self.handler = QueueHandler(logQueue)
+			else:
+				self.handler = streamHandler
+
+			rootLogger.addHandler(self.handler)
+			rootLogger.setLevel(logLevel)
+
+			if not self.isExitHookRegistered:
+				atexit.register(self.stopLogging)
+				self.isExitHookRegistered = True
+
+		for name, level in self._parseModuleLogLevels(moduleLogLevels).items():
+			logging.getLogger(name).setLevel(level)
+
+		logging.info("Logging configured: level=%s, async=%s.", logging.getLevelName(logLevel), enableAsync)
+
+		return enableAsync
+
+	def stopLogging(self):
+		"""
+		Flushes any queued records, stops the listener thread and removes
+		the handler installed by configureLogging().
+
+		"""
+		with self.lock:
+			self._removeHandler(logging.getLogger())
+
+	def getRateLimitedLogger(self, name: str = None) -> RateLimitedLogger:
+		"""
+		Returns the RateLimitedLogger for 'name', creating it on first use.
+
+		@param name The logger name (typically the module's __name__).
+		@return RateLimitedLogger
+		"""
+		rateLimitedLogger = self.rateLimitedLoggers.get(name)
+
+		if not rateLimitedLogger:
+			with self.lock:
+				rateLimitedLogger = self.rateLimitedLoggers.get(name)
+
+				if not rateLimitedLogger:
+					rateLimitedLogger = self.rateLimitedLoggers[name] = RateLimitedLogger(name, self.rateLimitSecs)
+
+		return rateLimitedLogger
+
+	def _removeHandler(self, rootLogger: logging.Logger):
+		if self.handler:
+			rootLogger.removeHandler(self.handler)
+			self.handler.close()
+			self.handler = None
+
+		if self.queueListener:
+			# stop() drains the queue before joining the listener thread
+			self.queueListener.stop()
+			self.queueListener = None
+
+	def _getLevel(self, levelName: str, defaultLevel: int) -> int:
+		level = logging.getLevelName(levelName.strip().upper()) if levelName else None
+
+		if isinstance(level, int):
+			return level
+
+		if levelName:
+			logging.warning("Invalid log level '%s'. Using %s.", levelName, logging.getLevelName(defaultLevel))
+
+		return defaultLevel
+
+	def _parseModuleLogLevels(self, moduleLogLevels: str) -> dict:
+		levels = {}
+
+		if not moduleLogLevels:
+			return levels
+
+		for entry in moduleLogLevels.split(','):
+			name, sep, levelName = entry.partition('=')
+
+			if not sep or not name.strip():
+				if entry.strip():
+					logging.warning("Ignoring invalid module log level entry: %s", entry)
+
+				continue
+
+			levels[name.strip()] = self._getLevel(levelName, logging.NOTSET)
+
+		return levels
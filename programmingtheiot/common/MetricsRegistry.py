@@ -0,0 +1,491 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import json
+import logging
+import os
+import threading
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.Singleton import Singleton
+
+class Counter():
+	"""
+	Monotonic counter. Each thread increments its own cell, so inc() never
+	takes a lock (after a thread's first call); getValue() sums the cells.
+
+	"""
+
+	def __init__(self, name: str, labels: dict = None):
+		self.name = name
+		self.labels = labels or {}
+
+		self.local = threading.local()
+		self.cells = []
+		self.lock = threading.Lock()
+
+	def inc(self, amount: int = 1):
+		try:
+			self.local.cell[0] += amount
+		except AttributeError:
+			cell = [amount]
+
+			with self.lock:
+				self.cells.append(cell)
+
+			self.local.cell = cell
+
+	def getValue(self) -> int:
+		with self.lock:
+			return sum(cell[0] for cell in self.cells)
+
+	def reset(self):
+		with self.lock:
+			self.cells = []
+			self.local = threading.local()
+
+class Gauge():
+	"""
+	Point-in-time value. It's either set directly or, if a function is set,
+	read from that function whenever a snapshot is taken.
+
+	"""
+
+	def __init__(self, name: str, labels: dict = None):
+		self.name = name
+		self.labels = labels or {}
+
+		self.value = 0
+		self.valueFunc = None
+		self.lock = threading.Lock()
+
+	def set(self, value):
+		self.value = value
+
+	def inc(self, amount = 1):
+		with self.lock:
+			self.value += amount
+
+	def dec(self, amount = 1):
+		with self.lock:
+			self.value -= amount
+
+	def setFunction(self, valueFunc):
+		"""
+		Sets the function to read the value from (e.g. a queue's depth).
+
+		@param valueFunc A no-arg function returning a number, or None to clear it.
+		"""
+		self.valueFunc = valueFunc
+
+	def getValue(self):
+		if self.valueFunc:
+			try:
+				return self.valueFunc()
+			except Exception as e:
+				logging.warning("Failed to read gauge %s: %s", self.name, e)
+
+				return 0
+
+		return self.value
+
+	def reset(self):
+		self.value = 0
+
+class _HistogramCell():
+
+	__slots__ = ('bucketCounts', 'count', 'total', 'minVal', 'maxVal')
+
+	def __init__(self):
+		self.bucketCounts = []
+		self.count = 0
+		self.total = 0
+		self.minVal = 0
+		self.maxVal = 0
+
+class Histogram():
+	"""
+	Log-linear histogram of non-negative integer values (e.g. microseconds),
+	in the style of HdrHistogram: values below 32 get their own bucket, and
+	every power of 2 above that is split into 16 linear sub-buckets, so any
+	reported value is within 1/16 (6.25%) of the true value. The bucket
+	index is computed with a couple of integer ops - no search.
+
+	Like Counter, each thread records into its own cell; cells are merged
+	when stats are read.
+
+	"""
+
+	SUB_BUCKET_BITS  = 4
+	SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+	LINEAR_LIMIT     = SUB_BUCKET_COUNT << 1
+
+	def __init__(self, name: str, labels: dict = None):
+		self.name = name
+		self.labels = labels or {}
+
+		self.local = threading.local()
+		self.cells = []
+		self.lock = threading.Lock()
+
+	def record(self, value):
+		"""
+		Records a single value. Negative values are recorded as 0.
+
+		@param value The value (truncated to an int).
+		"""
+		try:
+			cell = self.local.cell
+		except AttributeError:
+			cell = self._createCell()
+
+		value = int(value)
+
+		# plain comparisons - min() / max() cost several times more on this path
+		if value < 32:
+			if value < 0:
+				value = 0
+
+			index = value
+		else:
+			if value > 0x7FFFFFFFFFFFFFFF:
+				value = 0x7FFFFFFFFFFFFFFF
+
+			# SUB_BUCKET_BITS = 4: the top 5 bits pick the bucket
+			shift = value.bit_length() - 5
+			index = (shift << 4) + (value >> shift)
+
+		try:
+			cell.bucketCounts[index] += 1
+		except IndexError:
+			cell.bucketCounts.extend([0] * (index + 1 - len(cell.bucketCounts)))
+			cell.bucketCounts[index] += 1
+
+		if cell.count == 0 or value < cell.minVal:
+			cell.minVal = value
+
+		if value > cell.maxVal:
+			cell.maxVal = value
+
+		cell.count += 1
+		cell.total += value
+
+	def getCount(self) -> int:
+		with self.lock:
+			return sum(cell.count for cell in self.cells)
+
+	def getStats(self, scale: float = 1.0) -> dict:
+		"""
+		Returns the count, sum, min, max, mean and p50 / p90 / p99 values,
+		each multiplied by 'scale' (except the count).
+
+		@param scale The multiplier for unit conversion (e.g. 0.001 for micros to millis).
+		@return dict
+		"""
+		bucketCounts = []
+		count = total = minVal = maxVal = 0
+
+		with self.lock:
+			cells = list(self.cells)
+
+		for cell in cells:
+			if cell.count == 0:
+				continue
+
+			if len(cell.bucketCounts) > len(bucketCounts):
+				bucketCounts.extend([0] * (len(cell.bucketCounts) - len(bucketCounts)))
+
+			for i, bucketCount in enumerate(cell.bucketCounts):
+				bucketCounts[i] += bucketCount
+
+			minVal = cell.minVal if count == 0 else min(minVal, cell.minVal)
+			maxVal = max(maxVal, cell.maxVal)
+			count += cell.count
+			total += cell.total
+
+		return {
+			ConfigConst.COUNT_PROP: count,
+			ConfigConst.SUM_PROP:   total * scale,
+			ConfigConst.MIN_PROP:   minVal * scale,
+			ConfigConst.MAX_PROP:   maxVal * scale,
+			ConfigConst.MEAN_PROP:  (total / count * scale) if count else 0.0,
+			ConfigConst.P50_PROP:   self._getPercentile(bucketCounts, count, maxVal, 50.0) * scale,
+			ConfigConst.P90_PROP:   self._getPercentile(bucketCounts, count, maxVal, 90.0) * scale,
+			ConfigConst.P99_PROP:   self._getPercentile(bucketCounts, count, maxVal, 99.0) * scale
+		}
+
+	def reset(self):
+		with self.lock:
+			self.cells = []
+			self.local = threading.local()
+
+	def _createCell(self) -> _HistogramCell:
+		cell = _HistogramCell()
+
+		with self.lock:
+			self.cells.append(cell)
+
+		self.local.cell = cell
+
+		return cell
+
+	def _getPercentile(self, bucketCounts: list, count: int, maxVal: int, percentile: float) -> int:
+		if count == 0:
+			return 0
+
+		rank = max(1, -(-count * percentile // 100))
+		cumulativeCount = 0
+
+		for index, bucketCount in enumerate(bucketCounts):
+			cumulativeCount += bucketCount
+
+			if cumulativeCount >= rank:
+				return min(self._getBucketUpperBound(index), maxVal)
+
+		return maxVal
+
+	def _getBucketUpperBound(self, index: int) -> int:
+		if index < self.LINEAR_LIMIT:
+			return index
+
+		shift = (index >> self.SUB_BUCKET_BITS) - 1
+		subBucket = (index & (self.SUB_BUCKET_COUNT - 1)) + self.SUB_BUCKET_COUNT
+
+		return ((subBucket + 1) << shift) - 1
+
+class MetricsRegistry(metaclass = Singleton):
+	"""
+	Process-wide registry of counters, gauges and histograms, with snapshot
+	export as JSON or Prometheus text - over a local HTTP endpoint and / or
+	periodically to a file.
+
+	Metrics are looked up (or created) by name and optional labels; callers
+	should do that once (e.g. in their constructor) and keep the returned
+	object, so the hot path is just inc(), set() or record().
+
+	Histograms are exported to Prometheus as summaries (p50 / p90 / p99
+	quantiles, plus _sum and _count).
+
+	"""
+
+	METRIC_CLASSES = {
+		ConfigConst.METRIC_TYPE_COUNTER:   Counter,
+		ConfigConst.METRIC_TYPE_GAUGE:     Gauge,
+		ConfigConst.METRIC_TYPE_HISTOGRAM: Histogram
+	}
+
+	PROMETHEUS_QUANTILES = ((ConfigConst.P50_PROP, '0.5'), (ConfigConst.P90_PROP, '0.9'), (ConfigConst.P99_PROP, '0.99'))
+
+	def __init__(self):
+		# name -> (type, help text, {labelKey -> metric})
+		self.families = {}
+		self.lock = threading.Lock()
+
+		self.httpServer = None
+		self.httpThread = None
+
+		self.exportThread = None
+		self.exportStopEvent = threading.Event()
+
+	def counter(self, name: str, helpText: str = '', labels: dict = None) -> Counter:
+		return self._getOrCreateMetric(ConfigConst.METRIC_TYPE_COUNTER, name, helpText, labels)
+
+	def gauge(self, name: str, helpText: str = '', labels: dict = None) -> Gauge:
+		return self._getOrCreateMetric(ConfigConst.METRIC_TYPE_GAUGE, name, helpText, labels)
+
+	def histogram(self, name: str, helpText: str = '', labels: dict = None) -> Histogram:
+		return self._getOrCreateMetric(ConfigConst.METRIC_TYPE_HISTOGRAM, name, helpText, labels)
+
+	def getSnapshot(self) -> dict:
+		"""
+		Returns the current value of every metric, grouped by name.
+
+		@return dict Name -> {type, help, samples: [{labels, value}]}, where a
+		histogram's value is the stats dict from Histogram.getStats().
+		"""
+		with self.lock:
+			families = [(name, family[0], family[1], list(family[2].values())) for name, family in sorted(self.families.items())]
+
+		snapshot = {}
+
+		for name, metricType, helpText, metrics in families:
+			samples = []
+
+			for metric in metrics:
+				value = metric.getStats() if metricType == ConfigConst.METRIC_TYPE_HISTOGRAM else metric.getValue()
+				samples.append({ConfigConst.METRIC_LABELS_PROP: dict(metric.labels), ConfigConst.VALUE_PROP: value})
+
+			snapshot[name] = {ConfigConst.METRIC_TYPE_PROP: metricType, ConfigConst.METRIC_HELP_PROP: helpText, ConfigConst.METRIC_SAMPLES_PROP: samples}
+
+		return snapshot
+
+	def toJson(self) -> str:
+		return json.dumps(self.getSnapshot(), indent = 4)
+
+	def toPrometheusText(self) -> str:
+		"""
+		Returns the snapshot in the Prometheus text exposition format (0.0.4).
+
+		@return str
+		"""
+		lines = []
+
+		for name, family in self.getSnapshot().items():
+			metricType = family[ConfigConst.METRIC_TYPE_PROP]
+
+			if family[ConfigConst.METRIC_HELP_PROP]:
+				lines.append('# HELP {} {}'.format(name, family[ConfigConst.METRIC_HELP_PROP].replace('\\', '\\\\').replace('\n', '\\n')))
+
+			lines.append('# TYPE {} {}'.format(name, 'summary' if metricType == ConfigConst.METRIC_TYPE_HISTOGRAM else metricType))
+
+			for sample in family[ConfigConst.METRIC_SAMPLES_PROP]:
+				labels = sample[ConfigConst.METRIC_LABELS_PROP]
+				value = sample[ConfigConst.VALUE_PROP]
+
+				if metricType == ConfigConst.METRIC_TYPE_HISTOGRAM:
+					for prop, quantile in self.PROMETHEUS_QUANTILES:
+						lines.append('{}{} {}'.format(name, self._formatLabels(labels, quantile = quantile), value[prop]))
+
+					lines.append('{}_sum{} {}'.format(name, self._formatLabels(labels), value[ConfigConst.SUM_PROP]))
+					lines.append('{}_count{} {}'.format(name, self._formatLabels(labels), value[ConfigConst.COUNT_PROP]))
+				else:
+					lines.append('{}{} {}'.format(name, self._formatLabels(labels), value))
+
+		return '\n'.join(lines) + '\n'
+
+	def writeSnapshot(self, filePath: str, exportFormat: str = ConfigConst.METRICS_FORMAT_JSON) -> bool:
+		"""
+		Writes the snapshot to the file. The file is replaced atomically, so
+		readers never see a partial snapshot.
+
+		@param filePath The file to write.
+		@param exportFormat ConfigConst.METRICS_FORMAT_JSON or METRICS_FORMAT_PROMETHEUS.
+		@return bool True on success; False otherwise.
+		"""
+		content = self.toPrometheusText() if exportFormat == ConfigConst.METRICS_FORMAT_PROMETHEUS else self.toJson()
+		tmpPath = filePath + '.tmp'
+
+		try:
+			with open(tmpPath, 'w') as tmpFile:
+				tmpFile.write(content)
+
+			os.replace(tmpPath, filePath)
+
+			return True
+		except OSError as e:
+			logging.warning("Failed to write metrics snapshot to %s: %s", filePath, e)
+
+			return False
+
+	def startHttpEndpoint(self, host: str = ConfigConst.DEFAULT_METRICS_HOST, port: int = ConfigConst.DEFAULT_METRICS_PORT) -> int:
+		"""
+		Starts serving GET /metrics (Prometheus text) and /metrics.json.
+
+		@param host The address to listen on.
+		@param port The port to listen on. 0 picks a free port.
+		@return int The port actually bound.
+		"""
+		if self.httpServer:
+			return self.httpServer.server_address[1]
+
+		# http.server (and the email / http.client modules it pulls in) is only
+		# needed when the endpoint is enabled, so it's not imported at startup
+		from http.server import ThreadingHTTPServer
+
+		from programmingtheiot.common.MetricsRequestHandler import MetricsRequestHandler
+
+		self.httpServer = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+		self.httpServer.daemon_threads = True
+		self.httpServer.registry = self
+
+		self.httpThread = threading.Thread(target = self.httpServer.serve_forever, name = 'MetricsHttpEndpoint', daemon = True)
+		self.httpThread.start()
+
+		boundPort = self.httpServer.server_address[1]
+		logging.info("Metrics endpoint listening on http://%s:%d/metrics", host, boundPort)
+
+		return boundPort
+
+	def stopHttpEndpoint(self):
+		if self.httpServer:
+			self.httpServer.shutdown()
+			self.httpServer.server_close()
+			self.httpThread.join()
+
+			self.httpServer = None
+			self.httpThread = None
+
+	def startFileExport(self, filePath: str, intervalSecs: float = ConfigConst.DEFAULT_METRICS_EXPORT_INTERVAL, \
+		exportFormat: str = ConfigConst.METRICS_FORMAT_JSON):
+		"""
+		Writes a snapshot to the file every 'intervalSecs' seconds (and once
+		more on stopFileExport()).
+
+		"""
+		if self.exportThread:
+			return
+
+		self.exportStopEvent.clear()
+
+		self.exportThread = threading.Thread( \
+			target = self._runExportLoop, args = (filePath, max(1.0, intervalSecs), exportFormat), name = 'MetricsFileExport', daemon = True)
+		self.exportThread.start()
+
+		logging.info("Exporting metrics (%s) to %s every %s seconds", exportFormat, filePath, str(intervalSecs))
+
+	def stopFileExport(self):
+		if self.exportThread:
+			self.exportStopEvent.set()
+			self.exportThread.join()
+			self.exportThread = None
+
+	def clear(self):
+		"""
+		Removes every metric. Objects already handed out keep working, but are
+		no longer exported.
+
+		"""
+		with self.lock:
+			self.families.clear()
+
+	def _getOrCreateMetric(self, metricType: str, name: str, helpText: str, labels: dict):
+		labelKey = tuple(sorted(labels.items())) if labels else ()
+
+		with self.lock:
+			family = self.families.get(name)
+
+			if not family:
+				family = self.families[name] = (metricType, helpText, {})
+			elif family[0] != metricType:
+				raise ValueError("Metric {} is already registered as a {}".format(name, family[0]))
+
+			metric = family[2].get(labelKey)
+
+			if not metric:
+				metric = family[2][labelKey] = self.METRIC_CLASSES[metricType](name, labels)
+
+			return metric
+
+	def _formatLabels(self, labels: dict, quantile: str = None) -> str:
+		items = ['{}="{}"'.format(key, str(val).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, val in labels.items()]
+
+		if quantile:
+			items.append('quantile="{}"'.format(quantile))
+
+		return '{' + ','.join(items) + '}' if items else ''
+
+	def _runExportLoop(self, filePath: str, intervalSecs: float, exportFormat: str):
+		while not self.exportStopEvent.wait(intervalSecs):
+			self.writeSnapshot(filePath, exportFormat)
+
+		self.writeSnapshot(filePath, exportFormat)
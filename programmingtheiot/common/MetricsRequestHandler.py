@@ -0,0 +1,46 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+
+from http.server import BaseHTTPRequestHandler
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+	"""
+	Serves the MetricsRegistry snapshot for the metrics HTTP endpoint:
+	GET /metrics returns Prometheus text and GET /metrics.json returns JSON.
+	The server it's attached to must have a 'registry' attribute.
+
+	"""
+
+	def do_GET(self):
+		registry = self.server.registry
+		path = self.path.split('?', 1)[0]
+
+		if path == '/metrics':
+			self._sendResponse(registry.toPrometheusText(), 'text/plain; version=0.0.4; charset=utf-8')
+		elif path == '/metrics.json':
+			self._sendResponse(registry.toJson(), 'application/json')
+		else:
+			self.send_error(404)
+
+	def log_message(self, format, *args):
+		logging.debug("Metrics endpoint: " + format, *args)
+
+	def _sendResponse(self, content: str, contentType: str):
+		body = content.encode('utf-8')
+
+		self.send_response(200)
+		self.send_header('Content-Type', contentType)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
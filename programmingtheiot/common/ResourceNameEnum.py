@@ -7,10 +7,18 @@
 # Copyright (c) 2020 - 2025 by Andrew D. King
 # 
 
+import functools
+
 from enum import Enum
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
+RESOURCE_LEVEL_SEP = '/'
+TOPIC_SINGLE_LEVEL = '+'
+TOPIC_MULTI_LEVEL  = '#'
+
+DEFAULT_PATH_CACHE_SIZE = 1024
+
 class ResourceNameEnum(Enum):
 	"""
 	Enum declaration for resource and topic names for the CDA and GDA.
@@ -53,15 +61,60 @@ class ResourceNameEnum(Enum):
 	CDA_SYSTEM_PERF_MSG_RESOURCE	  = ConfigConst.CDA_SYSTEM_PERF_MSG_RESOURCE
 	CDA_UPDATE_NOTIFICATIONS_RESOURCE = ConfigConst.CDA_UPDATE_NOTIFICATIONS_MSG_RESOURCE
 	CDA_REGISTRATION_REQUEST_RESOURCE = ConfigConst.CDA_REGISTRATION_REQUEST_RESOURCE
+	CDA_MEDIA_DATA_MSG_RESOURCE       = ConfigConst.CDA_MEDIA_DATA_MSG_RESOURCE
 
-	def getResourceNameByValue(self, val: str) -> str:
+	@staticmethod
+	def getResourceNameByValue(val: str):
 		"""
-		Looks up the resource enum by its value.
+		Looks up the resource enum by its value (e.g. 'PIOT/ConstrainedDevice/SensorMsg').
+		For backwards compatibility, the enum name is accepted as well.
 		
 		@param val The string value to use for the enum lookup.
-		@return ResourceNameEnum On success, the enum will be returned.
+		@return ResourceNameEnum On success, the enum will be returned; None otherwise.
+		"""
+		resource = _RESOURCES_BY_VALUE.get(val)
+		
+		if resource is None and val in ResourceNameEnum.__members__:
+			resource = ResourceNameEnum.__members__[val]
+		
+		return resource
+	
+	@staticmethod
+	def parseResourcePath(path: str) -> tuple:
+		"""
+		Splits a concrete MQTT topic or CoAP path of the form
+		'PIOT/ConstrainedDevice/<Resource>[/<name>]' into its resource enum and
+		the (optional) name that follows it. Leading and trailing '/' are ignored.
+		
+		Results are memoized (LRU), as this is called for every inbound message.
+		Wildcard topic filters are never cached.
+		
+		@param path The topic or path to parse.
+		@return tuple (ResourceNameEnum, name) - the name is None if there is
+		none. (None, None) if the path doesn't start with a known resource.
 		"""
-		if val in ResourceNameEnum.__members__:
-			return ResourceNameEnum.__members__[val]
+		if not path or TOPIC_SINGLE_LEVEL in path or TOPIC_MULTI_LEVEL in path:
+			return (None, None)
+		
+		return _parseResourcePath(path)
+
+# resource value -> enum (the values are unique, so no aliases)
+_RESOURCES_BY_VALUE = {resource.value: resource for resource in ResourceNameEnum}
+
+# number of '/' separated levels in the resource values (all are currently 3)
+_RESOURCE_DEPTHS = sorted({resource.value.count(RESOURCE_LEVEL_SEP) + 1 for resource in ResourceNameEnum}, reverse = True)
+
+@functools.lru_cache(maxsize = DEFAULT_PATH_CACHE_SIZE)
+def _parseResourcePath(path: str) -> tuple:
+	levels = path.strip(RESOURCE_LEVEL_SEP).split(RESOURCE_LEVEL_SEP)
+	
+	# longest match first, should resources ever be nested
+	for depth in _RESOURCE_DEPTHS:
+		resource = _RESOURCES_BY_VALUE.get(RESOURCE_LEVEL_SEP.join(levels[0:depth]))
+		
+		if resource:
+			name = RESOURCE_LEVEL_SEP.join(levels[depth:])
+			
+			return (resource, name if name else None)
 	
-			
\ No newline at end of file
+	return (None, None)
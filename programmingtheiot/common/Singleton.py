@@ -7,17 +7,71 @@
 # Copyright (c) 2020 - 2025 by Andrew D. King
 # 
 
+import os
+import threading
+
 class Singleton(type):
 	"""
 	Metaclass definition for sub-classes that must be Singleton instances.
 	
+	Instance creation is double-checked: once an instance exists, lookups
+	are a lock-free dict read, and concurrent first calls are serialized so
+	__init__ only ever runs once. The lock is re-entrant, as one Singleton's
+	constructor may well create another (e.g. ConfigUtil).
+	
+	By default, instances are discarded in the child after os.fork(), so a
+	forked worker builds its own (with its own locks, threads and parser
+	state) on first use instead of sharing the parent's. Classes that are
+	safe to inherit as-is can opt out:
+	
+		class Foo(metaclass = Singleton, resetAfterFork = False):
+	
 	"""
 	_instances = {}
+	_lock = threading.RLock()
+	
+	def __new__(mcs, name, bases, namespace, resetAfterFork: bool = True, **kwargs):
+		return super(Singleton, mcs).__new__(mcs, name, bases, namespace, **kwargs)
+	
+	def __init__(c, name, bases, namespace, resetAfterFork: bool = True, **kwargs):
+		super(Singleton, c).__init__(name, bases, namespace, **kwargs)
+		
+		c._resetAfterFork = resetAfterFork
 	
 	def __call__(c, *args, **kwargs):
-		# check if the instance exists - if not, create it and add it to _instances
-		if c not in c._instances:
-			c._instances[c] = super(Singleton, c).__call__(*args, **kwargs)
+		# fast path - no lock once the instance exists
+		instance = Singleton._instances.get(c)
+		
+		if instance is None:
+			with Singleton._lock:
+				# check again, as another thread may have created it while this one waited
+				instance = Singleton._instances.get(c)
+				
+				if instance is None:
+					instance = super(Singleton, c).__call__(*args, **kwargs)
+					Singleton._instances[c] = instance
 			
-		return c._instances[c]
-	
\ No newline at end of file
+		return instance
+	
+	@staticmethod
+	def _acquireBeforeFork():
+		# keeps another thread from forking mid-construction
+		Singleton._lock.acquire()
+	
+	@staticmethod
+	def _releaseAfterFork():
+		Singleton._lock.release()
+	
+	@staticmethod
+	def _resetAfterForkInChild():
+		# the inherited lock belongs to the parent's thread, so start over with a new one
+		Singleton._lock = threading.RLock()
+		Singleton._instances = \
+			{c: instance for c, instance in Singleton._instances.items() if not c._resetAfterFork}
+
+# not available on every platform (e.g. Windows, which doesn't fork)
+if hasattr(os, 'register_at_fork'):
+	os.register_at_fork( \
+		before = Singleton._acquireBeforeFork, \
+		after_in_parent = Singleton._releaseAfterFork, \
+		after_in_child = Singleton._resetAfterForkInChild)
@@ -12,6 +12,7 @@ from datetime import datetime, timezone
 import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.LatencyTracer import LatencyTracer, TraceContext
 
 class BaseIotData(object):
 	"""
@@ -21,7 +22,13 @@ class BaseIotData(object):
 	
 	Sub-classes add parameters and accessors specific to their needs.
 	
+	If latency tracing is enabled, each instance also carries a TraceContext
+	(never serialized), which is stamped as the data moves through the CDA.
+	
 	"""
+	
+	# only set per instance when latency tracing is enabled
+	traceContext = None
 
 	def __init__(self, name = ConfigConst.NOT_SET, typeID = ConfigConst.DEFAULT_TYPE_ID, d = None):
 		"""
@@ -35,6 +42,11 @@ class BaseIotData(object):
 		self.updateTimeStamp()
 		self.hasError = False
 		
+		traceContext = LatencyTracer().createTraceContext()
+		
+		if traceContext:
+			self.traceContext = traceContext
+		
 		useDefaults = True
 		
 		if d:
@@ -121,6 +133,14 @@ class BaseIotData(object):
 		"""
 		return self.timeStamp
 	
+	def getTraceContext(self) -> TraceContext:
+		"""
+		Returns the trace context.
+		
+		@return The TraceContext, or None if latency tracing was disabled when this instance was created.
+		"""
+		return self.traceContext
+	
 	def getTypeID(self) -> int:
 		"""
 		Returns the type ID as an integer. This allows for additional granularity
@@ -139,6 +159,16 @@ class BaseIotData(object):
 		"""
 		return self.hasError
 	
+	def markTraceStage(self, stage: str, isFinal: bool = False):
+		"""
+		Marks the trace stage as reached. If there's no trace context, no action is taken.
+		
+		@param stage The stage name (e.g. ConfigConst.TRACE_STAGE_ANALYZE).
+		@param isFinal True if this is the last stage to be traced.
+		"""
+		if self.traceContext:
+			self.traceContext.markStage(stage, isFinal)
+	
 	def setElevation(self, val: float):
 		"""
 		Sets the elevation value.
@@ -1,8 +1,13 @@
 import json
 import logging
+import time
 from decimal import Decimal
 from json import JSONEncoder
 
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.LoggingUtil import LoggingUtil
+from programmingtheiot.common.MetricsRegistry import MetricsRegistry
 from programmingtheiot.data.ActuatorData import ActuatorData
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
@@ -10,7 +15,17 @@ from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 class DataUtil:
     def __init__(self, encodeToUtf8: bool = False):
         self.encodeToUtf8 = encodeToUtf8
-        logging.info("Created DataUtil instance.")
+
+        metricsRegistry = MetricsRegistry()
+        self.encodedCounter = metricsRegistry.counter(ConfigConst.DATA_ENCODED_METRIC, 'Data objects encoded to JSON')
+        self.decodedCounter = metricsRegistry.counter(ConfigConst.DATA_DECODED_METRIC, 'JSON messages decoded to data objects')
+        self.encodeMicros = metricsRegistry.histogram(ConfigConst.DATA_ENCODE_MICROS_METRIC, 'JSON encode time (microseconds)')
+        self.decodeMicros = metricsRegistry.histogram(ConfigConst.DATA_DECODE_MICROS_METRIC, 'JSON decode time (microseconds)')
+
+        # unmapped keys repeat on every message from a mismatched peer
+        self.unmappedKeyLogger = LoggingUtil().getRateLimitedLogger(__name__)
+
+        logging.debug("Created DataUtil instance.")
 
     # ----------------------
     # ActuatorData Conversions
@@ -73,15 +88,25 @@ class DataUtil:
         """
         Prepare JSON string and load into a dictionary.
         """
+        startTime = time.perf_counter_ns()
+
         jsonData = jsonData.replace("'", '"').replace('False', 'false').replace('True', 'true')
         if useDecForFloat:
-            return json.loads(jsonData, parse_float=Decimal)
-        return json.loads(jsonData)
+            jsonStruct = json.loads(jsonData, parse_float=Decimal)
+        else:
+            jsonStruct = json.loads(jsonData)
+
+        self.decodeMicros.record((time.perf_counter_ns() - startTime) // 1000)
+        self.decodedCounter.inc()
+
+        return jsonStruct
 
     def _generateJsonData(self, obj, useDecForFloat: bool = False) -> str:
         """
         Convert an object to a JSON string using JsonDataEncoder.
         """
+        startTime = time.perf_counter_ns()
+
         if self.encodeToUtf8:
             jsonData = json.dumps(obj, cls=JsonDataEncoder).encode('utf8')
         else:
@@ -89,6 +114,10 @@ class DataUtil:
 
         if jsonData:
             jsonData = jsonData.replace("'", '"').replace('False', 'false').replace('True', 'true')
+
+        self.encodeMicros.record((time.perf_counter_ns() - startTime) // 1000)
+        self.encodedCounter.inc()
+
         return jsonData
 
     def _updateIotData(self, jsonStruct: dict, obj):
@@ -100,7 +129,7 @@ class DataUtil:
             if key in varStruct:
                 setattr(obj, key, jsonStruct[key])
             else:
-                logging.warning("JSON data contains key not mappable to object: %s", key)
+                self.unmappedKeyLogger.warning("JSON data contains key not mappable to object: %s", key)
 
 
 class JsonDataEncoder(JSONEncoder):
@@ -109,4 +138,10 @@ class JsonDataEncoder(JSONEncoder):
     can be converted to a dict.
     """
     def default(self, o):
-        return o.__dict__
+        d = o.__dict__
+
+        # the trace context is local diagnostics only - it's never serialized
+        if 'traceContext' in d:
+            d = {key: val for key, val in d.items() if key != 'traceContext'}
+
+        return d
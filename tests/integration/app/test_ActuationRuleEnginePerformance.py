@@ -0,0 +1,104 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import random
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.ActuationRuleEngine import ActuationRuleEngine
+
+from programmingtheiot.data.SensorData import SensorData
+
+class ActuationRuleEnginePerformanceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for
+	ActuationRuleEngine. It loads several hundred rules spread across
+	many sensor type IDs and reports the number of readings evaluated
+	per second.
+	"""
+	NS_IN_SECOND = 1000000000
+	MAX_TEST_RUNS = 100000
+	RULE_COUNT = 500
+	TYPE_ID_COUNT = 100
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+
+	def setUp(self):
+		self.engine = ActuationRuleEngine(loadFromConfig = False)
+		self.engine.compileRules(self._createRuleDefs(self.RULE_COUNT, self.TYPE_ID_COUNT))
+
+		self.assertEqual(self.engine.getRuleCount(), self.RULE_COUNT)
+
+	def tearDown(self):
+		pass
+
+	def testEvaluateSteadyState(self):
+		"""
+		Readings stay inside every rule's bounds, so no commands are created.
+		"""
+		self._execTestEvaluate(self.MAX_TEST_RUNS, 19.0, 19.0)
+
+	def testEvaluateWithTransitions(self):
+		"""
+		Readings wander across the rule bounds, so some commands are created.
+		"""
+		self._execTestEvaluate(self.MAX_TEST_RUNS, 10.0, 30.0)
+
+	def _execTestEvaluate(self, maxTestRuns: int, minVal: float, maxVal: float):
+		readings = []
+
+		for typeID in range(0, self.TYPE_ID_COUNT):
+			sd = SensorData(typeID = ConfigConst.TEMP_SENSOR_TYPE + typeID)
+			sd.setValue(random.uniform(minVal, maxVal))
+			readings.append(sd)
+
+		cmdCount = 0
+		now = 0.0
+		startTime = time.perf_counter_ns()
+
+		for seqNo in range(0, maxTestRuns):
+			now += 0.1
+			cmdCount += len(self.engine.evaluate(readings[seqNo % self.TYPE_ID_COUNT], now = now))
+
+		elapsedSecs = (time.perf_counter_ns() - startTime) / self.NS_IN_SECOND
+
+		logging.info( \
+			"\n\tTesting Rule Evaluation: rules = %r | readings = %r | commands = %r | elapsed = %.3f s | readings/sec = %.0f", \
+			self.RULE_COUNT, maxTestRuns, cmdCount, elapsedSecs, maxTestRuns / elapsedSecs)
+
+	def _createRuleDefs(self, ruleCount: int, typeIDCount: int) -> list:
+		ruleTypes = [ConfigConst.RULE_TYPE_THRESHOLD, ConfigConst.RULE_TYPE_HYSTERESIS, ConfigConst.RULE_TYPE_RATE]
+		ruleDefs = []
+
+		for i in range(0, ruleCount):
+			ruleType = ruleTypes[i % len(ruleTypes)]
+			ruleDef = {
+				ConfigConst.NAME_PROP:            'Rule' + str(i),
+				ConfigConst.RULE_TYPE_KEY:        ruleType,
+				ConfigConst.SENSOR_TYPE_ID_KEY:   ConfigConst.TEMP_SENSOR_TYPE + (i % typeIDCount),
+				ConfigConst.ACTUATOR_TYPE_ID_KEY: ConfigConst.HVAC_ACTUATOR_TYPE,
+				ConfigConst.FLOOR_KEY:     18.0,
+				ConfigConst.CEILING_KEY:   20.0,
+				ConfigConst.DEADBAND_KEY:   0.5,
+				ConfigConst.MAX_RATE_KEY:  50.0
+			}
+			ruleDefs.append(ruleDef)
+
+		return ruleDefs
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,173 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import fnmatch
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+class ConstrainedDeviceAppStartupTest(unittest.TestCase):
+	"""
+	This test case class contains very basic startup performance tests
+	for ConstrainedDeviceApp. Each test runs a fresh interpreter with
+	'python -X importtime', so nothing is already cached in sys.modules,
+	and checks both the import time budget and which optional subsystems
+	(and their third-party dependencies) were loaded.
+	"""
+	MICROS_IN_MILLI = 1000
+
+	# cumulative import time budget for the app module (and everything it imports)
+	IMPORT_TIME_BUDGET_MILLIS = 100
+
+	APP_MODULE = 'programmingtheiot.cda.app.ConstrainedDeviceApp'
+
+	# never imported while enableEmulator is False
+	EMULATOR_TASK_MODULES = 'programmingtheiot.cda.sim.*SensorEmulatorTask'
+
+	# never imported while their subsystem is disabled
+	OPTIONAL_MODULES = [ \
+		'paho', 'aiocoap', 'coapthon', 'apscheduler', 'psutil', 'asyncio', 'http.server', 'pisense', \
+		'programmingtheiot.cda.connection.MqttClientConnector', \
+		'programmingtheiot.cda.connection.CoapClientConnector', \
+		'programmingtheiot.cda.connection.CoapServerAdapter', \
+		'programmingtheiot.cda.system.SystemPerformanceManager', \
+		'programmingtheiot.cda.system.SensorAdapterManager', \
+		'programmingtheiot.cda.emulated.HumidifierEmulatorTask']
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+
+		self.baseDir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+	def testImportTimeBudget(self):
+		importTimes = self._runImportTime('import ' + self.APP_MODULE)
+		appMillis = importTimes[self.APP_MODULE] / self.MICROS_IN_MILLI
+
+		logging.info( \
+			"\n\tTesting CDA Startup: modules imported = %r | app import = %.1f ms | budget = %r ms", \
+			len(importTimes), appMillis, self.IMPORT_TIME_BUDGET_MILLIS)
+
+		self.assertLess(appMillis, self.IMPORT_TIME_BUDGET_MILLIS)
+
+	def testDisabledSubsystemsNotImported(self):
+		# no config file - every optional subsystem is disabled
+		loadedModules = self._runStartup(configProps = None)
+
+		for moduleName in self.OPTIONAL_MODULES:
+			self.assertFalse(self._isLoaded(moduleName, loadedModules), moduleName)
+
+	def testEnabledSubsystemsImported(self):
+		# the default (thread) runtime mode, with the managers on their own schedulers
+		configProps = \
+			'[ConstrainedDevice]\n' + \
+			'enableMqttClient = True\n' + \
+			'enableSystemPerformance = True\n' + \
+			'enableSensing = True\n' + \
+			'enableEmulator = False\n'
+
+		loadedModules = self._runStartup(configProps = configProps)
+
+		for moduleName in ['paho', 'apscheduler', 'programmingtheiot.cda.system.SystemPerformanceManager', \
+			'programmingtheiot.cda.system.SensorAdapterManager']:
+			self.assertTrue(self._isLoaded(moduleName, loadedModules), moduleName)
+
+		# still disabled
+		for moduleName in ['aiocoap', 'coapthon', 'programmingtheiot.cda.app.AsyncDeviceRuntime', \
+			'programmingtheiot.cda.emulated.HumidifierEmulatorTask']:
+			self.assertFalse(self._isLoaded(moduleName, loadedModules), moduleName)
+
+		self.assertEqual(fnmatch.filter(loadedModules, self.EMULATOR_TASK_MODULES), [])
+
+	def testEnabledSubsystemsImportedAsyncio(self):
+		configProps = \
+			'[ConstrainedDevice]\n' + \
+			'enableMqttClient = True\n' + \
+			'enableSystemPerformance = True\n' + \
+			'enableSensing = True\n' + \
+			'enableEmulator = False\n' + \
+			'runtimeMode = asyncio\n'
+
+		loadedModules = self._runStartup(configProps = configProps)
+
+		for moduleName in ['paho', 'asyncio', 'programmingtheiot.cda.app.AsyncDeviceRuntime', \
+			'programmingtheiot.cda.system.SystemPerformanceManager', 'programmingtheiot.cda.system.SensorAdapterManager']:
+			self.assertTrue(self._isLoaded(moduleName, loadedModules), moduleName)
+
+		# still disabled
+		for moduleName in ['aiocoap', 'coapthon', 'programmingtheiot.cda.emulated.HumidifierEmulatorTask']:
+			self.assertFalse(self._isLoaded(moduleName, loadedModules), moduleName)
+
+		self.assertEqual(fnmatch.filter(loadedModules, self.EMULATOR_TASK_MODULES), [])
+
+	def _isLoaded(self, moduleName: str, loadedModules: list) -> bool:
+		return any(name == moduleName or name.startswith(moduleName + '.') for name in loadedModules)
+
+	def _runImportTime(self, code: str) -> dict:
+		"""
+		Returns each imported module's cumulative import time (in microseconds).
+
+		"""
+		result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], \
+			cwd = self.baseDir, capture_output = True, text = True, timeout = 60)
+
+		self.assertEqual(result.returncode, 0, result.stderr)
+
+		importTimes = {}
+
+		for line in result.stderr.splitlines():
+			fields = line[len('import time:'):].split('|')
+
+			# skips the header line
+			if len(fields) == 3 and fields[1].strip().isdigit():
+				importTimes[fields[2].strip()] = int(fields[1])
+
+		return importTimes
+
+	def _runStartup(self, configProps: str = None) -> list:
+		"""
+		Creates the app (and its DeviceDataManager) in a fresh interpreter
+		without starting it, and returns the names of the loaded modules.
+
+		"""
+		with tempfile.TemporaryDirectory() as tmpDir:
+			configFile = 'None'
+
+			if configProps:
+				configPath = os.path.join(tmpDir, 'PiotConfig.props')
+
+				with open(configPath, 'w') as propsFile:
+					propsFile.write(configProps)
+
+				configFile = repr(configPath)
+
+			code = \
+				'import json, sys\n' + \
+				'from programmingtheiot.common.ConfigUtil import ConfigUtil\n' + \
+				'ConfigUtil({})\n'.format(configFile) + \
+				'from {} import ConstrainedDeviceApp\n'.format(self.APP_MODULE) + \
+				'ConstrainedDeviceApp()\n' + \
+				'print(json.dumps(sorted(sys.modules)))\n'
+
+			result = subprocess.run([sys.executable, '-c', code], \
+				cwd = self.baseDir, capture_output = True, text = True, timeout = 60)
+
+		self.assertEqual(result.returncode, 0, result.stderr)
+
+		return json.loads(result.stdout.splitlines()[-1])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,92 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import configparser
+import logging
+import os
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class ConfigUtilPerformanceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for
+	ConfigUtil lookups. It compares the typed lookups against the same
+	lookups made directly on a ConfigParser (which re-parses the string
+	value on every call) and reports the cost per lookup.
+	"""
+	NS_IN_SECOND = 1000000000
+	MAX_TEST_RUNS = 100000
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+
+		configFile = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'config', 'PiotConfig.props')
+
+		self.configParser = configparser.ConfigParser()
+		self.configParser.read(configFile)
+
+		# bypasses the Singleton so the shared instance isn't affected
+		self.configUtil = ConfigUtil.__new__(ConfigUtil)
+		self.configUtil.__init__(configFile = configFile)
+
+	def testConfigParserLookups(self):
+		section = ConfigConst.CONSTRAINED_DEVICE
+
+		self._execTestLookups('ConfigParser', \
+			lambda: self.configParser.get(section, ConfigConst.DEVICE_LOCATION_ID_KEY, fallback = None), \
+			lambda: self.configParser.getboolean(section, ConfigConst.ENABLE_MQTT_CLIENT_KEY, fallback = False), \
+			lambda: self.configParser.getfloat(section, ConfigConst.HUMIDITY_SIM_FLOOR_KEY, fallback = 0.0))
+
+	def testConfigUtilLookups(self):
+		section = ConfigConst.CONSTRAINED_DEVICE
+
+		self._execTestLookups('ConfigUtil', \
+			lambda: self.configUtil.getProperty(section, ConfigConst.DEVICE_LOCATION_ID_KEY), \
+			lambda: self.configUtil.getBoolean(section, ConfigConst.ENABLE_MQTT_CLIENT_KEY), \
+			lambda: self.configUtil.getFloat(section, ConfigConst.HUMIDITY_SIM_FLOOR_KEY))
+
+	def testConfigSnapshotLookups(self):
+		section = ConfigConst.CONSTRAINED_DEVICE
+		snapshot = self.configUtil.getConfigSnapshot()
+
+		self._execTestLookups('ConfigSnapshot', \
+			lambda: snapshot.getProperty(section, ConfigConst.DEVICE_LOCATION_ID_KEY), \
+			lambda: snapshot.getBoolean(section, ConfigConst.ENABLE_MQTT_CLIENT_KEY), \
+			lambda: snapshot.getFloat(section, ConfigConst.HUMIDITY_SIM_FLOOR_KEY))
+
+	def _execTestLookups(self, label: str, getProperty, getBoolean, getFloat):
+		self.assertTrue(self.configUtil.isConfigDataLoaded())
+		self.assertEqual(getProperty(), 'constraineddevice001')
+		self.assertTrue(getBoolean())
+		self.assertEqual(getFloat(), 35.0)
+
+		results = []
+
+		for lookupType, lookup in (('string', getProperty), ('boolean', getBoolean), ('float', getFloat)):
+			startTime = time.perf_counter_ns()
+
+			for i in range(0, self.MAX_TEST_RUNS):
+				lookup()
+
+			elapsedNs = time.perf_counter_ns() - startTime
+
+			results.append('{} = {:.2f} us'.format(lookupType, elapsedNs / self.MAX_TEST_RUNS / 1000))
+
+		logging.info("\n\tTesting Config Lookups (%s): lookups = %r | %s", label, self.MAX_TEST_RUNS, ' | '.join(results))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,433 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import heapq
+import logging
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+class MqttTestBroker():
+	"""
+	Lightweight in-process MQTT 3.1.1 broker for hermetic integration and
+	performance tests. It listens on 127.0.0.1 (on an ephemeral port by
+	default) and supports:
+	 - CONNECT / CONNACK, PINGREQ / PINGRESP and DISCONNECT
+	 - PUBLISH at QoS 0, 1 (PUBACK) and 2 (PUBREC / PUBREL / PUBCOMP), both
+	   from publishers and to subscribers
+	 - SUBSCRIBE / SUBACK and UNSUBSCRIBE / UNSUBACK, with '+' and '#' wildcards
+
+	Sessions are always clean, and there are no retained messages, wills,
+	authentication or redelivery.
+
+	Network conditions can be injected:
+	 - latencySecs delays every packet the broker sends (acks and deliveries)
+	   without serializing them, so pipelined clients still benefit
+	 - lossRate drops that fraction of inbound PUBLISH packets without acking
+	   or delivering them. Paho doesn't retry within a session, so QoS 1 and 2
+	   messages lost this way stay in flight on the client.
+
+	Usage:
+
+	with MqttTestBroker() as broker:
+		mcc.host = broker.host
+		mcc.port = broker.port
+		...
+
+	"""
+
+	CONNECT     = 1
+	CONNACK     = 2
+	PUBLISH     = 3
+	PUBACK      = 4
+	PUBREC      = 5
+	PUBREL      = 6
+	PUBCOMP     = 7
+	SUBSCRIBE   = 8
+	SUBACK      = 9
+	UNSUBSCRIBE = 10
+	UNSUBACK    = 11
+	PINGREQ     = 12
+	PINGRESP    = 13
+	DISCONNECT  = 14
+
+	def __init__(self, host: str = '127.0.0.1', port: int = 0, latencySecs: float = 0.0, lossRate: float = 0.0, seed: int = None):
+		"""
+		Constructor.
+
+		@param host The address to listen on.
+		@param port The port to listen on. 0 (the default) picks a free port.
+		@param latencySecs The delay applied to every packet sent by the broker.
+		@param lossRate The fraction (0.0 - 1.0) of inbound PUBLISH packets to drop.
+		@param seed The optional random seed for loss injection.
+		"""
+		self.latencySecs = max(0.0, latencySecs)
+		self.lossRate = min(1.0, max(0.0, lossRate))
+		self.random = random.Random(seed)
+
+		self.server = _MqttTcpServer((host, port), _MqttSessionHandler, self)
+		self.host, self.port = self.server.server_address[:2]
+
+		self.serverThread = None
+
+		self.sessions = set()
+		self.lock = threading.Lock()
+
+		self.receivedCount = 0
+		self.deliveredCount = 0
+		self.droppedCount = 0
+
+	def __enter__(self):
+		self.startBroker()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.stopBroker()
+
+	def startBroker(self):
+		self.serverThread = threading.Thread(target = self.server.serve_forever, name = 'MqttTestBroker', daemon = True)
+		self.serverThread.start()
+
+		logging.info("MqttTestBroker listening on %s:%d (latency = %.3f s, loss = %.2f)", self.host, self.port, self.latencySecs, self.lossRate)
+
+	def stopBroker(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+		with self.lock:
+			sessions = list(self.sessions)
+
+		for session in sessions:
+			session.close()
+
+		if self.serverThread:
+			self.serverThread.join()
+			self.serverThread = None
+
+		logging.info("MqttTestBroker stopped: %s", str(self.getStats()))
+
+	def getStats(self) -> dict:
+		with self.lock:
+			return {'receivedCount': self.receivedCount, 'deliveredCount': self.deliveredCount, 'droppedCount': self.droppedCount}
+
+	@staticmethod
+	def isTopicMatch(topicFilter: str, topic: str) -> bool:
+		"""
+		Checks if the topic matches the filter, per the MQTT 3.1.1 wildcard rules.
+
+		"""
+		filterLevels = topicFilter.split('/')
+		topicLevels = topic.split('/')
+
+		if topic.startswith('$') and filterLevels[0] in ('+', '#'):
+			return False
+
+		for i, level in enumerate(filterLevels):
+			if level == '#':
+				return True
+
+			if i >= len(topicLevels) or (level != '+' and level != topicLevels[i]):
+				return False
+
+		return len(filterLevels) == len(topicLevels)
+
+	def _isDropped(self) -> bool:
+		with self.lock:
+			self.receivedCount += 1
+
+			if self.lossRate and self.random.random() < self.lossRate:
+				self.droppedCount += 1
+				return True
+
+		return False
+
+	def _routeMessage(self, topic: str, payload: bytes, qos: int):
+		with self.lock:
+			sessions = list(self.sessions)
+
+		for session in sessions:
+			subQos = session.getMaxQos(topic)
+
+			if subQos is not None:
+				session.sendPublish(topic, payload, min(qos, subQos))
+
+				with self.lock:
+					self.deliveredCount += 1
+
+class _MqttTcpServer(socketserver.ThreadingTCPServer):
+
+	daemon_threads = True
+	allow_reuse_address = True
+
+	def __init__(self, serverAddress, handlerClass, broker: MqttTestBroker):
+		self.broker = broker
+
+		super().__init__(serverAddress, handlerClass)
+
+class _MqttSessionHandler(socketserver.BaseRequestHandler):
+	"""
+	Handles a single client connection. Inbound packets are read on the
+	server's per-connection thread; outbound packets go through a writer
+	thread so injected latency doesn't block the reader.
+
+	"""
+
+	def setup(self):
+		self.broker = self.server.broker
+		self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+		# topicFilter -> qos
+		self.subscriptions = {}
+		self.inboundQos2Ids = set()
+		self.nextPacketID = 1
+
+		self.lock = threading.Lock()
+
+		# heap of (sendTime, seqNo, packet), or None to stop
+		self.outbound = []
+		self.outboundSeqNo = 0
+		self.outboundCond = threading.Condition()
+		self.isOpen = True
+
+		self.writerThread = threading.Thread(target = self._runWriterLoop, name = 'MqttTestBrokerWriter', daemon = True)
+		self.writerThread.start()
+
+	def handle(self):
+		try:
+			while self.isOpen:
+				packetType, flags, body = self._readPacket()
+
+				if packetType is None or not self._handlePacket(packetType, flags, body):
+					break
+		except (ConnectionError, OSError):
+			pass
+		finally:
+			with self.broker.lock:
+				self.broker.sessions.discard(self)
+
+	def finish(self):
+		self.close()
+		self.writerThread.join()
+
+	def close(self):
+		with self.outboundCond:
+			self.isOpen = False
+			self.outboundCond.notify()
+
+		try:
+			self.request.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+
+	def getMaxQos(self, topic: str) -> int:
+		maxQos = None
+
+		with self.lock:
+			for topicFilter, qos in self.subscriptions.items():
+				if MqttTestBroker.isTopicMatch(topicFilter, topic) and (maxQos is None or qos > maxQos):
+					maxQos = qos
+
+		return maxQos
+
+	def sendPublish(self, topic: str, payload: bytes, qos: int):
+		body = self._encodeString(topic)
+
+		if qos > 0:
+			with self.lock:
+				packetID = self.nextPacketID
+				self.nextPacketID = packetID % 65535 + 1
+
+			body += struct.pack('>H', packetID)
+
+		self._send(MqttTestBroker.PUBLISH, qos << 1, body + payload)
+
+	def _handlePacket(self, packetType: int, flags: int, body: bytes) -> bool:
+		if packetType == MqttTestBroker.CONNECT:
+			with self.broker.lock:
+				self.broker.sessions.add(self)
+
+			self._send(MqttTestBroker.CONNACK, 0, b'\x00\x00')
+		elif packetType == MqttTestBroker.PUBLISH:
+			self._handlePublish(flags, body)
+		elif packetType == MqttTestBroker.PUBREL:
+			packetID = body[:2]
+			self.inboundQos2Ids.discard(packetID)
+			self._send(MqttTestBroker.PUBCOMP, 0, packetID)
+		elif packetType == MqttTestBroker.PUBREC:
+			# a subscriber received a QoS 2 delivery
+			self._send(MqttTestBroker.PUBREL, 2, body[:2])
+		elif packetType == MqttTestBroker.SUBSCRIBE:
+			self._handleSubscribe(body)
+		elif packetType == MqttTestBroker.UNSUBSCRIBE:
+			self._handleUnsubscribe(body)
+		elif packetType == MqttTestBroker.PINGREQ:
+			self._send(MqttTestBroker.PINGRESP, 0, b'')
+		elif packetType == MqttTestBroker.DISCONNECT:
+			return False
+
+		# PUBACK and PUBCOMP from subscribers need no action - there's no redelivery
+
+		return True
+
+	def _handlePublish(self, flags: int, body: bytes):
+		qos = (flags >> 1) & 0x03
+		topic, offset = self._decodeString(body, 0)
+		packetID = None
+
+		if qos > 0:
+			packetID = body[offset:offset + 2]
+			offset += 2
+
+		if self.broker._isDropped():
+			return
+
+		payload = body[offset:]
+
+		if qos == 1:
+			self._send(MqttTestBroker.PUBACK, 0, packetID)
+		elif qos == 2:
+			self._send(MqttTestBroker.PUBREC, 0, packetID)
+
+			# a duplicate (resent before PUBREL) is acked again but not delivered again
+			if packetID in self.inboundQos2Ids:
+				return
+
+			self.inboundQos2Ids.add(packetID)
+
+		self.broker._routeMessage(topic, payload, qos)
+
+	def _handleSubscribe(self, body: bytes):
+		packetID = body[:2]
+		offset = 2
+		grantedQos = bytearray()
+
+		while offset < len(body):
+			topicFilter, offset = self._decodeString(body, offset)
+			qos = min(body[offset] & 0x03, 2)
+			offset += 1
+
+			with self.lock:
+				self.subscriptions[topicFilter] = qos
+
+			grantedQos.append(qos)
+
+		self._send(MqttTestBroker.SUBACK, 0, packetID + bytes(grantedQos))
+
+	def _handleUnsubscribe(self, body: bytes):
+		packetID = body[:2]
+		offset = 2
+
+		while offset < len(body):
+			topicFilter, offset = self._decodeString(body, offset)
+
+			with self.lock:
+				self.subscriptions.pop(topicFilter, None)
+
+		self._send(MqttTestBroker.UNSUBACK, 0, packetID)
+
+	def _readPacket(self) -> tuple:
+		header = self._readExactly(1)
+
+		if not header:
+			return (None, None, None)
+
+		remainingLength = 0
+		multiplier = 1
+
+		while True:
+			encodedByte = self._readExactly(1)
+
+			if not encodedByte:
+				return (None, None, None)
+
+			remainingLength += (encodedByte[0] & 0x7F) * multiplier
+			multiplier *= 128
+
+			if not encodedByte[0] & 0x80:
+				break
+
+		body = self._readExactly(remainingLength) if remainingLength else b''
+
+		if body is None:
+			return (None, None, None)
+
+		return (header[0] >> 4, header[0] & 0x0F, body)
+
+	def _readExactly(self, count: int) -> bytes:
+		data = bytearray()
+
+		while len(data) < count:
+			chunk = self.request.recv(count - len(data))
+
+			if not chunk:
+				return None
+
+			data.extend(chunk)
+
+		return bytes(data)
+
+	def _send(self, packetType: int, flags: int, body: bytes):
+		packet = bytearray([(packetType << 4) | flags])
+		remainingLength = len(body)
+
+		while True:
+			encodedByte = remainingLength % 128
+			remainingLength //= 128
+
+			packet.append(encodedByte | 0x80 if remainingLength else encodedByte)
+
+			if not remainingLength:
+				break
+
+		packet.extend(body)
+
+		with self.outboundCond:
+			self.outboundSeqNo += 1
+			heapq.heappush(self.outbound, (time.monotonic() + self.broker.latencySecs, self.outboundSeqNo, bytes(packet)))
+			self.outboundCond.notify()
+
+	def _runWriterLoop(self):
+		while True:
+			packets = []
+
+			with self.outboundCond:
+				while self.isOpen:
+					now = time.monotonic()
+
+					while self.outbound and self.outbound[0][0] <= now:
+						packets.append(heapq.heappop(self.outbound)[2])
+
+					if packets:
+						break
+
+					self.outboundCond.wait(self.outbound[0][0] - now if self.outbound else None)
+
+				if not self.isOpen:
+					return
+
+			try:
+				self.request.sendall(b''.join(packets))
+			except OSError:
+				return
+
+	def _encodeString(self, value: str) -> bytes:
+		encoded = value.encode('utf-8')
+		return struct.pack('>H', len(encoded)) + encoded
+
+	def _decodeString(self, data: bytes, offset: int) -> tuple:
+		length = struct.unpack_from('>H', data, offset)[0]
+		offset += 2
+
+		return (data[offset:offset + length].decode('utf-8'), offset + length)
@@ -0,0 +1,153 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import io
+import logging
+import os
+import time
+import unittest
+
+import aiocoap
+import aiocoap.resource as resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.cda.connection.handlers.BlockwiseResource import BlockwiseResource
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class CoapBlockwiseTransferTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration and performance
+	tests for CoAP block-wise transfers between CoapClientConnector and
+	CoapServerAdapter (on the loopback interface). It reports upload and
+	download throughput for 64 KB - 1 MB payloads, and compares downloads
+	with aiocoap's own block-wise handling.
+	
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	NS_IN_MILLIS = 1000000
+	NS_IN_SECOND = 1000000000
+	BYTES_IN_KB = 1024
+	
+	HOST = '127.0.0.1'
+	PAYLOAD_SIZES = [65536, 262144, 1048576]
+	
+	SMALL_BLOCK_NAME = 'small'
+	LIMITED_NAME = 'limited'
+	MANAGED_NAME = 'managed'
+	
+	@classmethod
+	def setUpClass(self):
+		logging.disable(level = logging.WARNING)
+		
+		self.smallBlockResource = BlockwiseResource(blockSize = 256)
+		self.limitedResource = BlockwiseResource(maxPayloadBytes = 4096)
+		self.managedResource = ManagedBlockwiseResource()
+		
+		self.coapServer = CoapServerAdapter(host = self.HOST, port = 0)
+		self.coapServer.addResource(ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, self.SMALL_BLOCK_NAME, self.smallBlockResource)
+		self.coapServer.addResource(ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, self.LIMITED_NAME, self.limitedResource)
+		self.coapServer.addResource(ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, self.MANAGED_NAME, self.managedResource)
+		self.coapServer.startServer()
+		
+	@classmethod
+	def tearDownClass(self):
+		self.coapServer.stopServer()
+		logging.disable(logging.NOTSET)
+		
+	def setUp(self):
+		self.coapClient = CoapClientConnector(host = self.HOST, port = self.coapServer.getPort())
+		
+	def tearDown(self):
+		self.coapClient.disconnectClient()
+		
+	def testTransferThroughput(self):
+		for payloadSize in self.PAYLOAD_SIZES:
+			payload = os.urandom(payloadSize)
+			
+			startTime = time.perf_counter_ns()
+			
+			self.assertTrue(self.coapClient.sendPutRequestBlockwise( \
+				resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, payload = payload))
+			
+			self._printRate("PUT (Block1)", payloadSize, startTime)
+			self.assertEqual(self.coapServer.mediaResource.getPayload(), payload)
+			
+			sink = io.BytesIO()
+			startTime = time.perf_counter_ns()
+			
+			self.assertTrue(self.coapClient.sendGetRequestBlockwise( \
+				resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, sink = sink))
+			
+			self._printRate("GET (Block2)", payloadSize, startTime)
+			self.assertEqual(sink.getvalue(), payload)
+			
+	def testManagedDownloadThroughput(self):
+		# for comparison - aiocoap reassembles the blocks itself
+		for payloadSize in self.PAYLOAD_SIZES:
+			self.managedResource.payload = b'x' * payloadSize
+			
+			startTime = time.perf_counter_ns()
+			
+			self.assertTrue(self.coapClient.sendGetRequest( \
+				resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, name = self.MANAGED_NAME, enableCON = True))
+			
+			self._printRate("GET (aiocoap managed)", payloadSize, startTime)
+			
+	def testBlockSizeNegotiation(self):
+		payload = os.urandom(10000)
+		
+		# uploaded from a file object, in 1024 byte blocks until the server asks for 256
+		self.assertTrue(self.coapClient.sendPostRequestBlockwise( \
+			resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, name = self.SMALL_BLOCK_NAME, payload = io.BytesIO(payload)))
+		self.assertEqual(self.smallBlockResource.getPayload(), payload)
+		
+		sink = io.BytesIO()
+		
+		self.assertTrue(self.coapClient.sendGetRequestBlockwise( \
+			resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, name = self.SMALL_BLOCK_NAME, sink = sink))
+		self.assertEqual(sink.getvalue(), payload)
+		
+	def testUploadTooLarge(self):
+		self.assertFalse(self.coapClient.sendPutRequestBlockwise( \
+			resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, name = self.LIMITED_NAME, payload = os.urandom(8192)))
+		self.assertIsNone(self.limitedResource.getPayload())
+		
+		# without a size (as for a file object), it's only turned down once the limit is reached
+		self.assertFalse(self.coapClient.sendPutRequestBlockwise( \
+			resource = ResourceNameEnum.CDA_MEDIA_DATA_MSG_RESOURCE, name = self.LIMITED_NAME, payload = io.BytesIO(os.urandom(8192))))
+		self.assertEqual(self.limitedResource.uploads, {})
+		
+	def _printRate(self, label: str, payloadSize: int, startTime: int) -> float:
+		elapsedNanos = time.perf_counter_ns() - startTime
+		rate = (payloadSize / self.BYTES_IN_KB) / (elapsedNanos / self.NS_IN_SECOND)
+		
+		print("\n" + label + " [" + str(payloadSize // self.BYTES_IN_KB) + " KB]: " + str(elapsedNanos / self.NS_IN_MILLIS) + " ms, " + str(round(rate)) + " KB/sec")
+		
+		return rate
+	
+class ManagedBlockwiseResource(resource.Resource):
+	
+	def __init__(self):
+		super().__init__()
+		
+		self.payload = b''
+		
+	async def render_get(self, request):
+		return aiocoap.Message(payload = self.payload)
+	
+if __name__ == "__main__":
+	unittest.main()
@@ -7,10 +7,15 @@
 # Copyright (c) 2020 - 2025 by Andrew D. King
 # 
 
+import asyncio
 import logging
+import threading
 import time
 import unittest
 
+import aiocoap
+import aiocoap.resource as resource
+
 from time import sleep
 
 from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
@@ -23,20 +28,43 @@ from programmingtheiot.data.SensorData import SensorData
 class CoapClientPerformanceTest(unittest.TestCase):
 	"""
 	This test case class contains very basic performance tests for
-	CoapClientConnector. It should not be considered complete,
+	CoapClientConnector against a local aiocoap server (on its own event
+	loop thread in this process). It reports requests/sec for sequential
+	requests (each waits for its response) and for pipelined requests
+	(up to the connector's maxConcurrentRequests outstanding).
+	
+	The simulated latency tests add a fixed delay to each response, as a
+	stand-in for a real network round trip - on the loopback interface,
+	client and server simply compete for the same CPU.
+	
+	It should not be considered complete,
 	but serve as a starting point for the student implementing
 	additional functionality within their Programming the IoT
 	environment.
 	"""
 	NS_IN_MILLIS = 1000000
+	NS_IN_SECOND = 1000000000
 	MAX_TEST_RUNS = 10000
+	MAX_PIPELINED_TEST_RUNS = 2000
+	MAX_LATENCY_TEST_RUNS = 200
+	
+	SIMULATED_LATENCY_SECS = 0.005
+	SIMULATED_LATENCY_NAME = 'delayed'
 	
 	@classmethod
 	def setUpClass(self):
 		logging.disable(level = logging.WARNING)
 		
+		self.coapServer = LocalCoapServer()
+		self.coapServer.startServer()
+		
+	@classmethod
+	def tearDownClass(self):
+		self.coapServer.stopServer()
+		logging.disable(logging.NOTSET)
+		
 	def setUp(self):
-		self.coapClient = CoapClientConnector()
+		self.coapClient = CoapClientConnector(host = LocalCoapServer.HOST, port = self.coapServer.port)
 
 	def tearDown(self):
 		self.coapClient.disconnectClient()
@@ -95,32 +123,65 @@ class CoapClientPerformanceTest(unittest.TestCase):
 		
 		self._execTestPut(self.MAX_TEST_RUNS, False)
 
-	def _execTestGet(self, maxTestRuns: int, useCon: bool):
-		startTime = time.time_ns()
+	def testPipelinedGetRequestCon(self):
+		self._execTestPipelinedGet(self.MAX_PIPELINED_TEST_RUNS, True)
+
+	def testPipelinedGetRequestNon(self):
+		self._execTestPipelinedGet(self.MAX_PIPELINED_TEST_RUNS, False)
+
+	def testPipelinedPutRequestCon(self):
+		payload = DataUtil().sensorDataToJson(SensorData())
+		
+		startTime = time.perf_counter_ns()
+		
+		futures = [ \
+			self.coapClient.sendPutRequestAsync(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, enableCON = True, payload = payload) \
+			for seqNo in range(0, self.MAX_PIPELINED_TEST_RUNS)]
+		
+		self._checkResults('PUT (pipelined) - useCON = True', futures, startTime)
+
+	def testSimulatedLatencyGetRequestCon(self):
+		# aiocoap allows one unacknowledged CON per server (NSTART = 1), so
+		# pipelining can't overlap the delay - reported for comparison only
+		self._execTestGet(self.MAX_LATENCY_TEST_RUNS, True, name = self.SIMULATED_LATENCY_NAME)
+		self._execTestPipelinedGet(self.MAX_LATENCY_TEST_RUNS, True, name = self.SIMULATED_LATENCY_NAME)
+
+	def testSimulatedLatencyGetRequestNon(self):
+		sequentialRate = self._execTestGet( \
+			self.MAX_LATENCY_TEST_RUNS, False, name = self.SIMULATED_LATENCY_NAME)
+		pipelinedRate = self._execTestPipelinedGet( \
+			self.MAX_LATENCY_TEST_RUNS, False, name = self.SIMULATED_LATENCY_NAME)
+		
+		# each sequential request waits out the full delay; pipelined ones overlap
+		self.assertGreater(pipelinedRate, sequentialRate * 2)
+
+	def _execTestGet(self, maxTestRuns: int, useCon: bool, name: str = None) -> float:
+		startTime = time.perf_counter_ns()
 		
 		for seqNo in range(0, maxTestRuns):
-			self.coapClient.sendGetRequest(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, enableCON = useCon)
+			self.coapClient.sendGetRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name = name, enableCON = useCon)
 			
-		endTime = time.time_ns()
-		elapsedMillis = (endTime - startTime) / self.NS_IN_MILLIS
+		return self._printRate("GET message - useCON = " + str(useCon), maxTestRuns, startTime)
 		
-		print("\nGET message - useCON = " + str(useCon) + " [" + str(maxTestRuns) + "]: " + str(elapsedMillis) + " ms")
+	def _execTestPipelinedGet(self, maxTestRuns: int, useCon: bool, name: str = None) -> float:
+		startTime = time.perf_counter_ns()
 		
-		sleep(2)
+		futures = [ \
+			self.coapClient.sendGetRequestAsync(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name = name, enableCON = useCon) \
+			for seqNo in range(0, maxTestRuns)]
+		
+		return self._checkResults("GET (pipelined) - useCON = " + str(useCon), futures, startTime)
 		
 	def _execTestPost(self, maxTestRuns: int, useCon: bool):
 		sensorData = SensorData()
 		payload = DataUtil().sensorDataToJson(sensorData)
 		
-		startTime = time.time_ns()
+		startTime = time.perf_counter_ns()
 		
 		for seqNo in range(0, maxTestRuns):
 			self.coapClient.sendPostRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, enableCON = useCon, payload = payload)
 			
-		endTime = time.time_ns()
-		elapsedMillis = (endTime - startTime) / self.NS_IN_MILLIS
-		
-		print("\nPOST message - useCON = " + str(useCon) + " [" + str(maxTestRuns) + "]: " + str(elapsedMillis) + " ms. Payload Len: " + str(len(payload)))
+		self._printRate("POST message - useCON = " + str(useCon) + ", payload len = " + str(len(payload)), maxTestRuns, startTime)
 		
 		sleep(2)
 		
@@ -128,18 +189,101 @@ class CoapClientPerformanceTest(unittest.TestCase):
 		sensorData = SensorData()
 		payload = DataUtil().sensorDataToJson(sensorData)
 		
-		startTime = time.time_ns()
+		startTime = time.perf_counter_ns()
 		
 		for seqNo in range(0, maxTestRuns):
-			self.coapClient.sendPostRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, enableCON = useCon, payload = payload)
+			self.coapClient.sendPutRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, enableCON = useCon, payload = payload)
 			
-		endTime = time.time_ns()
-		elapsedMillis = (endTime - startTime) / self.NS_IN_MILLIS
-		
-		print("\nPUT message - useCON = " + str(useCon) + " [" + str(maxTestRuns) + "]: " + str(elapsedMillis) + " ms. Payload Len: " + str(len(payload)))
+		self._printRate("PUT message - useCON = " + str(useCon) + ", payload len = " + str(len(payload)), maxTestRuns, startTime)
 		
 		sleep(2)
 	
+	def _checkResults(self, label: str, futures: list, startTime: int) -> float:
+		successCount = sum(1 for future in futures if future.result())
+		rate = self._printRate(label, len(futures), startTime)
+		
+		self.assertEqual(successCount, len(futures))
+		
+		return rate
+	
+	def _printRate(self, label: str, maxTestRuns: int, startTime: int) -> float:
+		elapsedNanos = time.perf_counter_ns() - startTime
+		rate = maxTestRuns / (elapsedNanos / self.NS_IN_SECOND)
+		
+		print("\n" + label + " [" + str(maxTestRuns) + "]: " + str(elapsedNanos / self.NS_IN_MILLIS) + " ms, " + str(round(rate)) + " requests/sec")
+		
+		return rate
+	
+class LocalCoapServer():
+	"""
+	Minimal aiocoap server for the perf tests. Every CDA resource accepts
+	GET, PUT and POST; '<resource>/delayed' responds after
+	CoapClientPerformanceTest.SIMULATED_LATENCY_SECS.
+	
+	"""
+	HOST = '127.0.0.1'
+	
+	def __init__(self):
+		self.loop = asyncio.new_event_loop()
+		self.loopThread = threading.Thread(target = self.loop.run_forever, daemon = True)
+		self.context = None
+		self.port = 0
+		
+	def startServer(self):
+		site = resource.Site()
+		
+		for resourceName in ResourceNameEnum:
+			path = resourceName.value.split('/')
+			
+			site.add_resource(path, EchoResource())
+			site.add_resource(path + [CoapClientPerformanceTest.SIMULATED_LATENCY_NAME], EchoResource(CoapClientPerformanceTest.SIMULATED_LATENCY_SECS))
+		
+		self.loopThread.start()
+		
+		# port 0 - the OS picks a free one
+		self.context = asyncio.run_coroutine_threadsafe( \
+			aiocoap.Context.create_server_context(site, bind = (self.HOST, 0)), self.loop).result()
+		self.port = self._getBoundPort()
+		
+	def stopServer(self):
+		asyncio.run_coroutine_threadsafe(self.context.shutdown(), self.loop).result()
+		
+		self.loop.call_soon_threadsafe(self.loop.stop)
+		self.loopThread.join()
+		self.loop.close()
+		
+	def _getBoundPort(self) -> int:
+		# aiocoap doesn't expose the bound address, so find it on the transport's socket
+		for transport in self.context.request_interfaces:
+			endpoint = getattr(getattr(transport, 'token_interface', None), 'message_interface', None)
+			endpoint = getattr(endpoint, 'message_interface', endpoint)
+			sock = getattr(getattr(endpoint, 'transport', None), 'get_extra_info', lambda key: None)('socket')
+			
+			if sock:
+				return sock.getsockname()[1]
+		
+		raise RuntimeError("Failed to find the local CoAP server's port.")
+	
+class EchoResource(resource.Resource):
+	
+	def __init__(self, delaySecs: float = 0.0):
+		super().__init__()
+		
+		self.delaySecs = delaySecs
+		self.payload = b'{"value": 1.0}'
+		
+	async def render_get(self, request):
+		if self.delaySecs:
+			await asyncio.sleep(self.delaySecs)
+		
+		return aiocoap.Message(payload = self.payload)
+	
+	async def render_put(self, request):
+		return aiocoap.Message(code = aiocoap.CHANGED)
+	
+	async def render_post(self, request):
+		return aiocoap.Message(code = aiocoap.CHANGED)
+	
 if __name__ == "__main__":
 	unittest.main()
-	
\ No newline at end of file
+	
@@ -0,0 +1,143 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+import aiocoap.resource as resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class CoapDiscoveryCacheTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration and performance
+	tests for CoapClientConnector's discovery cache, against a local
+	CoapServerAdapter. The server counts the '.well-known/core' requests
+	it gets, to show which discovery requests were answered locally.
+
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	NS_IN_MILLIS = 1000000
+
+	HOST = '127.0.0.1'
+	DISCOVERY_COUNT = 200
+
+	@classmethod
+	def setUpClass(self):
+		logging.disable(level = logging.WARNING)
+
+	@classmethod
+	def tearDownClass(self):
+		logging.disable(logging.NOTSET)
+
+	def setUp(self):
+		self.coapServer = CoapServerAdapter(host = self.HOST, port = 0, workerCount = 0)
+
+		self.wkcResource = CountingWKCResource(self.coapServer.site.get_resources_as_linkheader)
+		self.coapServer.site.add_resource(ConfigConst.WELL_KNOWN_CORE_PATH.split('/'), self.wkcResource)
+		self.coapServer.startServer()
+
+		self.coapClient = CoapClientConnector(host = self.HOST, port = self.coapServer.getPort())
+
+	def tearDown(self):
+		self.coapClient.disconnectClient()
+		self.coapServer.stopServer()
+
+	def testDiscoveryAnsweredLocally(self):
+		self.coapClient.getResourceDirectory().ttlSecs = 60
+
+		startTime = time.perf_counter_ns()
+		self.assertTrue(self.coapClient.sendDiscoveryRequest())
+		networkMillis = (time.perf_counter_ns() - startTime) / self.NS_IN_MILLIS
+
+		startTime = time.perf_counter_ns()
+
+		for i in range(0, self.DISCOVERY_COUNT):
+			self.assertTrue(self.coapClient.sendDiscoveryRequest())
+
+		cachedMillis = (time.perf_counter_ns() - startTime) / self.NS_IN_MILLIS / self.DISCOVERY_COUNT
+
+		print("\nDiscovery: %.3f ms over the network, %.4f ms answered locally (%d calls)." % \
+			(networkMillis, cachedMillis, self.DISCOVERY_COUNT))
+
+		self.assertEqual(self.wkcResource.requestCount, 1)
+
+		# the CDA's resources are known without another request
+		self.assertIsNotNone(self.coapClient.lookupResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE))
+		self.assertIsNotNone(self.coapClient.lookupResource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME))
+		self.assertIsNone(self.coapClient.lookupResource(ResourceNameEnum.CDA_REGISTRATION_REQUEST_RESOURCE))
+		self.assertEqual(self.wkcResource.requestCount, 1)
+
+	def testConcurrentDiscoveryShared(self):
+		with ThreadPoolExecutor(max_workers = 8) as executor:
+			results = list(executor.map(lambda i: self.coapClient.sendDiscoveryRequest(), range(0, 8)))
+
+		self.assertTrue(all(results))
+		self.assertEqual(self.wkcResource.requestCount, 1)
+
+	def testBackgroundRefresh(self):
+		ttlSecs = 0.5
+
+		self.coapClient.getResourceDirectory().ttlSecs = ttlSecs
+		self.assertTrue(self.coapClient.sendDiscoveryRequest())
+
+		# refreshed at 80% of each TTL, so the directory never expires
+		endTime = time.monotonic() + ttlSecs * 3
+
+		while time.monotonic() < endTime:
+			self.assertTrue(self.coapClient.getResourceDirectory().isValid())
+			time.sleep(0.02)
+
+		self.assertGreaterEqual(self.wkcResource.requestCount, 3)
+
+		requestCount = self.wkcResource.requestCount
+
+		for i in range(0, self.DISCOVERY_COUNT):
+			self.assertTrue(self.coapClient.sendDiscoveryRequest())
+
+		self.assertLessEqual(self.wkcResource.requestCount, requestCount + 1)
+
+	def testDisconnectClearsDirectory(self):
+		self.assertTrue(self.coapClient.sendDiscoveryRequest())
+		self.coapClient.disconnectClient()
+
+		self.assertFalse(self.coapClient.getResourceDirectory().isValid())
+		self.assertTrue(self.coapClient.sendDiscoveryRequest())
+		self.assertEqual(self.wkcResource.requestCount, 2)
+
+class CountingWKCResource(resource.WKCResource):
+	"""
+	'.well-known/core' resource that counts the requests it gets.
+
+	"""
+
+	def __init__(self, listgenerator):
+		super().__init__(listgenerator)
+
+		self.requestCount = 0
+
+	async def render_get(self, request):
+		self.requestCount += 1
+
+		return await super().render_get(request)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,157 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import unittest
+
+import aiocoap
+import aiocoap.resource as resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.data.SensorData import SensorData
+
+class CoapObserveThrottlingTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for CoAP
+	observe notification coalescing (GetTelemetryResourceHandler on a local
+	aiocoap server) and the CoapClientConnector observe cache. Sensor
+	updates are pushed far faster than the min notification interval, and
+	the number of notifications the client receives must stay bounded.
+	"""
+	HOST = '127.0.0.1'
+	MIN_INTERVAL_SECS = 0.2
+	UPDATE_DURATION_SECS = 1.0
+	UPDATE_RATE = 1000
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.info("Testing CoAP observe notification throttling...")
+
+	def setUp(self):
+		self.telemetryHandler = GetTelemetryResourceHandler(minIntervalSecs = self.MIN_INTERVAL_SECS)
+
+		site = resource.Site()
+		site.add_resource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value.split('/') + [ConfigConst.TEMP_SENSOR_NAME], self.telemetryHandler)
+
+		self.serverLoop = asyncio.new_event_loop()
+		self.serverThread = threading.Thread(target = self.serverLoop.run_forever, daemon = True)
+		self.serverThread.start()
+
+		# binding to port 0 lets the OS pick a free port
+		self.serverContext = asyncio.run_coroutine_threadsafe( \
+			aiocoap.Context.create_server_context(site, bind = (self.HOST, 0)), self.serverLoop).result()
+
+		self.listener = NotificationCountingListener()
+		self.coapClient = CoapClientConnector(dataMsgListener = self.listener, host = self.HOST, port = self._getServerPort())
+
+	def tearDown(self):
+		self.coapClient.disconnectClient()
+
+		asyncio.run_coroutine_threadsafe(self.serverContext.shutdown(), self.serverLoop).result()
+
+		self.serverLoop.call_soon_threadsafe(self.serverLoop.stop)
+		self.serverThread.join()
+		self.serverLoop.close()
+
+	def testNotificationsCoalesced(self):
+		self.telemetryHandler.onSensorDataUpdate(self._createSensorData(-1.0))
+
+		self.assertTrue(self.coapClient.startObserver(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, ttl = 0))
+
+		# a second start reuses the same relation
+		self.assertTrue(self.coapClient.startObserver(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, ttl = 0))
+
+		self._waitFor(lambda: self.telemetryHandler.observerCount == 1)
+
+		updateCount = int(self.UPDATE_DURATION_SECS * self.UPDATE_RATE)
+		startTime = time.monotonic()
+
+		for i in range(0, updateCount):
+			self.telemetryHandler.onSensorDataUpdate(self._createSensorData(float(i)))
+			time.sleep(1.0 / self.UPDATE_RATE)
+
+		elapsedSecs = time.monotonic() - startTime
+		lastValue = float(updateCount - 1)
+
+		# latest value wins - the last update is delivered once the interval is up
+		self._waitFor(lambda: self._getObservedValue() == lastValue)
+
+		stats = self.telemetryHandler.getStats()
+		maxNotifications = int(elapsedSecs / self.MIN_INTERVAL_SECS) + 2
+
+		logging.info( \
+			"\n\tCoAP observe: updates = %r | notifications = %r | received = %r | max expected = %r", \
+			stats[ConfigConst.UPDATE_COUNT_PROP], stats[ConfigConst.NOTIFICATION_COUNT_PROP], self.listener.msgCount, maxNotifications)
+
+		self.assertEqual(stats[ConfigConst.OBSERVER_COUNT_PROP], 1)
+		self.assertLessEqual(stats[ConfigConst.NOTIFICATION_COUNT_PROP], maxNotifications)
+
+		# the registration response plus the notifications
+		self.assertLessEqual(self.listener.msgCount, maxNotifications + 1)
+
+		self.assertTrue(self.coapClient.stopObserver(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME))
+		self._waitFor(lambda: self._getObservedValue() is None)
+
+	def _createSensorData(self, value: float) -> SensorData:
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(value)
+
+		return sensorData
+
+	def _getObservedValue(self) -> float:
+		payload = self.coapClient.getLatestObservedData(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME)
+
+		return json.loads(payload)['value'] if payload else None
+
+	def _getServerPort(self) -> int:
+		# aiocoap doesn't expose the bound address, so find it on the transport's socket
+		for transport in self.serverContext.request_interfaces:
+			endpoint = getattr(getattr(transport, 'token_interface', None), 'message_interface', None)
+			endpoint = getattr(endpoint, 'message_interface', endpoint)
+			sock = getattr(getattr(endpoint, 'transport', None), 'get_extra_info', lambda key: None)('socket')
+
+			if sock:
+				return sock.getsockname()[1]
+
+		raise RuntimeError("Failed to find the local CoAP server's port.")
+
+	def _waitFor(self, condition, timeoutSecs: float = 5.0):
+		endTime = time.monotonic() + timeoutSecs
+
+		while not condition():
+			self.assertLess(time.monotonic(), endTime, "Timed out waiting for condition.")
+			time.sleep(0.01)
+
+class NotificationCountingListener(DefaultDataMessageListener):
+
+	def __init__(self):
+		super().__init__()
+
+		self.msgCount = 0
+
+	def handleIncomingMessage(self, resourceEnum: ResourceNameEnum, msg: str) -> bool:
+		self.msgCount += 1
+
+		return True
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,198 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+import threading
+import time
+import unittest
+
+import aiocoap
+import aiocoap.resource as resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.data.SensorData import SensorData
+
+class CoapResourceCachePerformanceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for the
+	encoded representation cache in CoalescingObservableResource. It
+	reports GET requests/sec with and without the cache, both for the
+	resource alone (render_get on an event loop) and end to end (pipelined
+	NON GETs from CoapClientConnector to a local aiocoap server).
+	
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	NS_IN_MILLIS = 1000000
+	NS_IN_SECOND = 1000000000
+	MAX_RENDER_TEST_RUNS = 20000
+	MAX_PIPELINED_TEST_RUNS = 2000
+	
+	HOST = '127.0.0.1'
+	CACHED_NAME = 'cached'
+	UNCACHED_NAME = 'uncached'
+	
+	@classmethod
+	def setUpClass(self):
+		logging.disable(level = logging.WARNING)
+		
+	@classmethod
+	def tearDownClass(self):
+		logging.disable(logging.NOTSET)
+		
+	def setUp(self):
+		self.cachedHandler = GetTelemetryResourceHandler(minIntervalSecs = 0.0, enableCache = True)
+		self.uncachedHandler = GetTelemetryResourceHandler(minIntervalSecs = 0.0, enableCache = False)
+		
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(20.0)
+		
+		self.cachedHandler.onSensorDataUpdate(sensorData)
+		self.uncachedHandler.onSensorDataUpdate(sensorData)
+		
+	def testRenderGet(self):
+		uncachedRate = self._execTestRender("GET render - cache = False", self.uncachedHandler)
+		cachedRate = self._execTestRender("GET render - cache = True", self.cachedHandler)
+		
+		self.assertEqual(self.cachedHandler.getStats()[ConfigConst.ENCODE_COUNT_PROP], 1)
+		self.assertEqual(self.uncachedHandler.getStats()[ConfigConst.ENCODE_COUNT_PROP], self.MAX_RENDER_TEST_RUNS)
+		self.assertGreater(cachedRate, uncachedRate)
+		
+	def testPipelinedGetRequestNon(self):
+		self._startServer()
+		
+		try:
+			coapClient = CoapClientConnector(host = self.HOST, port = self._getServerPort())
+			
+			try:
+				self._execTestPipelinedGet(coapClient, self.UNCACHED_NAME)
+				self._execTestPipelinedGet(coapClient, self.CACHED_NAME)
+			finally:
+				coapClient.disconnectClient()
+		finally:
+			self._stopServer()
+		
+		self.assertEqual(self.cachedHandler.getStats()[ConfigConst.ENCODE_COUNT_PROP], 1)
+		
+	def testEtagRevalidation(self):
+		self._startServer()
+		
+		try:
+			listener = PayloadCollectingListener()
+			coapClient = CoapClientConnector(dataMsgListener = listener, host = self.HOST, port = self._getServerPort())
+			
+			try:
+				for i in range(0, 2):
+					self.assertTrue(coapClient.sendGetRequest( \
+						resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name = self.CACHED_NAME, enableCON = True))
+				
+				etagCount = len(coapClient.etagCache)
+			finally:
+				coapClient.disconnectClient()
+		finally:
+			self._stopServer()
+		
+		# the second response is a 2.03 Valid - the listener still gets the cached payload
+		self.assertEqual(etagCount, 1)
+		self.assertEqual(len(listener.payloads), 2)
+		self.assertEqual(listener.payloads[0], listener.payloads[1])
+		
+	def _execTestRender(self, label: str, handler: GetTelemetryResourceHandler) -> float:
+		request = aiocoap.Message(code = aiocoap.GET)
+		
+		async def renderAll():
+			for seqNo in range(0, self.MAX_RENDER_TEST_RUNS):
+				await handler.render_get(request)
+		
+		startTime = time.perf_counter_ns()
+		
+		asyncio.run(renderAll())
+		
+		return self._printRate(label, self.MAX_RENDER_TEST_RUNS, startTime)
+		
+	def _execTestPipelinedGet(self, coapClient: CoapClientConnector, name: str) -> float:
+		startTime = time.perf_counter_ns()
+		
+		futures = [ \
+			coapClient.sendGetRequestAsync(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name = name, enableCON = False) \
+			for seqNo in range(0, self.MAX_PIPELINED_TEST_RUNS)]
+		
+		successCount = sum(1 for future in futures if future.result())
+		rate = self._printRate("GET (pipelined) - " + name, len(futures), startTime)
+		
+		self.assertEqual(successCount, len(futures))
+		
+		return rate
+		
+	def _printRate(self, label: str, maxTestRuns: int, startTime: int) -> float:
+		elapsedNanos = time.perf_counter_ns() - startTime
+		rate = maxTestRuns / (elapsedNanos / self.NS_IN_SECOND)
+		
+		print("\n" + label + " [" + str(maxTestRuns) + "]: " + str(elapsedNanos / self.NS_IN_MILLIS) + " ms, " + str(round(rate)) + " requests/sec")
+		
+		return rate
+		
+	def _startServer(self):
+		path = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value.split('/')
+		
+		site = resource.Site()
+		site.add_resource(path + [self.CACHED_NAME], self.cachedHandler)
+		site.add_resource(path + [self.UNCACHED_NAME], self.uncachedHandler)
+		
+		self.serverLoop = asyncio.new_event_loop()
+		self.serverThread = threading.Thread(target = self.serverLoop.run_forever, daemon = True)
+		self.serverThread.start()
+		
+		# port 0 - the OS picks a free one
+		self.serverContext = asyncio.run_coroutine_threadsafe( \
+			aiocoap.Context.create_server_context(site, bind = (self.HOST, 0)), self.serverLoop).result()
+		
+	def _stopServer(self):
+		asyncio.run_coroutine_threadsafe(self.serverContext.shutdown(), self.serverLoop).result()
+		
+		self.serverLoop.call_soon_threadsafe(self.serverLoop.stop)
+		self.serverThread.join()
+		self.serverLoop.close()
+		
+	def _getServerPort(self) -> int:
+		# aiocoap doesn't expose the bound address, so find it on the transport's socket
+		for transport in self.serverContext.request_interfaces:
+			endpoint = getattr(getattr(transport, 'token_interface', None), 'message_interface', None)
+			endpoint = getattr(endpoint, 'message_interface', endpoint)
+			sock = getattr(getattr(endpoint, 'transport', None), 'get_extra_info', lambda key: None)('socket')
+			
+			if sock:
+				return sock.getsockname()[1]
+		
+		raise RuntimeError("Failed to find the local CoAP server's port.")
+	
+class PayloadCollectingListener(DefaultDataMessageListener):
+	
+	def __init__(self):
+		super().__init__()
+		
+		self.payloads = []
+		
+	def handleIncomingMessage(self, resourceEnum: ResourceNameEnum, msg: str) -> bool:
+		self.payloads.append(msg)
+		
+		return True
+	
+if __name__ == "__main__":
+	unittest.main()
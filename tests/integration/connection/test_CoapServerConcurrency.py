@@ -0,0 +1,129 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class CoapServerConcurrencyTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for
+	CoapServerAdapter's worker pool. While slow actuator commands are
+	being handled, telemetry GETs are timed - with the worker pool, they
+	are served by the event loop right away; without it, they wait for
+	the actuator commands.
+	
+	NON requests are used throughout, as the client would otherwise only
+	send one CON request to the server at a time (NSTART = 1).
+	
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	NS_IN_MILLIS = 1000000
+	
+	HOST = '127.0.0.1'
+	ACTUATION_SECS = 0.2
+	ACTUATOR_COMMAND_COUNT = 4
+	GET_COUNT = 20
+	
+	@classmethod
+	def setUpClass(self):
+		logging.disable(level = logging.WARNING)
+		
+	@classmethod
+	def tearDownClass(self):
+		logging.disable(logging.NOTSET)
+		
+	def testGetLatencyWithWorkerPool(self):
+		maxLatencyMillis = self._execTestGetLatency("worker pool", workerCount = 4)
+		
+		self.assertLess(maxLatencyMillis, self.ACTUATION_SECS * 1000 / 2)
+		
+	def testGetLatencyWithoutWorkerPool(self):
+		maxLatencyMillis = self._execTestGetLatency("event loop only", workerCount = 0)
+		
+		# at least one GET waited for an actuator command
+		self.assertGreater(maxLatencyMillis, self.ACTUATION_SECS * 1000 / 2)
+		
+	def _execTestGetLatency(self, label: str, workerCount: int) -> float:
+		listener = SlowActuatorListener(self.ACTUATION_SECS)
+		
+		coapServer = CoapServerAdapter(dataMsgListener = listener, host = self.HOST, port = 0, workerCount = workerCount)
+		coapServer.startServer()
+		
+		coapClient = CoapClientConnector(host = self.HOST, port = coapServer.getPort())
+		
+		try:
+			sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+			sensorData.setValue(20.0)
+			
+			listener.handleSensorMessage(sensorData)
+			
+			actuatorData = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE, name = ConfigConst.HVAC_ACTUATOR_NAME)
+			payload = DataUtil().actuatorDataToJson(actuatorData)
+			
+			futures = [ \
+				coapClient.sendPutRequestAsync(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, payload = payload, timeout = 10) \
+				for i in range(0, self.ACTUATOR_COMMAND_COUNT)]
+			
+			# the first actuator command is being handled
+			while listener.commandCount == 0:
+				time.sleep(0.001)
+			
+			latencies = []
+			
+			for i in range(0, self.GET_COUNT):
+				startTime = time.perf_counter_ns()
+				
+				self.assertTrue(coapClient.sendGetRequest( \
+					resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name = ConfigConst.TEMP_SENSOR_NAME, timeout = 10))
+				
+				latencies.append((time.perf_counter_ns() - startTime) / self.NS_IN_MILLIS)
+			
+			self.assertTrue(all(future.result() for future in futures))
+		finally:
+			coapClient.disconnectClient()
+			coapServer.stopServer()
+		
+		print("\nGET latency (" + label + ") [" + str(self.GET_COUNT) + "]: mean = " + \
+			str(round(sum(latencies) / len(latencies), 2)) + " ms, max = " + str(round(max(latencies), 2)) + " ms")
+		
+		return max(latencies)
+	
+class SlowActuatorListener(DefaultDataMessageListener):
+	
+	def __init__(self, actuationSecs: float):
+		super().__init__()
+		
+		self.actuationSecs = actuationSecs
+		self.commandCount = 0
+		
+	def handleActuatorCommandMessage(self, data: ActuatorData) -> bool:
+		# e.g. scrolling text on the SenseHAT's LED matrix
+		self.commandCount += 1
+		time.sleep(self.actuationSecs)
+		
+		return True
+	
+if __name__ == "__main__":
+	unittest.main()
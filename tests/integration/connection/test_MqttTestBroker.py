@@ -0,0 +1,138 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+import unittest
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from tests.integration.connection.MqttTestBroker import MqttTestBroker
+
+class MqttTestBrokerTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for
+	MqttTestBroker, using MqttClientConnector as the client. It should
+	not be considered complete, but serve as a starting point for the
+	student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttTestBroker class...")
+
+	def setUp(self):
+		self.broker = MqttTestBroker()
+		self.broker.startBroker()
+
+		self.mcc = MqttClientConnector(clientID = 'MqttTestBrokerTest')
+		self.mcc.host = self.broker.host
+		self.mcc.port = self.broker.port
+
+		self.received = []
+		self.receivedCond = threading.Condition()
+
+	def tearDown(self):
+		self.mcc.disconnectClient()
+		self.broker.stopBroker()
+
+	def testTopicMatch(self):
+		self.assertTrue(MqttTestBroker.isTopicMatch('PIOT/+/SensorMsg', 'PIOT/ConstrainedDevice/SensorMsg'))
+		self.assertTrue(MqttTestBroker.isTopicMatch('PIOT/#', 'PIOT'))
+		self.assertFalse(MqttTestBroker.isTopicMatch('PIOT/+', 'PIOT/a/b'))
+		self.assertFalse(MqttTestBroker.isTopicMatch('#', '$SYS/broker'))
+
+	def testPubSubAllQos(self):
+		self._connectAndSubscribe('PIOT/ConstrainedDevice/#', 2)
+
+		for qos in range(0, 3):
+			self.assertTrue(self.mcc.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = 'msg' + str(qos), qos = qos))
+
+		self._waitForMessages(3)
+
+		self.assertEqual(sorted(payload for topic, payload, qos in self.received), ['msg0', 'msg1', 'msg2'])
+
+		# delivered at the lower of the publish and subscription QoS
+		self.assertEqual(sorted(qos for topic, payload, qos in self.received), [0, 1, 2])
+
+	def testSubscriptionQosDowngrade(self):
+		self._connectAndSubscribe('PIOT/+/SensorMsg', 0)
+
+		self.assertTrue(self.mcc.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = 'msg', qos = 2))
+		self._waitForMessages(1)
+
+		self.assertEqual(self.received, [(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value, 'msg', 0)])
+
+	def testUnsubscribe(self):
+		self._connectAndSubscribe('PIOT/+/SensorMsg', 1)
+
+		self.mcc.unsubscribeFromTopic(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, topicFilter = 'PIOT/+/SensorMsg')
+		self._waitFor(lambda: not any('PIOT/+/SensorMsg' in session.subscriptions for session in list(self.broker.sessions)))
+
+		self.mcc.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = 'msg', qos = 1)
+		time.sleep(0.2)
+
+		self.assertEqual(self.received, [])
+
+	def testLossInjection(self):
+		self.broker.lossRate = 1.0
+		self._connectAndSubscribe('PIOT/#', 0)
+
+		for seqNo in range(0, 10):
+			self.mcc.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = str(seqNo), qos = 0)
+
+		self._waitFor(lambda: self.broker.getStats()['droppedCount'] == 10)
+
+		self.assertEqual(self.received, [])
+		self.assertEqual(self.broker.getStats()['deliveredCount'], 0)
+
+	def testLatencyInjection(self):
+		self.broker.latencySecs = 0.2
+		self._connectAndSubscribe('PIOT/#', 1)
+
+		startTime = time.monotonic()
+
+		self.mcc.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = 'msg', qos = 1)
+		self._waitForMessages(1)
+
+		self.assertGreaterEqual(time.monotonic() - startTime, 0.2)
+
+	def _connectAndSubscribe(self, topicFilter: str, qos: int):
+		self.mcc.subscribeToTopic(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, callback = self._onMessage, qos = qos, topicFilter = topicFilter)
+
+		self.assertTrue(self.mcc.connectClient())
+
+		# connected, and the subscription (sent on connect) has been processed
+		self._waitFor(lambda: any(topicFilter in session.subscriptions for session in list(self.broker.sessions)), timeout = 5.0)
+
+	def _onMessage(self, client, userdata, msg):
+		with self.receivedCond:
+			self.received.append((msg.topic, msg.payload.decode('utf-8'), msg.qos))
+			self.receivedCond.notify_all()
+
+	def _waitForMessages(self, count: int, timeout: float = 5.0):
+		with self.receivedCond:
+			self.assertTrue(self.receivedCond.wait_for(lambda: len(self.received) >= count, timeout))
+
+	def _waitFor(self, predicate, timeout: float = 1.0):
+		deadline = time.monotonic() + timeout
+
+		while not predicate():
+			self.assertLess(time.monotonic(), deadline)
+			time.sleep(0.01)
+
+if __name__ == "__main__":
+	unittest.main()
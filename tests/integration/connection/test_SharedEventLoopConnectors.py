@@ -0,0 +1,153 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+import unittest
+
+from aiocoap import Message
+from aiocoap.numbers.codes import Code
+from aiocoap.resource import Resource
+
+from programmingtheiot.cda.app.AsyncDeviceRuntime import AsyncDeviceRuntime
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from tests.integration.connection.MqttTestBroker import MqttTestBroker
+
+class SharedEventLoopConnectorsTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for the
+	MQTT client and the CoAP client and server running on the
+	AsyncDeviceRuntime's event loop (as in asyncio mode), rather than on
+	their own threads. Messages must still be delivered both ways, and
+	handled on the runtime's loop thread.
+
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	HOST = '127.0.0.1'
+	MSG_COUNT = 20
+	RESOURCE = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.info("Testing connectors on a shared event loop...")
+
+	def setUp(self):
+		self.runtime = AsyncDeviceRuntime(executorWorkers = 2)
+		self.runtime.startRuntime()
+
+		self.threadNames = set()
+		self.received = []
+
+	def tearDown(self):
+		self.runtime.stopRuntime()
+
+	def testMqttOnRuntimeLoop(self):
+		broker = MqttTestBroker(host = self.HOST)
+		broker.startBroker()
+
+		mqttClient = MqttClientConnector(clientID = 'CDASharedEventLoopTest001', eventLoop = self.runtime.getLoop())
+		mqttClient.host = broker.host
+		mqttClient.port = broker.port
+		mqttClient.enablePublishPipeline = True
+
+		try:
+			mqttClient.subscribeToTopic(self.RESOURCE, callback = self._handleMqttMessage, qos = 1)
+			mqttClient.connectClient()
+
+			self._waitFor(mqttClient.isConnected)
+
+			# the broker acks the subscription after the connection
+			time.sleep(0.2)
+
+			futures = [mqttClient.publishMessageAsync(self.RESOURCE, str(seqNo), qos = 1) for seqNo in range(0, self.MSG_COUNT)]
+
+			self.assertTrue(all(future.result(timeout = 5) for future in futures))
+
+			self._waitFor(lambda: len(self.received) == self.MSG_COUNT)
+		finally:
+			mqttClient.disconnectClient()
+			broker.stopBroker()
+
+		self.assertEqual(self.received, [str(seqNo) for seqNo in range(0, self.MSG_COUNT)])
+
+		# read off the socket by the runtime's loop, not paho's network thread
+		self.assertEqual(self.threadNames, {'AsyncDeviceRuntime'})
+		self.assertFalse(mqttClient.isConnected())
+
+	def testCoapOnRuntimeLoop(self):
+		coapResource = RecordingResource(self.threadNames)
+
+		coapServer = CoapServerAdapter(host = self.HOST, port = 0, workerCount = 0, eventLoop = self.runtime.getLoop())
+		coapServer.addResource(self.RESOURCE, resource = coapResource)
+
+		self.assertTrue(coapServer.startServer())
+
+		coapClient = CoapClientConnector(host = self.HOST, port = coapServer.getPort(), eventLoop = self.runtime.getLoop())
+
+		try:
+			for seqNo in range(0, self.MSG_COUNT):
+				self.assertTrue(coapClient.sendPostRequest(self.RESOURCE, payload = str(seqNo)))
+
+			threadNames = {thread.name for thread in threading.enumerate()}
+
+			self.assertNotIn('CoapClientConnector', threadNames)
+			self.assertNotIn('CoapServerAdapter', threadNames)
+		finally:
+			self.assertTrue(coapClient.disconnectClient())
+			self.assertTrue(coapServer.stopServer())
+
+		self.assertEqual(coapResource.payloads, [str(seqNo) for seqNo in range(0, self.MSG_COUNT)])
+		self.assertEqual(self.threadNames, {'AsyncDeviceRuntime'})
+
+		# stopping the connectors leaves the shared loop to the runtime
+		self.assertTrue(self.runtime.getLoop().is_running())
+
+	def _handleMqttMessage(self, client, userdata, msg):
+		self.threadNames.add(threading.current_thread().name)
+		self.received.append(msg.payload.decode('utf-8'))
+
+	def _waitFor(self, condition, timeout: float = 5.0):
+		deadline = time.monotonic() + timeout
+
+		while not condition():
+			self.assertLess(time.monotonic(), deadline)
+			time.sleep(0.01)
+
+class RecordingResource(Resource):
+	"""
+	Resource that remembers every payload POSTed to it, and the thread
+	it was handled on.
+
+	"""
+
+	def __init__(self, threadNames: set):
+		super().__init__()
+
+		self.payloads = []
+		self.threadNames = threadNames
+
+	async def render_post(self, request):
+		self.threadNames.add(threading.current_thread().name)
+		self.payloads.append(request.payload.decode('utf-8'))
+
+		return Message(code = Code.CHANGED)
+
+if __name__ == "__main__":
+	unittest.main()
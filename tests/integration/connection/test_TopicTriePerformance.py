@@ -0,0 +1,116 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+import unittest
+
+from programmingtheiot.cda.connection.TopicTrie import TopicTrie
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class TopicTriePerformanceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for
+	TopicTrie. It subscribes several thousand per-device and wildcard
+	topic filters and reports the number of topics matched per second,
+	with and without the resolved topic cache, alongside a linear scan
+	of every filter for comparison.
+	"""
+	NS_IN_SECOND = 1000000000
+	MAX_TEST_RUNS = 100000
+	DEVICE_COUNT = 1000
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+
+	def setUp(self):
+		self.topicFilters = []
+
+		for resource in ResourceNameEnum:
+			for deviceID in range(0, self.DEVICE_COUNT // 2):
+				self.topicFilters.append(resource.value + '/device' + str(deviceID))
+
+			self.topicFilters.append(resource.value + '/+')
+			self.topicFilters.append(resource.value + '/#')
+
+		self.topics = [resource.value + '/device' + str(deviceID) for resource in ResourceNameEnum for deviceID in range(0, self.DEVICE_COUNT)]
+
+	def tearDown(self):
+		pass
+
+	def testMatchWithCache(self):
+		topicTrie = self._createTopicTrie(TopicTrie.DEFAULT_MAX_CACHE_SIZE)
+
+		# a working set of hot topics that fits in the cache
+		self._execTestMatch('trie (cached)', lambda topic: topicTrie.match(topic), self.MAX_TEST_RUNS, \
+			self.topics[:TopicTrie.DEFAULT_MAX_CACHE_SIZE // 2])
+
+	def testMatchWithoutCache(self):
+		topicTrie = self._createTopicTrie(0)
+		self._execTestMatch('trie (uncached)', lambda topic: topicTrie.match(topic), self.MAX_TEST_RUNS)
+
+	def testLinearMatch(self):
+		# far slower, so fewer runs
+		self._execTestMatch('linear scan', self._matchLinear, self.MAX_TEST_RUNS // 100)
+
+	def _execTestMatch(self, label: str, matchFunc, maxTestRuns: int, topics: list = None):
+		if not topics:
+			topics = self.topics
+
+		matchCount = 0
+		startTime = time.perf_counter_ns()
+
+		for seqNo in range(0, maxTestRuns):
+			matchCount += len(matchFunc(topics[seqNo % len(topics)]))
+
+		elapsedSecs = (time.perf_counter_ns() - startTime) / self.NS_IN_SECOND
+
+		# every topic matches the '+' and '#' filters for its resource
+		self.assertGreaterEqual(matchCount, maxTestRuns * 2)
+
+		logging.info( \
+			"\n\tTesting Topic Match (%s): subscriptions = %r | distinct topics = %r | topics = %r | matches = %r | elapsed = %.3f s | topics/sec = %.0f", \
+			label, len(self.topicFilters), len(topics), maxTestRuns, matchCount, elapsedSecs, maxTestRuns / elapsedSecs)
+
+	def _createTopicTrie(self, maxCacheSize: int) -> TopicTrie:
+		topicTrie = TopicTrie(maxCacheSize = maxCacheSize)
+
+		for topicFilter in self.topicFilters:
+			topicTrie.subscribe(topicFilter, ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		self.assertEqual(topicTrie.getSubscriptionCount(), len(self.topicFilters))
+
+		return topicTrie
+
+	def _matchLinear(self, topic: str) -> list:
+		topicLevels = topic.split('/')
+		matches = []
+
+		for topicFilter in self.topicFilters:
+			filterLevels = topicFilter.split('/')
+
+			for i, level in enumerate(filterLevels):
+				if level == '#':
+					matches.append(topicFilter)
+					break
+
+				if i >= len(topicLevels) or (level != '+' and level != topicLevels[i]):
+					break
+			else:
+				if len(filterLevels) == len(topicLevels):
+					matches.append(topicFilter)
+
+		return matches
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,159 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+import unittest
+
+from aiocoap import Message
+from aiocoap.numbers.codes import Code
+from aiocoap.resource import Resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from programmingtheiot.cda.connection.UpstreamTransportRouter import UpstreamTransportRouter
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from tests.integration.connection.MqttTestBroker import MqttTestBroker
+
+class UpstreamTransportFailoverTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for
+	UpstreamTransportRouter, routing over an MQTT client (to an in-process
+	MqttTestBroker) and a CoAP client (to a local CoapServerAdapter).
+	The broker is stopped while messages are in flight; every message
+	must still be acked by the broker or received by the CoAP server.
+
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+	NS_IN_MILLIS = 1000000
+
+	HOST = '127.0.0.1'
+	MSG_COUNT = 400
+	BROKER_LATENCY_SECS = 0.02
+	RESOURCE = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE
+
+	@classmethod
+	def setUpClass(self):
+		logging.disable(level = logging.WARNING)
+
+	@classmethod
+	def tearDownClass(self):
+		logging.disable(logging.NOTSET)
+
+	def testFailoverWithoutLoss(self):
+		broker = MqttTestBroker(host = self.HOST, latencySecs = self.BROKER_LATENCY_SECS)
+		broker.startBroker()
+
+		mqttClient = MqttClientConnector(clientID = 'CDAUpstreamFailoverTest001')
+		mqttClient.host = broker.host
+		mqttClient.port = broker.port
+		mqttClient.enablePublishPipeline = True
+
+		coapResource = ReceivingResource()
+		coapServer = CoapServerAdapter(host = self.HOST, port = 0, workerCount = 0)
+		coapServer.addResource(self.RESOURCE, resource = coapResource)
+		coapServer.startServer()
+
+		coapClient = CoapClientConnector(host = self.HOST, port = coapServer.getPort())
+
+		# messages the broker acked
+		mqttAcked = set()
+		lock = threading.Lock()
+
+		def handlePublishResult(msg, future):
+			if future.result():
+				with lock:
+					mqttAcked.add(msg)
+
+		def publishMessage(resource, msg):
+			future = mqttClient.publishMessageAsync(resource = resource, msg = msg, qos = 1)
+			future.add_done_callback(lambda future: handlePublishResult(msg, future))
+
+			return future
+
+		router = UpstreamTransportRouter(windowSize = 20, maxErrorRate = 0.5, retryIntervalSecs = 60.0)
+		router.addTransport(ConfigConst.MQTT_TRANSPORT_NAME, publishMessage, mqttClient.isConnected)
+		router.addTransport(ConfigConst.COAP_TRANSPORT_NAME, lambda resource, msg: coapClient.sendPostRequestAsync(resource = resource, payload = msg))
+
+		try:
+			mqttClient.connectClient()
+			self._waitForConnection(mqttClient)
+
+			startTime = time.perf_counter_ns()
+			futures = []
+
+			for seqNo in range(0, self.MSG_COUNT):
+				futures.append(router.routeMessage(self.RESOURCE, str(seqNo)))
+
+				if seqNo == self.MSG_COUNT // 2:
+					# fails the messages in flight, and the client's connection
+					broker.stopBroker()
+					broker = None
+
+			# messages still queued in the publish pipeline fail when it stops
+			mqttClient.disconnectClient()
+
+			self.assertTrue(all(future.result(timeout = 30) for future in futures))
+
+			elapsedMillis = (time.perf_counter_ns() - startTime) / self.NS_IN_MILLIS
+		finally:
+			if broker:
+				broker.stopBroker()
+
+			coapClient.disconnectClient()
+			coapServer.stopServer()
+
+		stats = router.getStats()
+
+		print("\nFailover: %d msgs in %.0f ms | MQTT acked = %d | CoAP received = %d | failovers = %d | routes = %s" % \
+			(self.MSG_COUNT, elapsedMillis, len(mqttAcked), len(coapResource.payloads), \
+			stats[ConfigConst.FAILOVER_COUNT_PROP], str(stats[ConfigConst.ROUTES_PROP])))
+
+		# nothing lost - at least once over one transport or the other
+		self.assertEqual(mqttAcked | coapResource.payloads, {str(seqNo) for seqNo in range(0, self.MSG_COUNT)})
+
+		self.assertGreater(len(mqttAcked), 0)
+		self.assertGreater(len(coapResource.payloads), 0)
+		self.assertEqual(stats[ConfigConst.ROUTES_PROP][self.RESOURCE.name], ConfigConst.COAP_TRANSPORT_NAME)
+
+	def _waitForConnection(self, mqttClient: MqttClientConnector, timeout: float = 5.0):
+		deadline = time.monotonic() + timeout
+
+		while not mqttClient.isConnected():
+			self.assertLess(time.monotonic(), deadline)
+			time.sleep(0.01)
+
+class ReceivingResource(Resource):
+	"""
+	Resource that remembers every payload POSTed to it.
+
+	"""
+
+	def __init__(self):
+		super().__init__()
+
+		self.payloads = set()
+
+	async def render_post(self, request):
+		self.payloads.add(request.payload.decode('utf-8'))
+
+		return Message(code = Code.CHANGED)
+
+if __name__ == "__main__":
+	unittest.main()
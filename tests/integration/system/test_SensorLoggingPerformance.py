@@ -0,0 +1,119 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import tempfile
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.sim.HumiditySensorEmulatorTask import HumiditySensorEmulatorTask
+from programmingtheiot.cda.sim.PressureSensorEmulatorTask import PressureSensorEmulatorTask
+from programmingtheiot.cda.sim.TemperatureSensorEmulatorTask import TemperatureSensorEmulatorTask
+from programmingtheiot.common.LoggingUtil import LoggingUtil
+from programmingtheiot.data.DataUtil import DataUtil
+
+class SensorLoggingPerformanceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic performance tests for
+	the sensor path (generate + JSON encode) under three logging setups:
+	a synchronous handler logging every reading (the old behavior), an
+	async (queued) handler logging every reading, and an async handler
+	with the per-reading messages rate limited. It reports the number of
+	readings per second for each.
+	"""
+	NS_IN_SECOND = 1000000000
+	MAX_TEST_RUNS = 20000
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+
+		self.tasks = [TemperatureSensorEmulatorTask(), HumiditySensorEmulatorTask(), PressureSensorEmulatorTask()]
+		self.dataUtil = DataUtil()
+
+	def setUp(self):
+		rootLogger = logging.getLogger()
+
+		# keep any console handlers out of the measurement
+		self.rootLevel = rootLogger.level
+		self.rootHandlers = rootLogger.handlers[:]
+
+		for handler in self.rootHandlers:
+			rootLogger.removeHandler(handler)
+
+		self.logFile = tempfile.TemporaryFile(mode = 'w+')
+		self.results = None
+
+	def tearDown(self):
+		LoggingUtil().stopLogging()
+		self._setReadingLogInterval(LoggingUtil().rateLimitSecs)
+
+		rootLogger = logging.getLogger()
+		rootLogger.setLevel(self.rootLevel)
+
+		for handler in self.rootHandlers:
+			rootLogger.addHandler(handler)
+
+		self.logFile.close()
+
+		if self.results:
+			logging.info( \
+				"\n\tTesting Sensor Path Logging (%s): readings = %r | log lines = %r | elapsed = %.3f s | elapsed incl. drain = %.3f s | readings/sec = %.0f", \
+				*self.results)
+
+	def testSyncLoggingEveryReading(self):
+		self._execTestSensorPath('sync, every reading', enableAsync = False, intervalSecs = 0)
+
+	def testAsyncLoggingEveryReading(self):
+		self._execTestSensorPath('async, every reading', enableAsync = True, intervalSecs = 0)
+
+	def testAsyncLoggingRateLimited(self):
+		self._execTestSensorPath('async, rate limited', enableAsync = True, intervalSecs = ConfigConst.DEFAULT_LOG_RATE_LIMIT_SECS)
+
+	def _execTestSensorPath(self, label: str, enableAsync: bool, intervalSecs: float):
+		LoggingUtil().configureLogging(stream = self.logFile, enableAsync = enableAsync)
+		self._setReadingLogInterval(intervalSecs)
+
+		startTime = time.perf_counter_ns()
+
+		for seqNo in range(0, self.MAX_TEST_RUNS):
+			sensorData = self.tasks[seqNo % len(self.tasks)].generateTelemetry()
+			self.dataUtil.sensorDataToJson(sensorData)
+
+		elapsedSecs = (time.perf_counter_ns() - startTime) / self.NS_IN_SECOND
+
+		# include the time to drain the queue, so the async numbers are honest about total work
+		LoggingUtil().stopLogging()
+
+		drainedSecs = (time.perf_counter_ns() - startTime) / self.NS_IN_SECOND
+		logLines = self._countLogLines()
+
+		self.results = (label, self.MAX_TEST_RUNS, logLines, elapsedSecs, drainedSecs, self.MAX_TEST_RUNS / elapsedSecs)
+
+		if intervalSecs == 0:
+			self.assertGreaterEqual(logLines, self.MAX_TEST_RUNS)
+		else:
+			self.assertLess(logLines, self.MAX_TEST_RUNS / 100)
+
+	def _countLogLines(self) -> int:
+		self.logFile.seek(0)
+
+		return sum(1 for line in self.logFile)
+
+	def _setReadingLogInterval(self, intervalSecs: float):
+		for task in self.tasks:
+			task.readingLogger.setInterval(intervalSecs)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,151 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.ActuationRuleEngine import ActuationRuleEngine, HysteresisRule
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.Singleton import Singleton
+
+from programmingtheiot.data.SensorData import SensorData
+
+class ActuationRuleEngineTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	ActuationRuleEngine. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ActuationRuleEngine class...")
+
+	@classmethod
+	def tearDownClass(self):
+		# the SensorData fixtures load the default config - don't leave it to later tests
+		Singleton._instances.pop(ConfigUtil, None)
+
+	def setUp(self):
+		self.engine = ActuationRuleEngine(loadFromConfig = False)
+
+	def tearDown(self):
+		pass
+
+	def testThresholdRuleOnlyEmitsOnTransition(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD, floor = 18.0, ceiling = 20.0)])
+
+		self.assertEqual(len(self._evaluate(19.0)), 0)
+
+		cmds = self._evaluate(21.0)
+
+		self.assertEqual(len(cmds), 1)
+		self.assertEqual(cmds[0].getTypeID(), ConfigConst.HVAC_ACTUATOR_TYPE)
+		self.assertEqual(cmds[0].getCommand(), ConfigConst.COMMAND_ON)
+		self.assertEqual(cmds[0].getValue(), 21.0)
+
+		# still out of range - no repeated command
+		self.assertEqual(len(self._evaluate(22.0)), 0)
+		self.assertEqual(len(self._evaluate(17.0)), 0)
+
+		cmds = self._evaluate(19.5)
+
+		self.assertEqual(len(cmds), 1)
+		self.assertEqual(cmds[0].getCommand(), ConfigConst.COMMAND_OFF)
+
+	def testHysteresisRuleHoldsUntilDeadbandCleared(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_HYSTERESIS, floor = 18.0, ceiling = 20.0, deadband = 0.5)])
+
+		self.assertEqual(self._evaluate(20.2)[0].getCommand(), ConfigConst.COMMAND_ON)
+		self.assertEqual(len(self._evaluate(19.8)), 0)
+		self.assertEqual(self._evaluate(19.4)[0].getCommand(), ConfigConst.COMMAND_OFF)
+
+	def testRateOfChangeRule(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_RATE, maxRatePerSec = 1.0)])
+
+		self.assertEqual(len(self._evaluate(20.0, now = 0.0)), 0)
+		self.assertEqual(len(self._evaluate(20.5, now = 1.0)), 0)
+		self.assertEqual(self._evaluate(23.0, now = 2.0)[0].getCommand(), ConfigConst.COMMAND_ON)
+		self.assertEqual(self._evaluate(23.2, now = 3.0)[0].getCommand(), ConfigConst.COMMAND_OFF)
+
+	def testTargetValue(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD, ceiling = 20.0, targetValue = 19.0)])
+
+		self.assertEqual(self._evaluate(25.0)[0].getValue(), 19.0)
+
+	def testDispatchByTypeID(self):
+		self.engine.compileRules([ \
+			self._createRuleDef(ConfigConst.RULE_TYPE_HYSTERESIS, ceiling = 20.0), \
+			self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD, sensorTypeID = SensorData.HUMIDITY_SENSOR_TYPE, ceiling = 50.0)])
+
+		self.assertEqual(self.engine.getRuleCount(), 2)
+		self.assertIsInstance(self.engine.getRules(SensorData.TEMPERATURE_SENSOR_TYPE)[0], HysteresisRule)
+		self.assertEqual(len(self.engine.getRules(ConfigConst.PRESSURE_SENSOR_TYPE)), 0)
+
+		self.assertEqual(len(self._evaluate(60.0, typeID = ConfigConst.PRESSURE_SENSOR_TYPE)), 0)
+		self.assertEqual(len(self._evaluate(60.0, typeID = SensorData.HUMIDITY_SENSOR_TYPE)), 1)
+
+	def testInvalidRulesAreSkipped(self):
+		self.engine.compileRules([ \
+			self._createRuleDef('bogus', ceiling = 20.0), \
+			self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD), \
+			{ConfigConst.NAME_PROP: 'NoTypeIDs', ConfigConst.CEILING_KEY: '20.0'}])
+
+		self.assertEqual(self.engine.getRuleCount(), 0)
+
+	def testResetRuleState(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD, ceiling = 20.0)])
+
+		self.assertEqual(len(self._evaluate(25.0)), 1)
+
+		self.engine.resetRuleState()
+
+		self.assertEqual(len(self._evaluate(25.0)), 1)
+
+	def testHandleConfigChange(self):
+		self.engine.compileRules([self._createRuleDef(ConfigConst.RULE_TYPE_THRESHOLD, ceiling = 20.0)])
+
+		# unrelated settings don't trigger a recompile
+		self.assertFalse(self.engine.handleConfigChange(ConfigConst.CONSTRAINED_DEVICE, {'pollcyclesecs'}))
+		self.assertEqual(self.engine.getRuleCount(), 1)
+
+		self.assertTrue(self.engine.handleConfigChange(ConfigConst.CONSTRAINED_DEVICE, {'triggerhvactempfloor'}))
+		self.assertTrue(self.engine.handleConfigChange(ConfigConst.RULE_SECTION_PREFIX + 'HvacTemp', {'deadband'}))
+
+	def _createRuleDef(self, ruleType: str, sensorTypeID: int = SensorData.TEMPERATURE_SENSOR_TYPE, **kwargs) -> dict:
+		ruleDef = {
+			ConfigConst.NAME_PROP:            'TestRule',
+			ConfigConst.RULE_TYPE_KEY:        ruleType,
+			ConfigConst.SENSOR_TYPE_ID_KEY:   str(sensorTypeID),
+			ConfigConst.ACTUATOR_TYPE_ID_KEY: str(ConfigConst.HVAC_ACTUATOR_TYPE),
+			ConfigConst.ACTUATOR_NAME_KEY:    ConfigConst.HVAC_ACTUATOR_NAME
+		}
+
+		for key, val in kwargs.items():
+			ruleDef[key] = str(val)
+
+		return ruleDef
+
+	def _evaluate(self, val: float, typeID: int = SensorData.TEMPERATURE_SENSOR_TYPE, now: float = None) -> list:
+		sd = SensorData(typeID = typeID)
+		sd.setValue(val)
+
+		return self.engine.evaluate(sd, now = now)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,147 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+import threading
+import time
+import unittest
+
+from programmingtheiot.cda.app.AsyncDeviceRuntime import AsyncDeviceRuntime
+
+class AsyncDeviceRuntimeTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	AsyncDeviceRuntime. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing AsyncDeviceRuntime class...")
+
+	def setUp(self):
+		self.runtime = AsyncDeviceRuntime(executorWorkers = 2)
+		self.results = []
+		self.threadNames = set()
+
+	def tearDown(self):
+		self.runtime.stopRuntime()
+
+	def testSubmitRunsOnLoopInOrder(self):
+		self.assertFalse(self.runtime.submit(self._handleData, 0))
+
+		self.runtime.startRuntime()
+
+		for i in range(0, 10):
+			self.assertTrue(self.runtime.submit(self._handleData, i))
+
+		self.runtime.stopRuntime()
+
+		self.assertEqual(self.results, list(range(0, 10)))
+		self.assertEqual(self.threadNames, {'AsyncDeviceRuntime'})
+
+	def testAsyncHandler(self):
+		async def handleDataAsync(data):
+			await asyncio.sleep(0.01)
+			self.results.append(data)
+
+		self.runtime.startRuntime()
+		self.runtime.submit(handleDataAsync, 'async')
+		self.runtime.stopRuntime()
+
+		self.assertEqual(self.results, ['async'])
+
+	def testDrainLeavesSharedLoopRunning(self):
+		loop = self.runtime.getLoop()
+
+		self.runtime.startRuntime()
+
+		self.assertIs(self.runtime.getLoop(), loop)
+
+		async def handleDataAsync(data):
+			await asyncio.sleep(0.01)
+			self.results.append(data)
+
+		# e.g. a connector's observer, on the shared loop - not waited for
+		connectorFuture = asyncio.run_coroutine_threadsafe(asyncio.sleep(60), loop)
+
+		self.runtime.submit(handleDataAsync, 'async')
+		self.runtime.drainRuntime()
+
+		self.assertEqual(self.results, ['async'])
+		self.assertTrue(loop.is_running())
+
+		connectorFuture.cancel()
+		self.runtime.stopRuntime()
+
+		self.assertTrue(loop.is_closed())
+
+	def testBlockingWorkOffLoop(self):
+		self.runtime.startRuntime()
+
+		release = threading.Event()
+
+		# blocking work on the executor doesn't hold up the loop
+		self.runtime.submit(lambda data: self.runtime.runBlocking(release.wait), None)
+		time.sleep(0.05)
+		self.runtime.submit(self._handleData, 'notBlocked')
+		time.sleep(0.05)
+
+		self.assertEqual(self.results, ['notBlocked'])
+
+		release.set()
+
+	def testPolling(self):
+		self.runtime.schedulePolling(lambda: self._handleData('poll'), 0.05)
+		self.runtime.startRuntime()
+
+		time.sleep(0.3)
+
+		self.runtime.stopRuntime()
+
+		pollCount = len(self.results)
+
+		self.assertGreaterEqual(pollCount, 4)
+		self.assertLessEqual(pollCount, 8)
+
+		# polling stops with the runtime
+		time.sleep(0.1)
+		self.assertEqual(len(self.results), pollCount)
+
+	def testSetPollInterval(self):
+		pollFunc = lambda: self._handleData('poll')
+
+		self.runtime.schedulePolling(pollFunc, 60.0)
+		self.runtime.startRuntime()
+
+		time.sleep(0.1)
+
+		# only the initial poll
+		self.assertEqual(len(self.results), 1)
+
+		self.assertTrue(self.runtime.setPollInterval(pollFunc, 0.05))
+		self.assertFalse(self.runtime.setPollInterval(lambda: None, 0.05))
+
+		time.sleep(0.3)
+
+		self.assertGreaterEqual(len(self.results), 5)
+
+	def _handleData(self, data):
+		self.threadNames.add(threading.current_thread().name)
+		self.results.append(data)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,165 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.DataIngestQueue import DataIngestQueue
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.Singleton import Singleton
+
+class DataIngestQueueTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	DataIngestQueue. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing DataIngestQueue class...")
+
+	@classmethod
+	def tearDownClass(self):
+		# the queue loads the default config - don't leave it to later tests
+		Singleton._instances.pop(ConfigUtil, None)
+
+	def setUp(self):
+		self.processed = []
+		self.lock = threading.Lock()
+
+	def tearDown(self):
+		pass
+
+	def testProcessOnWorker(self):
+		ingestQueue = DataIngestQueue(maxSize = 10, workerCount = 2, dropPolicy = DataIngestQueue.DROP_OLDEST)
+		ingestQueue.startQueue()
+
+		for i in range(0, 5):
+			self.assertTrue(ingestQueue.submit(self._handleData, i))
+
+		ingestQueue.stopQueue()
+
+		self.assertEqual(sorted(self.processed), [0, 1, 2, 3, 4])
+		self.assertEqual(ingestQueue.getStats()[ConfigConst.PROCESSED_COUNT_PROP], 5)
+
+	def testDropOldest(self):
+		ingestQueue = DataIngestQueue(maxSize = 3, workerCount = 1, dropPolicy = DataIngestQueue.DROP_OLDEST)
+
+		# not started, so nothing is taken off the queue
+		for i in range(0, 5):
+			self.assertTrue(ingestQueue.submit(self._handleData, i))
+
+		self.assertEqual(ingestQueue.getDepth(), 3)
+		self.assertEqual(ingestQueue.getStats()[ConfigConst.DROPPED_OLDEST_COUNT_PROP], 2)
+
+		ingestQueue.stopQueue()
+
+		self.assertEqual(self.processed, [2, 3, 4])
+
+	def testDropNewest(self):
+		ingestQueue = DataIngestQueue(maxSize = 3, workerCount = 1, dropPolicy = DataIngestQueue.DROP_NEWEST)
+
+		for i in range(0, 5):
+			ingestQueue.submit(self._handleData, i)
+
+		self.assertEqual(ingestQueue.getStats()[ConfigConst.DROPPED_NEWEST_COUNT_PROP], 2)
+
+		ingestQueue.stopQueue()
+
+		self.assertEqual(self.processed, [0, 1, 2])
+
+	def testBlockTimesOut(self):
+		ingestQueue = DataIngestQueue(maxSize = 1, workerCount = 1, dropPolicy = DataIngestQueue.BLOCK, blockTimeoutMillis = 100)
+		ingestQueue.startQueue()
+
+		release = threading.Event()
+
+		# the first item holds the only worker, the second fills the queue
+		self.assertTrue(ingestQueue.submit(lambda data: release.wait(), 0))
+		time.sleep(0.05)
+		self.assertTrue(ingestQueue.submit(self._handleData, 1))
+
+		startTime = time.monotonic()
+
+		self.assertFalse(ingestQueue.submit(self._handleData, 2))
+		self.assertGreaterEqual(time.monotonic() - startTime, 0.09)
+
+		release.set()
+		ingestQueue.stopQueue()
+
+		self.assertEqual(self.processed, [1])
+		self.assertEqual(ingestQueue.getStats()[ConfigConst.DROPPED_NEWEST_COUNT_PROP], 1)
+
+	def testWorkerSubmitNotBlockedOnOwnQueue(self):
+		ingestQueue = DataIngestQueue(maxSize = 1, workerCount = 1, dropPolicy = DataIngestQueue.BLOCK, blockTimeoutMillis = 5000)
+		ingestQueue.startQueue()
+
+		release = threading.Event()
+		submitResults = []
+
+		# e.g. a rule firing an actuator command, whose response is submitted from the worker
+		def handleCommand(data):
+			release.wait()
+			submitResults.append(ingestQueue.submit(self._handleData, 'response'))
+
+		self.assertTrue(ingestQueue.submit(handleCommand, 'command'))
+		time.sleep(0.05)
+
+		# fills the queue while the only worker runs the command
+		self.assertTrue(ingestQueue.submit(self._handleData, 'reading'))
+
+		startTime = time.monotonic()
+
+		release.set()
+		ingestQueue.stopQueue()
+
+		self.assertLess(time.monotonic() - startTime, 1.0)
+		self.assertEqual(submitResults, [True])
+		self.assertEqual(self.processed, ['response', 'reading'])
+		self.assertEqual(ingestQueue.getStats()[ConfigConst.DROPPED_NEWEST_COUNT_PROP], 0)
+
+	def testProducerNotStalledBySlowHandler(self):
+		ingestQueue = DataIngestQueue(maxSize = 100, workerCount = 1, dropPolicy = DataIngestQueue.DROP_OLDEST)
+		ingestQueue.startQueue()
+
+		# simulates a slow upstream publish
+		slowHandler = lambda data: time.sleep(0.05)
+
+		startTime = time.monotonic()
+
+		for i in range(0, 10):
+			ingestQueue.submit(slowHandler, i)
+
+		self.assertLess(time.monotonic() - startTime, 0.05)
+
+		ingestQueue.stopQueue()
+
+		stats = ingestQueue.getStats()
+
+		self.assertEqual(stats[ConfigConst.PROCESSED_COUNT_PROP], 10)
+		self.assertGreater(stats[ConfigConst.MAX_WAIT_MILLIS_PROP], 0.0)
+
+	def _handleData(self, data):
+		with self.lock:
+			self.processed.append(data)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,206 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.DeviceDataManager import DeviceDataManager
+from programmingtheiot.cda.sim.TemperatureSensorEmulatorTask import TemperatureSensorEmulatorTask
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.common.Singleton import Singleton
+
+class DeviceDataManagerTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	DeviceDataManager, using a config file with no connections
+	enabled. It should not be considered complete, but serve as
+	a starting point for the student implementing additional
+	functionality within their Programming the IoT environment.
+	"""
+
+	RESOURCE = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE
+
+	CONFIG_PROPS = \
+		'[ConstrainedDevice]\n' + \
+		'enableEmulator = False\n' + \
+		'handleTempChangeOnDevice = True\n' + \
+		'triggerHvacTempFloor = -100.0\n' + \
+		'triggerHvacTempCeiling = -50.0\n'
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing DeviceDataManager class...")
+
+	def setUp(self):
+		self.tmpDir = tempfile.mkdtemp(prefix = 'cda-ddm-')
+		self.configProps = self.CONFIG_PROPS
+
+	def tearDown(self):
+		# each test loads its own config
+		Singleton._instances.pop(ConfigUtil, None)
+		shutil.rmtree(self.tmpDir, ignore_errors = True)
+
+	def testHvacTriggeredByEmulatedReading(self):
+		ddMgr = self._createManager()
+
+		# any reading is above the ceiling, so the first one turns the HVAC on
+		sensorData = TemperatureSensorEmulatorTask().generateTelemetry()
+
+		self.assertTrue(ddMgr.handleSensorMessage(sensorData))
+
+		self.assertEqual(len(self.actuatorCmds), 1)
+		self.assertEqual(self.actuatorCmds[0].getTypeID(), ConfigConst.HVAC_ACTUATOR_TYPE)
+		self.assertEqual(self.actuatorCmds[0].getCommand(), ConfigConst.COMMAND_ON)
+
+	def testEmulatorDisabledFromConfig(self):
+		self.configProps += 'enableSensing = True\n'
+
+		ddMgr = self._createManager()
+
+		self.assertFalse(ddMgr.sensorAdapterMgr.useEmulator)
+
+	def testLateMqttFailureStoredInOutbox(self):
+		self.configProps += 'enableOutbox = True\n'
+
+		ddMgr = self._createManager()
+		ddMgr.mqttClient = FakeMqttClient()
+
+		# queued in the publish pipeline - not delivered yet
+		ddMgr._sendUpstream(self.RESOURCE, 'msg')
+
+		self.assertEqual(len(ddMgr.mqttClient.pending), 1)
+		self.assertEqual(ddMgr.upstreamOutbox.getPendingCount(), 0)
+
+		# e.g. a disconnect failing the messages in flight
+		ddMgr.mqttClient.resolvePending(False)
+
+		self.assertEqual(ddMgr.upstreamOutbox.getPendingCount(), 1)
+
+		ddMgr.upstreamOutbox.close()
+
+	def testDisconnectFailuresKeptOnStop(self):
+		self.configProps += 'enableOutbox = True\n'
+
+		ddMgr = self._createManager()
+		ddMgr.mqttClient = FakeMqttClient()
+
+		ddMgr._sendUpstream(self.RESOURCE, 'msg')
+
+		# the disconnect fails the message in flight, which the outbox must still take
+		ddMgr.stopManager()
+
+		self.assertEqual(ddMgr.upstreamOutbox.getStats()[ConfigConst.STORED_COUNT_PROP], 1)
+
+	def testReplayWaitsForDelivery(self):
+		self.configProps += 'enableOutbox = True\n'
+
+		ddMgr = self._createManager()
+		ddMgr.mqttClient = FakeMqttClient(result = False, isDeferred = False)
+		ddMgr.REPLAY_SEND_TIMEOUT_SECS = 0.1
+
+		ddMgr.upstreamOutbox.storeMessage(self.RESOURCE, 'msg')
+
+		# failed, or still in flight - either way, it stays in the outbox
+		self.assertEqual(ddMgr.upstreamOutbox.replayMessages(ddMgr._replayUpstream), 0)
+
+		ddMgr.mqttClient.isDeferred = True
+
+		self.assertEqual(ddMgr.upstreamOutbox.replayMessages(ddMgr._replayUpstream), 0)
+		self.assertEqual(ddMgr.upstreamOutbox.getPendingCount(), 1)
+
+		ddMgr.mqttClient.isDeferred = False
+		ddMgr.mqttClient.result = True
+
+		self.assertEqual(ddMgr.upstreamOutbox.replayMessages(ddMgr._replayUpstream), 1)
+		self.assertEqual(ddMgr.upstreamOutbox.getPendingCount(), 0)
+
+		ddMgr.upstreamOutbox.close()
+
+	def testReplayWokenOnConnect(self):
+		self.configProps += 'enableMqttClient = True\n' + 'enableOutbox = True\n'
+
+		ddMgr = self._createManager()
+
+		self.assertFalse(ddMgr.upstreamOutbox.replayEvent.is_set())
+
+		# as paho calls it once the broker accepts the connection
+		ddMgr.mqttClient.onConnect(MagicMock(), None, None, 0)
+
+		self.assertTrue(ddMgr.upstreamOutbox.replayEvent.is_set())
+
+		ddMgr.upstreamOutbox.close()
+
+	def _createManager(self) -> DeviceDataManager:
+		configFile = os.path.join(self.tmpDir, 'PiotConfig.props')
+
+		with open(configFile, 'w') as propsFile:
+			propsFile.write(self.configProps)
+			propsFile.write('testCdaDataPath = ' + self.tmpDir + '\n')
+
+		Singleton._instances.pop(ConfigUtil, None)
+		ConfigUtil(configFile = configFile)
+
+		ddMgr = DeviceDataManager()
+
+		# records the commands instead of actuating
+		self.actuatorCmds = []
+		ddMgr.actuatorAdapterMgr.sendActuatorCommand = self.actuatorCmds.append
+
+		return ddMgr
+
+class FakeMqttClient():
+	"""
+	Stands in for MqttClientConnector with the publish pipeline enabled:
+	publishes resolve with 'result', or once resolvePending() is called if
+	'isDeferred' (the message is queued, but not yet acked).
+
+	"""
+
+	def __init__(self, result: bool = True, isDeferred: bool = True):
+		self.result = result
+		self.isDeferred = isDeferred
+		self.pending = []
+
+	def publishMessageAsync(self, resource: ResourceNameEnum = None, msg: str = None) -> Future:
+		future = Future()
+
+		if self.isDeferred:
+			self.pending.append(future)
+		else:
+			future.set_result(self.result)
+
+		return future
+
+	def disconnectClient(self) -> bool:
+		self.resolvePending(False)
+
+		return True
+
+	def resolvePending(self, result: bool):
+		pending, self.pending = self.pending, []
+
+		for future in pending:
+			future.set_result(result)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,97 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.ReportByExceptionFilter import ReportByExceptionFilter
+
+class ReportByExceptionFilterTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	ReportByExceptionFilter. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ReportByExceptionFilter class...")
+
+	def setUp(self):
+		self.rbeFilter = ReportByExceptionFilter(loadFromConfig = False)
+
+	def tearDown(self):
+		pass
+
+	def testNoDeadbandReportsEverything(self):
+		for i in range(0, 5):
+			self.assertTrue(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = i))
+
+		self.assertEqual(self.rbeFilter.getStats()[ConfigConst.SUPPRESSED_COUNT_PROP], 0)
+
+	def testAbsoluteDeadband(self):
+		self.rbeFilter.setDeadband(ConfigConst.PRESSURE_SENSOR_NAME, absDeadband = 0.5)
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = 0))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.4,), now = 1))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (999.6,), now = 2))
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.6,), now = 3))
+
+		# deadband is relative to the last *reported* value
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1001.0,), now = 4))
+
+		stats = self.rbeFilter.getStats(ConfigConst.PRESSURE_SENSOR_NAME)
+
+		self.assertEqual(stats[ConfigConst.SENT_COUNT_PROP], 2)
+		self.assertEqual(stats[ConfigConst.SUPPRESSED_COUNT_PROP], 3)
+		self.assertEqual(stats[ConfigConst.SUPPRESSED_PCT_PROP], 60.0)
+
+	def testPercentDeadband(self):
+		self.rbeFilter.setDeadband(absDeadband = None, pctDeadband = 10.0)
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (20.0,), now = 0))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (21.9,), now = 1))
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (22.1,), now = 2))
+
+	def testMaxSilenceHeartbeat(self):
+		self.rbeFilter.setDeadband(ConfigConst.PRESSURE_SENSOR_NAME, absDeadband = 5.0, maxSilenceSecs = 60)
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = 0))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = 59))
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = 60))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.PRESSURE_SENSOR_NAME, (1000.0,), now = 61))
+
+	def testMultipleValues(self):
+		self.rbeFilter.setDeadband(ConfigConst.SYSTEM_PERF_NAME, absDeadband = 2.0)
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.SYSTEM_PERF_NAME, (10.0, 0.0, 50.0), now = 0))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.SYSTEM_PERF_NAME, (11.0, 0.0, 51.0), now = 1))
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.SYSTEM_PERF_NAME, (11.0, 0.0, 53.0), now = 2))
+
+	def testReset(self):
+		self.rbeFilter.setDeadband(absDeadband = 5.0)
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (20.0,), now = 0))
+		self.assertFalse(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (20.0,), now = 1))
+
+		self.rbeFilter.reset()
+
+		self.assertTrue(self.rbeFilter.isReportable(ConfigConst.TEMP_SENSOR_NAME, (20.0,), now = 2))
+		self.assertEqual(self.rbeFilter.getStats()[ConfigConst.SENT_COUNT_PROP], 1)
+
+if __name__ == "__main__":
+	unittest.main()
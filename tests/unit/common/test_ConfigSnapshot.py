@@ -0,0 +1,141 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import configparser
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigSnapshot, ConfigUtil
+
+class ConfigSnapshotTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	ConfigSnapshot and ConfigUtil reloads. It should not be considered
+	complete, but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ConfigSnapshot class...")
+
+	def setUp(self):
+		self.tmpDir = tempfile.TemporaryDirectory()
+		self.configFile = os.path.join(self.tmpDir.name, 'PiotConfig.props')
+
+	def tearDown(self):
+		self.tmpDir.cleanup()
+
+	def testTypedLookups(self):
+		configParser = configparser.ConfigParser()
+		configParser.read_string( \
+			'[ConstrainedDevice]\n' + \
+			'enableMqttClient = yes\n' + \
+			'pollCycleSecs = 5\n' + \
+			'humiditySimFloor = 35.5\n' + \
+			'deviceLocationID = %(deviceID)s-loc\n' + \
+			'deviceID = cda001\n')
+
+		snapshot = ConfigSnapshot(configParser)
+
+		self.assertTrue(snapshot.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_MQTT_CLIENT_KEY))
+		self.assertEqual(snapshot.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY), 5)
+		self.assertEqual(snapshot.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY), 5.0)
+		self.assertEqual(snapshot.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.HUMIDITY_SIM_FLOOR_KEY), 35.5)
+		self.assertEqual(snapshot.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY), 'cda001-loc')
+
+		# invalid or missing values fall back to the default
+		self.assertEqual(snapshot.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.HUMIDITY_SIM_FLOOR_KEY, 7), 7)
+		self.assertFalse(snapshot.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY))
+		self.assertIsNone(snapshot.getProperty(ConfigConst.CONSTRAINED_DEVICE, 'missing'))
+		self.assertFalse(snapshot.hasSection('Missing'))
+
+		with self.assertRaises(TypeError):
+			snapshot.properties[(ConfigConst.CONSTRAINED_DEVICE, 'pollcyclesecs')] = '10'
+
+	def testReloadSwapsSnapshot(self):
+		self._writeConfig(pollCycleSecs = 5)
+
+		configUtil = self._createConfigUtil()
+		oldSnapshot = configUtil.getConfigSnapshot()
+
+		self.assertEqual(configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY), 5)
+
+		self._writeConfig(pollCycleSecs = 10)
+
+		self.assertEqual(configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, forceReload = True), 10)
+		self.assertEqual(oldSnapshot.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY), 5)
+
+		# a failed reload keeps the last good config
+		os.remove(self.configFile)
+
+		self.assertEqual(configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, forceReload = True), 10)
+		self.assertTrue(configUtil.isConfigDataLoaded())
+
+	def testConcurrentReload(self):
+		self._writeConfig(pollCycleSecs = 5)
+
+		configUtil = self._createConfigUtil()
+		errors = []
+		stopEvent = threading.Event()
+
+		def readConfig():
+			while not stopEvent.is_set():
+				snapshot = configUtil.getConfigSnapshot()
+				pollCycles = snapshot.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY)
+				floor = snapshot.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.HUMIDITY_SIM_FLOOR_KEY)
+
+				# both values always come from the same load
+				if floor != pollCycles * 2.0:
+					errors.append((pollCycles, floor))
+
+		readers = [threading.Thread(target = readConfig) for i in range(0, 4)]
+
+		for reader in readers:
+			reader.start()
+
+		for i in range(0, 50):
+			self._writeConfig(pollCycleSecs = i + 1)
+			configUtil.getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, forceReload = True)
+
+		stopEvent.set()
+
+		for reader in readers:
+			reader.join()
+
+		self.assertEqual(errors, [])
+		self.assertEqual(configUtil.getInteger(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY), 50)
+
+	def _createConfigUtil(self) -> ConfigUtil:
+		# bypasses the Singleton so the shared instance isn't pointed at a temp file
+		configUtil = ConfigUtil.__new__(ConfigUtil)
+		configUtil.__init__(configFile = self.configFile)
+
+		return configUtil
+
+	def _writeConfig(self, pollCycleSecs: int):
+		tmpFile = self.configFile + '.tmp'
+
+		with open(tmpFile, 'w') as propsFile:
+			propsFile.write('[ConstrainedDevice]\npollCycleSecs = {}\nhumiditySimFloor = {}\n'.format(pollCycleSecs, pollCycleSecs * 2.0))
+
+		os.replace(tmpFile, self.configFile)
+
+if __name__ == "__main__":
+	unittest.main()
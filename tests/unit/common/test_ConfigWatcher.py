@@ -0,0 +1,169 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+class ConfigWatcherTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	ConfigUtil config watcher and change listeners. It should not be
+	considered complete, but serve as a starting point for the student
+	implementing additional functionality within their Programming the
+	IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ConfigUtil watcher...")
+
+	def setUp(self):
+		self.tmpDir = tempfile.TemporaryDirectory()
+		self.configFile = os.path.join(self.tmpDir.name, 'PiotConfig.props')
+		self.credFile = os.path.join(self.tmpDir.name, 'Creds.props')
+		self.mtime = 1000000000
+
+		self._writeFile(self.credFile, 'userToken = Foo\nauthToken = Bar\n')
+		self._writeConfig(floor = '18.0', ceiling = '20.0')
+
+		# bypasses the Singleton so the shared instance isn't pointed at a temp file
+		self.configUtil = ConfigUtil.__new__(ConfigUtil)
+		self.configUtil.__init__(configFile = self.configFile)
+
+		self.changes = []
+
+	def tearDown(self):
+		self.configUtil.stopConfigWatcher()
+		self.tmpDir.cleanup()
+
+	def testOnlyChangedKeysReported(self):
+		self.configUtil.addConfigListener(self._handleChange)
+		self.configUtil.addConfigListener(self._handleFilteredChange, ConfigConst.CONSTRAINED_DEVICE, \
+			[ConfigConst.TRIGGER_HVAC_TEMP_FLOOR_KEY])
+
+		self.assertFalse(self.configUtil.checkForChanges())
+
+		# rewritten with the same content - nothing to report
+		self._writeConfig(floor = '18.0', ceiling = '20.0')
+		self.configUtil.checkForChanges()
+
+		self.assertEqual(self.changes, [])
+
+		self._writeConfig(floor = '18.0', ceiling = '21.0')
+
+		self.assertTrue(self.configUtil.checkForChanges())
+		self.assertEqual(self.changes, [('all', ConfigConst.CONSTRAINED_DEVICE, {'triggerhvactempceiling'}, 21.0)])
+
+		self.changes.clear()
+		self._writeConfig(floor = '17.5', ceiling = '21.0', extraSection = True)
+		self.configUtil.checkForChanges()
+
+		self.assertIn(('filtered', ConfigConst.CONSTRAINED_DEVICE, {ConfigConst.TRIGGER_HVAC_TEMP_FLOOR_KEY}, 21.0), self.changes)
+		self.assertIn(('all', 'Rule.HvacTemp', {'ruletype'}, 21.0), self.changes)
+
+		self.configUtil.removeConfigListener(self._handleChange)
+		self.configUtil.removeConfigListener(self._handleFilteredChange)
+		self.changes.clear()
+
+		self._writeConfig(floor = '16.0', ceiling = '22.0')
+		self.configUtil.checkForChanges()
+
+		self.assertEqual(self.changes, [])
+
+	def testCredentialFileChange(self):
+		self.configUtil.addConfigListener(self._handleChange)
+
+		self.assertEqual(self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)[ConfigConst.USER_NAME_TOKEN_KEY], 'Foo')
+
+		self._writeFile(self.credFile, 'userToken = Baz\nauthToken = Bar\n')
+
+		self.assertTrue(self.configUtil.checkForChanges())
+		self.assertEqual(self.changes, [('all', ConfigConst.CONSTRAINED_DEVICE, {'credfile'}, 20.0)])
+		self.assertEqual(self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)[ConfigConst.USER_NAME_TOKEN_KEY], 'Baz')
+
+	def testCredentialCache(self):
+		with mock.patch.object(Path, 'read_text', autospec = True, side_effect = Path.read_text) as readText:
+			for i in range(0, 10):
+				creds = self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)
+
+			self.assertEqual(readText.call_count, 1)
+
+			# callers get their own copy
+			creds[ConfigConst.USER_NAME_TOKEN_KEY] = 'Changed'
+
+			self.assertEqual(self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)[ConfigConst.USER_NAME_TOKEN_KEY], 'Foo')
+
+			self.configUtil.invalidateCredentials(ConfigConst.CONSTRAINED_DEVICE)
+			self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)
+
+			self.assertEqual(readText.call_count, 2)
+
+			# a changed file (new mtime) is re-read without any explicit invalidation
+			self._writeFile(self.credFile, 'userToken = Baz\nauthToken = Bar\n')
+
+			self.assertEqual(self.configUtil.getCredentials(ConfigConst.CONSTRAINED_DEVICE)[ConfigConst.USER_NAME_TOKEN_KEY], 'Baz')
+			self.assertEqual(readText.call_count, 3)
+
+	def testWatcherThread(self):
+		changed = threading.Event()
+
+		self.configUtil.addConfigListener(lambda section, changedKeys, snapshot: changed.set())
+
+		self.assertTrue(self.configUtil.startConfigWatcher(intervalSecs = 0.1))
+		self.assertFalse(self.configUtil.startConfigWatcher(intervalSecs = 0.1))
+
+		self._writeConfig(floor = '19.0', ceiling = '20.0')
+
+		self.assertTrue(changed.wait(5.0))
+		self.assertEqual(self.configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TRIGGER_HVAC_TEMP_FLOOR_KEY), 19.0)
+
+	def _handleChange(self, section: str, changedKeys: set, snapshot):
+		ceiling = snapshot.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TRIGGER_HVAC_TEMP_CEILING_KEY)
+		self.changes.append(('all', section, changedKeys, ceiling))
+
+	def _handleFilteredChange(self, section: str, changedKeys: set, snapshot):
+		ceiling = snapshot.getFloat(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TRIGGER_HVAC_TEMP_CEILING_KEY)
+		self.changes.append(('filtered', section, changedKeys, ceiling))
+
+	def _writeConfig(self, floor: str, ceiling: str, extraSection: bool = False):
+		configData = \
+			'[ConstrainedDevice]\n' + \
+			'credFile = ' + self.credFile + '\n' + \
+			'triggerHvacTempFloor = ' + floor + '\n' + \
+			'triggerHvacTempCeiling = ' + ceiling + '\n'
+
+		if extraSection:
+			configData += '\n[Rule.HvacTemp]\nruleType = threshold\n'
+
+		self._writeFile(self.configFile, configData)
+
+	def _writeFile(self, fileName: str, data: str):
+		with open(fileName, 'w') as dataFile:
+			dataFile.write(data)
+
+		# every write gets a distinct mtime, however coarse the file system clock
+		self.mtime += 1
+		os.utime(fileName, (self.mtime, self.mtime))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,115 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import unittest
+
+from concurrent.futures import Future
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.DeviceDataManager import DeviceDataManager
+from programmingtheiot.cda.sim.BaseSensorSimTask import BaseSensorSimTask
+from programmingtheiot.common.LatencyTracer import LatencyTracer
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class LatencyTracerTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	LatencyTracer. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing LatencyTracer class...")
+
+	def setUp(self):
+		self.tracer = LatencyTracer()
+		self.tracer.resetStats()
+
+	def tearDown(self):
+		self.tracer.setEnabled(False)
+		self.tracer.resetStats()
+
+	def testDisabledByDefault(self):
+		self.assertFalse(self.tracer.isEnabled())
+
+		sensorData = SensorData()
+		sensorData.markTraceStage(ConfigConst.TRACE_STAGE_ANALYZE)
+
+		self.assertIsNone(sensorData.getTraceContext())
+		self.assertNotIn('traceContext', vars(sensorData))
+		self.assertEqual(self.tracer.getStageStats(), {})
+
+	def testStageStamps(self):
+		self.tracer.setEnabled(True)
+
+		sensorData = BaseSensorSimTask(name = 'TempSensor').generateTelemetry()
+		traceContext = sensorData.getTraceContext()
+
+		self.assertIsNotNone(traceContext)
+
+		for stage in (ConfigConst.TRACE_STAGE_ANALYZE, ConfigConst.TRACE_STAGE_ENCODE, ConfigConst.TRACE_STAGE_ENQUEUE):
+			sensorData.markTraceStage(stage)
+
+		sensorData.markTraceStage(ConfigConst.TRACE_STAGE_PUBLISH_ACK, isFinal = True)
+
+		offsets = traceContext.getStageOffsetsMillis()
+		stageStats = self.tracer.getStageStats()
+
+		self.assertEqual(list(offsets.keys()), \
+			[ConfigConst.TRACE_STAGE_GENERATE, ConfigConst.TRACE_STAGE_ANALYZE, ConfigConst.TRACE_STAGE_ENCODE, \
+			ConfigConst.TRACE_STAGE_ENQUEUE, ConfigConst.TRACE_STAGE_PUBLISH_ACK])
+		self.assertEqual(sorted(offsets.values()), list(offsets.values()))
+
+		for stage in list(offsets.keys()) + [ConfigConst.TRACE_STAGE_TOTAL]:
+			self.assertEqual(stageStats[stage][ConfigConst.COUNT_PROP], 1)
+
+	def testTraceContextNotSerialized(self):
+		self.tracer.setEnabled(True)
+
+		sensorData = SensorData()
+		jsonData = DataUtil().sensorDataToJson(sensorData)
+
+		self.assertIsNotNone(sensorData.getTraceContext())
+		self.assertNotIn('traceContext', jsonData)
+		self.assertIsNotNone(DataUtil().jsonToSensorData(jsonData))
+
+	def testDeviceDataManagerStages(self):
+		self.tracer.setEnabled(True)
+
+		ddm = DeviceDataManager()
+		ddm.mqttClient = FakeMqttClient()
+
+		ddm.handleSensorMessage(BaseSensorSimTask(name = 'TempSensor').generateTelemetry())
+
+		stageStats = self.tracer.getStageStats()
+
+		for stage in (ConfigConst.TRACE_STAGE_GENERATE, ConfigConst.TRACE_STAGE_ANALYZE, ConfigConst.TRACE_STAGE_ENCODE, \
+			ConfigConst.TRACE_STAGE_ENQUEUE, ConfigConst.TRACE_STAGE_PUBLISH_ACK, ConfigConst.TRACE_STAGE_TOTAL):
+			self.assertEqual(stageStats[stage][ConfigConst.COUNT_PROP], 1)
+
+class FakeMqttClient():
+
+	def publishMessageAsync(self, resource = None, msg: str = None, qos: int = ConfigConst.DEFAULT_QOS) -> Future:
+		future = Future()
+		future.set_result(True)
+
+		return future
+
+if __name__ == "__main__":
+	unittest.main()
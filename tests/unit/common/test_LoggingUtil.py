@@ -0,0 +1,114 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import io
+import logging
+import unittest
+
+from logging.handlers import QueueHandler
+
+from programmingtheiot.cda.sim.TemperatureSensorEmulatorTask import TemperatureSensorEmulatorTask
+from programmingtheiot.common.LoggingUtil import LoggingUtil, RateLimitedLogger
+
+class LoggingUtilTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	LoggingUtil. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing LoggingUtil class...")
+
+	def setUp(self):
+		self.rootLevel = logging.getLogger().level
+		self.stream = io.StringIO()
+
+	def tearDown(self):
+		LoggingUtil().stopLogging()
+		logging.getLogger().setLevel(self.rootLevel)
+
+	def testRateLimitedLogger(self):
+		rateLimitedLogger = RateLimitedLogger('test.rateLimited', intervalSecs = 60.0)
+		rateLimitedLogger.logger.propagate = False
+		rateLimitedLogger.logger.setLevel(logging.INFO)
+
+		handler = logging.StreamHandler(self.stream)
+		rateLimitedLogger.logger.addHandler(handler)
+
+		try:
+			for i in range(0, 100):
+				rateLimitedLogger.info("Reading: %d", i)
+
+			self.assertEqual(self.stream.getvalue().splitlines(), ['Reading: 0'])
+			self.assertEqual(rateLimitedLogger.getSuppressedCount(), 99)
+
+			# disabled levels are neither emitted nor counted
+			rateLimitedLogger.debug("Reading: %d", 100)
+
+			self.assertEqual(rateLimitedLogger.getSuppressedCount(), 99)
+
+			rateLimitedLogger.setInterval(0)
+			rateLimitedLogger.info("Reading: %d", 101)
+
+			self.assertEqual(self.stream.getvalue().splitlines()[-1], 'Reading: 101 (99 similar messages suppressed)')
+			self.assertEqual(rateLimitedLogger.getSuppressedCount(), 0)
+		finally:
+			rateLimitedLogger.logger.removeHandler(handler)
+
+	def testAsyncLogging(self):
+		self.assertTrue(LoggingUtil().configureLogging(stream = self.stream, enableAsync = True))
+		self.assertTrue(any(isinstance(h, QueueHandler) for h in logging.getLogger().handlers))
+
+		logging.warning("Queued message")
+
+		# stopping the listener flushes the queue
+		LoggingUtil().stopLogging()
+
+		self.assertIn("Queued message", self.stream.getvalue())
+		self.assertFalse(any(isinstance(h, QueueHandler) for h in logging.getLogger().handlers))
+
+	def testConfigDrivenLevels(self):
+		self.assertFalse(LoggingUtil().configureLogging(stream = self.stream, enableAsync = False))
+
+		# no config file is loaded in the unit tests, so the defaults apply
+		self.assertEqual(logging.getLogger().level, logging.INFO)
+		self.assertEqual( \
+			LoggingUtil()._parseModuleLogLevels('paho.mqtt = WARNING, programmingtheiot.cda.sim=debug, bogus'), \
+			{'paho.mqtt': logging.WARNING, 'programmingtheiot.cda.sim': logging.DEBUG})
+
+	def testSensorReadingsRateLimited(self):
+		task = TemperatureSensorEmulatorTask()
+
+		self.assertIs(task.readingLogger, LoggingUtil().getRateLimitedLogger(TemperatureSensorEmulatorTask.__module__))
+
+		# disabled levels aren't counted, so make sure the readings (at INFO) are enabled
+		logger = task.readingLogger.logger
+		loggerLevel = logger.level
+		logger.setLevel(logging.DEBUG)
+
+		try:
+			suppressedCount = task.readingLogger.getSuppressedCount()
+
+			for i in range(0, 10):
+				task.generateTelemetry()
+
+			self.assertGreaterEqual(task.readingLogger.getSuppressedCount(), suppressedCount + 9)
+		finally:
+			logger.setLevel(loggerLevel)
+
+if __name__ == "__main__":
+	unittest.main()
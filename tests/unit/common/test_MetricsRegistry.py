@@ -0,0 +1,151 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.MetricsRegistry import Histogram, MetricsRegistry
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class MetricsRegistryTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MetricsRegistry. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MetricsRegistry class...")
+
+	def setUp(self):
+		self.registry = MetricsRegistry()
+
+	def tearDown(self):
+		self.registry.stopHttpEndpoint()
+		self.registry.stopFileExport()
+
+	def testCounterAcrossThreads(self):
+		counter = self.registry.counter('test_counter_total', 'Test counter')
+
+		self.assertIs(self.registry.counter('test_counter_total'), counter)
+
+		def incrementCounter():
+			for i in range(0, 10000):
+				counter.inc()
+
+		threads = [threading.Thread(target = incrementCounter) for i in range(0, 4)]
+
+		for thread in threads:
+			thread.start()
+
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(counter.getValue(), 40000)
+
+	def testGauge(self):
+		gauge = self.registry.gauge('test_gauge')
+		gauge.set(5)
+		gauge.inc()
+
+		self.assertEqual(gauge.getValue(), 6)
+
+		gauge.setFunction(lambda: 42)
+
+		self.assertEqual(gauge.getValue(), 42)
+
+	def testHistogramAccuracy(self):
+		histogram = Histogram('test_histogram')
+
+		# 90 x 1 ms, 9 x 10 ms, 1 x 100 ms (in microseconds)
+		for value in [1000] * 90 + [10000] * 9 + [100000]:
+			histogram.record(value)
+
+		stats = histogram.getStats()
+
+		self.assertEqual(stats[ConfigConst.COUNT_PROP], 100)
+		self.assertEqual(stats[ConfigConst.MIN_PROP], 1000)
+		self.assertEqual(stats[ConfigConst.MAX_PROP], 100000)
+		self.assertAlmostEqual(stats[ConfigConst.MEAN_PROP], 2800)
+
+		# within the bucket resolution (1/16)
+		self.assertAlmostEqual(stats[ConfigConst.P50_PROP], 1000, delta = 1000 / 16)
+		self.assertAlmostEqual(stats[ConfigConst.P90_PROP], 1000, delta = 1000 / 16)
+		self.assertAlmostEqual(stats[ConfigConst.P99_PROP], 10000, delta = 10000 / 16)
+
+		# small values are exact
+		histogram.reset()
+		histogram.record(7)
+
+		self.assertEqual(histogram.getStats()[ConfigConst.P99_PROP], 7)
+
+	def testTypeConflict(self):
+		self.registry.counter('test_conflict')
+
+		with self.assertRaises(ValueError):
+			self.registry.gauge('test_conflict')
+
+	def testPrometheusText(self):
+		self.registry.counter('test_prom_total', 'Messages "sent"', {'type': 'sensor'}).inc(3)
+		self.registry.histogram('test_prom_micros', 'Latency').record(100)
+
+		text = self.registry.toPrometheusText()
+
+		self.assertIn('# TYPE test_prom_total counter', text)
+		self.assertIn('test_prom_total{type="sensor"} 3', text)
+		self.assertIn('# TYPE test_prom_micros summary', text)
+		self.assertIn('test_prom_micros{quantile="0.99"} ', text)
+		self.assertIn('test_prom_micros_count 1', text)
+
+	def testJsonFileExport(self):
+		self.registry.counter('test_file_total').inc()
+
+		with tempfile.TemporaryDirectory() as tmpDir:
+			filePath = os.path.join(tmpDir, 'metrics.json')
+
+			self.assertTrue(self.registry.writeSnapshot(filePath))
+
+			with open(filePath) as snapshotFile:
+				snapshot = json.load(snapshotFile)
+
+		samples = snapshot['test_file_total'][ConfigConst.METRIC_SAMPLES_PROP]
+
+		self.assertEqual(samples[0][ConfigConst.VALUE_PROP], 1)
+
+	def testHttpEndpointAndDataUtil(self):
+		DataUtil().sensorDataToJson(SensorData())
+
+		port = self.registry.startHttpEndpoint(port = 0)
+
+		with urllib.request.urlopen('http://127.0.0.1:{}/metrics'.format(port), timeout = 5) as response:
+			text = response.read().decode('utf-8')
+
+		with urllib.request.urlopen('http://127.0.0.1:{}/metrics.json'.format(port), timeout = 5) as response:
+			snapshot = json.loads(response.read())
+
+		self.assertIn(ConfigConst.DATA_ENCODED_METRIC, text)
+		self.assertGreaterEqual(snapshot[ConfigConst.DATA_ENCODE_MICROS_METRIC][ConfigConst.METRIC_SAMPLES_PROP][0][ConfigConst.VALUE_PROP][ConfigConst.COUNT_PROP], 1)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,57 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class ResourceNameEnumTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	ResourceNameEnum. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ResourceNameEnum class...")
+
+	def testGetResourceNameByValue(self):
+		for resource in ResourceNameEnum:
+			self.assertIs(ResourceNameEnum.getResourceNameByValue(resource.value), resource)
+
+		# the enum name still works, and so does calling it on a member
+		self.assertIs( \
+			ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.getResourceNameByValue('CDA_ACTUATOR_CMD_RESOURCE'), \
+			ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE)
+		self.assertIsNone(ResourceNameEnum.getResourceNameByValue('PIOT/ConstrainedDevice/Unknown'))
+
+	def testParseResourcePath(self):
+		self.assertEqual( \
+			ResourceNameEnum.parseResourcePath(ConfigConst.CDA_SENSOR_DATA_MSG_RESOURCE), \
+			(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, None))
+		self.assertEqual( \
+			ResourceNameEnum.parseResourcePath('/' + ConfigConst.CDA_ACTUATOR_CMD_MSG_RESOURCE + '/HvacActuator/'), \
+			(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, 'HvacActuator'))
+
+		for path in [None, '', 'PIOT', 'PIOT/ConstrainedDevice', 'PIOT/ConstrainedDevice/Unknown/dev1', \
+			'PIOT/ConstrainedDevice/+', ConfigConst.CDA_SENSOR_DATA_MSG_RESOURCE + '/#']:
+			self.assertEqual(ResourceNameEnum.parseResourcePath(path), (None, None), path)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,95 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import os
+import threading
+import time
+import unittest
+
+from programmingtheiot.common.Singleton import Singleton
+
+class SlowSingleton(metaclass = Singleton):
+	initCount = 0
+
+	def __init__(self):
+		# widens the window for a racing second constructor call
+		time.sleep(0.05)
+		SlowSingleton.initCount += 1
+		self.pid = os.getpid()
+
+class InheritedSingleton(metaclass = Singleton, resetAfterFork = False):
+	def __init__(self):
+		self.pid = os.getpid()
+
+class SingletonTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	Singleton. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing Singleton class...")
+
+	def testConcurrentFirstAccess(self):
+		instances = []
+		barrier = threading.Barrier(8)
+
+		def getInstance():
+			barrier.wait()
+			instances.append(SlowSingleton())
+
+		threads = [threading.Thread(target = getInstance) for i in range(0, 8)]
+
+		for thread in threads:
+			thread.start()
+
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(len(instances), 8)
+		self.assertTrue(all(instance is instances[0] for instance in instances))
+		self.assertEqual(SlowSingleton.initCount, 1)
+
+	@unittest.skipUnless(hasattr(os, 'fork'), "os.fork() not available")
+	def testResetAfterFork(self):
+		parentInstance = SlowSingleton()
+		inheritedInstance = InheritedSingleton()
+
+		readFd, writeFd = os.pipe()
+		pid = os.fork()
+
+		if pid == 0:
+			# child - report back, then exit without running the test runner's cleanup
+			try:
+				result = '{},{}'.format(SlowSingleton().pid == os.getpid(), InheritedSingleton() is inheritedInstance)
+				os.write(writeFd, result.encode())
+			finally:
+				os._exit(0)
+
+		os.close(writeFd)
+
+		with os.fdopen(readFd) as resultFile:
+			result = resultFile.read()
+
+		os.waitpid(pid, 0)
+
+		self.assertEqual(result, 'True,True')
+		self.assertIs(SlowSingleton(), parentInstance)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,70 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import io
+import logging
+import unittest
+
+from programmingtheiot.cda.connection.CoapClientConnector import BlockReader
+from programmingtheiot.cda.connection.handlers.BlockwiseResource import blockSizeToBytes, getBlockSizeExp
+
+class BlockwiseResourceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	block-wise transfer helpers (block size exponents and BlockReader).
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing BlockwiseResource helpers...")
+
+	def testBlockSizeExp(self):
+		self.assertEqual(getBlockSizeExp(1024), 6)
+		self.assertEqual(getBlockSizeExp(16), 0)
+
+		# rounded down to a power of two, and clamped to 16 - 1024
+		self.assertEqual(getBlockSizeExp(1000), 5)
+		self.assertEqual(getBlockSizeExp(4096), 6)
+		self.assertEqual(getBlockSizeExp(1), 0)
+
+		for blockSizeExp in range(0, 7):
+			self.assertEqual(getBlockSizeExp(blockSizeToBytes(blockSizeExp)), blockSizeExp)
+
+	def testReadFromBytes(self):
+		blockReader = BlockReader(bytes(range(0, 100)))
+
+		self.assertEqual(blockReader.size, 100)
+		self.assertEqual(blockReader.read(64), (bytes(range(0, 64)), True))
+		self.assertEqual(blockReader.read(32), (bytes(range(64, 96)), True))
+		self.assertEqual(blockReader.read(32), (bytes(range(96, 100)), False))
+		self.assertEqual(blockReader.offset, 100)
+
+	def testReadFromFile(self):
+		blockReader = BlockReader(io.BytesIO(bytes(range(0, 96))))
+
+		self.assertIsNone(blockReader.size)
+		self.assertEqual(blockReader.read(64), (bytes(range(0, 64)), True))
+
+		# the last block is a full one - only known to be the last from the end of the file
+		self.assertEqual(blockReader.read(32), (bytes(range(64, 96)), False))
+		self.assertEqual(blockReader.offset, 96)
+
+	def testReadEmpty(self):
+		self.assertEqual(BlockReader(b'').read(16), (b'', False))
+		self.assertEqual(BlockReader(io.BytesIO()).read(16), (b'', False))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,102 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+import unittest
+
+from aiocoap import Message, ContentFormat, GET
+from aiocoap.numbers.codes import Code
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class CoalescingObservableResourceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	CoalescingObservableResource (via GetTelemetryResourceHandler).
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing CoalescingObservableResource class...")
+
+	def setUp(self):
+		self.handler = GetTelemetryResourceHandler(minIntervalSecs = 0.0, maxAgeSecs = 10)
+
+	def testGetBeforeUpdate(self):
+		self.assertEqual(self._get().code, Code.NOT_FOUND)
+
+	def testEncodedOncePerUpdate(self):
+		sensorData = self._createSensorData(20.0)
+		self.handler.onSensorDataUpdate(sensorData)
+
+		responses = [self._get() for i in range(0, 5)]
+
+		self.assertEqual(self.handler.getStats()[ConfigConst.ENCODE_COUNT_PROP], 1)
+		self.assertEqual(responses[0].payload.decode('utf-8'), DataUtil().sensorDataToJson(sensorData))
+		self.assertEqual(responses[0].opt.content_format, ContentFormat.JSON)
+		self.assertEqual(responses[0].opt.max_age, 10)
+		self.assertTrue(all(response.opt.etag == responses[0].opt.etag for response in responses))
+
+		# each content format is cached separately
+		self.assertEqual(self._get(accept = ContentFormat.TEXT).opt.content_format, ContentFormat.TEXT)
+		self.assertEqual(self._get(accept = ContentFormat.CBOR).code, Code.NOT_ACCEPTABLE)
+		self.assertEqual(self.handler.getStats()[ConfigConst.ENCODE_COUNT_PROP], 2)
+
+		# an update invalidates the cached payloads
+		self.handler.onSensorDataUpdate(self._createSensorData(21.0))
+
+		self.assertNotEqual(self._get().opt.etag, responses[0].opt.etag)
+		self.assertEqual(self.handler.getStats()[ConfigConst.ENCODE_COUNT_PROP], 3)
+
+	def testEtagRevalidation(self):
+		self.handler.onSensorDataUpdate(self._createSensorData(20.0))
+
+		etag = self._get().opt.etag
+		response = self._get(etags = (etag,))
+
+		self.assertEqual(response.code, Code.VALID)
+		self.assertEqual(response.payload, b'')
+		self.assertEqual(response.opt.etag, etag)
+
+		self.handler.onSensorDataUpdate(self._createSensorData(22.0))
+
+		# the server fills in 2.05 Content when no code is set
+		response = self._get(etags = (etag,))
+
+		self.assertIsNone(response.code)
+		self.assertNotEqual(response.payload, b'')
+
+	def _createSensorData(self, value: float) -> SensorData:
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(value)
+
+		return sensorData
+
+	def _get(self, accept: ContentFormat = None, etags: tuple = ()) -> Message:
+		request = Message(code = GET, etags = etags)
+
+		if accept is not None:
+			request.opt.accept = accept
+
+		return asyncio.run(self.handler.render_get(request))
+
+if __name__ == "__main__":
+	unittest.main()
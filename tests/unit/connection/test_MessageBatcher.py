@@ -0,0 +1,126 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import json
+import logging
+import unittest
+
+from time import sleep
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MessageBatcher import MessageBatcher
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class MessageBatcherTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MessageBatcher. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+	
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MessageBatcher class...")
+		
+	def setUp(self):
+		self.flushed = []
+		
+	def tearDown(self):
+		pass
+	
+	def testFlushOnMaxCount(self):
+		batcher = MessageBatcher(flushCallback = self._onFlush, maxCount = 3, maxBytes = 100000, maxLingerMillis = 60000)
+		
+		for i in range(0, 7):
+			batcher.addMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, json.dumps({'value': i}))
+		
+		self.assertEqual(len(self.flushed), 2)
+		self.assertEqual(self.flushed[0][2], 3)
+		self.assertEqual(batcher.getPendingCount(), 1)
+		
+		batcher.flushAll()
+		
+		self.assertEqual(len(self.flushed), 3)
+		self.assertEqual(batcher.getStats()[ConfigConst.MESSAGE_COUNT_PROP], 7)
+		self.assertEqual([json.loads(m)['value'] for m in MessageBatcher.unbatchPayload(self.flushed[0][1])], [0, 1, 2])
+	
+	def testFlushOnMaxBytes(self):
+		msg = json.dumps({'value': 1.0})
+		batcher = MessageBatcher(flushCallback = self._onFlush, maxCount = 1000, maxBytes = len(msg) * 3 + 4, maxLingerMillis = 60000)
+		
+		for i in range(0, 4):
+			batcher.addMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg)
+		
+		self.assertEqual(len(self.flushed), 1)
+		self.assertLessEqual(len(self.flushed[0][1]), batcher.maxBytes)
+		self.assertEqual(self.flushed[0][2], 3)
+	
+	def testFlushOnMaxLinger(self):
+		batcher = MessageBatcher(flushCallback = self._onFlush, maxCount = 1000, maxBytes = 100000, maxLingerMillis = 100)
+		batcher.startBatcher()
+		
+		batcher.addMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, json.dumps({'value': 1.0}))
+		batcher.addMessage(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, json.dumps({'cpuUtil': 1.0}))
+		
+		self.assertEqual(len(self.flushed), 0)
+		
+		sleep(0.5)
+		
+		self.assertEqual(len(self.flushed), 2)
+		self.assertEqual(set(f[0] for f in self.flushed), \
+			set([ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE]))
+		
+		batcher.stopBatcher()
+	
+	def testStopFlushesPending(self):
+		batcher = MessageBatcher(flushCallback = self._onFlush, maxCount = 1000, maxBytes = 100000, maxLingerMillis = 60000)
+		batcher.startBatcher()
+		batcher.addMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, json.dumps({'value': 1.0}))
+		batcher.stopBatcher()
+		
+		self.assertEqual(len(self.flushed), 1)
+	
+	def testUnbatchSensorData(self):
+		dataUtil = DataUtil()
+		msgs = []
+		
+		for i in range(0, 3):
+			sd = SensorData()
+			sd.setValue(float(i))
+			msgs.append(dataUtil.sensorDataToJson(sd))
+		
+		payload = MessageBatcher.createBatchPayload(msgs)
+		
+		self.assertTrue(MessageBatcher.isBatchPayload(payload))
+		self.assertTrue(MessageBatcher.isBatchPayload(payload.encode('utf-8')))
+		self.assertFalse(MessageBatcher.isBatchPayload(msgs[0]))
+		
+		unbatched = MessageBatcher.unbatchPayload(payload)
+		
+		self.assertEqual(len(unbatched), 3)
+		self.assertEqual(dataUtil.jsonToSensorData(unbatched[2]).getValue(), 2.0)
+		
+		self.assertEqual(MessageBatcher.unbatchPayload(msgs[0]), [msgs[0]])
+		self.assertEqual(MessageBatcher.unbatchPayload('[not json'), [])
+		self.assertEqual(MessageBatcher.unbatchPayload(None), [])
+	
+	def _onFlush(self, resource: ResourceNameEnum, payload: str, count: int):
+		self.flushed.append((resource, payload, count))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,235 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MessageOutbox import MessageOutbox
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class FakeConnector():
+	"""
+	Records every message 'sent', and can be set to fail to simulate a
+	broken uplink.
+
+	"""
+
+	def __init__(self):
+		self.isConnected = True
+		self.sentMsgs = []
+
+	def sendMessage(self, resource: ResourceNameEnum, msg: str) -> bool:
+		if not self.isConnected:
+			return False
+
+		self.sentMsgs.append((resource, msg))
+
+		return True
+
+class MessageOutboxTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MessageOutbox. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MessageOutbox class...")
+
+	def setUp(self):
+		self.outboxPath = tempfile.mkdtemp(prefix = 'cda-outbox-')
+		self.connector = FakeConnector()
+
+	def tearDown(self):
+		shutil.rmtree(self.outboxPath, ignore_errors = True)
+
+	def testStoreAndReplay(self):
+		outbox = self._createOutbox()
+
+		for i in range(0, 10):
+			self.assertTrue(outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i)))
+
+		self.assertEqual(outbox.getPendingCount(), 10)
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage), 10)
+		self.assertEqual(outbox.getPendingCount(), 0)
+
+		self.assertEqual([msg for _, msg in self.connector.sentMsgs], [self._createMsg(i) for i in range(0, 10)])
+		self.assertEqual(self.connector.sentMsgs[0][0], ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		outbox.close()
+
+	def testReplayStopsWhenUplinkDown(self):
+		outbox = self._createOutbox()
+
+		for i in range(0, 5):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		self.connector.isConnected = False
+
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage), 0)
+		self.assertEqual(outbox.getPendingCount(), 5)
+
+		self.connector.isConnected = True
+
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage, maxCount = 2), 2)
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage), 3)
+		self.assertEqual(len(self.connector.sentMsgs), 5)
+
+		outbox.close()
+
+	def testReplayResumesAfterRestart(self):
+		outbox = self._createOutbox(segmentMaxBytes = 200)
+
+		for i in range(0, 20):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		outbox.replayMessages(self.connector.sendMessage, maxCount = 7)
+		outbox.close()
+
+		# reopening picks up from the persisted cursor, not from the start
+		outbox = self._createOutbox(segmentMaxBytes = 200)
+
+		self.assertEqual(outbox.getPendingCount(), 13)
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage), 13)
+		self.assertEqual([msg for _, msg in self.connector.sentMsgs], [self._createMsg(i) for i in range(0, 20)])
+
+		outbox.close()
+
+	def testTornTailIsTruncated(self):
+		outbox = self._createOutbox()
+
+		for i in range(0, 3):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		outbox.close()
+
+		# simulate a crash part way through writing a record
+		segFileName = [f for f in os.listdir(self.outboxPath) if f.endswith(MessageOutbox.SEGMENT_SUFFIX)][0]
+
+		with open(os.path.join(self.outboxPath, segFileName), 'ab') as segFile:
+			segFile.write(MessageOutbox.RECORD_HEADER.pack(100, 0) + b'partial')
+
+		outbox = self._createOutbox()
+
+		self.assertEqual(outbox.getPendingCount(), 3)
+
+		outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(3))
+
+		self.assertEqual(outbox.replayMessages(self.connector.sendMessage), 4)
+
+		outbox.close()
+
+	def testOldestFirstEviction(self):
+		outbox = self._createOutbox(maxBytes = 1000, segmentMaxBytes = 200)
+
+		for i in range(0, 100):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		stats = outbox.getStats()
+
+		self.assertLessEqual(stats[ConfigConst.PENDING_BYTES_PROP], 1000)
+		self.assertGreater(stats[ConfigConst.EVICTED_COUNT_PROP], 0)
+		self.assertEqual(stats[ConfigConst.EVICTED_COUNT_PROP] + stats[ConfigConst.PENDING_COUNT_PROP], 100)
+
+		outbox.replayMessages(self.connector.sendMessage)
+
+		# the newest messages survive
+		self.assertEqual(self.connector.sentMsgs[-1][1], self._createMsg(99))
+
+		outbox.close()
+
+	def testRateLimitedReplayThread(self):
+		outbox = self._createOutbox(replayRatePerSec = 20.0)
+
+		for i in range(0, 100):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		outbox.startReplay(self.connector.sendMessage)
+		time.sleep(1.0)
+		outbox.stopReplay()
+
+		# about 20 in one second - never the whole backlog
+		self.assertGreater(len(self.connector.sentMsgs), 0)
+		self.assertLessEqual(len(self.connector.sentMsgs), 25)
+
+		outbox.close()
+
+	def testSlowReplayRate(self):
+		outbox = self._createOutbox(replayRatePerSec = 0.9)
+
+		for i in range(0, 10):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		outbox.startReplay(self.connector.sendMessage)
+		time.sleep(1.5)
+		outbox.stopReplay()
+
+		# less than one per second still replays, one at a time
+		self.assertEqual(len(self.connector.sentMsgs), 1)
+
+		outbox.close()
+
+	def testStoreWhileReplaying(self):
+		outbox = self._createOutbox()
+
+		for i in range(0, 5):
+			outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(i))
+
+		sendingEvent = threading.Event()
+		releaseEvent = threading.Event()
+
+		def sendSlowly(resource: ResourceNameEnum, msg: str) -> bool:
+			sendingEvent.set()
+			releaseEvent.wait(2.0)
+
+			return self.connector.sendMessage(resource, msg)
+
+		replayThread = threading.Thread(target = outbox.replayMessages, args = (sendSlowly,))
+		replayThread.start()
+
+		self.assertTrue(sendingEvent.wait(1.0))
+
+		# a slow uplink doesn't block new messages
+		startTime = time.monotonic()
+		self.assertTrue(outbox.storeMessage(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createMsg(5)))
+		self.assertLess(time.monotonic() - startTime, 1.0)
+
+		releaseEvent.set()
+		replayThread.join()
+
+		# the new message was picked up by the same replay
+		self.assertEqual([msg for _, msg in self.connector.sentMsgs], [self._createMsg(i) for i in range(0, 6)])
+		self.assertEqual(outbox.getPendingCount(), 0)
+
+		outbox.close()
+
+	def _createOutbox(self, maxBytes: int = 1048576, segmentMaxBytes: int = 4096, replayRatePerSec: float = 0.0) -> MessageOutbox:
+		return MessageOutbox( \
+			outboxPath = self.outboxPath, maxBytes = maxBytes, segmentMaxBytes = segmentMaxBytes, \
+			fsyncPolicy = MessageOutbox.FSYNC_NEVER, replayRatePerSec = replayRatePerSec, retryIntervalSecs = 0.1)
+
+	def _createMsg(self, i: int) -> str:
+		return '{"name": "TempSensor", "value": ' + str(i) + '}'
+
+if __name__ == "__main__":
+	unittest.main()
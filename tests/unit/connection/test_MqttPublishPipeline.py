@@ -0,0 +1,217 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import threading
+import time
+import unittest
+
+import paho.mqtt.client as mqttClient
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MqttPublishPipeline import MqttPublishPipeline
+
+class FakePahoClient():
+	"""
+	Stands in for the paho client: records each publish and hands out message
+	IDs. If 'pipeline' is set, every publish is acked before publish() returns,
+	the same as a fast broker racing the sender thread. If 'onPublishCall' is
+	set, it's called during each publish.
+
+	"""
+
+	def __init__(self):
+		self.published = []
+		self.nextMid = 1
+		self.pipeline = None
+		self.onPublishCall = None
+		self.lock = threading.Lock()
+
+	def publish(self, topic: str, payload = None, qos: int = 0) -> mqttClient.MQTTMessageInfo:
+		with self.lock:
+			msgInfo = mqttClient.MQTTMessageInfo(self.nextMid)
+			msgInfo.rc = mqttClient.MQTT_ERR_SUCCESS
+
+			self.nextMid += 1
+			self.published.append((msgInfo.mid, topic, payload, qos))
+
+		if self.onPublishCall:
+			self.onPublishCall()
+
+		if self.pipeline:
+			self.pipeline.onPublish(msgInfo.mid)
+
+		return msgInfo
+
+class MqttPublishPipelineTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MqttPublishPipeline. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttPublishPipeline class...")
+
+	def setUp(self):
+		self.client = FakePahoClient()
+
+	def tearDown(self):
+		pass
+
+	def testInflightWindow(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 2, maxQueueSize = 10)
+		pipeline.startPipeline()
+		pipeline.setConnected(True)
+
+		futures = [pipeline.publish('PIOT/Test', 'msg' + str(i), 1) for i in range(0, 5)]
+
+		self._waitFor(lambda: len(self.client.published) == 2)
+		time.sleep(0.05)
+
+		# nothing more goes out until something is acked
+		self.assertEqual(len(self.client.published), 2)
+		self.assertEqual(pipeline.getInflightCount(), 2)
+
+		pipeline.onPublish(self.client.published[0][0])
+
+		self.assertTrue(futures[0].result(timeout = 1))
+		self._waitFor(lambda: len(self.client.published) == 3)
+
+		for mid in range(2, 6):
+			self._waitFor(lambda: len(self.client.published) >= mid)
+			pipeline.onPublish(mid)
+
+		self.assertTrue(pipeline.flush(timeout = 1))
+		self.assertEqual([future.result() for future in futures], [True] * 5)
+		self.assertEqual(pipeline.getStats()[ConfigConst.ACKED_COUNT_PROP], 5)
+
+		pipeline.stopPipeline()
+
+	def testEarlyAck(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 1, maxQueueSize = 100)
+		self.client.pipeline = pipeline
+
+		pipeline.startPipeline()
+		pipeline.setConnected(True)
+
+		futures = [pipeline.publish('PIOT/Test', 'msg' + str(i), 2) for i in range(0, 50)]
+
+		self.assertTrue(pipeline.flush(timeout = 1))
+		self.assertTrue(all(future.result() for future in futures))
+		self.assertEqual(pipeline.getInflightCount(), 0)
+
+		pipeline.stopPipeline()
+
+	def testStaleAckIgnored(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 5, maxQueueSize = 10)
+		pipeline.startPipeline()
+		pipeline.setConnected(True)
+
+		# e.g. paho resending a message from before a reconnect
+		pipeline.onPublish(1)
+
+		self.assertEqual(len(pipeline.earlyAcks), 0)
+
+		# the next publish gets the same mid, and must wait for its own ack
+		future = pipeline.publish('PIOT/Test', 'msg', 1)
+
+		self._waitFor(lambda: len(self.client.published) == 1)
+		time.sleep(0.05)
+
+		self.assertEqual(self.client.published[0][0], 1)
+		self.assertFalse(future.done())
+
+		pipeline.onPublish(1)
+
+		self.assertTrue(future.result(timeout = 1))
+		self.assertEqual(len(pipeline.earlyAcks), 0)
+
+		pipeline.stopPipeline()
+
+	def testQueueFullAndStop(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 1, maxQueueSize = 2)
+		pipeline.startPipeline()
+
+		# not connected, so everything stays queued
+		futures = [pipeline.publish('PIOT/Test', 'msg' + str(i), 1) for i in range(0, 3)]
+
+		self.assertFalse(futures[2].result(timeout = 1))
+
+		pipeline.stopPipeline()
+
+		self.assertEqual([future.result(timeout = 1) for future in futures], [False] * 3)
+		self.assertEqual(len(self.client.published), 0)
+		self.assertEqual(pipeline.getStats()[ConfigConst.FAILED_COUNT_PROP], 3)
+
+	def testDisconnectFailsPending(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 5, maxQueueSize = 10)
+		pipeline.startPipeline()
+		pipeline.setConnected(True)
+
+		future = pipeline.publish('PIOT/Test', 'msg', 1)
+
+		self._waitFor(lambda: len(self.client.published) == 1)
+		time.sleep(0.05)
+
+		pipeline.setConnected(False)
+
+		self.assertFalse(future.result(timeout = 1))
+		self.assertEqual(pipeline.getInflightCount(), 0)
+
+		pipeline.stopPipeline()
+
+	def testDisconnectDuringPublish(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 5, maxQueueSize = 10)
+
+		# the connection drops before publish() returns the mid to the sender
+		self.client.onPublishCall = lambda: pipeline.setConnected(False)
+
+		pipeline.startPipeline()
+		pipeline.setConnected(True)
+
+		future = pipeline.publish('PIOT/Test', 'msg', 1)
+
+		self.assertFalse(future.result(timeout = 1))
+		self.assertEqual(pipeline.getInflightCount(), 0)
+		self.assertEqual(len(pipeline.pending), 0)
+
+		pipeline.stopPipeline()
+
+	def testFlushWhileDisconnected(self):
+		pipeline = MqttPublishPipeline(self.client, maxInflight = 1, maxQueueSize = 10)
+		pipeline.startPipeline()
+
+		future = pipeline.publish('PIOT/Test', 'msg', 1)
+		startTime = time.monotonic()
+
+		# can't drain until reconnected, so there's no point waiting out the timeout
+		self.assertFalse(pipeline.flush(timeout = 5))
+		self.assertLess(time.monotonic() - startTime, 1)
+		self.assertFalse(future.done())
+
+		pipeline.stopPipeline()
+
+	def _waitFor(self, predicate, timeout: float = 1.0):
+		deadline = time.monotonic() + timeout
+
+		while not predicate():
+			self.assertLess(time.monotonic(), deadline)
+			time.sleep(0.001)
+
+if __name__ == "__main__":
+	unittest.main()
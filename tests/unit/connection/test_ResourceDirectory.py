@@ -0,0 +1,97 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.ResourceDirectory import ResourceDirectory
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class ResourceDirectoryTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	ResourceDirectory. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	LINK_FORMAT = \
+		'</.well-known/core>;ct=40,' + \
+		'</PIOT/ConstrainedDevice/SensorMsg/TempSensor>;obs;rt="sensor";if="core.s",' + \
+		'</PIOT/ConstrainedDevice/ActuatorCmd>;title="Actuator, command";ct=50,' + \
+		'<coap://127.0.0.1:5683/PIOT/ConstrainedDevice/SystemPerfMsg/SystemPerfMsg>,' + \
+		'</unknown/path>;sz=1024'
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing ResourceDirectory class...")
+
+	def testParseLinkFormat(self):
+		resources = ResourceDirectory.parseLinkFormat(self.LINK_FORMAT)
+
+		self.assertEqual(len(resources), 5)
+		self.assertEqual(resources[ConfigConst.WELL_KNOWN_CORE_PATH], {'ct': '40'})
+		self.assertEqual(resources['PIOT/ConstrainedDevice/SensorMsg/TempSensor'], {'obs': True, 'rt': 'sensor', 'if': 'core.s'})
+
+		# quoted values may contain ','
+		self.assertEqual(resources['PIOT/ConstrainedDevice/ActuatorCmd'], {'title': 'Actuator, command', 'ct': '50'})
+
+		# absolute URIs are reduced to their path
+		self.assertEqual(resources['PIOT/ConstrainedDevice/SystemPerfMsg/SystemPerfMsg'], {})
+
+		self.assertEqual(ResourceDirectory.parseLinkFormat(None), {})
+		self.assertEqual(ResourceDirectory.parseLinkFormat(''), {})
+
+	def testLookupResource(self):
+		resourceDirectory = ResourceDirectory(ttlSecs = 60)
+
+		self.assertIsNone(resourceDirectory.lookupResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE))
+		self.assertEqual(resourceDirectory.update(self.LINK_FORMAT), 5)
+
+		self.assertEqual(resourceDirectory.lookupResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE)['ct'], '50')
+		self.assertTrue(resourceDirectory.lookupResource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME)['obs'])
+		self.assertIsNone(resourceDirectory.lookupResource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.HUMIDITY_SENSOR_NAME))
+
+		self.assertEqual(resourceDirectory.getResourceNames(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE), [ConfigConst.TEMP_SENSOR_NAME])
+		self.assertEqual(resourceDirectory.getResourceNames(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE), [None])
+
+		# unknown paths are still listed
+		self.assertIn('unknown/path', resourceDirectory.getResources())
+
+	def testTtl(self):
+		resourceDirectory = ResourceDirectory(ttlSecs = 0.1)
+
+		self.assertFalse(resourceDirectory.isValid())
+
+		resourceDirectory.update(self.LINK_FORMAT)
+
+		self.assertTrue(resourceDirectory.isValid())
+		self.assertLessEqual(resourceDirectory.getTimeToExpiry(), 0.1)
+
+		time.sleep(0.15)
+
+		# expired, but still there until replaced
+		self.assertFalse(resourceDirectory.isValid())
+		self.assertIsNotNone(resourceDirectory.lookupResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE))
+
+		resourceDirectory.clear()
+
+		self.assertIsNone(resourceDirectory.lookupResource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE))
+		self.assertEqual(len(resourceDirectory.getResources()), 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,148 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import unittest
+
+from paho.mqtt.client import MQTTMessage
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from programmingtheiot.cda.connection.TopicTrie import TopicTrie
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class TopicTrieTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	TopicTrie. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing TopicTrie class...")
+
+	def setUp(self):
+		self.topicTrie = TopicTrie()
+
+	def tearDown(self):
+		pass
+
+	def testExactMatch(self):
+		self.assertTrue(self.topicTrie.subscribe('PIOT/ConstrainedDevice/SensorMsg', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE))
+
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice/SensorMsg'), ['PIOT/ConstrainedDevice/SensorMsg'])
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice/SensorMsg/dev1'), [])
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice'), [])
+
+	def testSingleLevelWildcard(self):
+		self.topicTrie.subscribe('PIOT/+/SensorMsg', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice/SensorMsg'), ['PIOT/+/SensorMsg'])
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice/ActuatorCmd'), [])
+		self.assertEqual(self._matchFilters('PIOT/a/b/SensorMsg'), [])
+
+	def testMultiLevelWildcard(self):
+		self.topicTrie.subscribe('PIOT/ConstrainedDevice/#', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice/SensorMsg/dev1'), ['PIOT/ConstrainedDevice/#'])
+
+		# the parent level matches too
+		self.assertEqual(self._matchFilters('PIOT/ConstrainedDevice'), ['PIOT/ConstrainedDevice/#'])
+		self.assertEqual(self._matchFilters('PIOT/GatewayDevice/SensorMsg'), [])
+
+	def testMultipleMatchesAndSysTopics(self):
+		self.topicTrie.subscribe('#', ResourceNameEnum.CDA_MGMT_STATUS_MSG_RESOURCE)
+		self.topicTrie.subscribe('+/ConstrainedDevice/SensorMsg', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+		self.topicTrie.subscribe('PIOT/ConstrainedDevice/SensorMsg', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		self.assertEqual(sorted(self._matchFilters('PIOT/ConstrainedDevice/SensorMsg')), \
+			['#', '+/ConstrainedDevice/SensorMsg', 'PIOT/ConstrainedDevice/SensorMsg'])
+
+		# wildcards at the first level don't match '$' topics
+		self.assertEqual(self._matchFilters('$SYS/ConstrainedDevice/SensorMsg'), [])
+
+	def testInvalidFilters(self):
+		self.assertFalse(self.topicTrie.subscribe('PIOT/#/SensorMsg'))
+		self.assertFalse(self.topicTrie.subscribe('PIOT/Dev+/SensorMsg'))
+		self.assertFalse(self.topicTrie.subscribe(''))
+		self.assertEqual(self.topicTrie.getSubscriptionCount(), 0)
+
+	def testUnsubscribeInvalidatesCache(self):
+		self.topicTrie.subscribe('PIOT/+/SensorMsg', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE)
+
+		self.assertEqual(len(self.topicTrie.match('PIOT/ConstrainedDevice/SensorMsg')), 1)
+		self.assertTrue(self.topicTrie.unsubscribe('PIOT/+/SensorMsg'))
+		self.assertEqual(len(self.topicTrie.match('PIOT/ConstrainedDevice/SensorMsg')), 0)
+
+		self.assertFalse(self.topicTrie.unsubscribe('PIOT/+/SensorMsg'))
+		self.assertEqual(self.topicTrie.getSubscriptionCount(), 0)
+		self.assertEqual(self.topicTrie.root.children, {})
+
+	def testConnectorRouting(self):
+		mcc = MqttClientConnector(clientID = 'TopicTrieTest')
+		listener = RecordingDataMessageListener()
+		callbackMsgs = []
+
+		mcc.setDataMessageListener(listener)
+		mcc.subscribeToTopic(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, topicFilter = 'PIOT/+/SensorMsg/#')
+		mcc.subscribeToTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE, callback = lambda client, userdata, msg: callbackMsgs.append(msg.topic))
+
+		mcc.onMessage(None, None, self._createMessage('PIOT/ConstrainedDevice/SensorMsg/dev1', '{"value": 1}'))
+		mcc.onMessage(None, None, self._createMessage(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value, 'cmd'))
+		mcc.onMessage(None, None, self._createMessage('PIOT/Unknown', 'ignored'))
+
+		self.assertEqual(listener.incomingMsgs, [(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, '{"value": 1}')])
+		self.assertEqual(callbackMsgs, [ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value])
+
+	def testConnectorRoutingByTopic(self):
+		mcc = MqttClientConnector(clientID = 'TopicTrieTest')
+		listener = RecordingDataMessageListener()
+
+		# no resource - each message is mapped to the resource its topic starts with
+		mcc.setDataMessageListener(listener)
+		self.assertTrue(mcc.subscribeToTopic(topicFilter = 'PIOT/ConstrainedDevice/#'))
+		self.assertFalse(mcc.subscribeToTopic())
+
+		mcc.onMessage(None, None, self._createMessage(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value + '/HvacActuator', 'cmd'))
+		mcc.onMessage(None, None, self._createMessage(ResourceNameEnum.CDA_MGMT_STATUS_MSG_RESOURCE.value, 'status'))
+		mcc.onMessage(None, None, self._createMessage('PIOT/ConstrainedDevice/Unknown', 'ignored'))
+
+		self.assertEqual(listener.incomingMsgs, \
+			[(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, 'cmd'), (ResourceNameEnum.CDA_MGMT_STATUS_MSG_RESOURCE, 'status')])
+
+	def _matchFilters(self, topic: str) -> list:
+		return [topicFilter for topicFilter, resource, callback in self.topicTrie.match(topic)]
+
+	def _createMessage(self, topic: str, payload: str) -> MQTTMessage:
+		msg = MQTTMessage(topic = topic.encode('utf-8'))
+		msg.payload = payload.encode('utf-8')
+
+		return msg
+
+class RecordingDataMessageListener(DefaultDataMessageListener):
+
+	def __init__(self):
+		super().__init__()
+
+		self.incomingMsgs = []
+
+	def handleIncomingMessage(self, resourceEnum: ResourceNameEnum, msg: str) -> bool:
+		self.incomingMsgs.append((resourceEnum, msg))
+
+		return True
+
+if __name__ == "__main__":
+	unittest.main()
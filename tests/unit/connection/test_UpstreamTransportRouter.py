@@ -0,0 +1,209 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import logging
+import time
+import unittest
+
+from concurrent.futures import Future
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.UpstreamTransportRouter import UpstreamTransportRouter
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class UpstreamTransportRouterTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	UpstreamTransportRouter, using fake transports. It should not
+	be considered complete, but serve as a starting point for the
+	student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	SENSOR_RESOURCE = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE
+	SYS_PERF_RESOURCE = ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing UpstreamTransportRouter class...")
+
+	def setUp(self):
+		self.router = UpstreamTransportRouter(windowSize = 10, maxErrorRate = 0.5, retryIntervalSecs = 0.2)
+
+		self.mqtt = FakeTransport()
+		self.coap = FakeTransport()
+
+		self.router.addTransport(ConfigConst.MQTT_TRANSPORT_NAME, self.mqtt.send, self.mqtt.isConnected)
+		self.router.addTransport(ConfigConst.COAP_TRANSPORT_NAME, self.coap.send)
+
+	def testRouteToFirstTransport(self):
+		for i in range(0, 5):
+			self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+
+		# only one transport per message, and the first one added wins a tie
+		self.assertEqual(len(self.mqtt.messages), 5)
+		self.assertEqual(len(self.coap.messages), 0)
+
+		stats = self.router.getStats()
+
+		self.assertEqual(stats[ConfigConst.ROUTES_PROP][self.SENSOR_RESOURCE.name], ConfigConst.MQTT_TRANSPORT_NAME)
+		self.assertEqual(stats[ConfigConst.TRANSPORTS_PROP][ConfigConst.MQTT_TRANSPORT_NAME][ConfigConst.SENT_COUNT_PROP], 5)
+
+	def testSkipDisconnectedTransport(self):
+		self.mqtt.connected = False
+
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertEqual(len(self.mqtt.messages), 0)
+		self.assertEqual(self.coap.messages, [(self.SENSOR_RESOURCE, 'msg')])
+		self.assertEqual(self.router.getStats()[ConfigConst.FAILOVER_COUNT_PROP], 0)
+
+	def testHealthyListenerOnReconnect(self):
+		healthyCalls = []
+		self.router.setHealthyListener(lambda: healthyCalls.append(True))
+
+		self.mqtt.connected = False
+
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertEqual(len(healthyCalls), 0)
+
+		self.mqtt.connected = True
+
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+
+		# once per recovery, not per message
+		self.assertEqual(len(healthyCalls), 1)
+
+	def testFailoverOnLateFailure(self):
+		self.mqtt.isDeferred = True
+
+		future = self.router.routeMessage(self.SENSOR_RESOURCE, 'msg')
+
+		# queued, not yet resolved
+		self.assertFalse(future.done())
+
+		# e.g. a disconnect failing the messages in flight
+		self.mqtt.resolvePending(False)
+
+		self.assertTrue(future.result(timeout = 1))
+		self.assertEqual(self.coap.messages, [(self.SENSOR_RESOURCE, 'msg')])
+		self.assertEqual(self.router.getStats()[ConfigConst.FAILOVER_COUNT_PROP], 1)
+
+	def testFailoverOnException(self):
+		self.mqtt.isBroken = True
+
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertEqual(len(self.coap.messages), 1)
+
+	def testAllTransportsFail(self):
+		self.mqtt.result = False
+		self.coap.result = False
+
+		self.assertFalse(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+
+		# each transport is tried once per message
+		self.assertEqual(len(self.mqtt.messages), 1)
+		self.assertEqual(len(self.coap.messages), 1)
+
+	def testUnhealthyTransportRetried(self):
+		router = UpstreamTransportRouter(windowSize = 10, maxErrorRate = 0.5, retryIntervalSecs = 0.2)
+		router.addTransport(ConfigConst.MQTT_TRANSPORT_NAME, self.mqtt.send, self.mqtt.isConnected)
+
+		self.mqtt.result = False
+
+		for i in range(0, ConfigConst.ROUTER_MIN_SAMPLES):
+			self.assertFalse(router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+
+		self.assertFalse(router.getStats()[ConfigConst.TRANSPORTS_PROP][ConfigConst.MQTT_TRANSPORT_NAME][ConfigConst.IS_HEALTHY_PROP])
+
+		# no longer tried at all
+		self.assertFalse(router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertEqual(len(self.mqtt.messages), ConfigConst.ROUTER_MIN_SAMPLES)
+
+		# probed again after the retry interval
+		self.mqtt.result = True
+		time.sleep(0.25)
+
+		self.assertTrue(router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertTrue(router.getStats()[ConfigConst.TRANSPORTS_PROP][ConfigConst.MQTT_TRANSPORT_NAME][ConfigConst.IS_HEALTHY_PROP])
+
+	def testRoutePerResourceByRtt(self):
+		self.mqtt.delaySecs = 0.03
+
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+
+		# a failover measures CoAP, which is much faster...
+		self.mqtt.connected = False
+		self.assertTrue(self.router.routeMessage(self.SYS_PERF_RESOURCE, 'msg').result())
+		self.mqtt.connected = True
+
+		# ...so the sensor resource moves over, and the other one stays
+		self.assertTrue(self.router.routeMessage(self.SENSOR_RESOURCE, 'msg').result())
+		self.assertTrue(self.router.routeMessage(self.SYS_PERF_RESOURCE, 'msg').result())
+
+		routes = self.router.getStats()[ConfigConst.ROUTES_PROP]
+
+		self.assertEqual(routes[self.SENSOR_RESOURCE.name], ConfigConst.COAP_TRANSPORT_NAME)
+		self.assertEqual(routes[self.SYS_PERF_RESOURCE.name], ConfigConst.COAP_TRANSPORT_NAME)
+		self.assertEqual(len(self.mqtt.messages), 1)
+
+	def testInvalidMessage(self):
+		self.assertFalse(self.router.routeMessage(None, 'msg').result())
+		self.assertFalse(self.router.routeMessage(self.SENSOR_RESOURCE, None).result())
+		self.assertFalse(self.router.addTransport(None, self.mqtt.send))
+
+class FakeTransport():
+	"""
+	Transport whose sends resolve with 'result', after 'delaySecs' or, if
+	'isDeferred', once resolvePending() is called.
+
+	"""
+
+	def __init__(self):
+		self.connected = True
+		self.result = True
+		self.delaySecs = 0.0
+		self.isDeferred = False
+		self.isBroken = False
+
+		self.messages = []
+		self.pending = []
+
+	def isConnected(self) -> bool:
+		return self.connected
+
+	def send(self, resource, msg) -> Future:
+		if self.isBroken:
+			raise ConnectionError("broken")
+
+		self.messages.append((resource, msg))
+
+		future = Future()
+
+		if self.isDeferred:
+			self.pending.append(future)
+		else:
+			time.sleep(self.delaySecs)
+			future.set_result(self.result)
+
+		return future
+
+	def resolvePending(self, result: bool):
+		pending, self.pending = self.pending, []
+
+		for future in pending:
+			future.set_result(result)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,137 @@
+#####
+# 
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+# 
+# You may find it more helpful to your design to adjust the
+# functionality, constants and interfaces (if there are any)
+# provided within in order to meet the needs of your specific
+# Programming the Internet of Things project.
+# 
+
+import asyncio
+import logging
+import threading
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from aiocoap import Message, PUT
+from aiocoap.numbers.codes import Code
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.handlers.UpdateActuatorResourceHandler import UpdateActuatorResourceHandler
+from programmingtheiot.cda.connection.handlers.WorkerPoolResource import WorkerPoolResource
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+
+class WorkerPoolResourceTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	WorkerPoolResource and UpdateActuatorResourceHandler. It should not
+	be considered complete, but serve as a starting point for the student
+	implementing additional functionality within their Programming the
+	IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing WorkerPoolResource class...")
+
+	def setUp(self):
+		self.executor = ThreadPoolExecutor(max_workers = 4)
+
+	def tearDown(self):
+		self.executor.shutdown()
+
+	def testConcurrencyAndQueueLimits(self):
+		resource = BlockingResource(maxConcurrency = 2, maxQueuedRequests = 1)
+		resource.setExecutor(self.executor)
+
+		async def sendRequests():
+			tasks = [asyncio.create_task(resource.render_put(Message(code = PUT))) for i in range(0, 5)]
+
+			# let the first two start, then release them
+			while resource.activeCount < 2:
+				await asyncio.sleep(0.01)
+
+			self.assertEqual(resource.getStats()[ConfigConst.INFLIGHT_COUNT_PROP], 3)
+
+			resource.releaseEvent.set()
+
+			return await asyncio.gather(*tasks)
+
+		codes = [response.code for response in asyncio.run(sendRequests())]
+
+		# two handled at once, one queued, the rest turned down
+		self.assertEqual(codes.count(Code.CHANGED), 3)
+		self.assertEqual(codes.count(Code.SERVICE_UNAVAILABLE), 2)
+		self.assertEqual(resource.maxActiveCount, 2)
+
+		stats = resource.getStats()
+
+		self.assertEqual(stats[ConfigConst.HANDLED_COUNT_PROP], 3)
+		self.assertEqual(stats[ConfigConst.REJECTED_COUNT_PROP], 2)
+		self.assertEqual(stats[ConfigConst.INFLIGHT_COUNT_PROP], 0)
+
+	def testWithoutExecutor(self):
+		resource = BlockingResource()
+		resource.releaseEvent.set()
+
+		self.assertEqual(asyncio.run(resource.render_put(Message(code = PUT))).code, Code.CHANGED)
+		self.assertEqual(resource.handlerThreads, {threading.current_thread()})
+
+		# not implemented by the sub-class
+		self.assertEqual(asyncio.run(resource.render_delete(Message(code = PUT))).code, Code.METHOD_NOT_ALLOWED)
+
+	def testActuatorCommand(self):
+		handler = UpdateActuatorResourceHandler(dataMsgListener = DefaultDataMessageListener())
+		handler.setExecutor(self.executor)
+
+		actuatorData = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE, name = ConfigConst.HVAC_ACTUATOR_NAME)
+		actuatorData.setCommand(ConfigConst.COMMAND_ON)
+		actuatorData.setValue(22.0)
+
+		request = Message(code = PUT, payload = DataUtil().actuatorDataToJson(actuatorData).encode('utf-8'))
+		response = asyncio.run(handler.render_put(request))
+
+		self.assertEqual(response.code, Code.CHANGED)
+
+		responseData = DataUtil().jsonToActuatorData(response.payload.decode('utf-8'))
+
+		self.assertTrue(responseData.isResponseFlagEnabled())
+		self.assertEqual(responseData.getCommand(), ConfigConst.COMMAND_ON)
+		self.assertEqual(responseData.getValue(), 22.0)
+
+		self.assertEqual(asyncio.run(handler.render_put(Message(code = PUT, payload = b'not json'))).code, Code.BAD_REQUEST)
+
+class BlockingResource(WorkerPoolResource):
+
+	def __init__(self, maxConcurrency: int = 1, maxQueuedRequests: int = 0):
+		super().__init__(name = 'blocking', maxConcurrency = maxConcurrency, maxQueuedRequests = maxQueuedRequests)
+
+		self.releaseEvent = threading.Event()
+		self.lock = threading.Lock()
+		self.handlerThreads = set()
+		self.activeCount = 0
+		self.maxActiveCount = 0
+
+	def handlePut(self, request: Message) -> Message:
+		with self.lock:
+			self.handlerThreads.add(threading.current_thread())
+			self.activeCount += 1
+			self.maxActiveCount = max(self.maxActiveCount, self.activeCount)
+
+		self.releaseEvent.wait(5.0)
+
+		with self.lock:
+			self.activeCount -= 1
+
+		return Message(code = Code.CHANGED)
+
+if __name__ == "__main__":
+	unittest.main()